@@ -0,0 +1,146 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Diagnostics;
+using System.IO;
+
+using Sce.Atf.Dom;
+
+namespace DomConverter
+{
+    static class Program
+    {
+        // usage: DomConverter {schemaPath} {inputPath} {outputPath}
+        //        DomConverter -benchmark {schemaPath} {inputPath...}
+        [STAThread]
+        static int Main(string[] args)
+        {
+            if (args.Length >= 3 && args[0] == "-benchmark")
+                return Benchmark(args[1], args, 2);
+
+            if (args.Length != 3)
+            {
+                Console.WriteLine(
+                    "usage:\n" +
+                    "DomConverter {schemaPath} {inputPath} {outputPath}\n" +
+                    "   Converts an XML document to the binary document format, or a binary document\n" +
+                    "   back to XML\n" +
+                    "eg:      DomConverter Circuit.xsd Example.circuit Example.circuitb\n" +
+                    "DomConverter -benchmark {schemaPath} {inputPath...}\n" +
+                    "   Compares the sizes and load times of XML documents and their binary forms, the\n" +
+                    "   load times of XML documents with parallel attribute parsing and with the\n" +
+                    "   children of deep nodes loaded on demand, and the XML write times\n");
+                return 1;
+            }
+
+            XmlSchemaTypeLoader typeLoader = LoadSchema(args[0]);
+            string inputPath = args[1];
+            string outputPath = args[2];
+
+            DomBinaryReader reader = new DomBinaryReader(typeLoader);
+            DomNode root;
+            using (FileStream stream = File.OpenRead(inputPath))
+                root = reader.Read(stream, new Uri(Path.GetFullPath(inputPath)));
+
+            Uri outputUri = new Uri(Path.GetFullPath(outputPath));
+            using (FileStream stream = File.Create(outputPath))
+            {
+                if (reader.WasBinary)
+                {
+                    XmlSchemaTypeCollection typeCollection = typeLoader.GetTypeCollection(GetNamespace(root));
+                    new DomXmlWriter(typeCollection).Write(root, stream, outputUri);
+                }
+                else
+                {
+                    new DomBinaryWriter(typeLoader).Write(root, stream, outputUri);
+                }
+            }
+
+            Console.WriteLine("Converted {0} to {1} {2}", inputPath, reader.WasBinary ? "XML" : "binary", outputPath);
+            return 0;
+        }
+
+        private static int Benchmark(string schemaPath, string[] args, int firstInput)
+        {
+            XmlSchemaTypeLoader typeLoader = LoadSchema(schemaPath);
+            Console.WriteLine("{0,-32} {1,12} {2,12} {3,10} {4,14} {5,12} {6,10} {7,14}",
+                "Document", "XML bytes", "Binary bytes", "XML ms", "Parallel XML ms", "Lazy XML ms", "Binary ms",
+                "XML write ms");
+
+            for (int i = firstInput; i < args.Length; i++)
+            {
+                string inputPath = args[i];
+                byte[] xml = File.ReadAllBytes(inputPath);
+                Uri uri = new Uri(Path.GetFullPath(inputPath));
+
+                DomNode root = new DomXmlReader(typeLoader).Read(new MemoryStream(xml), uri);
+                MemoryStream binaryStream = new MemoryStream();
+                new DomBinaryWriter(typeLoader).Write(root, binaryStream, uri);
+                byte[] binary = binaryStream.ToArray();
+
+                DomXmlReader parallelReader = new DomXmlReader(typeLoader);
+                parallelReader.ParallelAttributeParsing = true;
+                DomXmlReader lazyReader = new DomXmlReader(typeLoader);
+                lazyReader.LazyLoadDepth = LazyLoadDepth;
+
+                double xmlTime = TimeLoads(new DomXmlReader(typeLoader).Read, xml, uri);
+                double parallelXmlTime = TimeLoads(parallelReader.Read, xml, uri);
+                double lazyXmlTime = TimeLoads(lazyReader.Read, xml, uri);
+                double binaryTime = TimeLoads(new DomBinaryReader(typeLoader).Read, binary, uri);
+
+                DomXmlWriter writer = new DomXmlWriter(typeLoader.GetTypeCollection(GetNamespace(root)));
+                double xmlWriteTime = Time(() => writer.Write(root, new MemoryStream(xml.Length), uri));
+
+                Console.WriteLine("{0,-32} {1,12} {2,12} {3,10:F3} {4,14:F3} {5,12:F3} {6,10:F3} {7,14:F3}",
+                    Path.GetFileName(inputPath), xml.Length, binary.Length, xmlTime, parallelXmlTime, lazyXmlTime, binaryTime,
+                    xmlWriteTime);
+            }
+
+            return 0;
+        }
+
+        // returns the average load time in milliseconds, after warming up
+        private static double TimeLoads(Func<Stream, Uri, DomNode> read, byte[] data, Uri uri)
+        {
+            return Time(() => read(new MemoryStream(data), uri));
+        }
+
+        // returns the average time of the action in milliseconds, after warming up
+        private static double Time(Action action)
+        {
+            for (int i = 0; i < WarmUpRuns; i++)
+                action();
+
+            Stopwatch stopwatch = Stopwatch.StartNew();
+            int runs = 0;
+            while (runs < MinTimedRuns || stopwatch.ElapsedMilliseconds < MinTimedMilliseconds)
+            {
+                action();
+                runs++;
+            }
+            return stopwatch.Elapsed.TotalMilliseconds / runs;
+        }
+
+        private static XmlSchemaTypeLoader LoadSchema(string schemaPath)
+        {
+            XmlSchemaTypeLoader typeLoader = new XmlSchemaTypeLoader();
+            typeLoader.Load(schemaPath);
+            return typeLoader;
+        }
+
+        private static string GetNamespace(DomNode root)
+        {
+            // type names are qualified by their namespace, which may itself contain colons
+            string typeName = root.Type.Name;
+            return typeName.Substring(0, typeName.LastIndexOf(':'));
+        }
+
+        private const int WarmUpRuns = 3;
+        private const int MinTimedRuns = 10;
+        private const long MinTimedMilliseconds = 1000;
+
+        // the depth at which the lazy reader defers children, which leaves the top levels that
+        //  tree views show loaded
+        private const int LazyLoadDepth = 2;
+    }
+}
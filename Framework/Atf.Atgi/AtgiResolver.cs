@@ -21,6 +21,12 @@ namespace Sce.Atf.Atgi
     [PartCreationPolicy(CreationPolicy.Shared)]
     public class AtgiResolver : IInitializable, IResourceResolver
     {
+        /// <summary>
+        /// Gets or sets the cache of parsed files. If null, files are parsed every time that
+        /// they're resolved.</summary>
+        [Import(AllowDefault = true)]
+        public DomResourceCache Cache { get; set; }
+
         #region IInitializable Members
 
         /// <summary>
@@ -59,12 +65,21 @@ public IResource Resolve(Uri uri)
                 if (!fileName.EndsWith(".atgi"))
                     return null; // unable to resolve this asset
 
-                using (Stream stream = File.OpenRead(fileName))
+                DomResourceCache cache = Cache;
+                if (cache != null)
+                {
+                    domNode = cache.Load(fileName, m_loader.GetNodeType,
+                        stream => new AtgiXmlPersister(m_loader).Read(stream, uri));
+                }
+                else
                 {
-                    if (stream != null)
+                    using (Stream stream = File.OpenRead(fileName))
                     {
-                        var persister = new AtgiXmlPersister(m_loader);
-                        domNode = persister.Read(stream, uri);
+                        if (stream != null)
+                        {
+                            var persister = new AtgiXmlPersister(m_loader);
+                            domNode = persister.Read(stream, uri);
+                        }
                     }
                 }
             }
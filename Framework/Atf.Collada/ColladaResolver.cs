@@ -18,6 +18,12 @@ namespace Sce.Atf.Collada
     [PartCreationPolicy(CreationPolicy.Shared)]
     public class ColladaResolver : IInitializable, IResourceResolver
     {
+        /// <summary>
+        /// Gets or sets the cache of parsed files. If null, files are parsed every time that
+        /// they're resolved.</summary>
+        [Import(AllowDefault = true)]
+        public DomResourceCache Cache { get; set; }
+
      
         #region IInitializable Members
 
@@ -52,10 +58,19 @@ public IResource Resolve(Uri uri)
             DomNode domNode = null;
             try
             {
-                using (Stream stream = File.OpenRead(fileName))
+                DomResourceCache cache = Cache;
+                if (cache != null)
+                {
+                    domNode = cache.Load(fileName, m_loader.GetNodeType,
+                        stream => new ColladaXmlPersister(m_loader).Read(stream, uri));
+                }
+                else
                 {
-                    var persister = new ColladaXmlPersister(m_loader);
-                    domNode = persister.Read(stream, uri);
+                    using (Stream stream = File.OpenRead(fileName))
+                    {
+                        var persister = new ColladaXmlPersister(m_loader);
+                        domNode = persister.Read(stream, uri);
+                    }
                 }
             }
             catch (IOException e)
@@ -545,47 +545,47 @@ public virtual string Convert(object value)
                     break;
 
                 case AttributeTypes.Int8Array:
-                    result = Convert<SByte>(value);
+                    result = DomTextFormat.Format((SByte[])value);
                     break;
 
                 case AttributeTypes.UInt8Array:
-                    result = Convert<Byte>(value);
+                    result = DomTextFormat.Format((Byte[])value);
                     break;
 
                 case AttributeTypes.Int16Array:
-                    result = Convert<Int16>(value);
+                    result = DomTextFormat.Format((Int16[])value);
                     break;
 
                 case AttributeTypes.UInt16Array:
-                    result = Convert<UInt16>(value);
+                    result = DomTextFormat.Format((UInt16[])value);
                     break;
 
                 case AttributeTypes.Int32Array:
-                    result = Convert<Int32>(value);
+                    result = DomTextFormat.Format((Int32[])value);
                     break;
 
                 case AttributeTypes.UInt32Array:
-                    result = Convert<UInt32>(value);
+                    result = DomTextFormat.Format((UInt32[])value);
                     break;
 
                 case AttributeTypes.Int64Array:
-                    result = Convert<Int64>(value);
+                    result = DomTextFormat.Format((Int64[])value);
                     break;
 
                 case AttributeTypes.UInt64Array:
-                    result = Convert<UInt64>(value);
+                    result = DomTextFormat.Format((UInt64[])value);
                     break;
 
                 case AttributeTypes.SingleArray:
-                    result = Convert<Single>(value);
+                    result = DomTextFormat.Format((Single[])value);
                     break;
 
                 case AttributeTypes.DoubleArray:
-                    result = Convert<Double>(value);
+                    result = DomTextFormat.Format((Double[])value);
                     break;
 
                 case AttributeTypes.DecimalArray:
-                    result = Convert<Decimal>(value);
+                    result = DomTextFormat.Format((Decimal[])value);
                     break;
 
                 case AttributeTypes.StringArray:
@@ -615,8 +615,6 @@ public virtual string Convert(object value)
         public virtual object Convert(string s)
         {
             object result = null;
-            string[] strings;
-            int stringsToParse;
 
             switch (m_type)
             {
@@ -714,86 +712,74 @@ public virtual object Convert(string s)
                     break;
 
                 case AttributeTypes.BooleanArray:
-                    Boolean[] booleans = CreateArrayValue<Boolean>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        Boolean.TryParse(strings[i], out booleans[i]);
+                    Boolean[] booleans = CreateArrayValue<Boolean>(s);
+                    DomTextFormat.ReadValues(s, booleans);
                     result = booleans;
                     break;
 
                 case AttributeTypes.Int8Array:
-                    SByte[] int8s = CreateArrayValue<SByte>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        SByte.TryParse(strings[i], NumberStyles.Integer, CultureInfo.InvariantCulture, out int8s[i]);
+                    SByte[] int8s = CreateArrayValue<SByte>(s);
+                    DomTextFormat.ReadValues(s, int8s);
                     result = int8s;
                     break;
 
                 case AttributeTypes.UInt8Array:
-                    Byte[] uint8s = CreateArrayValue<Byte>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        Byte.TryParse(strings[i], NumberStyles.Integer, CultureInfo.InvariantCulture, out uint8s[i]);
+                    Byte[] uint8s = CreateArrayValue<Byte>(s);
+                    DomTextFormat.ReadValues(s, uint8s);
                     result = uint8s;
                     break;
 
                 case AttributeTypes.Int16Array:
-                    Int16[] int16s = CreateArrayValue<Int16>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        Int16.TryParse(strings[i], NumberStyles.Integer, CultureInfo.InvariantCulture, out int16s[i]);
+                    Int16[] int16s = CreateArrayValue<Int16>(s);
+                    DomTextFormat.ReadValues(s, int16s);
                     result = int16s;
                     break;
 
                 case AttributeTypes.UInt16Array:
-                    UInt16[] uint16s = CreateArrayValue<UInt16>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        UInt16.TryParse(strings[i], NumberStyles.Integer, CultureInfo.InvariantCulture, out uint16s[i]);
+                    UInt16[] uint16s = CreateArrayValue<UInt16>(s);
+                    DomTextFormat.ReadValues(s, uint16s);
                     result = uint16s;
                     break;
 
                 case AttributeTypes.Int32Array:
-                    Int32[] int32s = CreateArrayValue<Int32>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        Int32.TryParse(strings[i], NumberStyles.Integer, CultureInfo.InvariantCulture, out int32s[i]);
+                    Int32[] int32s = CreateArrayValue<Int32>(s);
+                    DomTextFormat.ReadValues(s, int32s);
                     result = int32s;
                     break;
 
                 case AttributeTypes.UInt32Array:
-                    UInt32[] uint32s = CreateArrayValue<UInt32>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        UInt32.TryParse(strings[i], NumberStyles.Integer, CultureInfo.InvariantCulture, out uint32s[i]);
+                    UInt32[] uint32s = CreateArrayValue<UInt32>(s);
+                    DomTextFormat.ReadValues(s, uint32s);
                     result = uint32s;
                     break;
 
                 case AttributeTypes.Int64Array:
-                    Int64[] int64s = CreateArrayValue<Int64>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        Int64.TryParse(strings[i], NumberStyles.Integer, CultureInfo.InvariantCulture, out int64s[i]);
+                    Int64[] int64s = CreateArrayValue<Int64>(s);
+                    DomTextFormat.ReadValues(s, int64s);
                     result = int64s;
                     break;
 
                 case AttributeTypes.UInt64Array:
-                    UInt64[] uint64s = CreateArrayValue<UInt64>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        UInt64.TryParse(strings[i], NumberStyles.Integer, CultureInfo.InvariantCulture, out uint64s[i]);
+                    UInt64[] uint64s = CreateArrayValue<UInt64>(s);
+                    DomTextFormat.ReadValues(s, uint64s);
                     result = uint64s;
                     break;
 
                 case AttributeTypes.SingleArray:
-                    Single[] singles = CreateArrayValue<Single>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        Single.TryParse(strings[i], NumberStyles.Float, CultureInfo.InvariantCulture, out singles[i]);
+                    Single[] singles = CreateArrayValue<Single>(s);
+                    DomTextFormat.ReadValues(s, singles);
                     result = singles;
                     break;
 
                 case AttributeTypes.DoubleArray:
-                    Double[] doubles = CreateArrayValue<Double>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        Double.TryParse(strings[i], NumberStyles.Float, CultureInfo.InvariantCulture, out doubles[i]);
+                    Double[] doubles = CreateArrayValue<Double>(s);
+                    DomTextFormat.ReadValues(s, doubles);
                     result = doubles;
                     break;
 
                 case AttributeTypes.DecimalArray:
-                    Decimal[] decimals = CreateArrayValue<Decimal>(s, out strings, out stringsToParse);
-                    for (int i = 0; i < stringsToParse; i++)
-                        Decimal.TryParse(strings[i], NumberStyles.Number, CultureInfo.InvariantCulture, out decimals[i]);
+                    Decimal[] decimals = CreateArrayValue<Decimal>(s);
+                    DomTextFormat.ReadValues(s, decimals);
                     result = decimals;
                     break;
 
@@ -852,36 +838,13 @@ private object GetDefaultArrayValue<T>()
             return new T[length];
         }
 
-        private T[] CreateArrayValue<T>(string s, out string[] strings, out int stringsToParse)
+        private T[] CreateArrayValue<T>(string s)
         {
-            string[] array = s.Split(s_arraySeparator, StringSplitOptions.RemoveEmptyEntries);
-            // restrict length if type defines cardinality
-            int length = (m_length < Int32.MaxValue) ? m_length : array.Length;
-            strings = array;
-            // don't parse excess strings
-            stringsToParse = Math.Min(length, array.Length);
+            // restrict length if type defines cardinality; excess values aren't parsed
+            int length = (m_length < Int32.MaxValue) ? m_length : DomTextFormat.CountValues(s);
             return new T[length];
         }
 
-        private string Convert<T>(object array)
-            where T : IFormattable
-        {
-            IEnumerable<T> values = array as IEnumerable<T>;
-            StringBuilder sb = new StringBuilder();
-            foreach (T value in values)
-            {
-                if (typeof(T) == typeof(Single) || typeof(T) == typeof(Double))
-                    sb.Append(value.ToString("R", CultureInfo.InvariantCulture));
-                else
-                    sb.Append(value.ToString(null, CultureInfo.InvariantCulture));
-                sb.Append(" ");
-            }
-            if (sb.Length > 0)
-                sb.Length -= 1; // remove trailing space
-
-            return sb.ToString();
-        }
-
         private static bool AreEqualArraysOf<T>(object val1, object val2)
         {
             T[] array1 = val1 as T[];
@@ -1014,7 +977,5 @@ private static bool GetUnescapedChar(string s, ref int index, char terminator, o
         private static readonly object s_defaultDecimal = 0M;
 
         private static readonly DateTime s_defaultDateTime = new DateTime(0);
-
-        private static readonly char[] s_arraySeparator = new[] { ' ', '\n', '\t' };
     }
 }
@@ -9,6 +9,10 @@ namespace Sce.Atf.Dom
     /// Checks are only made within validations, which are signaled by IValidationContexts within
     /// the DOM data. InvalidTransactionExceptions are thrown, if necessary, in the Ended event
     /// of the IValidationContext.</summary>
+    /// <remarks>If the IValidationContext is a TransactionContext on the same DomNode that
+    /// batches notifications, the changes are taken from its change set instead. Because changes
+    /// to inserted DomNodes aren't in the change set, all the attributes and children of inserted
+    /// subtrees are checked.</remarks>
     public class DataValidator : Validator
     {
         /// <summary>
@@ -17,7 +21,7 @@ public class DataValidator : Validator
         /// <param name="e">Attribute change event args</param>
         protected override void OnAttributeChanged(object sender, AttributeEventArgs e)
         {
-            if (Validating)
+            if (Validating && m_changeSetContext == null)
                 m_attributeChanges[e.AttributeInfo] = e.NewValue;
         }
 
@@ -27,7 +31,7 @@ protected override void OnAttributeChanged(object sender, AttributeEventArgs e)
         /// <param name="e">Child event args</param>
         protected override void OnChildInserted(object sender, ChildEventArgs e)
         {
-            if (Validating)
+            if (Validating && m_changeSetContext == null)
                 m_childChanges.Add(new Pair<Pair<DomNode, DomNode>, ChildInfo>(new Pair<DomNode, DomNode>(e.Parent, e.Child), e.ChildInfo));
         }
 
@@ -37,16 +41,40 @@ protected override void OnChildInserted(object sender, ChildEventArgs e)
         /// <param name="e">Child event args</param>
         protected override void OnChildRemoved(object sender, ChildEventArgs e)
         {
-            if (Validating)
+            if (Validating && m_changeSetContext == null)
                 m_childChanges.Add(new Pair<Pair<DomNode, DomNode>, ChildInfo>(new Pair<DomNode, DomNode>(e.Parent, e.Child), e.ChildInfo));
         }
 
+        /// <summary>
+        /// Performs custom actions on validation Beginning events. If the validation context is
+        /// a TransactionContext that batches notifications for this DOM node, the changes are
+        /// taken from its change set when validation ends, instead of being recorded one by one.</summary>
+        /// <param name="sender">Validation context</param>
+        /// <param name="e">Event args</param>
+        protected override void OnBeginning(object sender, System.EventArgs e)
+        {
+            m_changeSetContext = sender as TransactionContext;
+            if (m_changeSetContext != null &&
+                (!m_changeSetContext.BatchNotifications || m_changeSetContext.DomNode != DomNode))
+            {
+                m_changeSetContext = null;
+            }
+        }
+
         /// <summary>
         /// Performs custom actions after validation finished</summary>
         /// <param name="sender">Sender (root DOM node)</param>
         /// <param name="e">Attribute event args</param>
         protected override void OnEnded(object sender, System.EventArgs e)
         {
+            if (m_changeSetContext != null)
+            {
+                DomChangeSet changeSet = m_changeSetContext.ChangeSet;
+                m_changeSetContext = null;
+                if (changeSet != null)
+                    AddChanges(changeSet);
+            }
+
             foreach (KeyValuePair<AttributeInfo, object> keyValuePair in m_attributeChanges)
             {
                 AttributeInfo info = keyValuePair.Key;
@@ -73,10 +101,50 @@ protected override void OnEnded(object sender, System.EventArgs e)
         /// <param name="e">Attribute event args</param>
         protected override void OnCancelled(object sender, System.EventArgs e)
         {
+            m_changeSetContext = null;
             m_childChanges.Clear();
             m_attributeChanges.Clear();
         }
 
+        private void AddChanges(DomChangeSet changeSet)
+        {
+            foreach (AttributeEventArgs e in changeSet.AttributeChanges)
+                m_attributeChanges[e.AttributeInfo] = e.NewValue;
+
+            foreach (ChildEventArgs e in changeSet.RemovedChildren)
+                m_childChanges.Add(new Pair<Pair<DomNode, DomNode>, ChildInfo>(new Pair<DomNode, DomNode>(e.Parent, e.Child), e.ChildInfo));
+
+            foreach (ChildEventArgs e in changeSet.InsertedChildren)
+            {
+                m_childChanges.Add(new Pair<Pair<DomNode, DomNode>, ChildInfo>(new Pair<DomNode, DomNode>(e.Parent, e.Child), e.ChildInfo));
+                ValidateSubtree(e.Child);
+            }
+        }
+
+        private static void ValidateSubtree(DomNode root)
+        {
+            // the changes made to an inserted subtree aren't in the change set, so check all of it
+            foreach (DomNode node in root.LoadedSubtree)
+            {
+                foreach (AttributeInfo info in node.Type.Attributes)
+                {
+                    if (!node.IsAttributeDefault(info) && !info.Validate(node.GetAttribute(info)))
+                        throw new InvalidTransactionException("invalid attribute value");
+                }
+
+                if (!node.HasUnloadedChildren)
+                {
+                    foreach (DomNode child in node.Children)
+                    {
+                        if (!child.ChildInfo.Validate(node, child))
+                            throw new InvalidTransactionException("invalid child removal or insertion");
+                    }
+                }
+            }
+        }
+
+        private TransactionContext m_changeSetContext;
+
         //pairs of parent and child; todo: use the Tuple in .Net 4.0
         private HashSet<Pair<Pair<DomNode, DomNode>,ChildInfo>> m_childChanges =
             new HashSet<Pair<Pair<DomNode, DomNode>,ChildInfo>>();
@@ -0,0 +1,383 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+
+namespace Sce.Atf.Dom
+{
+    /// <summary>
+    /// Constants and utilities for the compact binary document format that DomBinaryWriter writes
+    /// and DomBinaryReader reads</summary>
+    /// <remarks>
+    /// All numbers are little-endian. A document consists of:
+    /// 1. A header: the bytes "ATFB", the format version (int) and the schema hash (ulong).
+    /// 2. A string table with the names of the node types, attributes and children in the document.
+    /// 3. A type table, with, for each node type in the document, its name, the names and
+    ///    AttributeTypes of its attributes and the names of its children.
+    /// 4. The name of the root element, the number of nodes and the root node.
+    /// Each node holds its type's index in the type table, its local attributes and, for each of
+    /// its type's children, its child nodes. Attribute values are written in their binary form
+    /// unless they don't have the attribute type's CLR type, in which case they are converted to
+    /// strings, as they would be in XML. Child nodes are written in chunks, each of which holds
+    /// its number of nodes and byte length so that readers can skip children that their schema
+    /// doesn't define.
+    /// References to nodes in the document are written as node indices, in the order in which
+    /// the nodes are written; other references are written as strings.</remarks>
+    public static class DomBinaryFormat
+    {
+        /// <summary>
+        /// The version of the format written by DomBinaryWriter</summary>
+        public const int Version = 1;
+
+        /// <summary>
+        /// Determines whether a stream holds a binary document, without changing its position</summary>
+        /// <param name="stream">Stream, which must be seekable</param>
+        /// <returns>True iff the stream starts with the binary document header</returns>
+        public static bool IsBinaryDocument(Stream stream)
+        {
+            if (stream == null)
+                throw new ArgumentNullException("stream");
+
+            long position = stream.Position;
+            try
+            {
+                for (int i = 0; i < Magic.Length; i++)
+                {
+                    if (stream.ReadByte() != Magic[i])
+                        return false;
+                }
+                return true;
+            }
+            finally
+            {
+                stream.Position = position;
+            }
+        }
+
+        /// <summary>
+        /// Computes a hash of the node types defined by a type loader. Binary documents hold the hash
+        /// of the schema that they were written with, so that readers can tell whether their schema
+        /// has changed.</summary>
+        /// <param name="typeLoader">Type loader</param>
+        /// <returns>Hash of the node types, their attributes and their children</returns>
+        public static ulong ComputeSchemaHash(XmlSchemaTypeLoader typeLoader)
+        {
+            if (typeLoader == null)
+                throw new ArgumentNullException("typeLoader");
+
+            return ComputeSchemaHash(typeLoader.GetNodeTypes());
+        }
+
+        /// <summary>
+        /// Computes a hash of the given node types, in any order</summary>
+        /// <param name="nodeTypes">Node types</param>
+        /// <returns>Hash of the node types, their attributes and their children</returns>
+        internal static ulong ComputeSchemaHash(IEnumerable<DomNodeType> nodeTypes)
+        {
+            List<DomNodeType> types = new List<DomNodeType>(nodeTypes);
+            types.Sort((x, y) => string.CompareOrdinal(x.Name, y.Name));
+
+            // 64 bit FNV-1a, which, unlike string.GetHashCode(), is the same on every platform
+            ulong hash = FnvOffsetBasis;
+            foreach (DomNodeType type in types)
+            {
+                hash = Hash(hash, type.Name);
+                hash = Hash(hash, type.BaseType != null ? type.BaseType.Name : string.Empty);
+                foreach (AttributeInfo info in type.Attributes)
+                {
+                    hash = Hash(hash, info.Name);
+                    hash = Hash(hash, (int)info.Type.Type);
+                }
+                foreach (ChildInfo info in type.Children)
+                {
+                    hash = Hash(hash, info.Name);
+                    hash = Hash(hash, info.Type.Name);
+                    hash = Hash(hash, info.IsList ? 1 : 0);
+                }
+            }
+            return hash;
+        }
+
+        internal static void WriteCount(BinaryWriter writer, int value)
+        {
+            // 7 bits at a time, with the high bit set on all but the last byte
+            uint v = (uint)value;
+            while (v >= 0x80)
+            {
+                writer.Write((byte)(v | 0x80));
+                v >>= 7;
+            }
+            writer.Write((byte)v);
+        }
+
+        internal static int ReadCount(BinaryReader reader)
+        {
+            int result = 0;
+            for (int shift = 0; shift < 35; shift += 7)
+            {
+                byte b = reader.ReadByte();
+                result |= (b & 0x7F) << shift;
+                if ((b & 0x80) == 0)
+                    return result;
+            }
+            throw new InvalidDataException("Invalid count in binary document");
+        }
+
+        /// <summary>
+        /// Determines whether a value can be written in the binary form of an attribute type</summary>
+        internal static bool CanWriteValue(AttributeType type, object value)
+        {
+            return type.Type != AttributeTypes.Reference && value.GetType() == type.ClrType;
+        }
+
+        internal static void WriteValue(BinaryWriter writer, AttributeTypes type, object value)
+        {
+            switch (type)
+            {
+                case AttributeTypes.Boolean:
+                    writer.Write((bool)value);
+                    break;
+                case AttributeTypes.Int8:
+                    writer.Write((sbyte)value);
+                    break;
+                case AttributeTypes.UInt8:
+                    writer.Write((byte)value);
+                    break;
+                case AttributeTypes.Int16:
+                    writer.Write((short)value);
+                    break;
+                case AttributeTypes.UInt16:
+                    writer.Write((ushort)value);
+                    break;
+                case AttributeTypes.Int32:
+                    writer.Write((int)value);
+                    break;
+                case AttributeTypes.UInt32:
+                    writer.Write((uint)value);
+                    break;
+                case AttributeTypes.Int64:
+                    writer.Write((long)value);
+                    break;
+                case AttributeTypes.UInt64:
+                    writer.Write((ulong)value);
+                    break;
+                case AttributeTypes.Single:
+                    writer.Write((float)value);
+                    break;
+                case AttributeTypes.Double:
+                    writer.Write((double)value);
+                    break;
+                case AttributeTypes.Decimal:
+                    writer.Write((decimal)value);
+                    break;
+                case AttributeTypes.String:
+                    writer.Write((string)value);
+                    break;
+                case AttributeTypes.DateTime:
+                    writer.Write(((DateTime)value).ToBinary());
+                    break;
+                case AttributeTypes.Uri:
+                    writer.Write(((Uri)value).OriginalString);
+                    break;
+
+                case AttributeTypes.BooleanArray:
+                case AttributeTypes.Int8Array:
+                case AttributeTypes.UInt8Array:
+                    WritePrimitiveArray(writer, (Array)value, 1);
+                    break;
+                case AttributeTypes.Int16Array:
+                case AttributeTypes.UInt16Array:
+                    WritePrimitiveArray(writer, (Array)value, 2);
+                    break;
+                case AttributeTypes.Int32Array:
+                case AttributeTypes.UInt32Array:
+                case AttributeTypes.SingleArray:
+                    WritePrimitiveArray(writer, (Array)value, 4);
+                    break;
+                case AttributeTypes.Int64Array:
+                case AttributeTypes.UInt64Array:
+                case AttributeTypes.DoubleArray:
+                    WritePrimitiveArray(writer, (Array)value, 8);
+                    break;
+                case AttributeTypes.DecimalArray:
+                    decimal[] decimals = (decimal[])value;
+                    WriteCount(writer, decimals.Length);
+                    foreach (decimal d in decimals)
+                        writer.Write(d);
+                    break;
+                case AttributeTypes.StringArray:
+                    string[] strings = (string[])value;
+                    WriteCount(writer, strings.Length);
+                    foreach (string s in strings)
+                    {
+                        writer.Write(s != null);
+                        if (s != null)
+                            writer.Write(s);
+                    }
+                    break;
+
+                default:
+                    throw new InvalidOperationException("Can't write attribute type " + type);
+            }
+        }
+
+        internal static object ReadValue(BinaryReader reader, AttributeTypes type)
+        {
+            switch (type)
+            {
+                case AttributeTypes.Boolean:
+                    return reader.ReadBoolean();
+                case AttributeTypes.Int8:
+                    return reader.ReadSByte();
+                case AttributeTypes.UInt8:
+                    return reader.ReadByte();
+                case AttributeTypes.Int16:
+                    return reader.ReadInt16();
+                case AttributeTypes.UInt16:
+                    return reader.ReadUInt16();
+                case AttributeTypes.Int32:
+                    return reader.ReadInt32();
+                case AttributeTypes.UInt32:
+                    return reader.ReadUInt32();
+                case AttributeTypes.Int64:
+                    return reader.ReadInt64();
+                case AttributeTypes.UInt64:
+                    return reader.ReadUInt64();
+                case AttributeTypes.Single:
+                    return reader.ReadSingle();
+                case AttributeTypes.Double:
+                    return reader.ReadDouble();
+                case AttributeTypes.Decimal:
+                    return reader.ReadDecimal();
+                case AttributeTypes.String:
+                    return reader.ReadString();
+                case AttributeTypes.DateTime:
+                    return DateTime.FromBinary(reader.ReadInt64());
+                case AttributeTypes.Uri:
+                    return new Uri(reader.ReadString(), UriKind.RelativeOrAbsolute);
+
+                case AttributeTypes.BooleanArray:
+                    return ReadPrimitiveArray<bool>(reader, 1);
+                case AttributeTypes.Int8Array:
+                    return ReadPrimitiveArray<sbyte>(reader, 1);
+                case AttributeTypes.UInt8Array:
+                    return ReadPrimitiveArray<byte>(reader, 1);
+                case AttributeTypes.Int16Array:
+                    return ReadPrimitiveArray<short>(reader, 2);
+                case AttributeTypes.UInt16Array:
+                    return ReadPrimitiveArray<ushort>(reader, 2);
+                case AttributeTypes.Int32Array:
+                    return ReadPrimitiveArray<int>(reader, 4);
+                case AttributeTypes.UInt32Array:
+                    return ReadPrimitiveArray<uint>(reader, 4);
+                case AttributeTypes.SingleArray:
+                    return ReadPrimitiveArray<float>(reader, 4);
+                case AttributeTypes.Int64Array:
+                    return ReadPrimitiveArray<long>(reader, 8);
+                case AttributeTypes.UInt64Array:
+                    return ReadPrimitiveArray<ulong>(reader, 8);
+                case AttributeTypes.DoubleArray:
+                    return ReadPrimitiveArray<double>(reader, 8);
+                case AttributeTypes.DecimalArray:
+                    decimal[] decimals = new decimal[ReadCount(reader)];
+                    for (int i = 0; i < decimals.Length; i++)
+                        decimals[i] = reader.ReadDecimal();
+                    return decimals;
+                case AttributeTypes.StringArray:
+                    string[] strings = new string[ReadCount(reader)];
+                    for (int i = 0; i < strings.Length; i++)
+                        strings[i] = reader.ReadBoolean() ? reader.ReadString() : null;
+                    return strings;
+
+                default:
+                    throw new InvalidDataException("Can't read attribute type " + type);
+            }
+        }
+
+        // arrays are copied in blocks through a reused buffer, rather than element by element or
+        //  through a temporary array of their full size
+        private static void WritePrimitiveArray(BinaryWriter writer, Array array, int elementSize)
+        {
+            WriteCount(writer, array.Length);
+            byte[] buffer = GetBuffer();
+            int byteCount = array.Length * elementSize;
+            for (int offset = 0; offset < byteCount; offset += buffer.Length)
+            {
+                int blockSize = Math.Min(buffer.Length, byteCount - offset);
+                Buffer.BlockCopy(array, offset, buffer, 0, blockSize);
+                if (!BitConverter.IsLittleEndian)
+                    ReverseElements(buffer, blockSize, elementSize);
+                writer.Write(buffer, 0, blockSize);
+            }
+        }
+
+        private static T[] ReadPrimitiveArray<T>(BinaryReader reader, int elementSize)
+        {
+            T[] result = new T[ReadCount(reader)];
+            byte[] buffer = GetBuffer();
+            int byteCount = result.Length * elementSize;
+            for (int offset = 0; offset < byteCount; offset += buffer.Length)
+            {
+                int blockSize = Math.Min(buffer.Length, byteCount - offset);
+                for (int read = 0; read < blockSize; )
+                {
+                    int n = reader.Read(buffer, read, blockSize - read);
+                    if (n == 0)
+                        throw new EndOfStreamException();
+                    read += n;
+                }
+                if (!BitConverter.IsLittleEndian)
+                    ReverseElements(buffer, blockSize, elementSize);
+                Buffer.BlockCopy(buffer, 0, result, offset, blockSize);
+            }
+            return result;
+        }
+
+        private static void ReverseElements(byte[] bytes, int count, int elementSize)
+        {
+            if (elementSize > 1)
+            {
+                for (int i = 0; i < count; i += elementSize)
+                    Array.Reverse(bytes, i, elementSize);
+            }
+        }
+
+        private static byte[] GetBuffer()
+        {
+            return s_buffer ?? (s_buffer = new byte[BufferSize]);
+        }
+
+        private static ulong Hash(ulong hash, string text)
+        {
+            foreach (char c in text)
+                hash = Hash(hash, c);
+            return Hash(hash, 0);
+        }
+
+        private static ulong Hash(ulong hash, int value)
+        {
+            for (int i = 0; i < 4; i++)
+            {
+                hash ^= (byte)(value >> (i * 8));
+                hash *= FnvPrime;
+            }
+            return hash;
+        }
+
+        /// <summary>
+        /// Maximum number of child nodes in a chunk</summary>
+        internal const int ChunkSize = 256;
+
+        internal static readonly byte[] Magic = { (byte)'A', (byte)'T', (byte)'F', (byte)'B' };
+
+        // a multiple of every element size
+        private const int BufferSize = 8192;
+
+        [ThreadStatic]
+        private static byte[] s_buffer;
+
+        private const ulong FnvOffsetBasis = 14695981039346656037;
+        private const ulong FnvPrime = 1099511628211;
+    }
+}
@@ -0,0 +1,449 @@
+//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+
+namespace Sce.Atf.Dom
+{
+    /// <summary>
+    /// Class to read DOM data written by DomBinaryWriter. Streams that don't hold binary documents
+    /// are read as XML by a DomXmlReader, so this reader can be used for both formats.</summary>
+    /// <remarks>If the schema hash in the document doesn't match the schema of the type loader,
+    /// node types, attributes and children are matched by name, as they are in XML. Attributes
+    /// and children that the schema no longer defines are skipped, and values whose attribute type
+    /// has changed are converted to strings and back, with the same conversions as XML.</remarks>
+    public class DomBinaryReader
+    {
+        /// <summary>
+        /// Constructor</summary>
+        /// <param name="typeLoader">Type loader to translate names to DOM node types</param>
+        public DomBinaryReader(XmlSchemaTypeLoader typeLoader)
+            : this(typeLoader, new DomXmlReader(typeLoader))
+        {
+        }
+
+        /// <summary>
+        /// Constructor with a reader for XML documents</summary>
+        /// <param name="typeLoader">Type loader to translate names to DOM node types</param>
+        /// <param name="xmlReader">Reader for streams that don't hold binary documents</param>
+        public DomBinaryReader(XmlSchemaTypeLoader typeLoader, DomXmlReader xmlReader)
+        {
+            if (typeLoader == null)
+                throw new ArgumentNullException("typeLoader");
+            if (xmlReader == null)
+                throw new ArgumentNullException("xmlReader");
+
+            m_typeLoader = typeLoader;
+            m_xmlReader = xmlReader;
+        }
+
+        /// <summary>
+        /// Gets the type loader that defines DOM node types</summary>
+        public XmlSchemaTypeLoader TypeLoader
+        {
+            get { return m_typeLoader; }
+        }
+
+        /// <summary>
+        /// Gets the reader for streams that don't hold binary documents</summary>
+        public DomXmlReader XmlReader
+        {
+            get { return m_xmlReader; }
+        }
+
+        /// <summary>
+        /// Gets the URI for the current read</summary>
+        public Uri Uri
+        {
+            get { return m_uri; }
+        }
+
+        /// <summary>
+        /// Gets the root node for the current read</summary>
+        public DomNode Root
+        {
+            get { return m_root; }
+        }
+
+        /// <summary>
+        /// Gets whether the last stream that was read held a binary document</summary>
+        public bool WasBinary
+        {
+            get { return m_wasBinary; }
+        }
+
+        /// <summary>
+        /// Gets whether the schema hash of the last binary document that was read matched the
+        /// schema of the type loader</summary>
+        public bool SchemaMatched
+        {
+            get { return m_schemaMatched; }
+        }
+
+        /// <summary>
+        /// Gets an enumeration of references that couldn't be resolved</summary>
+        public IEnumerable<XmlNodeReference> UnresolvedReferences
+        {
+            get { return m_wasBinary ? m_unresolvedReferences : m_xmlReader.UnresolvedReferences; }
+        }
+
+        /// <summary>
+        /// Reads a node tree from a stream</summary>
+        /// <param name="stream">Read stream</param>
+        /// <param name="uri">URI of stream</param>
+        /// <returns>Node tree, from stream</returns>
+        public virtual DomNode Read(Stream stream, Uri uri)
+        {
+            if (stream == null)
+                throw new ArgumentNullException("stream");
+
+            m_uri = uri;
+            m_root = null;
+            m_unresolvedReferences.Clear();
+
+            if (!stream.CanSeek)
+            {
+                MemoryStream memory = new MemoryStream();
+                stream.CopyTo(memory);
+                memory.Position = 0;
+                stream = memory;
+            }
+
+            m_wasBinary = DomBinaryFormat.IsBinaryDocument(stream);
+            m_schemaMatched = false;
+            if (!m_wasBinary)
+            {
+                m_root = m_xmlReader.Read(stream, uri);
+                return m_root;
+            }
+
+            try
+            {
+                // the reader isn't disposed, as that would close the stream
+                BinaryReader reader = new BinaryReader(stream);
+                ReadHeader(reader);
+
+                int rootNameIndex = DomBinaryFormat.ReadCount(reader);
+                m_nodes.Capacity = DomBinaryFormat.ReadCount(reader);
+                m_root = ReadNode(reader, rootNameIndex > 0 ? m_strings[rootNameIndex - 1] : null);
+
+                ResolveReferences();
+            }
+            finally
+            {
+                m_strings = null;
+                m_types = null;
+                m_nodes.Clear();
+                m_nodeReferences.Clear();
+                m_internalReferences.Clear();
+            }
+
+            return m_root;
+        }
+
+        /// <summary>
+        /// Determines if attribute is a reference</summary>
+        /// <param name="attributeInfo">Attribute</param>
+        /// <returns>True iff attribute is reference</returns>
+        protected virtual bool IsReferenceAttribute(AttributeInfo attributeInfo)
+        {
+            return (attributeInfo.Type.Type == AttributeTypes.Reference);
+        }
+
+        /// <summary>
+        /// Gets the node type with the given name</summary>
+        /// <param name="typeName">Type name</param>
+        /// <returns>Node type, or null if there is no type with the name</returns>
+        protected virtual DomNodeType GetNodeType(string typeName)
+        {
+            return m_typeLoader.GetNodeType(typeName);
+        }
+
+        private void ReadHeader(BinaryReader reader)
+        {
+            reader.ReadBytes(DomBinaryFormat.Magic.Length);
+            int version = reader.ReadInt32();
+            if (version > DomBinaryFormat.Version)
+                throw new InvalidDataException(string.Format(
+                    "The binary document was written in version {0} of the format; this reader supports version {1}",
+                    version, DomBinaryFormat.Version));
+
+            ulong schemaHash = reader.ReadUInt64();
+            if (!m_schemaHash.HasValue)
+                m_schemaHash = DomBinaryFormat.ComputeSchemaHash(m_typeLoader);
+            m_schemaMatched = schemaHash == m_schemaHash.Value;
+
+            m_strings = new string[DomBinaryFormat.ReadCount(reader)];
+            for (int i = 0; i < m_strings.Length; i++)
+                m_strings[i] = reader.ReadString();
+
+            m_types = new WrittenType[DomBinaryFormat.ReadCount(reader)];
+            for (int i = 0; i < m_types.Length; i++)
+                m_types[i] = ReadType(reader);
+        }
+
+        private WrittenType ReadType(BinaryReader reader)
+        {
+            string typeName = m_strings[DomBinaryFormat.ReadCount(reader)];
+            DomNodeType type = GetNodeType(typeName);
+            if (type == null)
+                throw new InvalidOperationException("No type was found with the name " + typeName);
+
+            // If the schema matches, the attributes and children are in the same order as the
+            //  type's; otherwise, they are matched by name
+            List<AttributeInfo> attributes = m_schemaMatched ? new List<AttributeInfo>(type.Attributes) : null;
+            WrittenType result = new WrittenType(type, DomBinaryFormat.ReadCount(reader));
+            for (int i = 0; i < result.Attributes.Length; i++)
+            {
+                string name = m_strings[DomBinaryFormat.ReadCount(reader)];
+                AttributeTypes valueType = (AttributeTypes)reader.ReadByte();
+                AttributeInfo info = m_schemaMatched ? attributes[i] : type.GetAttributeInfo(name);
+                result.Attributes[i] = info;
+                result.ValueTypes[i] = valueType;
+                result.ConvertValues[i] = info != null && info.Type.Type != valueType;
+            }
+
+            List<ChildInfo> children = m_schemaMatched ? new List<ChildInfo>(type.Children) : null;
+            result.Children = new ChildInfo[DomBinaryFormat.ReadCount(reader)];
+            for (int i = 0; i < result.Children.Length; i++)
+            {
+                string name = m_strings[DomBinaryFormat.ReadCount(reader)];
+                reader.ReadBoolean(); // whether the child was a list
+                result.Children[i] = m_schemaMatched ? children[i] : type.GetChildInfo(name);
+            }
+
+            return result;
+        }
+
+        private DomNode ReadNode(BinaryReader reader, string rootName)
+        {
+            WrittenType writtenType = m_types[DomBinaryFormat.ReadCount(reader)];
+            ChildInfo rootInfo = rootName != null ? GetRootElement(rootName, writtenType.Type) : null;
+            return ReadNode(reader, writtenType, rootInfo);
+        }
+
+        private DomNode ReadNode(BinaryReader reader, WrittenType writtenType, ChildInfo childInfo)
+        {
+            DomNode node = new DomNode(writtenType.Type, childInfo);
+            m_nodes.Add(node);
+
+            int attributeCount = DomBinaryFormat.ReadCount(reader);
+            for (int i = 0; i < attributeCount; i++)
+            {
+                // the low bit of the index tells whether the value was written as a string
+                int key = DomBinaryFormat.ReadCount(reader);
+                int index = key >> 1;
+                AttributeInfo info = writtenType.Attributes[index];
+                AttributeTypes valueType = writtenType.ValueTypes[index];
+                if ((key & 1) != 0)
+                {
+                    string valueString = reader.ReadString();
+                    if (info != null)
+                        ReadAttribute(node, info, valueString);
+                }
+                else if (valueType == AttributeTypes.Reference)
+                {
+                    int refIndex = DomBinaryFormat.ReadCount(reader);
+                    if (info != null && IsReferenceAttribute(info))
+                        m_internalReferences.Add(new InternalReference(node, info, refIndex));
+                }
+                else
+                {
+                    object value = DomBinaryFormat.ReadValue(reader, valueType);
+                    if (info != null)
+                    {
+                        if (writtenType.ConvertValues[index])
+                            ReadAttribute(node, info, GetConverter(valueType).Convert(value));
+                        else
+                            node.SetAttribute(info, value);
+                    }
+                }
+            }
+
+            foreach (ChildInfo info in writtenType.Children)
+            {
+                while (true)
+                {
+                    int count = DomBinaryFormat.ReadCount(reader);
+                    if (count == 0)
+                        break;
+
+                    int nodeCount = reader.ReadInt32();
+                    int length = reader.ReadInt32();
+                    if (info == null)
+                    {
+                        // skip children that the schema doesn't define, keeping the node indices
+                        //  of the following nodes, for references
+                        reader.BaseStream.Seek(length, SeekOrigin.Current);
+                        for (int i = 0; i < nodeCount; i++)
+                            m_nodes.Add(null);
+                        continue;
+                    }
+
+                    for (int i = 0; i < count; i++)
+                    {
+                        WrittenType childType = m_types[DomBinaryFormat.ReadCount(reader)];
+                        DomNode child = ReadNode(reader, childType, info);
+                        if (info.IsList)
+                            node.GetChildList(info).Add(child);
+                        else
+                            node.SetChild(info, child);
+                    }
+                }
+            }
+
+            return node;
+        }
+
+        private void ReadAttribute(DomNode node, AttributeInfo info, string valueString)
+        {
+            if (IsReferenceAttribute(info))
+            {
+                // save reference so it can be resolved after all nodes have been read
+                m_nodeReferences.Add(new XmlNodeReference(node, info, valueString));
+            }
+            else
+            {
+                object value = info.Type.Convert(valueString);
+                node.SetAttribute(info, value);
+            }
+        }
+
+        private ChildInfo GetRootElement(string name, DomNodeType type)
+        {
+            ChildInfo result = null;
+            foreach (ChildInfo rootElement in m_typeLoader.GetRootElements())
+            {
+                if (rootElement.Name == name)
+                {
+                    result = rootElement;
+                    if (rootElement.Type == type)
+                        break;
+                }
+            }
+            return result ?? new ChildInfo(name, type);
+        }
+
+        private void ResolveReferences()
+        {
+            foreach (InternalReference reference in m_internalReferences)
+            {
+                DomNode refNode = m_nodes[reference.RefIndex];
+                if (refNode != null)
+                    reference.Node.SetAttribute(reference.Info, refNode);
+            }
+
+            if (m_nodeReferences.Count == 0)
+                return;
+
+            Dictionary<string, DomNode> nodeDictionary = new Dictionary<string, DomNode>();
+            foreach (DomNode node in m_nodes)
+            {
+                if (node != null && node.Type.IdAttribute != null)
+                {
+                    string id = node.GetId();
+                    if (!string.IsNullOrEmpty(id))
+                        nodeDictionary[id] = node;
+                }
+            }
+
+            foreach (XmlNodeReference nodeReference in m_nodeReferences)
+            {
+                // the same id fixup as DomXmlReader.ResolveReferences()
+                string id = nodeReference.Value.TrimStart('#');
+                id = Uri.UnescapeDataString(id);
+                id = id.TrimStart(s_trimChars);
+
+                DomNode refNode;
+                if (nodeDictionary.TryGetValue(id, out refNode))
+                {
+                    nodeReference.Node.SetAttribute(nodeReference.AttributeInfo, refNode);
+                }
+                else
+                {
+                    m_unresolvedReferences.Add(nodeReference);
+                    object value = nodeReference.AttributeInfo.Type.Convert(nodeReference.Value);
+                    nodeReference.Node.SetAttribute(nodeReference.AttributeInfo, value);
+                }
+            }
+        }
+
+        private static AttributeType GetConverter(AttributeTypes valueType)
+        {
+            lock (s_converters)
+            {
+                AttributeType converter;
+                if (!s_converters.TryGetValue(valueType, out converter))
+                {
+                    converter = new AttributeType(valueType.ToString(), s_clrTypes[(int)valueType]);
+                    s_converters.Add(valueType, converter);
+                }
+                return converter;
+            }
+        }
+
+        // node types as they were written, with the matching attributes and children of the schema
+        private class WrittenType
+        {
+            public WrittenType(DomNodeType type, int attributeCount)
+            {
+                Type = type;
+                Attributes = new AttributeInfo[attributeCount];
+                ValueTypes = new AttributeTypes[attributeCount];
+                ConvertValues = new bool[attributeCount];
+            }
+
+            public readonly DomNodeType Type;
+            public readonly AttributeInfo[] Attributes;
+            public readonly AttributeTypes[] ValueTypes;
+            public readonly bool[] ConvertValues;
+            public ChildInfo[] Children;
+        }
+
+        private class InternalReference
+        {
+            public InternalReference(DomNode node, AttributeInfo info, int refIndex)
+            {
+                Node = node;
+                Info = info;
+                RefIndex = refIndex;
+            }
+
+            public readonly DomNode Node;
+            public readonly AttributeInfo Info;
+            public readonly int RefIndex;
+        }
+
+        // CLR types, indexed by AttributeTypes
+        private static readonly Type[] s_clrTypes =
+        {
+            typeof(bool), typeof(bool[]), typeof(sbyte), typeof(sbyte[]), typeof(byte), typeof(byte[]),
+            typeof(short), typeof(short[]), typeof(ushort), typeof(ushort[]), typeof(int), typeof(int[]),
+            typeof(uint), typeof(uint[]), typeof(long), typeof(long[]), typeof(ulong), typeof(ulong[]),
+            typeof(float), typeof(float[]), typeof(double), typeof(double[]), typeof(decimal), typeof(decimal[]),
+            typeof(string), typeof(string[]), typeof(DateTime), typeof(Uri), typeof(DomNode),
+        };
+
+        private static readonly Dictionary<AttributeTypes, AttributeType> s_converters =
+            new Dictionary<AttributeTypes, AttributeType>();
+
+        private static readonly char[] s_trimChars = new[] { '|' };
+
+        private readonly XmlSchemaTypeLoader m_typeLoader;
+        private readonly DomXmlReader m_xmlReader;
+        private ulong? m_schemaHash;
+
+        private DomNode m_root;
+        private Uri m_uri;
+        private bool m_wasBinary;
+        private bool m_schemaMatched;
+
+        private string[] m_strings;
+        private WrittenType[] m_types;
+        private readonly List<DomNode> m_nodes = new List<DomNode>();
+        private readonly List<XmlNodeReference> m_nodeReferences = new List<XmlNodeReference>();
+        private readonly List<InternalReference> m_internalReferences = new List<InternalReference>();
+        private readonly List<XmlNodeReference> m_unresolvedReferences = new List<XmlNodeReference>();
+    }
+}
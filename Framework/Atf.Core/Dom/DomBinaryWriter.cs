@@ -0,0 +1,316 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+
+using Sce.Atf.Adaptation;
+
+namespace Sce.Atf.Dom
+{
+    /// <summary>
+    /// Class to write DOM data in the compact binary document format, which DomBinaryReader
+    /// loads much faster than DomXmlReader loads XML, because attribute values don't need to be
+    /// parsed. See DomBinaryFormat for a description of the format.</summary>
+    public class DomBinaryWriter
+    {
+        /// <summary>
+        /// Constructor</summary>
+        /// <param name="typeLoader">Type loader that defines the DOM node types of the data</param>
+        public DomBinaryWriter(XmlSchemaTypeLoader typeLoader)
+        {
+            if (typeLoader == null)
+                throw new ArgumentNullException("typeLoader");
+
+            m_typeLoader = typeLoader;
+        }
+
+        /// <summary>
+        /// Gets the type loader that defines DOM node types</summary>
+        public XmlSchemaTypeLoader TypeLoader
+        {
+            get { return m_typeLoader; }
+        }
+
+        /// <summary>
+        /// Writes the node tree to a stream</summary>
+        /// <param name="root">Node tree to write</param>
+        /// <param name="stream">Write stream</param>
+        /// <param name="uri">URI of stream</param>
+        public virtual void Write(DomNode root, Stream stream, Uri uri)
+        {
+            if (root == null)
+                throw new ArgumentNullException("root");
+            if (stream == null)
+                throw new ArgumentNullException("stream");
+
+            m_root = root;
+            m_uri = uri;
+            try
+            {
+                // Number the nodes and collect the names and types in the order they are written
+                AddNodes(root);
+                int rootNameIndex = root.ChildInfo != null ? AddString(root.ChildInfo.Name) + 1 : 0;
+
+                // Chunk lengths are patched once their nodes are written, so write to memory first
+                using (MemoryStream memory = new MemoryStream())
+                using (BinaryWriter writer = new BinaryWriter(memory))
+                {
+                    writer.Write(DomBinaryFormat.Magic);
+                    writer.Write(DomBinaryFormat.Version);
+                    writer.Write(DomBinaryFormat.ComputeSchemaHash(m_typeLoader));
+
+                    DomBinaryFormat.WriteCount(writer, m_strings.Count);
+                    foreach (string s in m_strings)
+                        writer.Write(s);
+
+                    DomBinaryFormat.WriteCount(writer, m_types.Count);
+                    foreach (DomNodeType type in m_types)
+                        WriteType(type, writer);
+
+                    DomBinaryFormat.WriteCount(writer, rootNameIndex);
+                    DomBinaryFormat.WriteCount(writer, m_nodeIndices.Count);
+                    WriteNode(root, writer);
+
+                    writer.Flush();
+                    memory.WriteTo(stream);
+                }
+            }
+            finally
+            {
+                m_root = null;
+                m_uri = null;
+                m_strings.Clear();
+                m_stringIndices.Clear();
+                m_types.Clear();
+                m_typeIndices.Clear();
+                m_nodeIndices.Clear();
+                m_nodesWritten = 0;
+            }
+        }
+
+        /// <summary>
+        /// Gets the root node for the current write</summary>
+        public DomNode Root
+        {
+            get { return m_root; }
+        }
+
+        /// <summary>
+        /// Gets the URI for the current write</summary>
+        public Uri Uri
+        {
+            get { return m_uri; }
+        }
+
+        /// <summary>
+        /// Converts a reference to a node outside of the data being written to a string. The string
+        /// is resolved like an XML reference when the data is read.</summary>
+        /// <param name="refNode">Node that is referenced</param>
+        /// <param name="root">Root node of data that is being written</param>
+        /// <param name="uri">URI of data that is being written</param>
+        /// <returns>String encoding the reference to the node</returns>
+        protected virtual string GetNodeReferenceString(DomNode refNode, DomNode root, Uri uri)
+        {
+            string id = refNode.GetId();
+
+            // if referenced node is in another resource, prepend URI, as DomXmlWriter does
+            if (!refNode.IsDescendantOf(root))
+            {
+                DomNode nodeRoot = refNode.GetRoot();
+                IResource resource = nodeRoot.As<IResource>();
+                if (resource != null)
+                {
+                    Uri relativeUri = uri.MakeRelativeUri(resource.Uri);
+                    id = relativeUri + "#" + id;
+                }
+            }
+
+            return id;
+        }
+
+        /// <summary>
+        /// Determines if an attribute should be written. By default, the same attributes are
+        /// written as by DomXmlWriter: those that don't have their default values, and those that
+        /// are forced to be serialized.</summary>
+        /// <param name="node">DomNode</param>
+        /// <param name="attributeInfo">Attribute</param>
+        /// <returns>True iff the attribute should be written</returns>
+        protected virtual bool ShouldWriteAttribute(DomNode node, AttributeInfo attributeInfo)
+        {
+            return attributeInfo.ForceSerialize
+                || !node.IsAttributeDefault(attributeInfo);
+        }
+
+        private void AddNodes(DomNode node)
+        {
+            m_nodeIndices.Add(node, m_nodeIndices.Count);
+
+            DomNodeType type = node.Type;
+            if (!m_typeIndices.ContainsKey(type))
+            {
+                m_typeIndices.Add(type, m_types.Count);
+                m_types.Add(type);
+                AddString(type.Name);
+                foreach (AttributeInfo info in type.Attributes)
+                    AddString(info.Name);
+                foreach (ChildInfo info in type.Children)
+                    AddString(info.Name);
+            }
+
+            // the same order as WriteNode
+            foreach (ChildInfo info in type.Children)
+            {
+                if (info.IsList)
+                {
+                    foreach (DomNode child in node.GetChildList(info))
+                        AddNodes(child);
+                }
+                else
+                {
+                    DomNode child = node.GetChild(info);
+                    if (child != null)
+                        AddNodes(child);
+                }
+            }
+        }
+
+        private int AddString(string s)
+        {
+            int index;
+            if (!m_stringIndices.TryGetValue(s, out index))
+            {
+                index = m_strings.Count;
+                m_stringIndices.Add(s, index);
+                m_strings.Add(s);
+            }
+            return index;
+        }
+
+        private void WriteType(DomNodeType type, BinaryWriter writer)
+        {
+            DomBinaryFormat.WriteCount(writer, m_stringIndices[type.Name]);
+
+            List<AttributeInfo> attributes = new List<AttributeInfo>(type.Attributes);
+            DomBinaryFormat.WriteCount(writer, attributes.Count);
+            foreach (AttributeInfo info in attributes)
+            {
+                DomBinaryFormat.WriteCount(writer, m_stringIndices[info.Name]);
+                writer.Write((byte)info.Type.Type);
+            }
+
+            List<ChildInfo> children = new List<ChildInfo>(type.Children);
+            DomBinaryFormat.WriteCount(writer, children.Count);
+            foreach (ChildInfo info in children)
+            {
+                DomBinaryFormat.WriteCount(writer, m_stringIndices[info.Name]);
+                writer.Write(info.IsList);
+            }
+        }
+
+        private void WriteNode(DomNode node, BinaryWriter writer)
+        {
+            DomNodeType type = node.Type;
+            DomBinaryFormat.WriteCount(writer, m_typeIndices[type]);
+            m_nodesWritten++;
+
+            int attributeCount = 0;
+            foreach (AttributeInfo info in type.Attributes)
+            {
+                if (ShouldWriteAttribute(node, info))
+                    attributeCount++;
+            }
+            DomBinaryFormat.WriteCount(writer, attributeCount);
+
+            int attributeIndex = 0;
+            foreach (AttributeInfo info in type.Attributes)
+            {
+                if (ShouldWriteAttribute(node, info))
+                    WriteAttribute(node, info, attributeIndex, writer);
+                attributeIndex++;
+            }
+
+            foreach (ChildInfo info in type.Children)
+            {
+                if (info.IsList)
+                {
+                    IList<DomNode> children = node.GetChildList(info);
+                    for (int i = 0; i < children.Count; i += DomBinaryFormat.ChunkSize)
+                        WriteChunk(children, i, Math.Min(DomBinaryFormat.ChunkSize, children.Count - i), writer);
+                }
+                else
+                {
+                    DomNode child = node.GetChild(info);
+                    if (child != null)
+                        WriteChunk(new[] { child }, 0, 1, writer);
+                }
+                DomBinaryFormat.WriteCount(writer, 0);
+            }
+        }
+
+        private void WriteAttribute(DomNode node, AttributeInfo info, int attributeIndex, BinaryWriter writer)
+        {
+            object value = node.GetAttribute(info);
+            AttributeType attributeType = info.Type;
+
+            // the low bit of the index tells whether the value is written as a string
+            if (attributeType.Type == AttributeTypes.Reference)
+            {
+                DomNode refNode = value as DomNode;
+                int refIndex;
+                if (refNode != null && m_nodeIndices.TryGetValue(refNode, out refIndex))
+                {
+                    DomBinaryFormat.WriteCount(writer, attributeIndex << 1);
+                    DomBinaryFormat.WriteCount(writer, refIndex);
+                }
+                else
+                {
+                    DomBinaryFormat.WriteCount(writer, (attributeIndex << 1) | 1);
+                    writer.Write(refNode != null ? GetNodeReferenceString(refNode, m_root, m_uri) ?? string.Empty : value.ToString());
+                }
+            }
+            else if (DomBinaryFormat.CanWriteValue(attributeType, value))
+            {
+                DomBinaryFormat.WriteCount(writer, attributeIndex << 1);
+                DomBinaryFormat.WriteValue(writer, attributeType.Type, value);
+            }
+            else
+            {
+                DomBinaryFormat.WriteCount(writer, (attributeIndex << 1) | 1);
+                writer.Write(attributeType.Convert(value));
+            }
+        }
+
+        private void WriteChunk(IList<DomNode> children, int start, int count, BinaryWriter writer)
+        {
+            DomBinaryFormat.WriteCount(writer, count);
+
+            // reserve space for the number of nodes in the chunk's subtrees and their length, and
+            //  fill them in afterwards
+            long headerPosition = writer.BaseStream.Position;
+            int firstNode = m_nodesWritten;
+            writer.Write(0);
+            writer.Write(0);
+            for (int i = start; i < start + count; i++)
+                WriteNode(children[i], writer);
+
+            long endPosition = writer.BaseStream.Position;
+            writer.BaseStream.Position = headerPosition;
+            writer.Write(m_nodesWritten - firstNode);
+            writer.Write((int)(endPosition - headerPosition - 2 * sizeof(int)));
+            writer.BaseStream.Position = endPosition;
+        }
+
+        private readonly XmlSchemaTypeLoader m_typeLoader;
+
+        private DomNode m_root;
+        private Uri m_uri;
+
+        private readonly List<string> m_strings = new List<string>();
+        private readonly Dictionary<string, int> m_stringIndices = new Dictionary<string, int>();
+        private readonly List<DomNodeType> m_types = new List<DomNodeType>();
+        private readonly Dictionary<DomNodeType, int> m_typeIndices = new Dictionary<DomNodeType, int>();
+        private readonly Dictionary<DomNode, int> m_nodeIndices = new Dictionary<DomNode, int>();
+        private int m_nodesWritten;
+    }
+}
@@ -0,0 +1,236 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+
+namespace Sce.Atf.Dom
+{
+    /// <summary>
+    /// Coalesced set of the changes made to a DOM tree, usually during a transaction. Cleaning-up
+    /// means: 1) Multiple changes to the same DomNode attribute are collapsed into one change, from
+    /// the first old value to the last new value, and a change that ends with the original value is
+    /// dropped. 2) Changes to a DomNode after it is inserted or before it is removed are ignored,
+    /// and a DomNode that is inserted and then removed is ignored entirely.</summary>
+    /// <remarks>TransactionContext collects a change set for each transaction if its
+    /// BatchNotifications property is true, so that listeners can process all the changes once,
+    /// when the transaction ends, instead of handling every DOM event.</remarks>
+    public class DomChangeSet
+    {
+        /// <summary>
+        /// Gets the attribute changes, in the order the attributes were first changed. Each change
+        /// holds the DomNode, the attribute, the value before the first change and the value after
+        /// the last change.</summary>
+        public IEnumerable<AttributeEventArgs> AttributeChanges
+        {
+            get
+            {
+                foreach (Pair<ChangeType, EventArgs> change in Changes)
+                {
+                    if (change.First == ChangeType.AttributeChanged)
+                        yield return (AttributeEventArgs)change.Second;
+                }
+            }
+        }
+
+        /// <summary>
+        /// Gets the child insertions, in order. The children of inserted DomNodes aren't
+        /// included.</summary>
+        public IEnumerable<ChildEventArgs> InsertedChildren
+        {
+            get { return GetChildChanges(ChangeType.ChildInserted); }
+        }
+
+        /// <summary>
+        /// Gets the child removals, in order</summary>
+        public IEnumerable<ChildEventArgs> RemovedChildren
+        {
+            get { return GetChildChanges(ChangeType.ChildRemoved); }
+        }
+
+        /// <summary>
+        /// Gets whether the change set is empty, i.e., whether the DOM is the same as it was
+        /// before the changes</summary>
+        public bool IsEmpty
+        {
+            get
+            {
+                using (IEnumerator<Pair<ChangeType, EventArgs>> changes = Changes.GetEnumerator())
+                    return !changes.MoveNext();
+            }
+        }
+
+        /// <summary>
+        /// Adds an attribute change</summary>
+        /// <param name="e">Attribute event args</param>
+        public void AddAttributeChanged(AttributeEventArgs e)
+        {
+            // Ignore changes to inserted DomNodes
+            foreach (DomNode ancestor in e.DomNode.Lineage)
+                if (m_inserted.ContainsKey(ancestor))
+                    return;
+
+            var key = new Pair<DomNode, AttributeInfo>(e.DomNode, e.AttributeInfo);
+            int index;
+            if (m_attributeChanges.TryGetValue(key, out index))
+            {
+                // Combine with the previous change to the same attribute
+                var oldEvent = (AttributeEventArgs)m_changes[index].Second;
+                m_changes[index] = new Pair<ChangeType, EventArgs>(
+                    ChangeType.AttributeChanged,
+                    new AttributeEventArgs(oldEvent.DomNode, oldEvent.AttributeInfo, oldEvent.OldValue, e.NewValue));
+            }
+            else
+            {
+                m_attributeChanges.Add(key, m_changes.Count);
+
+                List<int> nodeChanges;
+                if (!m_nodeChanges.TryGetValue(e.DomNode, out nodeChanges))
+                {
+                    nodeChanges = new List<int>();
+                    m_nodeChanges.Add(e.DomNode, nodeChanges);
+                }
+                nodeChanges.Add(m_changes.Count);
+
+                m_changes.Add(new Pair<ChangeType, EventArgs>(ChangeType.AttributeChanged, e));
+            }
+        }
+
+        /// <summary>
+        /// Adds a child insertion</summary>
+        /// <param name="e">Child event args</param>
+        public void AddChildInserted(ChildEventArgs e)
+        {
+            // Ignore insertions into inserted DomNodes
+            foreach (DomNode ancestor in e.Parent.Lineage)
+                if (m_inserted.ContainsKey(ancestor))
+                    return;
+
+            m_inserted[e.Child] = m_changes.Count;
+            m_changes.Add(new Pair<ChangeType, EventArgs>(ChangeType.ChildInserted, e));
+        }
+
+        /// <summary>
+        /// Adds a child removal</summary>
+        /// <param name="e">Child event args</param>
+        public void AddChildRemoved(ChildEventArgs e)
+        {
+            // Drop the attribute changes to the removed DomNodes. Unloaded children can't have
+            //  been changed.
+            if (m_nodeChanges.Count > 0)
+            {
+                foreach (DomNode removedNode in e.Child.LoadedSubtree)
+                {
+                    List<int> nodeChanges;
+                    if (m_nodeChanges.TryGetValue(removedNode, out nodeChanges))
+                    {
+                        foreach (int changeIndex in nodeChanges)
+                        {
+                            var attributeEvent = (AttributeEventArgs)m_changes[changeIndex].Second;
+                            m_attributeChanges.Remove(
+                                new Pair<DomNode, AttributeInfo>(attributeEvent.DomNode, attributeEvent.AttributeInfo));
+                            m_changes[changeIndex] = new Pair<ChangeType, EventArgs>(ChangeType.None, null);
+                        }
+                        m_nodeChanges.Remove(removedNode);
+                    }
+                }
+            }
+
+            // If this DomNode was inserted, drop the insertion and ignore the removal
+            int index;
+            if (m_inserted.TryGetValue(e.Child, out index))
+            {
+                m_changes[index] = new Pair<ChangeType, EventArgs>(ChangeType.None, null);
+                m_inserted.Remove(e.Child);
+                return;
+            }
+            foreach (DomNode ancestor in e.Parent.Lineage)
+                if (m_inserted.ContainsKey(ancestor))
+                    return;
+
+            m_changes.Add(new Pair<ChangeType, EventArgs>(ChangeType.ChildRemoved, e));
+        }
+
+        /// <summary>
+        /// Removes all changes</summary>
+        public void Clear()
+        {
+            m_changes.Clear();
+            m_attributeChanges.Clear();
+            m_nodeChanges.Clear();
+            m_inserted.Clear();
+        }
+
+        /// <summary>
+        /// Gets all the changes in the order they were made. Attribute changes that end with the
+        /// original value are left out.</summary>
+        internal IEnumerable<Pair<ChangeType, EventArgs>> Changes
+        {
+            get
+            {
+                foreach (Pair<ChangeType, EventArgs> change in m_changes)
+                {
+                    if (change.First == ChangeType.None)
+                        continue;
+
+                    if (change.First == ChangeType.AttributeChanged)
+                    {
+                        var e = (AttributeEventArgs)change.Second;
+                        if (e.AttributeInfo.Type.AreEqual(e.OldValue, e.NewValue))
+                            continue;
+                    }
+
+                    yield return change;
+                }
+            }
+        }
+
+        internal enum ChangeType
+        {
+            AttributeChanged,
+            ChildInserted,
+            ChildRemoved,
+            None //for dropped changes
+        }
+
+        private IEnumerable<ChildEventArgs> GetChildChanges(ChangeType type)
+        {
+            foreach (Pair<ChangeType, EventArgs> change in m_changes)
+            {
+                if (change.First == type)
+                    yield return (ChildEventArgs)change.Second;
+            }
+        }
+
+        private class AttributeComparer : IEqualityComparer<Pair<DomNode, AttributeInfo>>
+        {
+            public bool Equals(Pair<DomNode, AttributeInfo> x, Pair<DomNode, AttributeInfo> y)
+            {
+                return
+                    x.First.Equals(y.First) &&
+                    x.Second.Equivalent(y.Second);
+            }
+
+            public int GetHashCode(Pair<DomNode, AttributeInfo> obj)
+            {
+                return
+                    obj.First.GetHashCode() ^
+                    obj.Second.GetEquivalentHashCode();
+            }
+        }
+
+        // The changes, in order, including the dropped ones.
+        private readonly List<Pair<ChangeType, EventArgs>> m_changes = new List<Pair<ChangeType, EventArgs>>();
+
+        // Map the DomNode and its AttributeInfo to the index of the attribute change in m_changes.
+        private readonly Dictionary<Pair<DomNode, AttributeInfo>, int> m_attributeChanges =
+            new Dictionary<Pair<DomNode, AttributeInfo>, int>(s_comparer);
+
+        // Map each changed DomNode to the indices of its attribute changes in m_changes.
+        private readonly Dictionary<DomNode, List<int>> m_nodeChanges = new Dictionary<DomNode, List<int>>();
+
+        // Map inserted DomNodes (but not their children) to the index of the insertion in m_changes.
+        private readonly Dictionary<DomNode, int> m_inserted = new Dictionary<DomNode, int>();
+
+        private static readonly IEqualityComparer<Pair<DomNode, AttributeInfo>> s_comparer = new AttributeComparer();
+    }
+}
@@ -0,0 +1,23 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+
+namespace Sce.Atf.Dom
+{
+    /// <summary>
+    /// Event argument for events that report a coalesced set of DOM changes</summary>
+    public class DomChangeSetEventArgs : EventArgs
+    {
+        /// <summary>
+        /// Constructor</summary>
+        /// <param name="changeSet">DOM changes</param>
+        public DomChangeSetEventArgs(DomChangeSet changeSet)
+        {
+            ChangeSet = changeSet;
+        }
+
+        /// <summary>
+        /// DOM changes</summary>
+        public readonly DomChangeSet ChangeSet;
+    }
+}
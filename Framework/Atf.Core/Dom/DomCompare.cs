@@ -0,0 +1,421 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections;
+using System.Collections.Generic;
+
+using Sce.Atf.Adaptation;
+
+namespace Sce.Atf.Dom
+{
+    /// <summary>
+    /// Compares DOM node subtrees: their types, attributes, children and references. Scripts can
+    /// use this to verify a whole model in one call, instead of comparing it field by field.</summary>
+    public static class DomCompare
+    {
+        /// <summary>
+        /// Compares two DOM node subtrees</summary>
+        /// <param name="expected">Root of expected subtree</param>
+        /// <param name="actual">Root of actual subtree</param>
+        /// <returns>Descriptions of the differences; empty if the subtrees are equal</returns>
+        public static IList<string> Diff(DomNode expected, DomNode actual)
+        {
+            return Diff(expected, actual, null);
+        }
+
+        /// <summary>
+        /// Compares two DOM node subtrees</summary>
+        /// <param name="expected">Root of expected subtree</param>
+        /// <param name="actual">Root of actual subtree</param>
+        /// <param name="options">Comparison options, or null for the default options</param>
+        /// <returns>Descriptions of the differences; empty if the subtrees are equal</returns>
+        public static IList<string> Diff(DomNode expected, DomNode actual, DomCompareOptions options)
+        {
+            Comparison comparison = new Comparison(options);
+            comparison.AddRoot(expected, string.Empty);
+            comparison.AddRoot(actual, string.Empty);
+            comparison.CompareNodes(expected, actual);
+            comparison.CompareReferences();
+            return comparison.Differences;
+        }
+
+        /// <summary>
+        /// Compares two sequences of DOM node subtrees, e.g., the modules of two circuits,
+        /// pairwise</summary>
+        /// <param name="expected">Expected DOM nodes, or objects that adapt to DOM nodes</param>
+        /// <param name="actual">Actual DOM nodes, or objects that adapt to DOM nodes</param>
+        /// <param name="options">Comparison options, or null for the default options</param>
+        /// <returns>Descriptions of the differences; empty if the subtrees are equal</returns>
+        public static IList<string> Diff(IEnumerable expected, IEnumerable actual, DomCompareOptions options)
+        {
+            if (expected == null)
+                throw new ArgumentNullException("expected");
+            if (actual == null)
+                throw new ArgumentNullException("actual");
+
+            List<DomNode> expectedNodes = ToDomNodes(expected);
+            List<DomNode> actualNodes = ToDomNodes(actual);
+
+            Comparison comparison = new Comparison(options);
+            for (int i = 0; i < expectedNodes.Count; i++)
+                comparison.AddRoot(expectedNodes[i], "[" + i + "]");
+            for (int i = 0; i < actualNodes.Count; i++)
+                comparison.AddRoot(actualNodes[i], "[" + i + "]");
+
+            if (expectedNodes.Count != actualNodes.Count)
+                comparison.Add(string.Format("{0} nodes, expected {1}", actualNodes.Count, expectedNodes.Count));
+
+            int count = Math.Min(expectedNodes.Count, actualNodes.Count);
+            for (int i = 0; i < count; i++)
+                comparison.CompareNodes(expectedNodes[i], actualNodes[i]);
+
+            comparison.CompareReferences();
+            return comparison.Differences;
+        }
+
+        private static List<DomNode> ToDomNodes(IEnumerable items)
+        {
+            List<DomNode> nodes = new List<DomNode>();
+            foreach (object item in items)
+                nodes.Add(item.As<DomNode>());
+            return nodes;
+        }
+
+        /// <summary>
+        /// State of one comparison. Nodes are matched up while their attributes and children are
+        /// compared, so that references can be checked against the matches afterwards.</summary>
+        private class Comparison
+        {
+            public Comparison(DomCompareOptions options)
+            {
+                m_options = options ?? new DomCompareOptions();
+            }
+
+            public readonly List<string> Differences = new List<string>();
+
+            public void AddRoot(DomNode root, string path)
+            {
+                if (root != null)
+                    m_roots[root] = path;
+            }
+
+            public void Add(string difference)
+            {
+                if (Differences.Count < m_options.MaxDifferences)
+                    Differences.Add(difference);
+            }
+
+            public void CompareNodes(DomNode expected, DomNode actual)
+            {
+                if (Differences.Count >= m_options.MaxDifferences)
+                    return;
+
+                if (expected == null || actual == null)
+                {
+                    if (expected != actual)
+                        Add(string.Format("{0}: node is {1}, expected {2}",
+                            GetPath(expected ?? actual), Describe(actual), Describe(expected)));
+                    return;
+                }
+
+                if (expected.Type != actual.Type && expected.Type.Name != actual.Type.Name)
+                {
+                    Add(string.Format("{0}: node type is {1}, expected {2}",
+                        GetPath(expected), actual.Type.Name, expected.Type.Name));
+                    return;
+                }
+
+                m_matches[expected] = actual;
+                bool sameType = expected.Type == actual.Type;
+
+                foreach (AttributeInfo info in expected.Type.Attributes)
+                {
+                    if (!IsCompared(info))
+                        continue;
+
+                    AttributeInfo actualInfo = sameType ? info : actual.Type.GetAttributeInfo(info.Name);
+                    if (actualInfo == null)
+                    {
+                        Add(string.Format("{0}: attribute '{1}' is missing", GetPath(expected), info.Name));
+                        continue;
+                    }
+
+                    if (info.Type.Type == AttributeTypes.Reference)
+                    {
+                        if (m_options.CompareReferences)
+                            m_references.Add(new PendingReference(expected, actual, info, actualInfo));
+                        continue;
+                    }
+
+                    object expectedValue = expected.GetAttribute(info);
+                    object actualValue = actual.GetAttribute(actualInfo);
+                    if (!AreEqual(info.Type, expectedValue, actualValue))
+                    {
+                        Add(string.Format("{0}: attribute '{1}' is {2}, expected {3}", GetPath(expected), info.Name,
+                            Format(info.Type, actualValue), Format(info.Type, expectedValue)));
+                    }
+                }
+
+                foreach (ChildInfo info in expected.Type.Children)
+                {
+                    if (!IsCompared(info))
+                        continue;
+
+                    ChildInfo actualInfo = sameType ? info : actual.Type.GetChildInfo(info.Name);
+                    if (actualInfo == null)
+                    {
+                        Add(string.Format("{0}: child '{1}' is missing", GetPath(expected), info.Name));
+                        continue;
+                    }
+
+                    if (info.IsList)
+                    {
+                        IList<DomNode> expectedChildren = expected.GetChildList(info);
+                        IList<DomNode> actualChildren = actual.GetChildList(actualInfo);
+                        if (expectedChildren.Count != actualChildren.Count)
+                        {
+                            Add(string.Format("{0}: '{1}' has {2} children, expected {3}", GetPath(expected),
+                                info.Name, actualChildren.Count, expectedChildren.Count));
+                        }
+
+                        int count = Math.Min(expectedChildren.Count, actualChildren.Count);
+                        for (int i = 0; i < count; i++)
+                            CompareNodes(expectedChildren[i], actualChildren[i]);
+                    }
+                    else
+                    {
+                        DomNode expectedChild = expected.GetChild(info);
+                        DomNode actualChild = actual.GetChild(actualInfo);
+                        if (expectedChild == null || actualChild == null)
+                        {
+                            if (expectedChild != actualChild)
+                            {
+                                Add(string.Format("{0}: child '{1}' is {2}, expected {3}", GetPath(expected),
+                                    info.Name, Describe(actualChild), Describe(expectedChild)));
+                            }
+                        }
+                        else
+                        {
+                            CompareNodes(expectedChild, actualChild);
+                        }
+                    }
+                }
+
+                // types that only match by name may have members that the expected type lacks
+                if (!sameType)
+                {
+                    foreach (AttributeInfo info in actual.Type.Attributes)
+                    {
+                        if (IsCompared(info) && expected.Type.GetAttributeInfo(info.Name) == null)
+                            Add(string.Format("{0}: attribute '{1}' is unexpected", GetPath(expected), info.Name));
+                    }
+
+                    foreach (ChildInfo info in actual.Type.Children)
+                    {
+                        if (IsCompared(info) && expected.Type.GetChildInfo(info.Name) == null)
+                            Add(string.Format("{0}: child '{1}' is unexpected", GetPath(expected), info.Name));
+                    }
+                }
+            }
+
+            public void CompareReferences()
+            {
+                foreach (PendingReference reference in m_references)
+                {
+                    object expectedValue = reference.Expected.GetAttribute(reference.Info);
+                    object actualValue = reference.Actual.GetAttribute(reference.ActualInfo);
+                    if (!AreEqualReferences(expectedValue, actualValue))
+                    {
+                        Add(string.Format("{0}: reference '{1}' is {2}, expected {3}",
+                            GetPath(reference.Expected), reference.Info.Name,
+                            DescribeReference(actualValue), DescribeReference(expectedValue)));
+                    }
+                }
+            }
+
+            private bool IsCompared(AttributeInfo info)
+            {
+                return
+                    !m_options.IgnoredAttributes.Contains(info.Name) &&
+                    (m_options.ComparedAttributes == null || m_options.ComparedAttributes.Contains(info.Name));
+            }
+
+            private bool IsCompared(ChildInfo info)
+            {
+                return
+                    !m_options.IgnoredChildren.Contains(info.Name) &&
+                    (m_options.ComparedChildren == null || m_options.ComparedChildren.Contains(info.Name));
+            }
+
+            private bool AreEqual(AttributeType type, object expected, object actual)
+            {
+                if (m_options.Tolerance > 0 && expected != null && actual != null)
+                {
+                    switch (type.Type)
+                    {
+                        case AttributeTypes.Single:
+                        case AttributeTypes.Double:
+                        case AttributeTypes.Decimal:
+                            // values set from scripts may be boxed as another numeric type
+                            return Math.Abs(Convert.ToDouble(expected) - Convert.ToDouble(actual)) <= m_options.Tolerance;
+                        case AttributeTypes.SingleArray:
+                            if (expected is float[] && actual is float[])
+                                return AreClose((float[])expected, (float[])actual);
+                            break;
+                        case AttributeTypes.DoubleArray:
+                            if (expected is double[] && actual is double[])
+                                return AreClose((double[])expected, (double[])actual);
+                            break;
+                    }
+                }
+
+                return type.AreEqual(expected, actual);
+            }
+
+            private bool AreClose(float[] expected, float[] actual)
+            {
+                if (expected.Length != actual.Length)
+                    return false;
+                for (int i = 0; i < expected.Length; i++)
+                    if (Math.Abs(expected[i] - actual[i]) > m_options.Tolerance)
+                        return false;
+                return true;
+            }
+
+            private bool AreClose(double[] expected, double[] actual)
+            {
+                if (expected.Length != actual.Length)
+                    return false;
+                for (int i = 0; i < expected.Length; i++)
+                    if (Math.Abs(expected[i] - actual[i]) > m_options.Tolerance)
+                        return false;
+                return true;
+            }
+
+            private bool AreEqualReferences(object expected, object actual)
+            {
+                DomNode expectedNode = expected as DomNode;
+                DomNode actualNode = actual as DomNode;
+                if (expectedNode == null || actualNode == null)
+                    return object.Equals(expected, actual);
+
+                // references within the compared subtrees must refer to the matching node
+                DomNode match;
+                if (m_matches.TryGetValue(expectedNode, out match))
+                    return match == actualNode;
+                if (expectedNode == actualNode)
+                    return true;
+
+                // other references may refer to equivalent nodes in another document: nodes with
+                //  the same id, or if they have no id, at the same place in their documents
+                if (expectedNode.Type.Name != actualNode.Type.Name)
+                    return false;
+                string id = expectedNode.GetId();
+                if (id != null)
+                    return id == actualNode.GetId();
+                return AreAtSamePlace(expectedNode, actualNode);
+            }
+
+            private static bool AreAtSamePlace(DomNode node1, DomNode node2)
+            {
+                while (node1.Parent != null && node2.Parent != null)
+                {
+                    ChildInfo info = node1.ChildInfo;
+                    if (info.Name != node2.ChildInfo.Name)
+                        return false;
+                    if (info.IsList &&
+                        node1.Parent.GetChildList(info).IndexOf(node1) != node2.Parent.GetChildList(node2.ChildInfo).IndexOf(node2))
+                        return false;
+
+                    node1 = node1.Parent;
+                    node2 = node2.Parent;
+                }
+                return node1.Parent == null && node2.Parent == null;
+            }
+
+            // builds the path of a node only when there is a difference to report, so that
+            //  comparing equal subtrees doesn't build any strings
+            private string GetPath(DomNode node)
+            {
+                return TryGetPath(node) ?? node.Type.Name;
+            }
+
+            // gets the path of a node within the compared subtrees, or null if it is outside them
+            private string TryGetPath(DomNode node)
+            {
+                List<string> names = new List<string>();
+                while (true)
+                {
+                    string rootPath;
+                    if (m_roots.TryGetValue(node, out rootPath))
+                    {
+                        names.Add(rootPath);
+                        break;
+                    }
+
+                    DomNode parent = node.Parent;
+                    if (parent == null)
+                        return null;
+
+                    ChildInfo info = node.ChildInfo;
+                    if (info.IsList)
+                        names.Add(info.Name + "[" + parent.GetChildList(info).IndexOf(node) + "]");
+                    else
+                        names.Add(info.Name);
+                    node = parent;
+                }
+
+                names.Reverse();
+                string path = string.Join("/", names.ToArray());
+                return path.Length > 0 ? path : "/";
+            }
+
+            private static string Describe(DomNode node)
+            {
+                return node != null ? node.Type.Name : "null";
+            }
+
+            private string DescribeReference(object value)
+            {
+                DomNode node = value as DomNode;
+                if (node == null)
+                    return value != null ? value.ToString() : "null";
+
+                string path = TryGetPath(node);
+                if (path != null)
+                    return path;
+
+                string id = node.GetId();
+                return id != null ? node.Type.Name + " '" + id + "'" : node.Type.Name;
+            }
+
+            private static string Format(AttributeType type, object value)
+            {
+                if (value == null)
+                    return "null";
+                return "'" + type.Convert(value) + "'";
+            }
+
+            private readonly DomCompareOptions m_options;
+            private readonly Dictionary<DomNode, string> m_roots = new Dictionary<DomNode, string>();
+            private readonly Dictionary<DomNode, DomNode> m_matches = new Dictionary<DomNode, DomNode>();
+            private readonly List<PendingReference> m_references = new List<PendingReference>();
+        }
+
+        private struct PendingReference
+        {
+            public PendingReference(DomNode expected, DomNode actual, AttributeInfo info, AttributeInfo actualInfo)
+            {
+                Expected = expected;
+                Actual = actual;
+                Info = info;
+                ActualInfo = actualInfo;
+            }
+
+            public readonly DomNode Expected;
+            public readonly DomNode Actual;
+            public readonly AttributeInfo Info;
+            public readonly AttributeInfo ActualInfo;
+        }
+    }
+}
@@ -0,0 +1,91 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System.Collections.Generic;
+
+namespace Sce.Atf.Dom
+{
+    /// <summary>
+    /// Options for comparing DOM node subtrees with DomCompare</summary>
+    public class DomCompareOptions
+    {
+        /// <summary>
+        /// Constructor</summary>
+        public DomCompareOptions()
+        {
+            m_ignoredAttributes = new HashSet<string>();
+            m_ignoredChildren = new HashSet<string>();
+            m_compareReferences = true;
+            m_maxDifferences = 100;
+        }
+
+        /// <summary>
+        /// Gets or sets the largest difference allowed between floating point attribute values,
+        /// including the elements of floating point arrays. The default is 0.</summary>
+        public double Tolerance
+        {
+            get { return m_tolerance; }
+            set { m_tolerance = value; }
+        }
+
+        /// <summary>
+        /// Gets the names of attributes that are not compared</summary>
+        public ICollection<string> IgnoredAttributes
+        {
+            get { return m_ignoredAttributes; }
+        }
+
+        /// <summary>
+        /// Gets the names of children and child lists that are not compared</summary>
+        public ICollection<string> IgnoredChildren
+        {
+            get { return m_ignoredChildren; }
+        }
+
+        /// <summary>
+        /// Gets or sets the names of the only attributes that are compared, of any node type, or
+        /// null to compare all attributes. Ignored attributes are never compared. The default is null.</summary>
+        /// <remarks>Use this to compare the same fields as a check that picked them one by one.</remarks>
+        public ICollection<string> ComparedAttributes
+        {
+            get { return m_comparedAttributes; }
+            set { m_comparedAttributes = value; }
+        }
+
+        /// <summary>
+        /// Gets or sets the names of the only children and child lists that are compared, of any
+        /// node type, or null to compare all children. An empty collection compares only the
+        /// nodes themselves. Ignored children are never compared. The default is null.</summary>
+        public ICollection<string> ComparedChildren
+        {
+            get { return m_comparedChildren; }
+            set { m_comparedChildren = value; }
+        }
+
+        /// <summary>
+        /// Gets or sets whether reference attributes are compared. References to nodes within the
+        /// compared subtrees must refer to corresponding nodes; other references must refer to the
+        /// same node, or to nodes of the same type with the same id or, for nodes without an id,
+        /// at the same place in their documents. The default is true.</summary>
+        public bool CompareReferences
+        {
+            get { return m_compareReferences; }
+            set { m_compareReferences = value; }
+        }
+
+        /// <summary>
+        /// Gets or sets the number of differences after which the comparison stops. The default is 100.</summary>
+        public int MaxDifferences
+        {
+            get { return m_maxDifferences; }
+            set { m_maxDifferences = value; }
+        }
+
+        private double m_tolerance;
+        private readonly HashSet<string> m_ignoredAttributes;
+        private readonly HashSet<string> m_ignoredChildren;
+        private ICollection<string> m_comparedAttributes;
+        private ICollection<string> m_comparedChildren;
+        private bool m_compareReferences;
+        private int m_maxDifferences;
+    }
+}
@@ -5,6 +5,7 @@
 using System.Collections.ObjectModel;
 using System.Linq;
 using System.Reflection;
+using System.Runtime.InteropServices;
 using Sce.Atf.Adaptation;
 using System.Diagnostics;
 
@@ -168,39 +169,68 @@ public IEnumerable<DomNode> Children
 
         /// <summary>
         /// Gets the enumeration of the subtree rooted at this node, in pre-order (also known
-        /// as depth-first)</summary>
+        /// as depth-first). Children that haven't been loaded are loaded.</summary>
         public IEnumerable<DomNode> Subtree
         {
-            get
+            get { return GetSubtree(true); }
+        }
+
+        /// <summary>
+        /// Gets the enumeration of the nodes of the subtree rooted at this node that have been
+        /// loaded, in pre-order (also known as depth-first). Unlike Subtree, this doesn't load
+        /// the children of nodes that have unloaded children.</summary>
+        public IEnumerable<DomNode> LoadedSubtree
+        {
+            get { return GetSubtree(false); }
+        }
+
+        /// <summary>
+        /// Gets whether this node's children are loaded on demand and haven't been loaded yet.
+        /// They are loaded the first time that they are accessed.</summary>
+        /// <remarks>Readers, such as DomXmlReader, can leave the children of deep nodes to be
+        /// loaded on demand. Loading children doesn't raise ChildInserting and ChildInserted
+        /// events, so it isn't recorded in transactions; the ChildLoaded event is raised instead.</remarks>
+        public bool HasUnloadedChildren
+        {
+            get { return m_childLoader != null; }
+        }
+
+        private IEnumerable<DomNode> GetSubtree(bool loadChildren)
+        {
+            Stack<DomNode> nodes = new Stack<DomNode>();
+            nodes.Push(this);
+
+            while (nodes.Count > 0)
             {
-                Stack<DomNode> nodes = new Stack<DomNode>();
-                nodes.Push(this);
+                DomNode node = nodes.Pop();
+                yield return node;
 
-                while (nodes.Count > 0)
+                if (node.m_childLoader != null)
                 {
-                    DomNode node = nodes.Pop();
-                    yield return node;
+                    if (!loadChildren)
+                        continue;
+                    node.LoadChildren();
+                }
 
-                    // push children in reverse order so pop gives nodes in pre-order
-                    foreach (ChildInfo childInfo in node.Type.Children)
+                // push children in reverse order so pop gives nodes in pre-order
+                foreach (ChildInfo childInfo in node.Type.Children)
+                {
+                    int i = childInfo.Index + node.Type.FirstChildIndex;
+                    if (childInfo.IsList)
                     {
-                        int i = childInfo.Index + node.Type.FirstChildIndex;
-                        if (childInfo.IsList)
-                        {
-                            NodeList.ChildList children = node.m_data[i] as NodeList.ChildList;
-                            if (children != null)
-                            {
-                                for (int j = children.Count - 1; j >= 0; j--)
-                                    nodes.Push(children[j]);
-                            }
-                        }
-                        else
+                        NodeList.ChildList children = node.m_data[i] as NodeList.ChildList;
+                        if (children != null)
                         {
-                            DomNode child = node.m_data[i] as DomNode;
-                            if (child != null)
-                                nodes.Push(child);
+                            for (int j = children.Count - 1; j >= 0; j--)
+                                nodes.Push(children[j]);
                         }
                     }
+                    else
+                    {
+                        DomNode child = node.m_data[i] as DomNode;
+                        if (child != null)
+                            nodes.Push(child);
+                    }
                 }
             }
         }
@@ -307,10 +337,11 @@ public static DomNode GetLowestCommonAncestor(IEnumerable<DomNode> nodes)
         /// usually happens just before the adapter is requested for the first time, but
         /// some adapters (e.g. validators) are never referenced but must be attached to
         /// the underlying DOM data.</summary>
-        /// <remarks>Call this method when a newly constructed DOM sub-tree is complete.</remarks>
+        /// <remarks>Call this method when a newly constructed DOM sub-tree is complete. Nodes
+        /// that haven't been loaded yet have their extensions initialized when they are loaded.</remarks>
         public void InitializeExtensions()
         {
-            foreach (DomNode node in Subtree)
+            foreach (DomNode node in LoadedSubtree)
             {
                 foreach (ExtensionInfo extensionInfo in node.Type.Extensions)
                 {
@@ -362,7 +393,55 @@ public object GetAttribute(AttributeInfo attributeInfo)
         public object GetLocalAttribute(AttributeInfo attributeInfo)
         {
             int index = m_type.GetDataIndex(attributeInfo);
-            return m_data[index];
+            return GetLocalValue(index);
+        }
+
+        /// <summary>
+        /// Gets the value of a float attribute without boxing it</summary>
+        /// <param name="attributeInfo">Attribute metadata</param>
+        /// <returns>Attribute value, as GetAttribute would return it</returns>
+        public float GetFloat(AttributeInfo attributeInfo)
+        {
+            PackedValue value;
+            if (TryGetPackedValue(attributeInfo, AttributeTypes.Single, out value))
+                return value.Single;
+            return (float)GetAttribute(attributeInfo);
+        }
+
+        /// <summary>
+        /// Gets the value of a double attribute without boxing it</summary>
+        /// <param name="attributeInfo">Attribute metadata</param>
+        /// <returns>Attribute value, as GetAttribute would return it</returns>
+        public double GetDouble(AttributeInfo attributeInfo)
+        {
+            PackedValue value;
+            if (TryGetPackedValue(attributeInfo, AttributeTypes.Double, out value))
+                return value.Double;
+            return (double)GetAttribute(attributeInfo);
+        }
+
+        /// <summary>
+        /// Gets the value of an int attribute without boxing it</summary>
+        /// <param name="attributeInfo">Attribute metadata</param>
+        /// <returns>Attribute value, as GetAttribute would return it</returns>
+        public int GetInt(AttributeInfo attributeInfo)
+        {
+            PackedValue value;
+            if (TryGetPackedValue(attributeInfo, AttributeTypes.Int32, out value))
+                return value.Int32;
+            return (int)GetAttribute(attributeInfo);
+        }
+
+        /// <summary>
+        /// Gets the value of a bool attribute without boxing it</summary>
+        /// <param name="attributeInfo">Attribute metadata</param>
+        /// <returns>Attribute value, as GetAttribute would return it</returns>
+        public bool GetBool(AttributeInfo attributeInfo)
+        {
+            PackedValue value;
+            if (TryGetPackedValue(attributeInfo, AttributeTypes.Boolean, out value))
+                return value.Boolean;
+            return (bool)GetAttribute(attributeInfo);
         }
 
         /// <summary>
@@ -420,10 +499,13 @@ public void SetAttributeIfDefault(AttributeInfo attributeInfo, object value)
         /// Sets the attribute corresponding to the attribute metadata</summary>
         /// <param name="attributeInfo">Attribute metadata</param>
         /// <param name="value">New attribute value</param>
+        /// <remarks>Values of scalar attribute types, such as float and int, are stored unboxed,
+        /// so GetLocalAttribute and GetAttribute return new boxes for them. Use the typed accessors,
+        /// such as GetFloat and SetFloat, to avoid boxing.</remarks>
         public void SetAttribute(AttributeInfo attributeInfo, object value)
         {
             int index = m_type.GetDataIndex(attributeInfo);
-            object oldValue = m_data[index];
+            object oldValue = GetLocalValue(index);
 
             // The old value should be the same as GetAttribute() would have returned, to ensure
             //  that the old value is a valid value.
@@ -435,7 +517,7 @@ public void SetAttribute(AttributeInfo attributeInfo, object value)
             {
                 var e = new AttributeEventArgs(this, attributeInfo, oldValue, value);
                 RaiseAttributeChanging(e);
-                m_data[index] = value;
+                StoreValue(index, value);
                 DiagnosticAttributeChanged.Raise(this, e);
                 RaiseAttributeChanged(e);
             }
@@ -444,10 +526,161 @@ public void SetAttribute(AttributeInfo attributeInfo, object value)
                 // Client code may rely on GetLocalAttribute() to tell the difference between an attribute
                 //  being at its default value (GetLocalAttribute() will return null) or if it was set to
                 //  a value that equals the default value (non-null).
-                m_data[index] = value;
+                StoreValue(index, value);
             }
         }
 
+        /// <summary>
+        /// Sets the value of a float attribute. Unless the change raises events, the value isn't
+        /// boxed.</summary>
+        /// <param name="attributeInfo">Attribute metadata</param>
+        /// <param name="value">New attribute value</param>
+        public void SetFloat(AttributeInfo attributeInfo, float value)
+        {
+            PackedValue packed = new PackedValue();
+            packed.Single = value;
+            if (!TrySetPackedValue(attributeInfo, AttributeTypes.Single, packed))
+                SetAttribute(attributeInfo, value);
+        }
+
+        /// <summary>
+        /// Sets the value of a double attribute. Unless the change raises events, the value isn't
+        /// boxed.</summary>
+        /// <param name="attributeInfo">Attribute metadata</param>
+        /// <param name="value">New attribute value</param>
+        public void SetDouble(AttributeInfo attributeInfo, double value)
+        {
+            PackedValue packed = new PackedValue();
+            packed.Double = value;
+            if (!TrySetPackedValue(attributeInfo, AttributeTypes.Double, packed))
+                SetAttribute(attributeInfo, value);
+        }
+
+        /// <summary>
+        /// Sets the value of an int attribute. Unless the change raises events, the value isn't
+        /// boxed.</summary>
+        /// <param name="attributeInfo">Attribute metadata</param>
+        /// <param name="value">New attribute value</param>
+        public void SetInt(AttributeInfo attributeInfo, int value)
+        {
+            PackedValue packed = new PackedValue();
+            packed.Int32 = value;
+            if (!TrySetPackedValue(attributeInfo, AttributeTypes.Int32, packed))
+                SetAttribute(attributeInfo, value);
+        }
+
+        /// <summary>
+        /// Sets the value of a bool attribute. Unless the change raises events, the value isn't
+        /// boxed.</summary>
+        /// <param name="attributeInfo">Attribute metadata</param>
+        /// <param name="value">New attribute value</param>
+        public void SetBool(AttributeInfo attributeInfo, bool value)
+        {
+            PackedValue packed = new PackedValue();
+            packed.Boolean = value;
+            if (!TrySetPackedValue(attributeInfo, AttributeTypes.Boolean, packed))
+                SetAttribute(attributeInfo, value);
+        }
+
+        /// <summary>
+        /// Gets whether values of an attribute type are stored unboxed</summary>
+        internal static bool IsPackedType(AttributeTypes type)
+        {
+            return PackedValue.IsPackedType(type);
+        }
+
+        private object GetLocalValue(int index)
+        {
+            object value = m_data[index];
+            if (value == s_packedValue)
+                value = m_values[m_type.PackedIndices[index]].Box(m_type.GetAttributeInfo(index).Type.Type);
+            return value;
+        }
+
+        private void StoreValue(int index, object value)
+        {
+            int packedIndex = m_type.PackedIndices[index];
+            if (packedIndex >= 0 && value != null)
+            {
+                if (m_values == null)
+                    m_values = new PackedValue[m_type.PackedCount];
+                if (m_values[packedIndex].TrySet(m_type.GetAttributeInfo(index).Type.Type, value))
+                {
+                    m_data[index] = s_packedValue;
+                    return;
+                }
+            }
+
+            m_data[index] = value;
+        }
+
+        private bool TryGetPackedValue(AttributeInfo attributeInfo, AttributeTypes type, out PackedValue value)
+        {
+            int index = m_type.GetDataIndex(attributeInfo);
+            if (m_data[index] == s_packedValue && m_type.GetAttributeInfo(index).Type.Type == type)
+            {
+                value = m_values[m_type.PackedIndices[index]];
+                return true;
+            }
+
+            value = new PackedValue();
+            return false;
+        }
+
+        // sets a packed value the way SetAttribute() does, or returns false to let SetAttribute()
+        //  handle attributes of other types, and values that aren't stored packed
+        private bool TrySetPackedValue(AttributeInfo attributeInfo, AttributeTypes type, PackedValue value)
+        {
+            int index = m_type.GetDataIndex(attributeInfo);
+            int packedIndex = m_type.PackedIndices[index];
+            if (packedIndex < 0 || m_type.GetAttributeInfo(index).Type.Type != type)
+                return false;
+
+            object local = m_data[index];
+            PackedValue oldValue = new PackedValue();
+            if (local == s_packedValue)
+                oldValue = m_values[packedIndex];
+            else if (local != null || !oldValue.TrySet(type, GetAttribute(attributeInfo)))
+                return false;
+
+            if (!oldValue.AreEqual(type, value))
+            {
+                if (HasAttributeListeners())
+                {
+                    var e = new AttributeEventArgs(this, attributeInfo,
+                        local != null ? oldValue.Box(type) : GetAttribute(attributeInfo), value.Box(type));
+                    RaiseAttributeChanging(e);
+                    StoreValue(index, e.NewValue);
+                    DiagnosticAttributeChanged.Raise(this, e);
+                    RaiseAttributeChanged(e);
+                    return true;
+                }
+            }
+            else if (local != null)
+            {
+                return true;
+            }
+
+            // nothing is listening, or the value is being set to the default value
+            if (m_values == null)
+                m_values = new PackedValue[m_type.PackedCount];
+            m_values[packedIndex] = value;
+            m_data[index] = s_packedValue;
+            return true;
+        }
+
+        private bool HasAttributeListeners()
+        {
+            if (DiagnosticAttributeChanged != null)
+                return true;
+
+            foreach (DomNode node in Lineage)
+                if (node.m_eventHandlers != null)
+                    return true;
+
+            return false;
+        }
+
         /// <summary>
         /// Gets the child corresponding to the given child metadata</summary>
         /// <param name="childInfo">Child metadata for when there is a maximum of one child</param>
@@ -457,6 +690,9 @@ public DomNode GetChild(ChildInfo childInfo)
             if (childInfo.IsList)
                 throw new InvalidOperationException("field is a list");
 
+            if (m_childLoader != null)
+                LoadChildren();
+
             int index = m_type.GetDataIndex(childInfo);
             return m_data[index] as DomNode;
         }
@@ -480,6 +716,9 @@ public IList<DomNode> GetChildList(ChildInfo childInfo)
         /// Does not return null.</returns>
         public IEnumerable<DomNode> GetChildren(ChildInfo childInfo)
         {
+            if (m_childLoader != null)
+                LoadChildren();
+
             int index = m_type.GetDataIndex(childInfo);
             if (childInfo.IsList)
             {
@@ -507,6 +746,9 @@ public void SetChild(ChildInfo childInfo, DomNode child)
             if (childInfo.IsList)
                 throw new InvalidOperationException("field is a list");
 
+            if (m_childLoader != null)
+                LoadChildren();
+
             int index = m_type.GetDataIndex(childInfo);
             DomNode oldChild = m_data[index] as DomNode;
 
@@ -566,6 +808,21 @@ public object GetExtension(ExtensionInfo extensionInfo)
             return extension;
         }
 
+        /// <summary>
+        /// Gets the extension at a data index, which must be an adapter, initializing it if necessary</summary>
+        /// <param name="index">Data index of extension</param>
+        /// <returns>Extension adapter</returns>
+        internal IAdapter GetExtensionAdapter(int index)
+        {
+            IAdapter adapter = (IAdapter)m_data[index];
+
+            // this check is required, as shown by our unit tests
+            if (adapter.Adaptee == null)
+                adapter.Adaptee = this;
+
+            return adapter;
+        }
+
         /// <summary>
         /// Event that is raised before an attribute is changed to a new value on this DomNode
         /// or any DomNode of the sub-tree</summary>
@@ -620,6 +877,16 @@ public object GetExtension(ExtensionInfo extensionInfo)
             remove { GetEventHandlers().ChildRemoved -= value; }
         }
 
+        /// <summary>
+        /// Event that is raised after a child that was loaded on demand is added to this DomNode
+        /// or any DomNode of the sub-tree. The event is raised for each loaded child, after all
+        /// of the node's children have been loaded.</summary>
+        public event EventHandler<ChildEventArgs> ChildLoaded
+        {
+            add { GetEventHandlers().ChildLoaded += value; }
+            remove { GetEventHandlers().ChildLoaded -= value; }
+        }
+
         /// <summary>
         /// Subscribes the destination node to this DomNode's events</summary>
         /// <param name="destination">DomNode to be added to this DomNode's subscribers</param>
@@ -644,11 +911,7 @@ public void UnsubscribeFromEvents(DomNode destination)
         /// <returns>Adapter of the specified type, or null</returns>
         public object GetAdapter(Type type)
         {
-            // try a normal cast
-            if (type.IsAssignableFrom(typeof(DomNode)))
-                return this;
-
-            // try to get an adapter
+            // the node type knows whether a normal cast works, or which adapter to get
             return DomNodeType.GetAdapter(this, type);
         }
 
@@ -917,6 +1180,17 @@ internal IEnumerable<EventHandler<ChildEventArgs>> GetChildRemovedHandlers()
                             yield return listener;
             }
 
+            public event EventHandler<ChildEventArgs> ChildLoaded;
+
+            internal void RaiseChildLoaded(ChildEventArgs e)
+            {
+                ChildLoaded.Raise(m_node, e);
+
+                if (m_subscribers != null)
+                    foreach (DomNode subscriber in m_subscribers)
+                        subscriber.RaiseChildLoaded(e);
+            }
+
             internal void Subscribe(DomNode subscriber)
             {
                 if (m_subscribers == null)
@@ -1026,6 +1300,13 @@ internal IEnumerable<EventHandler<ChildEventArgs>> GetChildRemovedHandlers()
                         yield return listener;
         }
 
+        private void RaiseChildLoaded(ChildEventArgs e)
+        {
+            foreach (DomNode node in Lineage)
+                if (node.m_eventHandlers != null)
+                    node.m_eventHandlers.RaiseChildLoaded(e);
+        }
+
         private NodeEventHandlers GetEventHandlers()
         {
             if (m_eventHandlers == null)
@@ -1063,16 +1344,97 @@ public override int GetHashCode()
 
         private NodeList.ChildList GetChildListObject(ChildInfo childInfo)
         {
+            if (m_childLoader != null)
+                LoadChildren();
+
             int index = m_type.GetDataIndex(childInfo);
             return m_data[index] as NodeList.ChildList;
         }
 
         private void SetChildListObject(ChildInfo childInfo, NodeList.ChildList list)
         {
+            if (m_childLoader != null)
+                LoadChildren();
+
             int index = m_type.GetDataIndex(childInfo);
             m_data[index] = list;
         }
 
+        /// <summary>
+        /// Sets the method that loads this node's children when they are first accessed. The
+        /// method must add the children with AddLoadedChild().</summary>
+        /// <param name="childLoader">Method that loads the node's children</param>
+        internal void SetChildLoader(Action<DomNode> childLoader)
+        {
+            m_childLoader = childLoader;
+        }
+
+        /// <summary>
+        /// Adds a child that was loaded on demand, without raising any events</summary>
+        /// <param name="childInfo">Child metadata</param>
+        /// <param name="child">Loaded child</param>
+        internal void AddLoadedChild(ChildInfo childInfo, DomNode child)
+        {
+            int index = m_type.GetDataIndex(childInfo);
+            if (childInfo.IsList)
+            {
+                NodeList.ChildList list = m_data[index] as NodeList.ChildList;
+                if (list == null)
+                {
+                    list = new NodeList.ChildList(this, childInfo);
+                    m_data[index] = list;
+                }
+                list.AddLoaded(child);
+            }
+            else
+            {
+                m_data[index] = child;
+                child.SetParent(this, childInfo);
+            }
+        }
+
+        /// <summary>
+        /// Loads the children of a node whose children are loaded on demand</summary>
+        internal void LoadChildren()
+        {
+            Action<DomNode> childLoader = m_childLoader;
+            if (childLoader == null)
+                return;
+
+            // clear the loader first, as the children are accessed while they're added
+            m_childLoader = null;
+            childLoader(this);
+
+            // the loaded nodes join the subtree in the state that the rest of it is in
+            bool initializeExtensions = AreExtensionsInitialized();
+            foreach (ChildInfo childInfo in m_type.Children)
+            {
+                int index = 0;
+                foreach (DomNode child in GetChildren(childInfo))
+                {
+                    if (initializeExtensions)
+                        child.InitializeExtensions();
+                    RaiseChildLoaded(new ChildEventArgs(this, childInfo, child, index));
+                    index++;
+                }
+            }
+        }
+
+        private bool AreExtensionsInitialized()
+        {
+            // use the closest node that has adapters, as the root may not have any
+            foreach (DomNode node in Lineage)
+            {
+                foreach (ExtensionInfo extensionInfo in node.m_type.Extensions)
+                {
+                    IAdapter nodeAdapter = node.GetExtension(extensionInfo) as IAdapter;
+                    if (nodeAdapter != null)
+                        return nodeAdapter.Adaptee != null;
+                }
+            }
+            return false;
+        }
+
         private void SetParent(DomNode parent, ChildInfo childInfo)
         {
             m_parent = parent;
@@ -1108,6 +1470,11 @@ private DomNodeDebugger _DebugInfo
         private ChildInfo m_childInfo;
         private readonly object[] m_data;
         private NodeEventHandlers m_eventHandlers;
+        private Action<DomNode> m_childLoader;
+        private PackedValue[] m_values;
+
+        // marks attributes whose values are in m_values
+        private static readonly object s_packedValue = new object();
 
         // The properties of this class are designed to appear in the Visual Studio debugger in
         //  a useful way. For example, IList<> is more useful than IEnumerable<> in the debugger view.
@@ -1219,6 +1586,135 @@ public ListenerDebugger(Delegate d)
             public readonly object Target;
         }
 
+        // Unboxed storage for the value of a scalar attribute
+        [StructLayout(LayoutKind.Explicit)]
+        private struct PackedValue
+        {
+            [FieldOffset(0)] public bool Boolean;
+            [FieldOffset(0)] public sbyte Int8;
+            [FieldOffset(0)] public byte UInt8;
+            [FieldOffset(0)] public short Int16;
+            [FieldOffset(0)] public ushort UInt16;
+            [FieldOffset(0)] public int Int32;
+            [FieldOffset(0)] public uint UInt32;
+            [FieldOffset(0)] public long Int64;
+            [FieldOffset(0)] public ulong UInt64;
+            [FieldOffset(0)] public float Single;
+            [FieldOffset(0)] public double Double;
+
+            public static bool IsPackedType(AttributeTypes type)
+            {
+                switch (type)
+                {
+                    case AttributeTypes.Boolean:
+                    case AttributeTypes.Int8:
+                    case AttributeTypes.UInt8:
+                    case AttributeTypes.Int16:
+                    case AttributeTypes.UInt16:
+                    case AttributeTypes.Int32:
+                    case AttributeTypes.UInt32:
+                    case AttributeTypes.Int64:
+                    case AttributeTypes.UInt64:
+                    case AttributeTypes.Single:
+                    case AttributeTypes.Double:
+                        return true;
+                }
+                return false;
+            }
+
+            // stores the value if it has the attribute type's CLR type
+            public bool TrySet(AttributeTypes type, object value)
+            {
+                switch (type)
+                {
+                    case AttributeTypes.Boolean:
+                        if (!(value is bool)) return false;
+                        Boolean = (bool)value;
+                        return true;
+                    case AttributeTypes.Int8:
+                        if (!(value is sbyte)) return false;
+                        Int8 = (sbyte)value;
+                        return true;
+                    case AttributeTypes.UInt8:
+                        if (!(value is byte)) return false;
+                        UInt8 = (byte)value;
+                        return true;
+                    case AttributeTypes.Int16:
+                        if (!(value is short)) return false;
+                        Int16 = (short)value;
+                        return true;
+                    case AttributeTypes.UInt16:
+                        if (!(value is ushort)) return false;
+                        UInt16 = (ushort)value;
+                        return true;
+                    case AttributeTypes.Int32:
+                        if (!(value is int)) return false;
+                        Int32 = (int)value;
+                        return true;
+                    case AttributeTypes.UInt32:
+                        if (!(value is uint)) return false;
+                        UInt32 = (uint)value;
+                        return true;
+                    case AttributeTypes.Int64:
+                        if (!(value is long)) return false;
+                        Int64 = (long)value;
+                        return true;
+                    case AttributeTypes.UInt64:
+                        if (!(value is ulong)) return false;
+                        UInt64 = (ulong)value;
+                        return true;
+                    case AttributeTypes.Single:
+                        if (!(value is float)) return false;
+                        Single = (float)value;
+                        return true;
+                    case AttributeTypes.Double:
+                        if (!(value is double)) return false;
+                        Double = (double)value;
+                        return true;
+                }
+                return false;
+            }
+
+            public object Box(AttributeTypes type)
+            {
+                switch (type)
+                {
+                    case AttributeTypes.Boolean: return Boolean;
+                    case AttributeTypes.Int8: return Int8;
+                    case AttributeTypes.UInt8: return UInt8;
+                    case AttributeTypes.Int16: return Int16;
+                    case AttributeTypes.UInt16: return UInt16;
+                    case AttributeTypes.Int32: return Int32;
+                    case AttributeTypes.UInt32: return UInt32;
+                    case AttributeTypes.Int64: return Int64;
+                    case AttributeTypes.UInt64: return UInt64;
+                    case AttributeTypes.Single: return Single;
+                    case AttributeTypes.Double: return Double;
+                }
+                throw new InvalidOperationException("Attribute type isn't packed");
+            }
+
+            // compares values as AttributeType.AreEqual() does, with Equals()
+            public bool AreEqual(AttributeTypes type, PackedValue other)
+            {
+                switch (type)
+                {
+                    case AttributeTypes.Boolean: return Boolean == other.Boolean;
+                    case AttributeTypes.Int8: return Int8 == other.Int8;
+                    case AttributeTypes.UInt8: return UInt8 == other.UInt8;
+                    case AttributeTypes.Int16: return Int16 == other.Int16;
+                    case AttributeTypes.UInt16: return UInt16 == other.UInt16;
+                    case AttributeTypes.Int32: return Int32 == other.Int32;
+                    case AttributeTypes.UInt32: return UInt32 == other.UInt32;
+                    case AttributeTypes.Int64: return Int64 == other.Int64;
+                    case AttributeTypes.UInt64: return UInt64 == other.UInt64;
+                    case AttributeTypes.Single: return Single.Equals(other.Single);
+                    case AttributeTypes.Double: return Double.Equals(other.Double);
+                }
+                throw new InvalidOperationException("Attribute type isn't packed");
+            }
+        }
+
         // Lightweight List Support
 
         private class NodeList : IList<DomNode>
@@ -1488,6 +1984,13 @@ public ChildList(DomNode node, ChildInfo childInfo)
                     m_childInfo = childInfo;
                 }
 
+                // adds a child that was loaded on demand, without raising events
+                public void AddLoaded(DomNode item)
+                {
+                    Items.Add(item);
+                    item.SetParent(m_node, m_childInfo);
+                }
+
                 protected override void InsertItem(int index, DomNode item)
                 {
                     if (item == null)
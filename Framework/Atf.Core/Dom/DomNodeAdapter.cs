@@ -90,6 +90,11 @@ protected T GetParentAs<T>()
         /// the default value of type T (if T is a value type)</returns>
         protected T GetAttribute<T>(AttributeInfo attributeInfo)
         {
+            // read float, double, int and bool attributes without boxing them
+            Func<DomNode, AttributeInfo, T> getValue = TypedGetter<T>.GetValue;
+            if (getValue != null && attributeInfo.Type.ClrType == typeof(T))
+                return getValue(DomNode, attributeInfo);
+
             object value = DomNode.GetAttribute(attributeInfo);
 
             // if value is not null, attempt the cast; an invalid type will then cause
@@ -219,6 +224,26 @@ public override string ToString()
             return base.ToString() + ", DomNode is not set";
         }
 
+        // The DomNode accessor that reads values of type T without boxing them, or null
+        private static class TypedGetter<T>
+        {
+            public static readonly Func<DomNode, AttributeInfo, T> GetValue = Create();
+
+            private static Func<DomNode, AttributeInfo, T> Create()
+            {
+                object getValue = null;
+                if (typeof(T) == typeof(float))
+                    getValue = new Func<DomNode, AttributeInfo, float>((node, info) => node.GetFloat(info));
+                else if (typeof(T) == typeof(double))
+                    getValue = new Func<DomNode, AttributeInfo, double>((node, info) => node.GetDouble(info));
+                else if (typeof(T) == typeof(int))
+                    getValue = new Func<DomNode, AttributeInfo, int>((node, info) => node.GetInt(info));
+                else if (typeof(T) == typeof(bool))
+                    getValue = new Func<DomNode, AttributeInfo, bool>((node, info) => node.GetBool(info));
+                return (Func<DomNode, AttributeInfo, T>)getValue;
+            }
+        }
+
         private DomNode m_domNode;
     }
 }
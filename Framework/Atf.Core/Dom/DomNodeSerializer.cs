@@ -10,11 +10,17 @@ namespace Sce.Atf.Dom
     /// A class to support passing DOM node graphs between applications. This
     /// class has methods to serialize the node graph to and from byte arrays, and
     /// is Serializable itself, so can be used as the data in an IDataObject.</summary>
+    /// <remarks>The data starts with a header that holds the format version. Node type names
+    /// are written once, in a string table, and attribute values are written in binary form
+    /// where possible, as by DomBinaryWriter. Data in the original format, which has no header,
+    /// can still be deserialized.</remarks>
     public class DomNodeSerializer
     {
-        // TODO
-        //  Right now, DomNode attributes are serialized as strings; it would be more efficient
-        //   if attributes were serialized as bytes.
+        /// <summary>
+        /// The version of the format written by Serialize. Version 1 is the original format,
+        /// without a header, which wrote every node's type name and attribute values as
+        /// strings.</summary>
+        public const int Version = 2;
 
         /// <summary>
         /// Constructs the stream from nodes</summary>
@@ -25,32 +31,64 @@ public byte[] Serialize(IEnumerable<DomNode> nodes)
             if (nodes == null)
                 throw new ArgumentNullException("nodes");
 
-            byte[] result = EmptyArray<byte>.Instance;
+            // write to a reused buffer, so it doesn't have to grow for every payload, and copy the
+            //  data out once
+            MemoryStream stream = s_buffer ?? new MemoryStream();
+            s_buffer = null;
+            try
+            {
+                Serialize(nodes, stream);
+
+                byte[] result = new byte[stream.Length];
+                Buffer.BlockCopy(stream.GetBuffer(), 0, result, 0, result.Length);
+                return result;
+            }
+            finally
+            {
+                if (stream.Capacity <= MaxBufferSize)
+                {
+                    stream.SetLength(0);
+                    s_buffer = stream;
+                }
+            }
+        }
+
+        /// <summary>
+        /// Writes nodes to a stream, in the same format as Serialize(IEnumerable&lt;DomNode&gt;)</summary>
+        /// <param name="nodes">Nodes to serialize; there should be no duplicates</param>
+        /// <param name="stream">Stream to write to</param>
+        public void Serialize(IEnumerable<DomNode> nodes, Stream stream)
+        {
+            if (nodes == null)
+                throw new ArgumentNullException("nodes");
+            if (stream == null)
+                throw new ArgumentNullException("stream");
 
             // convert nodes to a list to avoid repeatedly enumerating them
             List<DomNode> nodeList = new List<DomNode>(nodes);
 
-            // assign node ids, so we can serialize internal references (and efficiently detect
-            //  external references)
-            Dictionary<DomNode, int> nodeIds = new Dictionary<DomNode, int>();
-            AssignNodeIds(nodeList, nodeIds);
+            // collect the type names, and number the nodes that are referenced within the data,
+            //  so the references can be restored; references to other nodes are dropped
+            List<string> typeNames = new List<string>();
+            Dictionary<DomNodeType, int> typeIds = new Dictionary<DomNodeType, int>();
+            Dictionary<DomNode, int> targetIds = new Dictionary<DomNode, int>();
+            int targetCount = AssignIds(nodeList, typeNames, typeIds, targetIds);
 
-            // serialize nodes as a stream of bytes
-            using (MemoryStream stream = new MemoryStream())
-            {
-                using (BinaryWriter writer = new BinaryWriter(stream))
-                {
-                    // write top level node count
-                    writer.Write(nodeList.Count);
+            // the writer isn't disposed, which would close the caller's stream
+            BinaryWriter writer = new BinaryWriter(stream);
+            writer.Write(HeaderMarker);
+            DomBinaryFormat.WriteCount(writer, Version);
 
-                    foreach (DomNode node in nodeList)
-                        Serialize(node, nodeIds, writer);
+            DomBinaryFormat.WriteCount(writer, typeNames.Count);
+            foreach (string typeName in typeNames)
+                writer.Write(typeName);
 
-                    result = stream.ToArray();
-                }
-            }
+            DomBinaryFormat.WriteCount(writer, targetCount);
+            DomBinaryFormat.WriteCount(writer, nodeList.Count);
+            foreach (DomNode node in nodeList)
+                Serialize(node, typeIds, targetIds, writer);
 
-            return result;
+            writer.Flush();
         }
 
         /// <summary>
@@ -65,112 +103,259 @@ public IEnumerable<DomNode> Deserialize(byte[] data, Func<string, DomNodeType> g
             if (getNodeType == null)
                 throw new ArgumentNullException("getNodeType");
 
-            List<DomNode> nodeList = new List<DomNode>();
-            List<Reference> references = new List<Reference>();
+            using (MemoryStream stream = new MemoryStream(data, false))
+                return Deserialize(stream, getNodeType);
+        }
 
-            // convert bytes back into Dom nodes
-            using (MemoryStream stream = new MemoryStream(data))
-            {
-                using (BinaryReader reader = new BinaryReader(stream))
-                {
-                    // read top level nodes
-                    int count = reader.ReadInt32();
-                    nodeList.Capacity = count;
+        /// <summary>
+        /// Deserialize DomNodes from a stream, which can be in any version of the format</summary>
+        /// <param name="stream">Stream to read from</param>
+        /// <param name="getNodeType">Method returning type of DOM node to obtain from data</param>
+        /// <returns>Deserialized nodes</returns>
+        public IEnumerable<DomNode> Deserialize(Stream stream, Func<string, DomNodeType> getNodeType)
+        {
+            if (stream == null)
+                throw new ArgumentNullException("stream");
+            if (getNodeType == null)
+                throw new ArgumentNullException("getNodeType");
 
-                    for (int i = 0; i < count; i++)
-                    {
-                        DomNode node = Deserialize(reader, getNodeType, references);
-                        nodeList.Add(node);
-                    }
-                }
+            // the reader isn't disposed, which would close the caller's stream
+            BinaryReader reader = new BinaryReader(stream);
+
+            // the original format starts with the number of top level nodes, which can't be
+            //  negative like the header marker
+            int count = reader.ReadInt32();
+            if (count != HeaderMarker)
+                return DeserializeVersion1(reader, count, getNodeType);
+
+            int version = DomBinaryFormat.ReadCount(reader);
+            if (version != Version)
+                throw new InvalidDataException("Unsupported serialized DOM version " + version);
+
+            // resolve each type once
+            TypeInfo[] types = new TypeInfo[DomBinaryFormat.ReadCount(reader)];
+            for (int i = 0; i < types.Length; i++)
+            {
+                DomNodeType type = getNodeType(reader.ReadString());
+                if (type == null)
+                    throw new InvalidOperationException("unknown node type");
+                types[i] = new TypeInfo(type);
             }
 
-            FixReferences(nodeList, references);
+            DomNode[] targets = new DomNode[DomBinaryFormat.ReadCount(reader)];
+            List<Reference> references = new List<Reference>();
+
+            int nodeCount = DomBinaryFormat.ReadCount(reader);
+            List<DomNode> nodeList = new List<DomNode>(nodeCount);
+            for (int i = 0; i < nodeCount; i++)
+                nodeList.Add(Deserialize(reader, types, targets, references));
+
+            foreach (Reference reference in references)
+                reference.Node.SetAttribute(reference.Info, targets[reference.RefId]);
 
             return nodeList;
         }
 
-        // assign integer ids to all top level nodes and their subtrees
-        private static void AssignNodeIds(IEnumerable<DomNode> nodes, Dictionary<DomNode, int> nodeIds)
+        // assigns integer ids to the types of the top level nodes and their subtrees, and to the
+        //  nodes that are referenced from and are in those subtrees; returns the number of
+        //  referenced nodes
+        private static int AssignIds(
+            List<DomNode> nodeList,
+            List<string> typeNames,
+            Dictionary<DomNodeType, int> typeIds,
+            Dictionary<DomNode, int> targetIds)
         {
-            int count = 0;
-            foreach (DomNode node in nodes)
+            HashSet<DomNode> roots = new HashSet<DomNode>();
+            foreach (DomNode node in nodeList)
             {
-                foreach (DomNode descendant in node.Subtree)
+                if (!roots.Add(node))
+                    throw new InvalidOperationException("duplicate nodes in stream");
+            }
+            foreach (DomNode node in nodeList)
+            {
+                for (DomNode ancestor = node.Parent; ancestor != null; ancestor = ancestor.Parent)
                 {
-                    if (nodeIds.ContainsKey(descendant))
+                    if (roots.Contains(ancestor))
                         throw new InvalidOperationException("duplicate nodes in stream");
+                }
+            }
+
+            // external targets are mapped to -1
+            int count = 0;
+            foreach (DomNode root in nodeList)
+            {
+                foreach (DomNode node in root.Subtree)
+                {
+                    DomNodeType type = node.Type;
+                    if (!typeIds.ContainsKey(type))
+                    {
+                        typeIds.Add(type, typeNames.Count);
+                        typeNames.Add(type.Name);
+                    }
 
-                    nodeIds.Add(descendant, count++);
+                    foreach (AttributeInfo info in type.Attributes)
+                    {
+                        if (info.Type.Type != AttributeTypes.Reference)
+                            continue;
+
+                        DomNode target = node.GetLocalAttribute(info) as DomNode;
+                        if (target != null && !targetIds.ContainsKey(target))
+                        {
+                            bool isInternal = false;
+                            for (DomNode ancestor = target; ancestor != null; ancestor = ancestor.Parent)
+                            {
+                                if (roots.Contains(ancestor))
+                                {
+                                    isInternal = true;
+                                    break;
+                                }
+                            }
+                            targetIds.Add(target, isInternal ? count++ : -1);
+                        }
+                    }
                 }
             }
+            return count;
         }
 
-        private static void Serialize(DomNode node, Dictionary<DomNode, int> nodeIds, BinaryWriter writer)
+        private static void Serialize(
+            DomNode node,
+            Dictionary<DomNodeType, int> typeIds,
+            Dictionary<DomNode, int> targetIds,
+            BinaryWriter writer)
         {
-            writer.Write(node.Type.Name);
+            // the low bit of the type index tells whether the node is referenced, and so has an id
+            DomNodeType type = node.Type;
+            int targetId;
+            if (targetIds.TryGetValue(node, out targetId) && targetId >= 0)
+            {
+                DomBinaryFormat.WriteCount(writer, (typeIds[type] << 1) | 1);
+                DomBinaryFormat.WriteCount(writer, targetId);
+            }
+            else
+            {
+                DomBinaryFormat.WriteCount(writer, typeIds[type] << 1);
+            }
 
-            foreach (AttributeInfo info in node.Type.Attributes)
+            // write the attributes that are set, each starting with its index plus 1, and end with
+            //  0; the low bit of that tells whether the value is written as a string
+            int attributeIndex = 0;
+            foreach (AttributeInfo info in type.Attributes)
             {
                 object value = node.GetLocalAttribute(info);
-
-                // references are serialized as an integer id
-                if (info.Type.Type == AttributeTypes.Reference)
+                if (value != null)
                 {
-                    DomNode reference = value as DomNode;
-                    int refId;
-                    if (reference == null ||
-                        !nodeIds.TryGetValue(reference, out refId))
+                    // references are serialized as the target's id
+                    if (info.Type.Type == AttributeTypes.Reference)
                     {
-                        // null, or reference was external to top level nodes and their subtrees
-                        writer.Write(false);
+                        DomNode reference = value as DomNode;
+                        if (reference != null &&
+                            targetIds.TryGetValue(reference, out targetId) &&
+                            targetId >= 0)
+                        {
+                            DomBinaryFormat.WriteCount(writer, (attributeIndex + 1) << 1);
+                            DomBinaryFormat.WriteCount(writer, targetId);
+                        }
                     }
-                    else
+                    else if (DomBinaryFormat.CanWriteValue(info.Type, value))
                     {
-                        writer.Write(true);
-                        writer.Write(refId);
-                    }
-                }
-                else
-                {
-                    if (value == null)
-                    {
-                        writer.Write(false);
+                        DomBinaryFormat.WriteCount(writer, (attributeIndex + 1) << 1);
+                        DomBinaryFormat.WriteValue(writer, info.Type.Type, value);
                     }
                     else
                     {
-                        writer.Write(true);
+                        DomBinaryFormat.WriteCount(writer, ((attributeIndex + 1) << 1) | 1);
                         writer.Write(info.Type.Convert(value));
                     }
                 }
+                attributeIndex++;
             }
+            DomBinaryFormat.WriteCount(writer, 0);
 
-            foreach (ChildInfo info in node.Type.Children)
+            foreach (ChildInfo info in type.Children)
             {
                 if (info.IsList)
                 {
                     IList<DomNode> children = node.GetChildList(info);
-                    writer.Write(children.Count);
+                    DomBinaryFormat.WriteCount(writer, children.Count);
                     foreach (DomNode child in children)
-                        Serialize(child, nodeIds, writer);
+                        Serialize(child, typeIds, targetIds, writer);
                 }
                 else
                 {
                     DomNode child = node.GetChild(info);
                     if (child == null)
                     {
-                        writer.Write(false);
+                        DomBinaryFormat.WriteCount(writer, 0);
                     }
                     else
                     {
-                        writer.Write(true);
-                        Serialize(child, nodeIds, writer);
+                        DomBinaryFormat.WriteCount(writer, 1);
+                        Serialize(child, typeIds, targetIds, writer);
                     }
                 }
             }
         }
 
-        private static DomNode Deserialize(BinaryReader reader, Func<string, DomNodeType> getNodeType, List<Reference> references)
+        private static DomNode Deserialize(BinaryReader reader, TypeInfo[] types, DomNode[] targets, List<Reference> references)
+        {
+            int typeIndex = DomBinaryFormat.ReadCount(reader);
+            TypeInfo typeInfo = types[typeIndex >> 1];
+            DomNode node = new DomNode(typeInfo.Type);
+            if ((typeIndex & 1) != 0)
+                targets[DomBinaryFormat.ReadCount(reader)] = node;
+
+            for (int attributeIndex = DomBinaryFormat.ReadCount(reader);
+                attributeIndex != 0;
+                attributeIndex = DomBinaryFormat.ReadCount(reader))
+            {
+                AttributeInfo info = typeInfo.Attributes[(attributeIndex >> 1) - 1];
+
+                // references are reconstituted after all nodes are read
+                if (info.Type.Type == AttributeTypes.Reference)
+                    references.Add(new Reference(node, info, DomBinaryFormat.ReadCount(reader)));
+                else if ((attributeIndex & 1) != 0)
+                    node.SetAttribute(info, info.Type.Convert(reader.ReadString()));
+                else
+                    node.SetAttribute(info, DomBinaryFormat.ReadValue(reader, info.Type.Type));
+            }
+
+            foreach (ChildInfo info in typeInfo.Children)
+            {
+                int count = DomBinaryFormat.ReadCount(reader);
+                if (info.IsList)
+                {
+                    IList<DomNode> childList = node.GetChildList(info);
+                    for (int i = 0; i < count; i++)
+                        childList.Add(Deserialize(reader, types, targets, references));
+                }
+                else if (count != 0)
+                {
+                    node.SetChild(info, Deserialize(reader, types, targets, references));
+                }
+            }
+
+            return node;
+        }
+
+        private static IEnumerable<DomNode> DeserializeVersion1(BinaryReader reader, int count, Func<string, DomNodeType> getNodeType)
+        {
+            List<DomNode> nodeList = new List<DomNode>(count);
+            List<Reference> references = new List<Reference>();
+
+            // read top level nodes
+            for (int i = 0; i < count; i++)
+            {
+                DomNode node = DeserializeVersion1(reader, getNodeType, references);
+                nodeList.Add(node);
+            }
+
+            FixReferences(nodeList, references);
+
+            return nodeList;
+        }
+
+        private static DomNode DeserializeVersion1(BinaryReader reader, Func<string, DomNodeType> getNodeType, List<Reference> references)
         {
             string typeName = reader.ReadString();
             DomNodeType type = getNodeType(typeName);
@@ -207,7 +392,7 @@ private static DomNode Deserialize(BinaryReader reader, Func<string, DomNodeType
                     IList<DomNode> childList = node.GetChildList(info);
                     for (int i = 0; i < count; i++)
                     {
-                        DomNode child = Deserialize(reader, getNodeType, references);
+                        DomNode child = DeserializeVersion1(reader, getNodeType, references);
                         childList.Add(child);
                     }
                 }
@@ -216,7 +401,7 @@ private static DomNode Deserialize(BinaryReader reader, Func<string, DomNodeType
                     bool hasChild = reader.ReadBoolean();
                     if (hasChild)
                     {
-                        DomNode child = Deserialize(reader, getNodeType, references);
+                        DomNode child = DeserializeVersion1(reader, getNodeType, references);
                         node.SetChild(info, child);
                     }
                 }
@@ -254,5 +439,27 @@ public Reference(DomNode node, AttributeInfo info, int refId)
             public readonly AttributeInfo Info;
             public readonly int RefId;
         }
+
+        // a node type with its attributes and children, indexed as they are written
+        private class TypeInfo
+        {
+            public TypeInfo(DomNodeType type)
+            {
+                Type = type;
+                Attributes = new List<AttributeInfo>(type.Attributes);
+                Children = new List<ChildInfo>(type.Children);
+            }
+            public readonly DomNodeType Type;
+            public readonly List<AttributeInfo> Attributes;
+            public readonly List<ChildInfo> Children;
+        }
+
+        // The original format starts with the non-negative number of top level nodes.
+        private const int HeaderMarker = -1;
+
+        private const int MaxBufferSize = 4 * 1024 * 1024;
+
+        [ThreadStatic]
+        private static MemoryStream s_buffer;
     }
 }
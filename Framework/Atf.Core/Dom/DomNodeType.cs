@@ -2,6 +2,7 @@
 
 using System;
 using System.Collections.Generic;
+using System.Threading;
 
 using Sce.Atf.Adaptation;
 
@@ -490,6 +491,10 @@ protected override NamedMetadata GetParent()
         internal int FirstExtensionIndex;
         internal bool IsFrozen;
 
+        // For each attribute, the index of its unboxed value in a DomNode, or -1 if its values are boxed
+        internal int[] PackedIndices;
+        internal int PackedCount;
+
         internal void Freeze()
         {
             if (m_attributes == null)
@@ -505,6 +510,13 @@ internal void Freeze()
             FirstChildIndex = m_attributes.Length;
             FirstExtensionIndex = FirstChildIndex + m_children.Length;
             FieldCount = FirstExtensionIndex + m_extensions.Length;
+
+            PackedIndices = new int[m_attributes.Length];
+            PackedCount = 0;
+            for (int i = 0; i < m_attributes.Length; i++)
+                PackedIndices[i] = DomNode.IsPackedType(m_attributes[i].Type.Type) ? PackedCount++ : -1;
+
+            AddExtensionAdapterLookups();
         }
 
         private void FreezeAttributes()
@@ -648,60 +660,170 @@ private void AddCreator(IAdapterCreator creator)
                 m_adapterCreators = new List<IAdapterCreator>();
 
             m_adapterCreators.Add(creator);
+
+            // the new creator may change what requests resolve to
+            m_adapterLookups = null;
+        }
+
+        /// <summary>
+        /// Gets or sets whether requests for adapters of DomNodes, through DomNode.GetAdapter()
+        /// and DomNode.GetDecorators(), are counted, for profiling. Default is false.</summary>
+        public static bool CountAdapterLookups
+        {
+            get { return s_countAdapterLookups; }
+            set { s_countAdapterLookups = value; }
+        }
+
+        /// <summary>
+        /// Gets the numbers of requests for adapters of DomNodes, by node type and requested type,
+        /// since counting was enabled or the counts were reset</summary>
+        /// <returns>Counts, highest first, keyed by "node type name -> requested type name"</returns>
+        public static IList<KeyValuePair<string, int>> GetAdapterLookupCounts()
+        {
+            List<KeyValuePair<string, int>> counts = new List<KeyValuePair<string, int>>();
+            lock (s_countedLookups)
+            {
+                foreach (AdapterLookup lookup in s_countedLookups)
+                {
+                    counts.Add(new KeyValuePair<string, int>(
+                        lookup.NodeType.Name + " -> " + lookup.Type.FullName, lookup.Count));
+                }
+            }
+
+            counts.Sort((x, y) => y.Value.CompareTo(x.Value));
+            return counts;
+        }
+
+        /// <summary>
+        /// Resets the counts of requests for adapters of DomNodes to zero</summary>
+        public static void ResetAdapterLookupCounts()
+        {
+            lock (s_countedLookups)
+            {
+                foreach (AdapterLookup lookup in s_countedLookups)
+                    lookup.Count = 0;
+                s_countedLookups.Clear();
+            }
         }
 
         internal static object GetAdapter(DomNode node, Type type)
         {
-            IEnumerable<IAdapterCreator> adapterCreators = GetAdapterCreators(node, type);
-            foreach (IAdapterCreator creator in adapterCreators)
-                return creator.GetAdapter(node, type);
+            AdapterLookup lookup = GetAdapterLookup(node, type);
+            if (lookup.IsDomNode)
+                return node;
+            if (lookup.ExtensionIndex >= 0)
+                return node.GetExtensionAdapter(lookup.ExtensionIndex);
+            if (lookup.Creators.Length > 0)
+                return lookup.Creators[0].GetAdapter(node, type);
 
             return null;
         }
 
         internal static IEnumerable<object> GetAdapters(DomNode node, Type type)
         {
-            IEnumerable<IAdapterCreator> adapterCreators = GetAdapterCreators(node, type);
-            foreach (IAdapterCreator adapterCreator in adapterCreators)
+            AdapterLookup lookup = GetAdapterLookup(node, type);
+            foreach (IAdapterCreator adapterCreator in lookup.Creators)
             {
                 object adapter = adapterCreator.GetAdapter(node, type);
                 yield return adapter;
             }
         }
 
-        private static IEnumerable<IAdapterCreator> GetAdapterCreators(DomNode node, Type type)
+        private static AdapterLookup GetAdapterLookup(DomNode node, Type type)
         {
             DomNodeType nodeType = node.Type;
-            if (nodeType.m_adapterCreatorCache == null)
-                nodeType.m_adapterCreatorCache = new Dictionary<Type, IEnumerable<IAdapterCreator>>();
+            Dictionary<Type, AdapterLookup> lookups = nodeType.m_adapterLookups;
 
-            IEnumerable<IAdapterCreator> adapterCreators;
-            if (!nodeType.m_adapterCreatorCache.TryGetValue(type, out adapterCreators))
+            AdapterLookup lookup;
+            if (lookups == null || !lookups.TryGetValue(type, out lookup))
             {
-                // build an array of adapter creators that can adapt the node
-                List<IAdapterCreator> creators = new List<IAdapterCreator>();
-                while (nodeType != null)
+                // cache the result, even if nothing can adapt the node, for subsequent requests
+                lookup = nodeType.CreateAdapterLookup(node, type);
+                nodeType.AddAdapterLookup(lookup);
+            }
+
+            if (s_countAdapterLookups && Interlocked.Increment(ref lookup.Count) == 1)
+            {
+                lock (s_countedLookups)
+                    s_countedLookups.Add(lookup);
+            }
+
+            return lookup;
+        }
+
+        private AdapterLookup CreateAdapterLookup(DomNode node, Type type)
+        {
+            // build an array of adapter creators that can adapt the node
+            List<IAdapterCreator> creators = new List<IAdapterCreator>();
+            for (DomNodeType nodeType = this; nodeType != null; nodeType = nodeType.BaseType)
+            {
+                if (nodeType.m_adapterCreators != null)
                 {
-                    if (nodeType.m_adapterCreators != null)
+                    foreach (IAdapterCreator creator in nodeType.m_adapterCreators)
                     {
-                        foreach (IAdapterCreator creator in nodeType.m_adapterCreators)
-                        {
-                            if (creator.CanAdapt(node, type))
-                                creators.Add(creator);
-                        }
+                        ExtensionAdapterCreator extensionCreator = creator as ExtensionAdapterCreator;
+                        if (extensionCreator != null ? extensionCreator.CanAdapt(type) : creator.CanAdapt(node, type))
+                            creators.Add(creator);
                     }
+                }
+            }
+
+            // when an extension comes first, it can be fetched directly
+            int extensionIndex = -1;
+            if (creators.Count > 0 && creators[0] is ExtensionAdapterCreator)
+                extensionIndex = GetDataIndex(((ExtensionAdapterCreator)creators[0]).ExtensionInfo);
 
-                    nodeType = nodeType.BaseType;
+            return new AdapterLookup(this, type,
+                type.IsAssignableFrom(typeof(DomNode)),
+                extensionIndex,
+                creators.Count > 0 ? creators.ToArray() : EmptyArray<IAdapterCreator>.Instance);
+        }
+
+        private void AddAdapterLookup(AdapterLookup lookup)
+        {
+            // copy on write, so that lookups from multiple threads don't need a lock
+            Dictionary<Type, AdapterLookup> lookups = m_adapterLookups != null
+                ? new Dictionary<Type, AdapterLookup>(m_adapterLookups)
+                : new Dictionary<Type, AdapterLookup>();
+            lookups[lookup.Type] = lookup;
+            m_adapterLookups = lookups;
+        }
+
+        // Resolves requests for the types that the extensions implement up front, as those are
+        //  the ones that are made. Custom adapter creators may depend on the node, so types that
+        //  have them are left to resolve requests as they're made.
+        private void AddExtensionAdapterLookups()
+        {
+            for (DomNodeType nodeType = this; nodeType != null; nodeType = nodeType.BaseType)
+            {
+                if (nodeType.m_adapterCreators != null)
+                {
+                    foreach (IAdapterCreator creator in nodeType.m_adapterCreators)
+                    {
+                        if (!(creator is ExtensionAdapterCreator))
+                            return;
+                    }
                 }
+            }
+
+            Dictionary<Type, AdapterLookup> lookups = new Dictionary<Type, AdapterLookup>();
+            foreach (ExtensionInfo extensionInfo in m_extensions)
+            {
+                if (!typeof(IAdapter).IsAssignableFrom(extensionInfo.Type))
+                    continue;
 
-                // for empty arrays, use global instance
-                adapterCreators = (creators.Count > 0) ? creators.ToArray() : EmptyEnumerable<IAdapterCreator>.Instance;
+                List<Type> types = new List<Type>(extensionInfo.Type.GetInterfaces());
+                for (Type type = extensionInfo.Type; type != typeof(object); type = type.BaseType)
+                    types.Add(type);
 
-                // cache the result for subsequent searches
-                node.Type.m_adapterCreatorCache.Add(type, adapterCreators);
+                foreach (Type type in types)
+                {
+                    if (!lookups.ContainsKey(type))
+                        lookups.Add(type, CreateAdapterLookup(null, type));
+                }
             }
 
-            return adapterCreators;
+            m_adapterLookups = lookups;
         }
 
         // Class constructor
@@ -730,11 +852,22 @@ public ExtensionAdapterCreator(ExtensionInfo extensionInfo)
                 m_extensionInfo = extensionInfo;
             }
 
+            public ExtensionInfo ExtensionInfo
+            {
+                get { return m_extensionInfo; }
+            }
+
             public bool CanAdapt(object adaptee, Type type)
             {
                 DomNode node = adaptee as DomNode;
                 return
                     node != null &&
+                    CanAdapt(type);
+            }
+
+            public bool CanAdapt(Type type)
+            {
+                return
                     type != null &&
                     type.IsAssignableFrom(m_extensionInfo.Type);
             }
@@ -760,6 +893,34 @@ public object GetAdapter(object adaptee, Type type)
             private readonly ExtensionInfo m_extensionInfo;
         }
 
+        // What a request for an adapter of a type resolves to, for the nodes of a node type
+        private class AdapterLookup
+        {
+            public AdapterLookup(DomNodeType nodeType, Type type, bool isDomNode, int extensionIndex, IAdapterCreator[] creators)
+            {
+                NodeType = nodeType;
+                Type = type;
+                IsDomNode = isDomNode;
+                ExtensionIndex = extensionIndex;
+                Creators = creators;
+            }
+
+            public readonly DomNodeType NodeType;
+            public readonly Type Type;
+
+            // the node itself is the adapter
+            public readonly bool IsDomNode;
+
+            // the data index of the extension that is the adapter, or -1
+            public readonly int ExtensionIndex;
+
+            // all creators that can adapt the node, in order
+            public readonly IAdapterCreator[] Creators;
+
+            // number of requests, when they're counted
+            public int Count;
+        }
+
         // Class to speed up search for field names using binary search
         private class StringIndex
         {
@@ -857,9 +1018,12 @@ public int CompareTo(StringInfo other)
         private Definitions m_definitions = new Definitions();
 
         private List<IAdapterCreator> m_adapterCreators;
-        private Dictionary<Type, IEnumerable<IAdapterCreator>> m_adapterCreatorCache;
+        private volatile Dictionary<Type, AdapterLookup> m_adapterLookups;
         private bool m_isAbstract;
 
         private static readonly DomNodeType s_baseOfAllTypes;
+
+        private static bool s_countAdapterLookups;
+        private static readonly List<AdapterLookup> s_countedLookups = new List<AdapterLookup>();
     }
 }
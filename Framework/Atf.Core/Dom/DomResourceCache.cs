@@ -0,0 +1,717 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.ComponentModel.Composition;
+using System.IO;
+using System.Security.Cryptography;
+using System.Text;
+
+namespace Sce.Atf.Dom
+{
+    /// <summary>
+    /// Cache of the DOM trees read from files, such as the models loaded by resource resolvers, so
+    /// that files that are resolved repeatedly are only parsed once. Trees are kept in the binary
+    /// form written by DomNodeSerializer, in memory, up to a byte budget, and optionally in a
+    /// directory on disk, so that they can outlive the application. This class is thread safe.</summary>
+    /// <remarks>Each entry is keyed by the file's full path, and is valid while the file's size and
+    /// last write time are unchanged. If only the last write time has changed, the entry is still
+    /// valid if the SHA-1 hash of the file's contents is unchanged. Entries also record the files
+    /// that the tree was read from besides the file itself, such as an OBJ file's materials, and a
+    /// hash of the node types in the tree, and are discarded if any of these have changed. If a
+    /// file watcher service is available, cached files and the files that they depend on are
+    /// registered with it, and entries are invalidated when any of their files change.</remarks>
+    [Export(typeof(DomResourceCache))]
+    [PartCreationPolicy(CreationPolicy.Shared)]
+    public class DomResourceCache
+    {
+        /// <summary>
+        /// Constructor for a cache with the default capacity and no directory</summary>
+        public DomResourceCache()
+            : this(DefaultCapacity, null)
+        {
+        }
+
+        /// <summary>
+        /// Constructor</summary>
+        /// <param name="capacity">Maximum number of bytes of cached data kept in memory</param>
+        /// <param name="directory">Directory for cached data on disk, or null to only cache in memory</param>
+        public DomResourceCache(long capacity, string directory)
+        {
+            m_entries = new LruCache<string, Entry>(capacity, entry => entry.Data.Length, StringComparer.InvariantCultureIgnoreCase);
+            m_entries.Evicted += entries_Evicted;
+            m_directory = directory;
+        }
+
+        /// <summary>
+        /// Gets or sets the maximum number of bytes of cached data kept in memory. Reducing the
+        /// capacity evicts least recently used data as necessary.</summary>
+        public long Capacity
+        {
+            get { lock (m_lock) return m_entries.Capacity; }
+            set { lock (m_lock) m_entries.Capacity = value; }
+        }
+
+        /// <summary>
+        /// Gets the number of bytes of cached data currently kept in memory</summary>
+        public long Size
+        {
+            get { lock (m_lock) return m_entries.Size; }
+        }
+
+        /// <summary>
+        /// Gets or sets the directory for cached data on disk, or null to only cache in memory.
+        /// The directory is created when data is first written to it.</summary>
+        public string CacheDirectory
+        {
+            get { lock (m_lock) return m_directory; }
+            set { lock (m_lock) m_directory = value; }
+        }
+
+        /// <summary>
+        /// Gets or sets the file watcher service that invalidates entries when their files change.
+        /// Can be null.</summary>
+        [Import(AllowDefault = true)]
+        public IFileWatcherService FileWatcherService
+        {
+            get { return m_fileWatcherService; }
+            set
+            {
+                lock (m_lock)
+                {
+                    if (m_fileWatcherService != null)
+                    {
+                        m_fileWatcherService.FileChanged -= fileWatcherService_FileChanged;
+                        foreach (string filePath in m_dependents.Keys)
+                            m_fileWatcherService.Unregister(filePath);
+                        m_dependents.Clear();
+                    }
+
+                    m_fileWatcherService = value;
+
+                    if (m_fileWatcherService != null)
+                        m_fileWatcherService.FileChanged += fileWatcherService_FileChanged;
+                }
+            }
+        }
+
+        /// <summary>
+        /// Gets the number of loads that were satisfied by data in memory</summary>
+        public long MemoryHits
+        {
+            get { lock (m_lock) return m_memoryHits; }
+        }
+
+        /// <summary>
+        /// Gets the number of loads that were satisfied by data on disk</summary>
+        public long DiskHits
+        {
+            get { lock (m_lock) return m_diskHits; }
+        }
+
+        /// <summary>
+        /// Gets the number of loads that had to read their files</summary>
+        public long Misses
+        {
+            get { lock (m_lock) return m_misses; }
+        }
+
+        /// <summary>
+        /// Gets the DOM tree read from a file. The tree is created from cached data if the file
+        /// hasn't changed since it was cached; otherwise the file is read and the result is cached.</summary>
+        /// <param name="filePath">Path of file</param>
+        /// <param name="getNodeType">Function that returns the DomNodeType with a given name, such
+        /// as XmlSchemaTypeLoader.GetNodeType</param>
+        /// <param name="read">Function that reads a DOM tree from a stream of the file's contents,
+        /// and may return null</param>
+        /// <returns>Root of a new DOM tree, or null if the read function returned null</returns>
+        /// <remarks>References to DomNodes outside of the tree aren't cached, as in DomNodeSerializer.</remarks>
+        public DomNode Load(string filePath, Func<string, DomNodeType> getNodeType, Func<Stream, DomNode> read)
+        {
+            if (read == null)
+                throw new ArgumentNullException("read");
+
+            return Load(filePath, getNodeType, (stream, dependencies) => read(stream));
+        }
+
+        /// <summary>
+        /// Gets the DOM tree read from a file and the other files that it refers to, such as an OBJ
+        /// file and its material files. The tree is created from cached data if none of the files
+        /// have changed since it was cached; otherwise the file is read and the result is cached.</summary>
+        /// <param name="filePath">Path of file</param>
+        /// <param name="getNodeType">Function that returns the DomNodeType with a given name, such
+        /// as XmlSchemaTypeLoader.GetNodeType</param>
+        /// <param name="read">Function that reads a DOM tree from a stream of the file's contents,
+        /// adds the paths of any other files that it read to the collection, and may return null</param>
+        /// <returns>Root of a new DOM tree, or null if the read function returned null</returns>
+        /// <remarks>References to DomNodes outside of the tree aren't cached, as in DomNodeSerializer.</remarks>
+        public DomNode Load(string filePath, Func<string, DomNodeType> getNodeType, Func<Stream, ICollection<string>, DomNode> read)
+        {
+            if (filePath == null)
+                throw new ArgumentNullException("filePath");
+            if (getNodeType == null)
+                throw new ArgumentNullException("getNodeType");
+            if (read == null)
+                throw new ArgumentNullException("read");
+
+            filePath = Path.GetFullPath(filePath);
+            var fileInfo = new FileInfo(filePath);
+            long length = fileInfo.Length;
+            DateTime lastWriteTime = fileInfo.LastWriteTimeUtc;
+
+            Entry entry;
+            lock (m_lock)
+                m_entries.TryGetValue(filePath, out entry);
+            bool inMemory = entry != null;
+            if (!inMemory)
+                entry = ReadEntry(filePath);
+
+            if (entry != null && !IsCurrent(entry, getNodeType))
+            {
+                // the schema or one of the other files has changed
+                RemoveEntry(filePath);
+                entry = null;
+            }
+
+            byte[] contents = null;
+            byte[] hash = null;
+            if (entry != null && entry.Length == length)
+            {
+                if (entry.LastWriteTime != lastWriteTime)
+                {
+                    // the file may have been touched without being changed
+                    contents = File.ReadAllBytes(filePath);
+                    hash = ComputeHash(contents);
+                    if (AreEqual(hash, entry.Hash))
+                    {
+                        entry = new Entry(length, lastWriteTime, hash, entry.SchemaHash, entry.TypeNames,
+                            entry.Dependencies, entry.Data);
+                        AddEntry(filePath, entry);
+                        WriteEntry(filePath, entry);
+                    }
+                    else
+                    {
+                        entry = null;
+                    }
+                }
+                else if (!inMemory)
+                {
+                    AddEntry(filePath, entry);
+                }
+
+                if (entry != null)
+                {
+                    DomNode cachedRoot = Deserialize(entry.Data, getNodeType);
+                    if (cachedRoot != null)
+                    {
+                        lock (m_lock)
+                        {
+                            if (inMemory)
+                                m_memoryHits++;
+                            else
+                                m_diskHits++;
+                        }
+                        return cachedRoot;
+                    }
+
+                    // the data is corrupt, so read the file instead
+                    RemoveEntry(filePath);
+                }
+            }
+
+            if (contents == null)
+            {
+                contents = File.ReadAllBytes(filePath);
+                hash = ComputeHash(contents);
+            }
+
+            DomNode root;
+            var dependencies = new List<string>();
+            using (var stream = new MemoryStream(contents, false))
+                root = read(stream, dependencies);
+
+            lock (m_lock)
+                m_misses++;
+
+            if (root != null)
+            {
+                // the hash covers the types in the tree, rather than the whole schema, as those are
+                //  the only ones that the data depends on
+                var types = new List<DomNodeType>();
+                var typeSet = new HashSet<DomNodeType>();
+                foreach (DomNode node in root.Subtree)
+                    if (typeSet.Add(node.Type))
+                        types.Add(node.Type);
+
+                var typeNames = new string[types.Count];
+                for (int i = 0; i < typeNames.Length; i++)
+                    typeNames[i] = types[i].Name;
+
+                var stamps = new List<FileStamp>();
+                var dependencySet = new HashSet<string>(StringComparer.InvariantCultureIgnoreCase) { filePath };
+                foreach (string dependency in dependencies)
+                {
+                    string dependencyPath = Path.GetFullPath(dependency);
+                    if (dependencySet.Add(dependencyPath))
+                        stamps.Add(FileStamp.Create(dependencyPath));
+                }
+
+                entry = new Entry(length, lastWriteTime, hash, DomBinaryFormat.ComputeSchemaHash(types), typeNames,
+                    stamps.ToArray(), m_serializer.Serialize(new[] { root }));
+                AddEntry(filePath, entry);
+                WriteEntry(filePath, entry);
+            }
+
+            return root;
+        }
+
+        /// <summary>
+        /// Removes the cached data for a file, from memory and disk</summary>
+        /// <param name="filePath">Path of file</param>
+        public void Invalidate(string filePath)
+        {
+            if (filePath == null)
+                throw new ArgumentNullException("filePath");
+
+            RemoveEntry(Path.GetFullPath(filePath));
+        }
+
+        /// <summary>
+        /// Removes all cached data, from memory and disk. Does not reset the hit and miss counts.</summary>
+        public void Clear()
+        {
+            lock (m_lock)
+            {
+                m_entries.Clear();
+                if (m_fileWatcherService != null)
+                {
+                    foreach (string filePath in m_dependents.Keys)
+                        m_fileWatcherService.Unregister(filePath);
+                }
+                m_dependents.Clear();
+
+                if (m_directory != null && Directory.Exists(m_directory))
+                {
+                    foreach (string entryPath in Directory.GetFiles(m_directory, "*" + EntryExtension))
+                    {
+                        try
+                        {
+                            File.Delete(entryPath);
+                        }
+                        catch (IOException)
+                        {
+                        }
+                        catch (UnauthorizedAccessException)
+                        {
+                        }
+                    }
+                }
+            }
+        }
+
+        private void AddEntry(string filePath, Entry entry)
+        {
+            lock (m_lock)
+            {
+                Entry oldEntry;
+                if (m_entries.TryGetValue(filePath, out oldEntry))
+                    Unwatch(filePath, oldEntry);
+
+                m_entries.Set(filePath, entry);
+                if (m_entries.ContainsKey(filePath))
+                    Watch(filePath, entry);
+            }
+        }
+
+        // Removes the entry for a file from memory and disk.
+        private void RemoveEntry(string filePath)
+        {
+            lock (m_lock)
+            {
+                Entry entry;
+                if (m_entries.TryGetValue(filePath, out entry))
+                {
+                    m_entries.Remove(filePath);
+                    Unwatch(filePath, entry);
+                }
+
+                DeleteEntry(filePath);
+            }
+        }
+
+        // Registers the file for an entry, and the files that it depends on, with the file watcher
+        //  service. A file is registered once, however many entries depend on it.
+        private void Watch(string filePath, Entry entry)
+        {
+            if (m_fileWatcherService == null)
+                return;
+
+            foreach (string watchedPath in GetWatchedPaths(filePath, entry))
+            {
+                List<string> dependents;
+                if (!m_dependents.TryGetValue(watchedPath, out dependents))
+                {
+                    dependents = new List<string>();
+                    m_dependents.Add(watchedPath, dependents);
+                    m_fileWatcherService.Register(watchedPath);
+                }
+                if (!dependents.Contains(filePath))
+                    dependents.Add(filePath);
+            }
+        }
+
+        private void Unwatch(string filePath, Entry entry)
+        {
+            foreach (string watchedPath in GetWatchedPaths(filePath, entry))
+            {
+                List<string> dependents;
+                if (m_dependents.TryGetValue(watchedPath, out dependents) &&
+                    dependents.Remove(filePath) &&
+                    dependents.Count == 0)
+                {
+                    m_dependents.Remove(watchedPath);
+                    m_fileWatcherService.Unregister(watchedPath);
+                }
+            }
+        }
+
+        private static IEnumerable<string> GetWatchedPaths(string filePath, Entry entry)
+        {
+            yield return filePath;
+            foreach (FileStamp dependency in entry.Dependencies)
+                yield return dependency.Path;
+        }
+
+        // Returns true iff the node types in an entry's tree and the other files that it was read
+        //  from are unchanged.
+        private static bool IsCurrent(Entry entry, Func<string, DomNodeType> getNodeType)
+        {
+            var types = new DomNodeType[entry.TypeNames.Length];
+            for (int i = 0; i < types.Length; i++)
+            {
+                types[i] = getNodeType(entry.TypeNames[i]);
+                if (types[i] == null)
+                    return false;
+            }
+            if (DomBinaryFormat.ComputeSchemaHash(types) != entry.SchemaHash)
+                return false;
+
+            foreach (FileStamp dependency in entry.Dependencies)
+                if (!dependency.Equals(FileStamp.Create(dependency.Path)))
+                    return false;
+
+            return true;
+        }
+
+        // Deserializes an entry's tree, or returns null if the data is corrupt.
+        private DomNode Deserialize(byte[] data, Func<string, DomNodeType> getNodeType)
+        {
+            try
+            {
+                foreach (DomNode root in m_serializer.Deserialize(data, getNodeType))
+                    return root;
+                return null;
+            }
+            catch (Exception e)
+            {
+                // corrupt data can fail in many ways, e.g., with EndOfStreamException or
+                //  IndexOutOfRangeException, and should only cost a read of the file
+                Outputs.WriteLine(OutputMessageType.Warning, "Could not read cache data: " + e.Message);
+                return null;
+            }
+        }
+
+        // Reads the entry for a file from the directory, or returns null if there isn't a valid one.
+        //  Invalid entries, such as those written by other versions, are deleted.
+        private Entry ReadEntry(string filePath)
+        {
+            string entryPath = GetEntryPath(filePath);
+            if (entryPath == null || !File.Exists(entryPath))
+                return null;
+
+            Entry entry = null;
+            try
+            {
+                using (var reader = new BinaryReader(File.OpenRead(entryPath)))
+                    entry = ReadEntry(reader, filePath);
+            }
+            catch (EndOfStreamException)
+            {
+                // the entry is truncated
+            }
+            catch (IOException)
+            {
+                // the entry may be locked by another process, e.g., one that is deleting it
+                return null;
+            }
+            catch (UnauthorizedAccessException)
+            {
+                return null;
+            }
+            catch (Exception e)
+            {
+                Outputs.WriteLine(OutputMessageType.Warning, "Could not read cache file: " + e.Message);
+            }
+
+            if (entry == null)
+                DeleteEntry(filePath);
+            return entry;
+        }
+
+        private static Entry ReadEntry(BinaryReader reader, string filePath)
+        {
+            if (reader.ReadInt32() != EntryMarker ||
+                reader.ReadInt32() != EntryVersion ||
+                !string.Equals(reader.ReadString(), filePath, StringComparison.InvariantCultureIgnoreCase))
+            {
+                return null;
+            }
+
+            long length = reader.ReadInt64();
+            DateTime lastWriteTime = new DateTime(reader.ReadInt64(), DateTimeKind.Utc);
+            byte[] hash = reader.ReadBytes(HashLength);
+            ulong schemaHash = reader.ReadUInt64();
+
+            // counts are checked against the remaining length, so that a corrupt entry can't
+            //  cause a huge allocation
+            long remaining = reader.BaseStream.Length - reader.BaseStream.Position;
+            int typeCount = reader.ReadInt32();
+            if (typeCount < 0 || typeCount > remaining)
+                return null;
+            var typeNames = new string[typeCount];
+            for (int i = 0; i < typeCount; i++)
+                typeNames[i] = reader.ReadString();
+
+            int dependencyCount = reader.ReadInt32();
+            if (dependencyCount < 0 || dependencyCount > remaining)
+                return null;
+            var dependencies = new FileStamp[dependencyCount];
+            for (int i = 0; i < dependencyCount; i++)
+                dependencies[i] = new FileStamp(reader.ReadString(), reader.ReadInt64(), reader.ReadInt64());
+
+            int dataLength = reader.ReadInt32();
+            if (dataLength < 0 || dataLength > reader.BaseStream.Length - reader.BaseStream.Position)
+                return null;
+            byte[] data = reader.ReadBytes(dataLength);
+            if (hash.Length != HashLength || data.Length != dataLength)
+                return null;
+
+            return new Entry(length, lastWriteTime, hash, schemaHash, typeNames, dependencies, data);
+        }
+
+        // Writes the entry for a file to the directory. The data is written to a temporary file
+        //  first, so that other readers never see a partial entry.
+        private void WriteEntry(string filePath, Entry entry)
+        {
+            string entryPath = GetEntryPath(filePath);
+            if (entryPath == null)
+                return;
+
+            string tempPath = entryPath + "." + Path.GetRandomFileName();
+            try
+            {
+                Directory.CreateDirectory(Path.GetDirectoryName(entryPath));
+                using (var writer = new BinaryWriter(File.Create(tempPath)))
+                {
+                    writer.Write(EntryMarker);
+                    writer.Write(EntryVersion);
+                    writer.Write(filePath);
+                    writer.Write(entry.Length);
+                    writer.Write(entry.LastWriteTime.Ticks);
+                    writer.Write(entry.Hash);
+                    writer.Write(entry.SchemaHash);
+                    writer.Write(entry.TypeNames.Length);
+                    foreach (string typeName in entry.TypeNames)
+                        writer.Write(typeName);
+                    writer.Write(entry.Dependencies.Length);
+                    foreach (FileStamp dependency in entry.Dependencies)
+                    {
+                        writer.Write(dependency.Path);
+                        writer.Write(dependency.Length);
+                        writer.Write(dependency.LastWriteTime);
+                    }
+                    writer.Write(entry.Data.Length);
+                    writer.Write(entry.Data);
+                }
+
+                lock (m_lock)
+                {
+                    if (File.Exists(entryPath))
+                        File.Delete(entryPath);
+                    File.Move(tempPath, entryPath);
+                }
+            }
+            catch (IOException e)
+            {
+                Outputs.WriteLine(OutputMessageType.Warning, "Could not write cache file: " + e.Message);
+            }
+            catch (UnauthorizedAccessException e)
+            {
+                Outputs.WriteLine(OutputMessageType.Warning, "Could not write cache file: " + e.Message);
+            }
+            finally
+            {
+                try
+                {
+                    if (File.Exists(tempPath))
+                        File.Delete(tempPath);
+                }
+                catch (IOException)
+                {
+                }
+                catch (UnauthorizedAccessException)
+                {
+                }
+            }
+        }
+
+        private void DeleteEntry(string filePath)
+        {
+            string entryPath = GetEntryPath(filePath);
+            if (entryPath == null)
+                return;
+
+            lock (m_lock)
+            {
+                try
+                {
+                    File.Delete(entryPath);
+                }
+                catch (IOException)
+                {
+                }
+                catch (UnauthorizedAccessException)
+                {
+                }
+            }
+        }
+
+        // Gets the path of the entry for a file in the directory, which is named by the hash of
+        //  the file's path, or null if there's no directory.
+        private string GetEntryPath(string filePath)
+        {
+            string directory = CacheDirectory;
+            if (directory == null)
+                return null;
+
+            byte[] hash = ComputeHash(Encoding.UTF8.GetBytes(filePath.ToUpperInvariant()));
+            var name = new StringBuilder(hash.Length * 2 + EntryExtension.Length);
+            foreach (byte b in hash)
+                name.Append(b.ToString("x2"));
+            name.Append(EntryExtension);
+            return Path.Combine(directory, name.ToString());
+        }
+
+        private static byte[] ComputeHash(byte[] data)
+        {
+            using (SHA1 sha1 = SHA1.Create())
+                return sha1.ComputeHash(data);
+        }
+
+        private static bool AreEqual(byte[] a, byte[] b)
+        {
+            if (a.Length != b.Length)
+                return false;
+            for (int i = 0; i < a.Length; i++)
+                if (a[i] != b[i])
+                    return false;
+            return true;
+        }
+
+        private void entries_Evicted(object sender, ItemRemovedEventArgs<KeyValuePair<string, Entry>> e)
+        {
+            // the entry can still be loaded from disk, which checks whether the files have changed
+            Unwatch(e.Item.Key, e.Item.Value);
+        }
+
+        private void fileWatcherService_FileChanged(object sender, FileSystemEventArgs e)
+        {
+            // invalidate the file's entry, and the entries of all files that depend on it
+            string filePath = Path.GetFullPath(e.FullPath);
+            List<string> dependents;
+            lock (m_lock)
+            {
+                dependents = m_dependents.TryGetValue(filePath, out dependents)
+                    ? new List<string>(dependents)
+                    : new List<string>();
+            }
+
+            if (!dependents.Contains(filePath))
+                dependents.Add(filePath);
+            foreach (string dependent in dependents)
+                RemoveEntry(dependent);
+        }
+
+        private class Entry
+        {
+            public Entry(long length, DateTime lastWriteTime, byte[] hash, ulong schemaHash, string[] typeNames,
+                FileStamp[] dependencies, byte[] data)
+            {
+                Length = length;
+                LastWriteTime = lastWriteTime;
+                Hash = hash;
+                SchemaHash = schemaHash;
+                TypeNames = typeNames;
+                Dependencies = dependencies;
+                Data = data;
+            }
+
+            public readonly long Length;
+            public readonly DateTime LastWriteTime;
+            public readonly byte[] Hash;
+            public readonly ulong SchemaHash;
+            public readonly string[] TypeNames;
+            public readonly FileStamp[] Dependencies;
+            public readonly byte[] Data;
+        }
+
+        // The size and last write time of a file that an entry depends on, or -1 and 0 if the file
+        //  doesn't exist, so that an entry is also invalid if a missing file is created.
+        private struct FileStamp : IEquatable<FileStamp>
+        {
+            public FileStamp(string path, long length, long lastWriteTime)
+            {
+                Path = path;
+                Length = length;
+                LastWriteTime = lastWriteTime;
+            }
+
+            public static FileStamp Create(string path)
+            {
+                var fileInfo = new FileInfo(path);
+                return fileInfo.Exists
+                    ? new FileStamp(path, fileInfo.Length, fileInfo.LastWriteTimeUtc.Ticks)
+                    : new FileStamp(path, -1, 0);
+            }
+
+            public bool Equals(FileStamp other)
+            {
+                return
+                    Length == other.Length &&
+                    LastWriteTime == other.LastWriteTime &&
+                    string.Equals(Path, other.Path, StringComparison.InvariantCultureIgnoreCase);
+            }
+
+            public readonly string Path;
+            public readonly long Length;
+            public readonly long LastWriteTime;
+        }
+
+        private readonly LruCache<string, Entry> m_entries;
+        private readonly Dictionary<string, List<string>> m_dependents =
+            new Dictionary<string, List<string>>(StringComparer.InvariantCultureIgnoreCase);
+        private readonly DomNodeSerializer m_serializer = new DomNodeSerializer();
+        private readonly object m_lock = new object();
+        private string m_directory;
+        private IFileWatcherService m_fileWatcherService;
+        private long m_memoryHits;
+        private long m_diskHits;
+        private long m_misses;
+
+        private const long DefaultCapacity = 256 * 1024 * 1024;
+        private const int EntryMarker = 0x43444641; // "AFDC"
+        private const int EntryVersion = 2;
+        private const int HashLength = 20;
+        private const string EntryExtension = ".domcache";
+    }
+}
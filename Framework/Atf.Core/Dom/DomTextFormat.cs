@@ -0,0 +1,724 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Globalization;
+using System.Text;
+
+namespace Sce.Atf.Dom
+{
+    /// <summary>
+    /// Utilities for reading and writing the text form of array attribute values, which is a
+    /// list of values separated by spaces, tabs or newlines, as in XML documents</summary>
+    /// <remarks>Values are read straight from the string into the destination array, and written
+    /// through a reused character buffer, so that large arrays, like mesh data, don't create a
+    /// temporary string per value. Common value forms are parsed and formatted directly; other
+    /// forms, like exponents that are out of range or thousands separators, fall back to the CLR's
+    /// invariant culture parsing and formatting, so the results are the same as parsing each value
+    /// on its own.</remarks>
+    internal static class DomTextFormat
+    {
+        /// <summary>
+        /// Counts the values in a string</summary>
+        /// <param name="s">String of separated values</param>
+        /// <returns>Number of values in the string</returns>
+        public static int CountValues(string s)
+        {
+            int count = 0;
+            bool inValue = false;
+            for (int i = 0; i < s.Length; i++)
+            {
+                bool separator = IsSeparator(s[i]);
+                if (!separator && !inValue)
+                    count++;
+                inValue = !separator;
+            }
+            return count;
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as false.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, Boolean[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                SkipValue(s, ref index);
+                int length = index - start;
+                if (length == 4 && string.Compare(s, start, "true", 0, 4, StringComparison.OrdinalIgnoreCase) == 0)
+                    values[i] = true;
+                else if (length == 5 && string.Compare(s, start, "false", 0, 5, StringComparison.OrdinalIgnoreCase) == 0)
+                    values[i] = false;
+                else
+                    Boolean.TryParse(s.Substring(start, length), out values[i]);
+            }
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as 0.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, SByte[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                long value;
+                if (TryParseInteger(s, ref index, SByte.MinValue, SByte.MaxValue, out value))
+                    values[i] = (SByte)value;
+                else
+                    SByte.TryParse(GetValue(s, start, ref index), NumberStyles.Integer, CultureInfo.InvariantCulture, out values[i]);
+            }
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as 0.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, Byte[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                long value;
+                if (TryParseInteger(s, ref index, Byte.MinValue, Byte.MaxValue, out value))
+                    values[i] = (Byte)value;
+                else
+                    Byte.TryParse(GetValue(s, start, ref index), NumberStyles.Integer, CultureInfo.InvariantCulture, out values[i]);
+            }
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as 0.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, Int16[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                long value;
+                if (TryParseInteger(s, ref index, Int16.MinValue, Int16.MaxValue, out value))
+                    values[i] = (Int16)value;
+                else
+                    Int16.TryParse(GetValue(s, start, ref index), NumberStyles.Integer, CultureInfo.InvariantCulture, out values[i]);
+            }
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as 0.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, UInt16[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                long value;
+                if (TryParseInteger(s, ref index, UInt16.MinValue, UInt16.MaxValue, out value))
+                    values[i] = (UInt16)value;
+                else
+                    UInt16.TryParse(GetValue(s, start, ref index), NumberStyles.Integer, CultureInfo.InvariantCulture, out values[i]);
+            }
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as 0.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, Int32[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                long value;
+                if (TryParseInteger(s, ref index, Int32.MinValue, Int32.MaxValue, out value))
+                    values[i] = (Int32)value;
+                else
+                    Int32.TryParse(GetValue(s, start, ref index), NumberStyles.Integer, CultureInfo.InvariantCulture, out values[i]);
+            }
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as 0.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, UInt32[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                long value;
+                if (TryParseInteger(s, ref index, UInt32.MinValue, UInt32.MaxValue, out value))
+                    values[i] = (UInt32)value;
+                else
+                    UInt32.TryParse(GetValue(s, start, ref index), NumberStyles.Integer, CultureInfo.InvariantCulture, out values[i]);
+            }
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as 0.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, Int64[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                long value;
+                if (TryParseInteger(s, ref index, Int64.MinValue, Int64.MaxValue, out value))
+                    values[i] = value;
+                else
+                    Int64.TryParse(GetValue(s, start, ref index), NumberStyles.Integer, CultureInfo.InvariantCulture, out values[i]);
+            }
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as 0.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, UInt64[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                if (!TryParseUnsigned(s, ref index, out values[i]))
+                    UInt64.TryParse(GetValue(s, start, ref index), NumberStyles.Integer, CultureInfo.InvariantCulture, out values[i]);
+            }
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as 0.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, Single[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                double value;
+                if (TryParseDouble(s, ref index, out value) && NumberParser.IsExactSingle(value))
+                    values[i] = (Single)value;
+                else
+                    Single.TryParse(GetValue(s, start, ref index), NumberStyles.Float, CultureInfo.InvariantCulture, out values[i]);
+            }
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as 0.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, Double[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                if (!TryParseDouble(s, ref index, out values[i]))
+                    Double.TryParse(GetValue(s, start, ref index), NumberStyles.Float, CultureInfo.InvariantCulture, out values[i]);
+            }
+        }
+
+        /// <summary>
+        /// Reads values from a string into an array. If there are fewer values than array
+        /// elements, the remaining elements are left unchanged; excess values are ignored. Values
+        /// that can't be parsed are read as 0.</summary>
+        /// <param name="s">String of separated values</param>
+        /// <param name="values">Destination array</param>
+        public static void ReadValues(string s, Decimal[] values)
+        {
+            int index = 0;
+            for (int i = 0; i < values.Length && SkipSeparators(s, ref index); i++)
+            {
+                int start = index;
+                bool negative;
+                ulong mantissa;
+                int exponent;
+                if (TryParseNumber(s, ref index, false, out negative, out mantissa, out exponent) &&
+                    !(negative && mantissa == 0) && exponent >= -MaxDecimalScale)
+                {
+                    values[i] = new Decimal((int)mantissa, (int)(mantissa >> 32), 0, negative, (byte)-exponent);
+                }
+                else
+                {
+                    Decimal.TryParse(GetValue(s, start, ref index), NumberStyles.Number, CultureInfo.InvariantCulture, out values[i]);
+                }
+            }
+        }
+
+        /// <summary>
+        /// Formats values as a string, separated by spaces</summary>
+        /// <param name="values">Values</param>
+        /// <returns>String of separated values</returns>
+        public static string Format(SByte[] values)
+        {
+            StringBuilder sb = GetBuilder(values.Length);
+            char[] buffer = GetBuffer();
+            foreach (SByte value in values)
+                AppendInteger(sb, buffer, value);
+            return ToStringAndRelease(sb);
+        }
+
+        /// <summary>
+        /// Formats values as a string, separated by spaces</summary>
+        /// <param name="values">Values</param>
+        /// <returns>String of separated values</returns>
+        public static string Format(Byte[] values)
+        {
+            StringBuilder sb = GetBuilder(values.Length);
+            char[] buffer = GetBuffer();
+            foreach (Byte value in values)
+                AppendInteger(sb, buffer, value);
+            return ToStringAndRelease(sb);
+        }
+
+        /// <summary>
+        /// Formats values as a string, separated by spaces</summary>
+        /// <param name="values">Values</param>
+        /// <returns>String of separated values</returns>
+        public static string Format(Int16[] values)
+        {
+            StringBuilder sb = GetBuilder(values.Length);
+            char[] buffer = GetBuffer();
+            foreach (Int16 value in values)
+                AppendInteger(sb, buffer, value);
+            return ToStringAndRelease(sb);
+        }
+
+        /// <summary>
+        /// Formats values as a string, separated by spaces</summary>
+        /// <param name="values">Values</param>
+        /// <returns>String of separated values</returns>
+        public static string Format(UInt16[] values)
+        {
+            StringBuilder sb = GetBuilder(values.Length);
+            char[] buffer = GetBuffer();
+            foreach (UInt16 value in values)
+                AppendInteger(sb, buffer, value);
+            return ToStringAndRelease(sb);
+        }
+
+        /// <summary>
+        /// Formats values as a string, separated by spaces</summary>
+        /// <param name="values">Values</param>
+        /// <returns>String of separated values</returns>
+        public static string Format(Int32[] values)
+        {
+            StringBuilder sb = GetBuilder(values.Length);
+            char[] buffer = GetBuffer();
+            foreach (Int32 value in values)
+                AppendInteger(sb, buffer, value);
+            return ToStringAndRelease(sb);
+        }
+
+        /// <summary>
+        /// Formats values as a string, separated by spaces</summary>
+        /// <param name="values">Values</param>
+        /// <returns>String of separated values</returns>
+        public static string Format(UInt32[] values)
+        {
+            StringBuilder sb = GetBuilder(values.Length);
+            char[] buffer = GetBuffer();
+            foreach (UInt32 value in values)
+                AppendInteger(sb, buffer, value);
+            return ToStringAndRelease(sb);
+        }
+
+        /// <summary>
+        /// Formats values as a string, separated by spaces</summary>
+        /// <param name="values">Values</param>
+        /// <returns>String of separated values</returns>
+        public static string Format(Int64[] values)
+        {
+            StringBuilder sb = GetBuilder(values.Length);
+            char[] buffer = GetBuffer();
+            foreach (Int64 value in values)
+                AppendInteger(sb, buffer, value);
+            return ToStringAndRelease(sb);
+        }
+
+        /// <summary>
+        /// Formats values as a string, separated by spaces</summary>
+        /// <param name="values">Values</param>
+        /// <returns>String of separated values</returns>
+        public static string Format(UInt64[] values)
+        {
+            StringBuilder sb = GetBuilder(values.Length);
+            char[] buffer = GetBuffer();
+            foreach (UInt64 value in values)
+                AppendDigits(sb, buffer, false, value, 0, 0);
+            return ToStringAndRelease(sb);
+        }
+
+        /// <summary>
+        /// Formats values as a string, separated by spaces. Each value is written with the fewest
+        /// digits that read back as the same value.</summary>
+        /// <param name="values">Values</param>
+        /// <returns>String of separated values</returns>
+        public static string Format(Single[] values)
+        {
+            StringBuilder sb = GetBuilder(values.Length);
+            char[] buffer = GetBuffer();
+            foreach (Single value in values)
+            {
+                ulong mantissa;
+                int exponent;
+                if (TryGetShortestDigits(value, MaxSingleDigits, true, out mantissa, out exponent))
+                {
+                    AppendDigits(sb, buffer, value < 0, mantissa, exponent, 0);
+                }
+                else
+                {
+                    AppendSeparator(sb);
+                    sb.Append(value.ToString("R", CultureInfo.InvariantCulture));
+                }
+            }
+            return ToStringAndRelease(sb);
+        }
+
+        /// <summary>
+        /// Formats values as a string, separated by spaces. Each value is written with the fewest
+        /// digits that read back as the same value.</summary>
+        /// <param name="values">Values</param>
+        /// <returns>String of separated values</returns>
+        public static string Format(Double[] values)
+        {
+            StringBuilder sb = GetBuilder(values.Length);
+            char[] buffer = GetBuffer();
+            foreach (Double value in values)
+            {
+                ulong mantissa;
+                int exponent;
+                if (TryGetShortestDigits(value, MaxDoubleDigits, false, out mantissa, out exponent))
+                {
+                    AppendDigits(sb, buffer, value < 0, mantissa, exponent, 0);
+                }
+                else
+                {
+                    AppendSeparator(sb);
+                    sb.Append(value.ToString("R", CultureInfo.InvariantCulture));
+                }
+            }
+            return ToStringAndRelease(sb);
+        }
+
+        /// <summary>
+        /// Formats values as a string, separated by spaces. Each value is written with its
+        /// scale, i.e., with any trailing zeros after the decimal point.</summary>
+        /// <param name="values">Values</param>
+        /// <returns>String of separated values</returns>
+        public static string Format(Decimal[] values)
+        {
+            StringBuilder sb = GetBuilder(values.Length);
+            char[] buffer = GetBuffer();
+            foreach (Decimal value in values)
+            {
+                int[] bits = Decimal.GetBits(value);
+                bool negative = bits[3] < 0;
+                ulong mantissa = ((ulong)(uint)bits[1] << 32) | (uint)bits[0];
+                if (bits[2] == 0 && !(negative && mantissa == 0))
+                {
+                    int scale = (bits[3] >> 16) & 0xFF;
+                    AppendDigits(sb, buffer, negative, mantissa, -scale, scale);
+                }
+                else
+                {
+                    AppendSeparator(sb);
+                    sb.Append(value.ToString(null, CultureInfo.InvariantCulture));
+                }
+            }
+            return ToStringAndRelease(sb);
+        }
+
+        private static bool IsSeparator(char c)
+        {
+            return c <= ' ' && (c == ' ' || c == '\n' || c == '\t');
+        }
+
+        // Moves the index to the start of the next value, and returns whether there is one.
+        private static bool SkipSeparators(string s, ref int index)
+        {
+            while (index < s.Length && IsSeparator(s[index]))
+                index++;
+            return index < s.Length;
+        }
+
+        // Moves the index to the end of the current value.
+        private static void SkipValue(string s, ref int index)
+        {
+            while (index < s.Length && !IsSeparator(s[index]))
+                index++;
+        }
+
+        // Moves the index to the end of the current value, and gets the value, for the CLR to
+        //  parse when it can't be parsed directly.
+        private static string GetValue(string s, int start, ref int index)
+        {
+            SkipValue(s, ref index);
+            return s.Substring(start, index - start);
+        }
+
+        private static bool IsValueEnd(string s, int index)
+        {
+            return index == s.Length || IsSeparator(s[index]);
+        }
+
+        // The parsing methods below read the value that starts at the index and move the index
+        //  past the characters that they read. They only succeed if they read the whole value.
+
+        // Parses an optional sign and up to MaxIntegerDigits digits, which is all that most
+        //  integer values have, so that the result can't overflow.
+        private static bool TryParseInteger(string s, ref int index, long minValue, long maxValue, out long value)
+        {
+            value = 0;
+            int i = index;
+            bool negative = false;
+            if (s[i] == '-' || s[i] == '+')
+            {
+                negative = s[i] == '-';
+                i++;
+            }
+
+            int digitStart = i;
+            long result = 0;
+            for (; i < s.Length; i++)
+            {
+                int digit = s[i] - '0';
+                if ((uint)digit > 9)
+                    break;
+                result = result * 10 + digit;
+            }
+
+            index = i;
+            int digitCount = i - digitStart;
+            if (digitCount < 1 || digitCount > MaxIntegerDigits || !IsValueEnd(s, i))
+                return false;
+
+            if (negative)
+                result = -result;
+            if (result < minValue || result > maxValue)
+                return false;
+
+            value = result;
+            return true;
+        }
+
+        // Parses an optional plus sign and up to MaxMantissaDigits digits, which can't overflow.
+        private static bool TryParseUnsigned(string s, ref int index, out ulong value)
+        {
+            value = 0;
+            int i = index;
+            if (s[i] == '+')
+                i++;
+
+            int digitStart = i;
+            ulong result = 0;
+            for (; i < s.Length; i++)
+            {
+                int digit = s[i] - '0';
+                if ((uint)digit > 9)
+                    break;
+                result = result * 10 + (uint)digit;
+            }
+
+            index = i;
+            int digitCount = i - digitStart;
+            if (digitCount < 1 || digitCount > NumberParser.MaxMantissaDigits || !IsValueEnd(s, i))
+                return false;
+
+            value = result;
+            return true;
+        }
+
+        // Parses a number that must be followed by the end of the value; see
+        //  NumberParser.TryParseNumber().
+        private static bool TryParseNumber(string s, ref int index, bool allowExponent,
+            out bool negative, out ulong mantissa, out int exponent)
+        {
+            return
+                NumberParser.TryParseNumber(new NumberParser.StringText(s), ref index, s.Length, allowExponent,
+                    out negative, out mantissa, out exponent) &&
+                IsValueEnd(s, index);
+        }
+
+        // Parses numbers whose double can be computed exactly; see NumberParser.TryGetDouble().
+        private static bool TryParseDouble(string s, ref int index, out double value)
+        {
+            value = 0;
+            bool negative;
+            ulong mantissa;
+            int exponent;
+            return
+                TryParseNumber(s, ref index, true, out negative, out mantissa, out exponent) &&
+                NumberParser.TryGetDouble(negative, mantissa, exponent, out value);
+        }
+
+        // Finds the fewest significant digits, rounded from the value, that read back as the same
+        //  value. Values outside of the range that is written without an exponent, and values
+        //  that need more digits than can be parsed exactly, aren't handled.
+        private static bool TryGetShortestDigits(double value, int maxDigits, bool isSingle,
+            out ulong mantissa, out int exponent)
+        {
+            mantissa = 0;
+            exponent = 0;
+            if (value == 0)
+                return BitConverter.DoubleToInt64Bits(value) == 0; // leave negative zero to the CLR
+
+            double magnitude = Math.Abs(value);
+            if (!(magnitude >= MinFixedValue && magnitude < MaxFixedValue))
+                return false; // also excludes NaN
+
+            // an estimate of the decimal exponent is enough, because the result is checked
+            int magnitudeExponent = (int)Math.Floor(Math.Log10(magnitude));
+            for (int digitCount = 1; digitCount <= maxDigits; digitCount++)
+            {
+                int candidateExponent = magnitudeExponent - digitCount + 1;
+                if (candidateExponent < -NumberParser.MaxExactPowerOf10 ||
+                    candidateExponent > NumberParser.MaxExactPowerOf10)
+                    continue;
+
+                double digits = candidateExponent < 0 ?
+                    Math.Round(magnitude * NumberParser.GetPowerOf10(-candidateExponent)) :
+                    Math.Round(magnitude / NumberParser.GetPowerOf10(candidateExponent));
+                if (digits > NumberParser.MaxExactMantissa)
+                    break;
+
+                double candidate = NumberParser.ToDouble((ulong)digits, candidateExponent);
+                if (isSingle ?
+                    NumberParser.IsExactSingle(candidate) && (float)candidate == (float)magnitude :
+                    candidate == magnitude)
+                {
+                    mantissa = (ulong)digits;
+                    exponent = candidateExponent;
+                    return true;
+                }
+            }
+
+            return false;
+        }
+
+        // Appends a separator, if needed, and the number (-)mantissa * 10^exponent, without an
+        //  exponent, and with at least minFractionDigits digits after the decimal point.
+        private static void AppendDigits(StringBuilder sb, char[] buffer, bool negative, ulong mantissa,
+            int exponent, int minFractionDigits)
+        {
+            // drop trailing zeros that aren't needed
+            while (exponent < -minFractionDigits && mantissa != 0 && mantissa % 10 == 0)
+            {
+                mantissa /= 10;
+                exponent++;
+            }
+
+            // write the digits backwards from the end of the buffer
+            int position = buffer.Length;
+            for (int i = 0; i < exponent; i++)
+                buffer[--position] = '0';
+
+            int fractionDigits = -exponent;
+            int digitCount = 0;
+            do
+            {
+                if (digitCount == fractionDigits && digitCount > 0)
+                    buffer[--position] = '.';
+                buffer[--position] = (char)('0' + (int)(mantissa % 10));
+                mantissa /= 10;
+                digitCount++;
+            }
+            while (mantissa != 0 || digitCount <= fractionDigits);
+
+            if (negative)
+                buffer[--position] = '-';
+
+            AppendSeparator(sb);
+            sb.Append(buffer, position, buffer.Length - position);
+        }
+
+        private static void AppendInteger(StringBuilder sb, char[] buffer, long value)
+        {
+            if (value < 0)
+                AppendDigits(sb, buffer, true, (ulong)-(value + 1) + 1, 0, 0);
+            else
+                AppendDigits(sb, buffer, false, (ulong)value, 0, 0);
+        }
+
+        // Separates each value from the previous one.
+        private static void AppendSeparator(StringBuilder sb)
+        {
+            if (sb.Length > 0)
+                sb.Append(' ');
+        }
+
+        private static StringBuilder GetBuilder(int valueCount)
+        {
+            StringBuilder sb = s_builder ?? (s_builder = new StringBuilder());
+            sb.Length = 0;
+            sb.EnsureCapacity(Math.Min(valueCount, MaxPooledCapacity / 8) * 8);
+            return sb;
+        }
+
+        private static string ToStringAndRelease(StringBuilder sb)
+        {
+            string result = sb.ToString();
+            // don't hold on to the buffer for the largest arrays
+            if (sb.Capacity > MaxPooledCapacity)
+                s_builder = null;
+            return result;
+        }
+
+        private static char[] GetBuffer()
+        {
+            return s_buffer ?? (s_buffer = new char[BufferSize]);
+        }
+
+        private const int MaxIntegerDigits = 18;
+        private const int MaxDecimalScale = 28;
+        private const int MaxSingleDigits = 9;
+        private const int MaxDoubleDigits = 17;
+
+        private const double MinFixedValue = 1e-5;
+        private const double MaxFixedValue = 1e15;
+
+        // long enough for the longest formatted value, e.g., -0.00001 followed by 17 digits
+        private const int BufferSize = 64;
+        private const int MaxPooledCapacity = 1024 * 1024;
+
+        [ThreadStatic]
+        private static StringBuilder s_builder;
+
+        [ThreadStatic]
+        private static char[] s_buffer;
+    }
+}
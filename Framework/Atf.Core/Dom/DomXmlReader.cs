@@ -2,8 +2,11 @@
 
 using System;
 using System.Collections.Generic;
+using System.ComponentModel;
 using System.IO;
 using System.Linq;
+using System.Text;
+using System.Threading.Tasks;
 using System.Xml;
 
 namespace Sce.Atf.Dom
@@ -57,6 +60,47 @@ public IEnumerable<XmlNodeReference> UnresolvedReferences
             protected set { m_nodeReferences = value.ToList(); }
         }
 
+        /// <summary>
+        /// Gets or sets whether attribute values are parsed on worker threads. The XML is still
+        /// read, and the nodes are still created, on the calling thread, as are ids and references.
+        /// Default is false.</summary>
+        /// <remarks>When this is set, ReadAttribute() sets most attribute values only after the
+        /// elements have been read, so overrides of ReadElement() and ReadAttribute() must not
+        /// depend on the attribute values of the nodes being read, other than their ids. The
+        /// AttributeTypes of the schema must be able to convert strings on multiple threads at once,
+        /// which the ATF attribute types can.</remarks>
+        public bool ParallelAttributeParsing
+        {
+            get { return m_parallelAttributeParsing; }
+            set { m_parallelAttributeParsing = value; }
+        }
+
+        /// <summary>
+        /// Gets or sets the depth of the nodes whose children are loaded on demand, where the root
+        /// is at depth 0. The XML of these children is kept, unparsed, and read the first time that
+        /// the children are accessed, and so on for their children. Default is int.MaxValue, which
+        /// reads the whole document up front.</summary>
+        /// <remarks>Nodes that haven't been loaded are loaded when a reference to them is
+        /// resolved; their ids are those of the id attributes of the type loader's node types.
+        /// Children are loaded by this reader, so overrides of ReadElement(), ReadAttribute() and
+        /// ResolveReferences() are called then, too, and NodeDictionary and UnresolvedReferences
+        /// only hold the nodes and references that were read up front.</remarks>
+        public int LazyLoadDepth
+        {
+            get { return m_lazyLoadDepth; }
+            set
+            {
+                if (value < 0)
+                    throw new ArgumentOutOfRangeException("value");
+                m_lazyLoadDepth = value;
+            }
+        }
+
+        /// <summary>
+        /// Event that is raised on the reading thread as the stream is read, with the percentage of
+        /// the stream that has been read. It is only raised for seekable streams.</summary>
+        public event EventHandler<ProgressChangedEventArgs> ProgressChanged;
+
         /// <summary>
         /// Reads a node tree from a stream</summary>
         /// <param name="stream">Read stream</param>
@@ -66,14 +110,24 @@ public virtual DomNode Read(Stream stream, Uri uri)
         {
             m_uri = uri;
             m_root = null;
+            // the previous document may still need its dictionary, to load its nodes
+            if (m_lazyDocument != null)
+                m_nodeDictionary = new Dictionary<string, DomNode>();
             m_nodeDictionary.Clear();
             m_nodeReferences.Clear();
+            m_parallelRead = m_parallelAttributeParsing;
+            m_depth = 0;
+            m_lazyDocument = null;
+            BeginProgress(stream);
 
             XmlReaderSettings settings = new XmlReaderSettings();
             settings.IgnoreComments = true;
             settings.IgnoreProcessingInstructions = true;
             //settings.IgnoreWhitespace = true;
 
+            if (m_lazyLoadDepth < int.MaxValue)
+                m_lazyDocument = new LazyDocument(this, m_lazyLoadDepth, m_uri, m_nodeDictionary, settings);
+
             using (XmlReader reader = XmlReader.Create(stream, settings))
             {
                 reader.MoveToContent();
@@ -84,11 +138,26 @@ public virtual DomNode Read(Stream stream, Uri uri)
                         "No root element was found in the XML document, probably " +
                         "due to a namespace mismatch with the schema file");
 
-                m_root = ReadElement(rootElement, reader);
+                try
+                {
+                    m_root = ReadElement(rootElement, reader);
+                    if (m_lazyDocument != null)
+                        m_lazyDocument.Root = m_root;
+                    ApplyParsedAttributes();
+                }
+                finally
+                {
+                    m_parallelRead = false;
+                    m_currentBatch = null;
+                    m_pendingBatches.Clear();
+                    m_progressStream = null;
+                }
 
                 ResolveReferences();
             }
 
+            OnProgressChanged(new ProgressChangedEventArgs(100, null));
+
             return m_root;
         }
 
@@ -133,6 +202,13 @@ protected virtual void ReadAttribute(DomNode node, AttributeInfo attributeInfo,
                 // save reference so it can be resolved after all nodes have been read
                 m_nodeReferences.Add(new XmlNodeReference(node, attributeInfo, valueString));
             }
+            else if (m_parallelRead &&
+                attributeInfo.Type.Type != AttributeTypes.String &&
+                attributeInfo != node.Type.IdAttribute)
+            {
+                // ids are needed to resolve references, and strings don't need to be parsed
+                QueueAttribute(node, attributeInfo, valueString);
+            }
             else
             {
                 object value = attributeInfo.Type.Convert(valueString);
@@ -177,6 +253,7 @@ protected virtual DomNode ReadElement(ChildInfo nodeInfo, XmlReader reader)
             string typeNS = type.Name.Substring(0, index);
 
             DomNode node = new DomNode(type, nodeInfo);
+            ReportProgress();
 
             // read attributes
             while (reader.MoveToNextAttribute())
@@ -202,6 +279,7 @@ protected virtual DomNode ReadElement(ChildInfo nodeInfo, XmlReader reader)
 
             reader.MoveToElement();
 
+            DeferredChildren deferred = null;
             if (!reader.IsEmptyElement)
             {
                 // read child elements
@@ -219,7 +297,18 @@ protected virtual DomNode ReadElement(ChildInfo nodeInfo, XmlReader reader)
 
                         if (childInfo != null)
                         {
+                            if (m_lazyDocument != null && m_depth >= m_lazyDocument.LazyLoadDepth)
+                            {
+                                // keep the child's XML, to read when the node's children are accessed
+                                if (deferred == null)
+                                    deferred = new DeferredChildren(m_lazyDocument, reader);
+                                DeferElement(node, deferred, childInfo, reader);
+                                continue;
+                            }
+
+                            m_depth++;
                             DomNode childNode = ReadElement(childInfo, reader);
+                            m_depth--;
                             if (childNode != null)
                             {
                                 // childNode is fully populated sub-tree
@@ -287,6 +376,12 @@ protected virtual DomNode ReadElement(ChildInfo nodeInfo, XmlReader reader)
                 }
             }
 
+            if (deferred != null)
+            {
+                deferred.Finish();
+                node.SetChildLoader(deferred.Load);
+            }
+
             reader.MoveToContent();
 
             return node;
@@ -347,7 +442,7 @@ protected virtual void ResolveReferences()
                 id = id.TrimStart(s_trimChars);
                 
                 DomNode refNode;
-                if (m_nodeDictionary.TryGetValue(id, out refNode))
+                if (TryGetReferencedNode(nodeReference, id, out refNode))
                 {
                     nodeReference.Node.SetAttribute(nodeReference.AttributeInfo, refNode);
                 }
@@ -362,6 +457,14 @@ protected virtual void ResolveReferences()
             m_nodeReferences = unresolved;            
         }
 
+        /// <summary>
+        /// Raises the ProgressChanged event</summary>
+        /// <param name="e">Event args</param>
+        protected virtual void OnProgressChanged(ProgressChangedEventArgs e)
+        {
+            ProgressChanged.Raise(this, e);
+        }
+
         /// <summary>
         /// Gets node type of child of a node type</summary>
         /// <param name="type">Node type</param>
@@ -399,14 +502,383 @@ protected DomNodeType GetChildType(DomNodeType type, XmlReader reader)
             return result;
         }
 
+        private bool TryGetReferencedNode(XmlNodeReference nodeReference, string id, out DomNode refNode)
+        {
+            if (m_lazyDocument == null)
+                return m_nodeDictionary.TryGetValue(id, out refNode);
+
+            // load the node if it hasn't been loaded; this may take a few levels of loading
+            LazyDocument document = m_lazyDocument;
+            DomNode owner;
+            while (!m_nodeDictionary.TryGetValue(id, out refNode) &&
+                document.DeferredIds.TryGetValue(id, out owner) &&
+                owner.HasUnloadedChildren)
+            {
+                owner.LoadChildren();
+            }
+
+            // nodes that were loaded earlier may have been removed from the document since
+            return refNode != null && refNode.GetRoot() == nodeReference.Node.GetRoot();
+        }
+
+        private void DeferElement(DomNode node, DeferredChildren deferred, ChildInfo childInfo, XmlReader reader)
+        {
+            HashSet<string> idNames = deferred.Document.IdAttributeNames;
+            XmlWriter writer = deferred.Writer;
+            int depth = reader.Depth;
+
+            // copy the element, noting the ids in it so references to them can be resolved, and
+            //  leave the reader on the element's end, as ReadElement() does
+            while (true)
+            {
+                switch (reader.NodeType)
+                {
+                    case XmlNodeType.Element:
+                        writer.WriteStartElement(reader.Prefix, reader.LocalName, reader.NamespaceURI);
+                        while (reader.MoveToNextAttribute())
+                        {
+                            if (reader.Prefix == string.Empty && idNames.Contains(reader.LocalName))
+                                deferred.Document.DeferredIds[reader.Value] = node;
+                        }
+                        reader.MoveToElement();
+                        writer.WriteAttributes(reader, true);
+                        if (reader.IsEmptyElement)
+                            writer.WriteEndElement();
+                        break;
+                    case XmlNodeType.EndElement:
+                        writer.WriteFullEndElement();
+                        break;
+                    case XmlNodeType.Text:
+                        writer.WriteString(reader.Value);
+                        break;
+                    case XmlNodeType.CDATA:
+                        writer.WriteCData(reader.Value);
+                        break;
+                }
+
+                if (reader.Depth == depth && (reader.NodeType == XmlNodeType.EndElement || reader.IsEmptyElement))
+                    break;
+                if (!reader.Read())
+                    break;
+            }
+
+            deferred.Add(childInfo);
+        }
+
+        private void LoadDeferredChildren(DomNode node, DeferredChildren deferred)
+        {
+            // children can be loaded at any time, even during another read, so save the state
+            LazyDocument oldDocument = m_lazyDocument;
+            Uri oldUri = m_uri;
+            DomNode oldRoot = m_root;
+            Dictionary<string, DomNode> oldNodeDictionary = m_nodeDictionary;
+            List<XmlNodeReference> oldNodeReferences = m_nodeReferences;
+            int oldDepth = m_depth;
+            bool oldParallelRead = m_parallelRead;
+            Stream oldProgressStream = m_progressStream;
+
+            LazyDocument document = deferred.Document;
+            m_lazyDocument = document;
+            m_uri = document.Uri;
+            m_root = document.Root;
+            m_nodeDictionary = document.Nodes;
+            m_nodeReferences = new List<XmlNodeReference>();
+            m_depth = document.LazyLoadDepth + 1;
+            m_parallelRead = false;
+            m_progressStream = null;
+            try
+            {
+                // the children's elements follow each other in the XML
+                XmlParserContext context = new XmlParserContext(null, deferred.CreateNamespaceManager(), null, XmlSpace.None);
+                using (XmlReader reader = XmlReader.Create(new StringReader(deferred.Xml), document.FragmentSettings, context))
+                {
+                    for (int i = 0; i < deferred.Count; i++)
+                    {
+                        reader.MoveToContent();
+                        ChildInfo childInfo = deferred.GetChildInfo(i);
+                        DomNode childNode = ReadElement(childInfo, reader);
+                        if (childNode != null)
+                            node.AddLoadedChild(childInfo, childNode);
+                        reader.Read();
+                    }
+                }
+
+                ResolveReferences();
+            }
+            finally
+            {
+                m_lazyDocument = oldDocument;
+                m_uri = oldUri;
+                m_root = oldRoot;
+                m_nodeDictionary = oldNodeDictionary;
+                m_nodeReferences = oldNodeReferences;
+                m_depth = oldDepth;
+                m_parallelRead = oldParallelRead;
+                m_progressStream = oldProgressStream;
+            }
+        }
+
+        private void BeginProgress(Stream stream)
+        {
+            m_progressStream = null;
+            m_progressPercentage = 0;
+            if (ProgressChanged != null && stream.CanSeek)
+            {
+                m_progressStream = stream;
+                m_progressStart = stream.Position;
+                m_progressLength = stream.Length - m_progressStart;
+            }
+        }
+
+        private void ReportProgress()
+        {
+            if (m_progressStream == null || m_progressLength <= 0)
+                return;
+
+            // the XmlReader reads ahead in blocks, so this is approximate
+            int percentage = (int)(100 * (m_progressStream.Position - m_progressStart) / m_progressLength);
+            if (percentage > m_progressPercentage && percentage < 100)
+            {
+                m_progressPercentage = percentage;
+                OnProgressChanged(new ProgressChangedEventArgs(percentage, null));
+            }
+        }
+
+        private void QueueAttribute(DomNode node, AttributeInfo attributeInfo, string valueString)
+        {
+            if (m_currentBatch == null)
+                m_currentBatch = new AttributeBatch();
+
+            m_currentBatch.Add(node, attributeInfo, valueString);
+            if (m_currentBatch.Count == AttributeBatch.Size)
+            {
+                StartBatch();
+
+                // set the values of parsed batches as we go, and limit the batches in flight, so
+                //  the parsed values don't pile up
+                while (m_pendingBatches.Count > 0 &&
+                    (m_pendingBatches.Peek().Task.IsCompleted || m_pendingBatches.Count > s_maxPendingBatches))
+                {
+                    m_pendingBatches.Dequeue().Apply();
+                }
+            }
+        }
+
+        private void StartBatch()
+        {
+            AttributeBatch batch = m_currentBatch;
+            batch.Task = Task.Factory.StartNew(batch.Parse);
+            m_pendingBatches.Enqueue(batch);
+            m_currentBatch = null;
+        }
+
+        private void ApplyParsedAttributes()
+        {
+            if (m_currentBatch != null)
+                StartBatch();
+            while (m_pendingBatches.Count > 0)
+                m_pendingBatches.Dequeue().Apply();
+        }
+
+        // Attribute values that are parsed together on a worker thread, then set on the reading thread
+        private class AttributeBatch
+        {
+            public const int Size = 1024;
+
+            public int Count
+            {
+                get { return m_count; }
+            }
+
+            public Task Task;
+
+            public void Add(DomNode node, AttributeInfo attributeInfo, string valueString)
+            {
+                m_nodes[m_count] = node;
+                m_attributeInfos[m_count] = attributeInfo;
+                m_valueStrings[m_count] = valueString;
+                m_count++;
+            }
+
+            public void Parse()
+            {
+                for (int i = 0; i < m_count; i++)
+                {
+                    try
+                    {
+                        m_values[i] = m_attributeInfos[i].Type.Convert(m_valueStrings[i]);
+                    }
+                    catch (Exception)
+                    {
+                        // the string is parsed again on the reading thread, so that the exception
+                        //  is thrown from there, as it is when reading sequentially
+                        m_failed[i] = true;
+                    }
+                }
+            }
+
+            public void Apply()
+            {
+                Task.Wait();
+                for (int i = 0; i < m_count; i++)
+                {
+                    AttributeInfo attributeInfo = m_attributeInfos[i];
+                    object value = m_failed[i] ? attributeInfo.Type.Convert(m_valueStrings[i]) : m_values[i];
+                    m_nodes[i].SetAttribute(attributeInfo, value);
+                }
+            }
+
+            private readonly DomNode[] m_nodes = new DomNode[Size];
+            private readonly AttributeInfo[] m_attributeInfos = new AttributeInfo[Size];
+            private readonly string[] m_valueStrings = new string[Size];
+            private readonly object[] m_values = new object[Size];
+            private readonly bool[] m_failed = new bool[Size];
+            private int m_count;
+        }
+
+        // A document that is read with LazyLoadDepth, whose nodes may still be loading
+        private class LazyDocument
+        {
+            public LazyDocument(DomXmlReader reader, int lazyLoadDepth, Uri uri,
+                Dictionary<string, DomNode> nodes, XmlReaderSettings settings)
+            {
+                Reader = reader;
+                LazyLoadDepth = lazyLoadDepth;
+                Uri = uri;
+                Nodes = nodes;
+                FragmentSettings = settings.Clone();
+                FragmentSettings.ConformanceLevel = ConformanceLevel.Fragment;
+
+                IdAttributeNames = new HashSet<string>();
+                foreach (DomNodeType type in reader.TypeLoader.GetNodeTypes())
+                {
+                    if (type.IdAttribute != null)
+                        IdAttributeNames.Add(type.IdAttribute.Name);
+                }
+            }
+
+            public readonly DomXmlReader Reader;
+            public readonly int LazyLoadDepth;
+            public readonly Uri Uri;
+            public readonly Dictionary<string, DomNode> Nodes;
+            public readonly XmlReaderSettings FragmentSettings;
+            public readonly HashSet<string> IdAttributeNames;
+
+            // ids in unloaded XML, and the nodes that load them
+            public readonly Dictionary<string, DomNode> DeferredIds = new Dictionary<string, DomNode>();
+
+            public DomNode Root;
+        }
+
+        // The unparsed XML of a node's children
+        private class DeferredChildren
+        {
+            public DeferredChildren(LazyDocument document, XmlReader reader)
+            {
+                Document = document;
+
+                // the XML may use prefixes that are declared by its ancestors
+                IXmlNamespaceResolver resolver = reader as IXmlNamespaceResolver;
+                if (resolver != null)
+                    m_namespaces = resolver.GetNamespacesInScope(XmlNamespaceScope.ExcludeXml);
+            }
+
+            public readonly LazyDocument Document;
+
+            public int Count
+            {
+                get { return m_childInfos.Count; }
+            }
+
+            // writes the children's XML, until Finish() is called
+            public XmlWriter Writer
+            {
+                get
+                {
+                    if (m_writer == null)
+                    {
+                        m_builder = new StringBuilder();
+                        m_writer = XmlWriter.Create(m_builder, s_fragmentSettings);
+                    }
+                    return m_writer;
+                }
+            }
+
+            public string Xml
+            {
+                get { return m_xml; }
+            }
+
+            public void Add(ChildInfo childInfo)
+            {
+                m_childInfos.Add(childInfo);
+            }
+
+            public void Finish()
+            {
+                m_writer.Close();
+                m_xml = m_builder.ToString();
+                m_writer = null;
+                m_builder = null;
+            }
+
+            public ChildInfo GetChildInfo(int index)
+            {
+                return m_childInfos[index];
+            }
+
+            public XmlNamespaceManager CreateNamespaceManager()
+            {
+                XmlNamespaceManager namespaces = new XmlNamespaceManager(new NameTable());
+                if (m_namespaces != null)
+                {
+                    foreach (KeyValuePair<string, string> pair in m_namespaces)
+                        namespaces.AddNamespace(pair.Key, pair.Value);
+                }
+                return namespaces;
+            }
+
+            public void Load(DomNode node)
+            {
+                Document.Reader.LoadDeferredChildren(node, this);
+            }
+
+            private readonly IDictionary<string, string> m_namespaces;
+            private readonly List<ChildInfo> m_childInfos = new List<ChildInfo>();
+            private StringBuilder m_builder;
+            private XmlWriter m_writer;
+            private string m_xml;
+        }
+
+        private static readonly XmlWriterSettings s_fragmentSettings = new XmlWriterSettings
+        {
+            OmitXmlDeclaration = true,
+            ConformanceLevel = ConformanceLevel.Fragment,
+        };
+
         private static readonly char[] s_trimChars = new[] { '|' };
+        private static readonly int s_maxPendingBatches = 4 * Environment.ProcessorCount;
 
         private readonly XmlSchemaTypeLoader m_typeLoader;
 
         private DomNode m_root;
         private Uri m_uri;
 
-        private readonly Dictionary<string, DomNode> m_nodeDictionary = new Dictionary<string,DomNode>();
+        private Dictionary<string, DomNode> m_nodeDictionary = new Dictionary<string,DomNode>();
         private List<XmlNodeReference> m_nodeReferences = new List<XmlNodeReference>();
+
+        private bool m_parallelAttributeParsing;
+        private bool m_parallelRead;
+        private AttributeBatch m_currentBatch;
+        private readonly Queue<AttributeBatch> m_pendingBatches = new Queue<AttributeBatch>();
+
+        private int m_lazyLoadDepth = int.MaxValue;
+        private int m_depth;
+        private LazyDocument m_lazyDocument;
+
+        private Stream m_progressStream;
+        private long m_progressStart;
+        private long m_progressLength;
+        private int m_progressPercentage;
     }
 }
@@ -26,6 +26,14 @@ protected override void OnNodeSet()
         /// Checks all DOM nodes in the subtree for validity</summary>
         protected abstract void ValidateSubtree();
 
+        /// <summary>
+        /// Checks the DOM nodes in a subtree that was loaded on demand for validity. The default
+        /// does nothing.</summary>
+        /// <param name="root">Root of loaded subtree</param>
+        protected virtual void ValidateLoadedSubtree(DomNode root)
+        {
+        }
+
         /// <summary>
         /// Performs clean up or flags an error in case of an id collision</summary>
         /// <param name="node">Node with id that collides with a previous node's id</param>
@@ -112,6 +120,18 @@ protected override void OnCancelled(object sender, EventArgs e)
         /// <param name="renamed">Renamed nodes and old ids</param>
         protected abstract void RenameNodes(Dictionary<DomNode, string> renamed);
 
+        /// <summary>
+        /// Performs custom actions after a child that was loaded on demand is added to the DOM
+        /// subtree, by checking the loaded subtree for validity</summary>
+        /// <param name="sender">Sender (root DOM node)</param>
+        /// <param name="e">Child event args</param>
+        protected override void OnChildLoaded(object sender, ChildEventArgs e)
+        {
+            ValidateLoadedSubtree(e.Child);
+
+            base.OnChildLoaded(sender, e);
+        }
+
         /// <summary>
         /// Performs custom actions after an attribute in the DOM subtree changes</summary>
         /// <param name="sender">Sender (root DOM node)</param>
@@ -181,10 +181,7 @@ private void DomNode_AttributeChanged(object sender, AttributeEventArgs e)
             
             var args = e.AttributeInfo.GetTagLocal<PropertyChangedEventArgsCollection>();
             if (args != null)
-            {
-                foreach (var arg in args)
-                    OnPropertyChanged(arg);
-            }
+                RaisePropertyChangedEvents(args);
         }
 
         private void DomNode_ChildRemoved(object sender, ChildEventArgs e)
@@ -194,10 +191,7 @@ private void DomNode_ChildRemoved(object sender, ChildEventArgs e)
             
             var args = e.ChildInfo.GetTagLocal<PropertyChangedEventArgsCollection>();
             if (args != null)
-            {
-                foreach (var arg in args)
-                    OnPropertyChanged(arg);
-            }
+                RaisePropertyChangedEvents(args);
         }
 
         private void DomNode_ChildInserted(object sender, ChildEventArgs e)
@@ -207,10 +201,46 @@ private void DomNode_ChildInserted(object sender, ChildEventArgs e)
             
             var args = e.ChildInfo.GetTagLocal<PropertyChangedEventArgsCollection>();
             if (args != null)
+                RaisePropertyChangedEvents(args);
+        }
+
+        private void RaisePropertyChangedEvents(PropertyChangedEventArgsCollection args)
+        {
+            // If the transaction batches notifications, raise each PropertyChanged event once,
+            //  when the transaction ends
+            TransactionContext context = m_pendingContext ?? TransactionContext.GetBatchingContext(DomNode);
+            if (context == null)
             {
                 foreach (var arg in args)
                     OnPropertyChanged(arg);
+                return;
+            }
+
+            if (m_pendingContext == null)
+            {
+                if (m_pendingArgs == null)
+                    m_pendingArgs = new List<PropertyChangedEventArgs>();
+                m_pendingContext = context;
+                m_pendingContext.Ended += TransactionContext_Finished;
+                m_pendingContext.Cancelled += TransactionContext_Finished;
             }
+            foreach (var arg in args)
+            {
+                if (!m_pendingArgs.Contains(arg))
+                    m_pendingArgs.Add(arg);
+            }
+        }
+
+        private void TransactionContext_Finished(object sender, EventArgs e)
+        {
+            m_pendingContext.Ended -= TransactionContext_Finished;
+            m_pendingContext.Cancelled -= TransactionContext_Finished;
+            m_pendingContext = null;
+
+            var pendingArgs = m_pendingArgs.ToArray();
+            m_pendingArgs.Clear();
+            foreach (var arg in pendingArgs)
+                OnPropertyChanged(arg);
         }
 
         private void Subscibe()
@@ -273,6 +303,8 @@ protected virtual void OnPropertyChanged(PropertyChangedEventArgs e)
         private readonly object m_lock = new object(); //for accessing m_childListCache
         private Dictionary<ChildInfo, Dictionary<Type, IObservableCollection>> m_childListsCache;
         private bool m_hasTags;
+        private TransactionContext m_pendingContext;
+        private List<PropertyChangedEventArgs> m_pendingArgs;
         private event PropertyChangedEventHandler m_propertyChanged;
     }
 }
@@ -61,6 +61,19 @@ private void OnChildrenChanged(ChildEventArgs e, NotifyCollectionChangedAction a
         {
             if (e.ChildInfo.IsEquivalent(m_childInfo) && e.Parent == m_node)
             {
+                // If the transaction batches notifications, reset the collection once, when the
+                //  transaction ends
+                if (m_pendingContext != null)
+                    return;
+                TransactionContext context = TransactionContext.GetBatchingContext(m_node);
+                if (context != null)
+                {
+                    m_pendingContext = context;
+                    m_pendingContext.Ended += TransactionContext_Finished;
+                    m_pendingContext.Cancelled += TransactionContext_Finished;
+                    return;
+                }
+
                 T adapter = e.Child.As<T>();
                 System.Diagnostics.Debug.Assert(adapter != null);
 
@@ -70,6 +83,17 @@ private void OnChildrenChanged(ChildEventArgs e, NotifyCollectionChangedAction a
             }
         }
 
+        private void TransactionContext_Finished(object sender, EventArgs e)
+        {
+            m_pendingContext.Ended -= TransactionContext_Finished;
+            m_pendingContext.Cancelled -= TransactionContext_Finished;
+            m_pendingContext = null;
+
+            OnCollectionChanged(new NotifyCollectionChangedEventArgs(NotifyCollectionChangedAction.Reset));
+            OnPropertyChanged(s_countPropertyChangedArgs);
+            OnPropertyChanged(s_indexerPropertyChangedArgs);
+        }
+
         /// <summary>
         /// Handle CollectionChanged event</summary>
         /// <param name="e">Notify CollectionChanged event arguments</param>
@@ -175,6 +199,7 @@ object ICollection.SyncRoot
         private object m_syncRoot;
         private readonly ChildInfo m_childInfo;
         private readonly DomNode m_node;
+        private TransactionContext m_pendingContext;
         private static PropertyChangedEventArgs s_countPropertyChangedArgs = new PropertyChangedEventArgs("Count");
         private static PropertyChangedEventArgs s_indexerPropertyChangedArgs = new PropertyChangedEventArgs("[]");
     }
@@ -5,6 +5,8 @@ namespace Sce.Atf.Dom
     /// <summary>
     /// Abstract base class for DOM contexts, which track DOM nodes as they enter
     /// and exit the subtree rooted at the DOM node to which this adapter is bound</summary>
+    /// <remarks>Nodes whose parents' children haven't been loaded yet (see DomNode.HasUnloadedChildren)
+    /// are added when they are loaded, so observers don't cause the whole subtree to be loaded.</remarks>
     public abstract class Observer : DomNodeAdapter
     {
         /// <summary>
@@ -15,6 +17,7 @@ protected override void OnNodeSet()
             DomNode.AttributeChanged += OnAttributeChanged;
             DomNode.ChildInserted += DomNode_ChildInserted;
             DomNode.ChildRemoved += DomNode_ChildRemoved;
+            DomNode.ChildLoaded += DomNode_ChildLoaded;
             
             AddSubtree(DomNode);
         }
@@ -43,6 +46,15 @@ protected virtual void OnChildRemoved(object sender, ChildEventArgs e)
         {
         }
 
+        /// <summary>
+        /// Performs custom actions after a child that was loaded on demand is added to the DOM
+        /// subtree. AddNode() has already been called for the child's subtree.</summary>
+        /// <param name="sender">Sender (root DOM node)</param>
+        /// <param name="e">Child event args</param>
+        protected virtual void OnChildLoaded(object sender, ChildEventArgs e)
+        {
+        }
+
         /// <summary>
         /// Performs custom actions for a node that has been added to our DOM subtree.
         /// This method is called for each DomNode added and for each of that DomNode's
@@ -73,15 +85,21 @@ private void DomNode_ChildRemoved(object sender, ChildEventArgs e)
             OnChildRemoved(sender, e);
         }
 
+        private void DomNode_ChildLoaded(object sender, ChildEventArgs e)
+        {
+            AddSubtree(e.Child);
+            OnChildLoaded(sender, e);
+        }
+
         private void AddSubtree(DomNode root)
         {
-            foreach (DomNode node in root.Subtree)
+            foreach (DomNode node in root.LoadedSubtree)
                 AddNode(node);
         }
 
         private void RemoveSubtree(DomNode root)
         {
-            foreach (DomNode node in root.Subtree)
+            foreach (DomNode node in root.LoadedSubtree)
                 RemoveNode(node);
         }
     }
@@ -14,7 +14,9 @@ namespace Sce.Atf.Dom
     /// 1. Tracks all DOM node references in the subtree.
     /// 2. Raises notifications if external DOM node references are added or removed.
     /// 3. After validating, raises notification events if referents have been removed,
-    /// leaving dangling references.</summary>
+    /// leaving dangling references.
+    /// References are indexed by their targets in hash sets, so adding and removing a reference,
+    /// and finding the references to a removed DomNode, don't depend on the number of references.</summary>
     public class ReferenceValidator : Validator
     {
         /// <summary>
@@ -23,8 +25,8 @@ public class ReferenceValidator : Validator
         /// <returns>Sequence of node-attribute pairs for all references to target</returns>
         public IEnumerable<Pair<DomNode, AttributeInfo>> GetReferences(DomNode target)
         {
-            List<Pair<DomNode, AttributeInfo>> references;
-            if (m_nodeReferenceLists.TryGetValue(target, out references))
+            HashSet<Pair<DomNode, AttributeInfo>> references;
+            if (m_nodeReferences.TryGetValue(target, out references))
                 return references;
 
             return EmptyEnumerable<Pair<DomNode, AttributeInfo>>.Instance;
@@ -106,18 +108,18 @@ protected override void OnEnding(object sender, EventArgs e)
                 // update all dangling references to removed node
                 foreach (DomNode removedNode in removedNodes)
                 {
-                    List<Pair<DomNode, AttributeInfo>> referenceList;
-                    if (m_nodeReferenceLists.TryGetValue(removedNode, out referenceList))
+                    HashSet<Pair<DomNode, AttributeInfo>> references;
+                    if (m_nodeReferences.TryGetValue(removedNode, out references))
                     {
-                        foreach (Pair<DomNode, AttributeInfo> pair in referenceList.ToArray()) // copy, as list may be modified
+                        foreach (Pair<DomNode, AttributeInfo> pair in references.ToArray()) // copy, as set may be modified
                         {
                             ReferenceEventArgs args = new ReferenceEventArgs(pair.First, pair.Second, removedNode);
                             ReferentRemoved.Raise(this, args);
                             OnReferentRemoved(args);
                         }
 
-                        // remove the list of references to  the removed node
-                        m_nodeReferenceLists.Remove(removedNode);
+                        // remove the references to the removed node
+                        m_nodeReferences.Remove(removedNode);
                     }
                 }
             }
@@ -217,13 +219,13 @@ protected override void RemoveNode(DomNode node)
         // adds refs to the tracker, and reports added external refs
         private void AddReference(DomNode owner, AttributeInfo attributeInfo, DomNode target)
         {
-            List<Pair<DomNode, AttributeInfo>> referenceList;
-            if (!m_nodeReferenceLists.TryGetValue(target, out referenceList))
+            HashSet<Pair<DomNode, AttributeInfo>> references;
+            if (!m_nodeReferences.TryGetValue(target, out references))
             {
-                referenceList = new List<Pair<DomNode, AttributeInfo>>();
-                m_nodeReferenceLists.Add(target, referenceList);
+                references = new HashSet<Pair<DomNode, AttributeInfo>>();
+                m_nodeReferences.Add(target, references);
             }
-            referenceList.Add(new Pair<DomNode, AttributeInfo>(owner, attributeInfo));
+            references.Add(new Pair<DomNode, AttributeInfo>(owner, attributeInfo));
 
             // if target's root isn't the context's root, then it's an external reference
             //  that is being added.
@@ -240,13 +242,13 @@ private void AddReference(DomNode owner, AttributeInfo attributeInfo, DomNode ta
         // removes refs from the tracker, and reports removed external refs
         private void RemoveReference(DomNode owner, AttributeInfo attributeInfo, DomNode target)
         {
-            List<Pair<DomNode, AttributeInfo>> referenceList;
-            if (m_nodeReferenceLists.TryGetValue(target, out referenceList))
+            HashSet<Pair<DomNode, AttributeInfo>> references;
+            if (m_nodeReferences.TryGetValue(target, out references))
             {
-                referenceList.Remove(new Pair<DomNode, AttributeInfo>(owner, attributeInfo));
-                if (referenceList.Count == 0)
+                references.Remove(new Pair<DomNode, AttributeInfo>(owner, attributeInfo));
+                if (references.Count == 0)
                 {
-                    m_nodeReferenceLists.Remove(target);
+                    m_nodeReferences.Remove(target);
                 }
             }
 
@@ -261,8 +263,8 @@ private void RemoveReference(DomNode owner, AttributeInfo attributeInfo, DomNode
             }
         }
 
-        private readonly Dictionary<DomNode, List<Pair<DomNode, AttributeInfo>>> m_nodeReferenceLists =
-            new Dictionary<DomNode, List<Pair<DomNode, AttributeInfo>>>();
+        private readonly Dictionary<DomNode, HashSet<Pair<DomNode, AttributeInfo>>> m_nodeReferences =
+            new Dictionary<DomNode, HashSet<Pair<DomNode, AttributeInfo>>>();
 
         private HashSet<DomNode> m_removed;
     }
@@ -2,6 +2,9 @@
 
 using System;
 using System.Collections.Generic;
+using System.IO;
+
+using Sce.Atf.Adaptation;
 
 namespace Sce.Atf.Dom
 {
@@ -44,7 +47,15 @@ public virtual void Begin(string transactionName)
 
             // Setting this indicates that a transaction is in progress; InTransaction will be true.
             if (!m_transactionCancelled)
+            {
                 m_transactionOperations = new List<Operation>();
+                m_attributeOperations.Clear();
+                if (m_batchNotifications)
+                {
+                    m_changeSet = new DomChangeSet();
+                    m_collectingChanges = true;
+                }
+            }
         }
 
         /// <summary>
@@ -66,6 +77,12 @@ public virtual void Cancel()
                 OnCancelled();
                 Cancelled.Raise(this, EventArgs.Empty);
 
+                // Cancelled listeners are done with the change set, so the rollback changes are
+                //  reported as they happen
+                m_collectingChanges = false;
+                m_changeSet = null;
+                m_attributeOperations.Clear();
+
                 // rollback in reverse order
                 for (int i = m_transactionOperations.Count - 1; i >= 0; i--)
                     m_transactionOperations[i].Undo();
@@ -95,12 +112,20 @@ public virtual void End()
                 OnEnding();
                 Ending.Raise(this, EventArgs.Empty);
 
+                // the change set is complete, but remains available to the Ended listeners
+                m_collectingChanges = false;
+
+                if (m_compactOperations)
+                    RemoveUnchangedOperations();
+
                 OnEnded();
                 Ended.Raise(this, EventArgs.Empty);
 
                 // transaction operations are assumed to be available by the Ended listeners like HistoryContext
                 m_transactionOperations = null;
                 m_transactionName = null;
+                m_changeSet = null;
+                m_attributeOperations.Clear();
             }
         }
 
@@ -141,6 +166,50 @@ public bool RequireTransactions
             set { m_requireTransactions = value; }
         }
 
+        /// <summary>
+        /// Gets or sets a value indicating if repeated changes to the same attribute of the same
+        /// DomNode during a transaction are combined into one AttributeChangedOperation, and if
+        /// attribute changes that end with the original value are removed when the transaction
+        /// ends. Attribute values don't depend on the other operations, so this doesn't change
+        /// the result of doing or undoing the operations.</summary>
+        public bool CompactOperations
+        {
+            get { return m_compactOperations; }
+            set { m_compactOperations = value; }
+        }
+
+        /// <summary>
+        /// Gets or sets a value indicating if the changes made during each transaction are
+        /// collected into a coalesced ChangeSet. Listeners like TransactionReporter, DataValidator
+        /// and the observable adapters then process the change set when the transaction ends,
+        /// instead of handling every DOM event. Takes effect with the next transaction.</summary>
+        public bool BatchNotifications
+        {
+            get { return m_batchNotifications; }
+            set { m_batchNotifications = value; }
+        }
+
+        /// <summary>
+        /// Gets the coalesced changes made by the current transaction, if BatchNotifications is
+        /// true. Is valid after the Beginning event and during the Ending and Ended events. Is null
+        /// otherwise.</summary>
+        public DomChangeSet ChangeSet
+        {
+            get { return m_changeSet; }
+        }
+
+        /// <summary>
+        /// Gets the transaction context of the given node's DOM tree if it is collecting the
+        /// changes of a transaction into a change set, so that listeners should defer their
+        /// notifications until the transaction ends</summary>
+        /// <param name="node">DomNode</param>
+        /// <returns>Transaction context on the root of the node's tree, or null</returns>
+        internal static TransactionContext GetBatchingContext(DomNode node)
+        {
+            TransactionContext context = node.GetRoot().As<TransactionContext>();
+            return context != null && context.m_collectingChanges ? context : null;
+        }
+
         /// <summary>
         /// Gets operations representing the changes made by the transaction. Is valid after
         /// the Beginning event.</summary>
@@ -176,6 +245,72 @@ public abstract class Operation
             /// <summary>
             /// Rolls back the transaction operation</summary>
             public abstract void Undo();
+
+            /// <summary>
+            /// Gets an estimate of the memory used by the operation, in bytes, for limiting the
+            /// memory used by undo/redo histories</summary>
+            public virtual long MemorySize
+            {
+                get { return ObjectSize; }
+            }
+
+            /// <summary>
+            /// Writes the operation's bulky data, such as large attribute values, to a stream and
+            /// releases it from memory. The operation can't be done or undone until Restore() is
+            /// called. By default, nothing is written.</summary>
+            /// <param name="writer">Writer for the stream</param>
+            /// <returns>True iff any data was released</returns>
+            public virtual bool Spill(BinaryWriter writer)
+            {
+                return false;
+            }
+
+            /// <summary>
+            /// Reads the data that was written by Spill() back into memory</summary>
+            /// <param name="reader">Reader for the stream, positioned where Spill() started writing</param>
+            public virtual void Restore(BinaryReader reader)
+            {
+            }
+
+            /// <summary>
+            /// Estimates the memory used by an attribute value, in bytes</summary>
+            /// <param name="value">Attribute value</param>
+            /// <returns>Estimated size; DomNodes and other shared objects count as references</returns>
+            protected static long EstimateValueSize(object value)
+            {
+                if (value == null)
+                    return 0;
+
+                string s = value as string;
+                if (s != null)
+                    return ObjectSize + 2L * s.Length;
+
+                Array array = value as Array;
+                if (array != null)
+                {
+                    Type elementType = array.GetType().GetElementType();
+                    if (elementType.IsPrimitive)
+                        return ObjectSize + Buffer.ByteLength(array);
+
+                    long size = ObjectSize + (long)IntPtr.Size * array.Length;
+                    if (elementType == typeof(string))
+                    {
+                        foreach (string element in array)
+                            size += EstimateValueSize(element);
+                    }
+                    return size;
+                }
+
+                if (value is DomNode)
+                    return IntPtr.Size;
+
+                // boxed value
+                return ObjectSize;
+            }
+
+            /// <summary>
+            /// Estimated size of a small object, in bytes</summary>
+            protected static readonly int ObjectSize = 3 * IntPtr.Size;
         }
 
         /// <summary>
@@ -197,6 +332,7 @@ public AttributeChangedOperation(AttributeEventArgs e)
             /// Does the transaction operation</summary>
             public override void Do()
             {
+                CheckRestored();
                 m_node.SetAttribute(m_attributeInfo, m_newValue);
             }
 
@@ -204,9 +340,69 @@ public override void Do()
             /// Rolls back the transaction operation</summary>
             public override void Undo()
             {
+                CheckRestored();
                 m_node.SetAttribute(m_attributeInfo, m_oldValue);
             }
 
+            /// <summary>
+            /// Gets an estimate of the memory used by the operation, in bytes</summary>
+            public override long MemorySize
+            {
+                get { return 2 * ObjectSize + EstimateValueSize(m_oldValue) + EstimateValueSize(m_newValue); }
+            }
+
+            /// <summary>
+            /// Writes the old and new values to a stream and releases them from memory, if they
+            /// are strings or arrays that can be written in binary form</summary>
+            /// <param name="writer">Writer for the stream</param>
+            /// <returns>True iff any value was released</returns>
+            public override bool Spill(BinaryWriter writer)
+            {
+                int spilled = 0;
+                if (CanSpill(m_oldValue))
+                    spilled |= SpilledOldValue;
+                if (CanSpill(m_newValue))
+                    spilled |= SpilledNewValue;
+
+                writer.Write((byte)spilled);
+                if ((spilled & SpilledOldValue) != 0)
+                {
+                    DomBinaryFormat.WriteValue(writer, m_attributeInfo.Type.Type, m_oldValue);
+                    m_oldValue = null;
+                }
+                if ((spilled & SpilledNewValue) != 0)
+                {
+                    DomBinaryFormat.WriteValue(writer, m_attributeInfo.Type.Type, m_newValue);
+                    m_newValue = null;
+                }
+
+                m_spilled |= spilled;
+                return spilled != 0;
+            }
+
+            /// <summary>
+            /// Reads the values that were written by Spill() back into memory</summary>
+            /// <param name="reader">Reader for the stream, positioned where Spill() started writing</param>
+            public override void Restore(BinaryReader reader)
+            {
+                int spilled = reader.ReadByte();
+                if ((spilled & SpilledOldValue) != 0)
+                {
+                    object oldValue = DomBinaryFormat.ReadValue(reader, m_attributeInfo.Type.Type);
+                    if ((m_spilled & SpilledOldValue) != 0)
+                        m_oldValue = oldValue;
+                }
+                if ((spilled & SpilledNewValue) != 0)
+                {
+                    // the new value may have been set since it was spilled
+                    object newValue = DomBinaryFormat.ReadValue(reader, m_attributeInfo.Type.Type);
+                    if ((m_spilled & SpilledNewValue) != 0)
+                        m_newValue = newValue;
+                }
+
+                m_spilled = 0;
+            }
+
             /// <summary>
             /// Gets the DomNode for the attribute being changed</summary>
             public DomNode DomNode
@@ -221,18 +417,54 @@ public AttributeInfo AttributeInfo
                 get { return m_attributeInfo; }
             }
 
+            /// <summary>
+            /// Gets the old value</summary>
+            public object OldValue
+            {
+                get
+                {
+                    CheckRestored();
+                    return m_oldValue;
+                }
+            }
+
             /// <summary>
             /// Gets and sets the new value</summary>
             public object NewValue
             {
-                get { return m_newValue; }
-                set { m_newValue = value; }
+                get
+                {
+                    CheckRestored();
+                    return m_newValue;
+                }
+                set
+                {
+                    m_newValue = value;
+                    m_spilled &= ~SpilledNewValue;
+                }
+            }
+
+            private bool CanSpill(object value)
+            {
+                return
+                    (value is string || value is Array) &&
+                    DomBinaryFormat.CanWriteValue(m_attributeInfo.Type, value);
+            }
+
+            private void CheckRestored()
+            {
+                if (m_spilled != 0)
+                    throw new InvalidOperationException("operation's values have been spilled");
             }
 
+            private const int SpilledOldValue = 1;
+            private const int SpilledNewValue = 2;
+
             private readonly DomNode m_node;
             private readonly AttributeInfo m_attributeInfo;
-            private readonly object m_oldValue;
+            private object m_oldValue;
             private object m_newValue;
+            private int m_spilled;
         }
 
         /// <summary>
@@ -343,6 +575,26 @@ public override void Undo()
                 }
             }
 
+            /// <summary>
+            /// Gets an estimate of the memory used by the operation, in bytes, including the
+            /// removed subtree, which only the operation may reference</summary>
+            public override long MemorySize
+            {
+                get
+                {
+                    long size = 2 * ObjectSize;
+                    foreach (DomNode node in m_child.LoadedSubtree)
+                    {
+                        size += NodeSize;
+                        foreach (AttributeInfo info in node.Type.Attributes)
+                            size += IntPtr.Size;
+                    }
+                    return size;
+                }
+            }
+
+            private static readonly int NodeSize = 12 * IntPtr.Size;
+
             private readonly DomNode m_parent;
             private readonly ChildInfo m_childInfo;
             private readonly DomNode m_child;
@@ -352,19 +604,65 @@ public override void Undo()
         private void DomNode_AttributeChanged(object sender, AttributeEventArgs e)
         {
             if (CheckTransaction())
-                AddOperation(new AttributeChangedOperation(e));
+            {
+                if (m_compactOperations)
+                {
+                    // combine with the previous change to the attribute, if there is one
+                    AttributeChangedOperation operation;
+                    var key = new Pair<DomNode, int>(e.DomNode, e.AttributeInfo.Index);
+                    if (m_attributeOperations.TryGetValue(key, out operation))
+                    {
+                        operation.NewValue = e.NewValue;
+                    }
+                    else
+                    {
+                        operation = new AttributeChangedOperation(e);
+                        m_attributeOperations.Add(key, operation);
+                        AddOperation(operation);
+                    }
+                }
+                else
+                {
+                    AddOperation(new AttributeChangedOperation(e));
+                }
+
+                if (m_collectingChanges)
+                    m_changeSet.AddAttributeChanged(e);
+            }
         }
 
         private void DomNode_ChildInserted(object sender, ChildEventArgs e)
         {
             if (CheckTransaction())
+            {
                 AddOperation(new ChildInsertedOperation(e));
+                if (m_collectingChanges)
+                    m_changeSet.AddChildInserted(e);
+            }
         }
 
         private void DomNode_ChildRemoved(object sender, ChildEventArgs e)
         {
             if (CheckTransaction())
+            {
                 AddOperation(new ChildRemovedOperation(e));
+                if (m_collectingChanges)
+                    m_changeSet.AddChildRemoved(e);
+            }
+        }
+
+        private void RemoveUnchangedOperations()
+        {
+            if (m_attributeOperations.Count > 0)
+            {
+                m_transactionOperations.RemoveAll(operation =>
+                {
+                    var setOp = operation as AttributeChangedOperation;
+                    return
+                        setOp != null &&
+                        setOp.AttributeInfo.Type.AreEqual(setOp.OldValue, setOp.NewValue);
+                });
+            }
         }
 
         private bool CheckTransaction()
@@ -381,5 +679,11 @@ private bool CheckTransaction()
         private List<Operation> m_transactionOperations;
         private bool m_requireTransactions;
         private bool m_transactionCancelled;
+        private bool m_compactOperations;
+        private readonly Dictionary<Pair<DomNode, int>, AttributeChangedOperation> m_attributeOperations =
+            new Dictionary<Pair<DomNode, int>, AttributeChangedOperation>();
+        private bool m_batchNotifications;
+        private DomChangeSet m_changeSet;
+        private bool m_collectingChanges;
     }
 }
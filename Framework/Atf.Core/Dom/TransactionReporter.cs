@@ -11,6 +11,8 @@ namespace Sce.Atf.Dom
     /// occurs outside a transaction, then the change is reported immediately. Cleaning-up means:
     /// 1) Multiple changes to the same DomNode attribute are collapsed into one event. 2) Changes
     /// to a DomNode after it is inserted or before it is removed are ignored.</summary>
+    /// <remarks>If the TransactionContext on the same DomNode has BatchNotifications set, the
+    /// reporter uses the context's change set instead of recording the changes itself.</remarks>
     public class TransactionReporter : Validator
     {
         /// <summary>
@@ -36,6 +38,15 @@ public class TransactionReporter : Validator
         /// change will be outside of a transaction.</remarks>
         public event EventHandler<ChildEventArgs> TransactionFinishedChildRemoved;
 
+        /// <summary>
+        /// Event that is raised once after a transaction has finished, with all the "cleaned-up"
+        /// changes made during the transaction, if there were any. If there is no transaction,
+        /// then this event is raised immediately for each change. This event is raised after the
+        /// TransactionFinishedXxx events for the individual changes.</summary>
+        /// <remarks>Listeners should not change the DOM in response to this event, because that
+        /// change will be outside of a transaction.</remarks>
+        public event EventHandler<DomChangeSetEventArgs> TransactionFinished;
+
         /// <summary>
         /// Raises the TransactionFinishedAttributeChanged event</summary>
         /// <param name="attributeEventArgs">Attribute event arguments</param>
@@ -60,6 +71,14 @@ protected virtual void OnTransactionFinishedChildRemoved(ChildEventArgs childEve
             TransactionFinishedChildRemoved.Raise(this, childEventArgs);
         }
 
+        /// <summary>
+        /// Raises the TransactionFinished event</summary>
+        /// <param name="changeSetEventArgs">Change set event arguments</param>
+        protected virtual void OnTransactionFinished(DomChangeSetEventArgs changeSetEventArgs)
+        {
+            TransactionFinished.Raise(this, changeSetEventArgs);
+        }
+
         #region sealed methods; use the above methods and events instead
 
         /// <summary>
@@ -70,36 +89,18 @@ protected sealed override void OnAttributeChanged(object sender, AttributeEventA
         {
             if (m_inTransaction)
             {
-                // First check if this attribute has changed on an inserted DomNode.
-                foreach(DomNode ancestor in attributeEventArgs.DomNode.Lineage)
-                    if (m_inserted.ContainsKey(ancestor))
-                        return;
-
-                // Now check if this attribute has already been changed.
-                var domNodeAndAttributeInfo = new Pair<DomNode, AttributeInfo>(attributeEventArgs.DomNode, attributeEventArgs.AttributeInfo);
-                int index;
-                if (m_attributeChanges.TryGetValue(domNodeAndAttributeInfo, out index))
-                {
-                    // A previous event was raised for the same attribute on the same DomNode. Combine.
-                    var oldEvent = (AttributeEventArgs)m_events[index].Second;
-                    var newEvent = new AttributeEventArgs(
-                        oldEvent.DomNode,
-                        oldEvent.AttributeInfo,
-                        oldEvent.OldValue,
-                        attributeEventArgs.NewValue);
-                    m_events[index] = new Pair<EventType, EventArgs>(EventType.AttributeChanged, newEvent);
-                }
-                else
-                {
-                    // This is the first time we've seen this attribute change on this DomNode.
-                    m_attributeChanges.Add(domNodeAndAttributeInfo, m_events.Count);
-                    // Record this attribute changed event.
-                    m_events.Add(new Pair<EventType, EventArgs>(EventType.AttributeChanged, attributeEventArgs));
-                }
+                if (!UseContextChangeSet)
+                    m_changes.AddAttributeChanged(attributeEventArgs);
             }
             else
             {
                 OnTransactionFinishedAttributeChanged(attributeEventArgs);
+                if (TransactionFinished != null)
+                {
+                    var changeSet = new DomChangeSet();
+                    changeSet.AddAttributeChanged(attributeEventArgs);
+                    OnTransactionFinished(new DomChangeSetEventArgs(changeSet));
+                }
             }
         }
 
@@ -111,17 +112,19 @@ protected sealed override void OnChildInserted(object sender, ChildEventArgs chi
         {
             if (m_inTransaction)
             {
-                // Ignore if any ancestor was previously inserted.
-                foreach(DomNode ancestor in childEventArgs.Parent.Lineage)
-                    if (m_inserted.ContainsKey(ancestor))
-                        return;
-
-                m_inserted[childEventArgs.Child] = m_events.Count;
-                // Record this child inserted event.
-                m_events.Add(new Pair<EventType, EventArgs>(EventType.ChildInserted, childEventArgs));
+                if (!UseContextChangeSet)
+                    m_changes.AddChildInserted(childEventArgs);
             }
             else
+            {
                 OnTransactionFinishedChildInserted(childEventArgs);
+                if (TransactionFinished != null)
+                {
+                    var changeSet = new DomChangeSet();
+                    changeSet.AddChildInserted(childEventArgs);
+                    OnTransactionFinished(new DomChangeSetEventArgs(changeSet));
+                }
+            }
         }
 
         /// <summary>
@@ -132,44 +135,19 @@ protected sealed override void OnChildRemoved(object sender, ChildEventArgs chil
         {
             if (m_inTransaction)
             {
-                // Clear out any attribute-changed events previously set for this DomNode (or any of its children).
-                var dictionaryCleanup = new List<Pair<DomNode, AttributeInfo>>();
-                foreach (DomNode removedNode in childEventArgs.Child.Subtree)
-                {
-                    foreach (var changedAttributePair in m_attributeChanges) //this search might be slow
-                    {
-                        if (changedAttributePair.Key.First == removedNode)
-                        {
-                            dictionaryCleanup.Add(changedAttributePair.Key);
-                            m_events[changedAttributePair.Value] = new Pair<EventType, EventArgs>(EventType.None, null);
-                        }
-                    }
-                    if (dictionaryCleanup.Count > 0)
-                    {
-                        foreach (var changedAttributePair in dictionaryCleanup)
-                            m_attributeChanges.Remove(changedAttributePair);
-                        dictionaryCleanup.Clear();
-                    }
-                }
-
-                // Check if this DomNode was previously inserted. If so, clear the previous insertion
-                //  event and ignore this new ChildRemoved event.
-                int eventIndex;
-                if (m_inserted.TryGetValue(childEventArgs.Child, out eventIndex))
-                {
-                    m_events[eventIndex] = new Pair<EventType, EventArgs>(EventType.None, null);
-                    m_inserted.Remove(childEventArgs.Child);
-                    return;
-                }
-                foreach (DomNode ancestor in childEventArgs.Parent.Lineage)
-                    if (m_inserted.ContainsKey(ancestor))
-                        return;
-
-                // Record this child removed event.
-                m_events.Add(new Pair<EventType, EventArgs>(EventType.ChildRemoved, childEventArgs));
+                if (!UseContextChangeSet)
+                    m_changes.AddChildRemoved(childEventArgs);
             }
             else
+            {
                 OnTransactionFinishedChildRemoved(childEventArgs);
+                if (TransactionFinished != null)
+                {
+                    var changeSet = new DomChangeSet();
+                    changeSet.AddChildRemoved(childEventArgs);
+                    OnTransactionFinished(new DomChangeSetEventArgs(changeSet));
+                }
+            }
         }
 
         /// <summary>
@@ -178,8 +156,14 @@ protected sealed override void OnChildRemoved(object sender, ChildEventArgs chil
         /// <param name="e">Event arguments</param>
         protected sealed override void OnBeginning(object sender, EventArgs e)
         {
-            ClearRecording();
+            m_changes.Clear();
             m_inTransaction = true;
+
+            // A transaction context on our DomNode that batches notifications collects the same
+            //  changes that we would
+            m_transactionContext = sender as TransactionContext;
+            if (m_transactionContext != null && m_transactionContext.DomNode != DomNode)
+                m_transactionContext = null;
         }
 
         /// <summary>
@@ -188,8 +172,9 @@ protected sealed override void OnBeginning(object sender, EventArgs e)
         /// <param name="e">Event arguments</param>
         protected sealed override void OnCancelled(object sender, EventArgs e)
         {
-            ClearRecording();
+            m_changes.Clear();
             m_inTransaction = false;
+            m_transactionContext = null;
         }
 
         /// <summary>
@@ -198,66 +183,41 @@ protected sealed override void OnCancelled(object sender, EventArgs e)
         /// <param name="e">Event arguments</param>
         protected sealed override void OnEnded(object sender, EventArgs e)
         {
+            DomChangeSet changes = UseContextChangeSet ? m_transactionContext.ChangeSet : m_changes;
+
             // Stop recording changes now, since the transaction has ended and we're about to report the changes.
             m_inTransaction = false;
+            m_transactionContext = null;
 
-            foreach (Pair<EventType, EventArgs> pair in m_events)
+            foreach (Pair<DomChangeSet.ChangeType, EventArgs> pair in changes.Changes)
             {
                 switch (pair.First)
                 {
-                    case EventType.AttributeChanged:
-                        var attrArgs = (AttributeEventArgs)pair.Second;
-                        if (!attrArgs.AttributeInfo.Type.AreEqual(attrArgs.OldValue, attrArgs.NewValue))
-                            OnTransactionFinishedAttributeChanged(attrArgs);
+                    case DomChangeSet.ChangeType.AttributeChanged:
+                        OnTransactionFinishedAttributeChanged((AttributeEventArgs)pair.Second);
                         break;
-                    case EventType.ChildInserted:
+                    case DomChangeSet.ChangeType.ChildInserted:
                         OnTransactionFinishedChildInserted((ChildEventArgs)pair.Second);
                         break;
-                    case EventType.ChildRemoved:
+                    case DomChangeSet.ChangeType.ChildRemoved:
                         OnTransactionFinishedChildRemoved((ChildEventArgs)pair.Second);
                         break;
-                    case EventType.None:
-                        break;
                     default:
                         throw new ArgumentOutOfRangeException();
                 }
             }
 
-            ClearRecording();
-        }
+            if (!changes.IsEmpty)
+                OnTransactionFinished(new DomChangeSetEventArgs(changes));
 
-        #endregion
-
-        private void ClearRecording()
-        {
-            m_events.Clear();
-            m_attributeChanges.Clear();
-            m_inserted.Clear();
+            m_changes.Clear();
         }
 
-        private enum EventType
-        {
-            AttributeChanged,
-            ChildInserted,
-            ChildRemoved,
-            None //for when a DomNode is inserted and then removed
-        }
+        #endregion
 
-        private class AttributeComparer : IEqualityComparer<Pair<DomNode, AttributeInfo>>
+        private bool UseContextChangeSet
         {
-            public bool Equals(Pair<DomNode, AttributeInfo> x, Pair<DomNode, AttributeInfo> y)
-            {
-                return
-                    x.First.Equals(y.First) &&
-                    x.Second.Equivalent(y.Second);
-            }
-
-            public int GetHashCode(Pair<DomNode, AttributeInfo> obj)
-            {
-                return
-                    obj.First.GetHashCode() ^
-                    obj.Second.GetEquivalentHashCode();
-            }
+            get { return m_transactionContext != null && m_transactionContext.ChangeSet != null; }
         }
 
         //'m_inTransaction' is different than base.Validating because Validating is false after OnEnding() is called, but
@@ -265,16 +225,10 @@ public int GetHashCode(Pair<DomNode, AttributeInfo> obj)
         //  need to keep track of when OnEnded() gets called.
         private bool m_inTransaction;
 
-        // The recording of final events to be raised after the transaction finishes.
-        private readonly List<Pair<EventType, EventArgs>> m_events = new List<Pair<EventType, EventArgs>>();
-    
-        // Map the DomNode and its AttributeInfo to the index of 'm_events' that contains the attribute changed event.
-        private readonly Dictionary<Pair<DomNode, AttributeInfo>, int> m_attributeChanges =
-            new Dictionary<Pair<DomNode, AttributeInfo>, int>(s_comparer);
-
-        // Map newly inserted DomNodes (but not their children) to the index of m_events that contains the insertion event.
-        private readonly Dictionary<DomNode,int> m_inserted = new Dictionary<DomNode, int>();
+        // The recording of the changes, if the transaction context doesn't collect them.
+        private readonly DomChangeSet m_changes = new DomChangeSet();
 
-        private static readonly IEqualityComparer<Pair<DomNode, AttributeInfo>> s_comparer = new AttributeComparer();
+        // The transaction context on our DomNode, during a transaction.
+        private TransactionContext m_transactionContext;
     }
 }
@@ -33,7 +33,20 @@ protected override void OnNodeSet()
         /// Checks all DOM nodes in the subtree for validity</summary>
         protected override void ValidateSubtree()
         {
-            foreach (DomNode node in DomNode.Subtree)
+            ValidateNodes(DomNode.LoadedSubtree);
+        }
+
+        /// <summary>
+        /// Checks the DOM nodes in a subtree that was loaded on demand for validity</summary>
+        /// <param name="root">Root of loaded subtree</param>
+        protected override void ValidateLoadedSubtree(DomNode root)
+        {
+            ValidateNodes(root.LoadedSubtree);
+        }
+
+        private void ValidateNodes(IEnumerable<DomNode> nodes)
+        {
+            foreach (DomNode node in nodes)
             {
                 if (node.Type.IdAttribute != null)
                 {
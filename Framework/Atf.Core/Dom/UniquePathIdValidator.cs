@@ -8,6 +8,10 @@ namespace Sce.Atf.Dom
     /// <summary>
     /// Adapter that ensures that every DOM child node has a unique id, so that
     /// all paths composed of ids are unique</summary>
+    /// <remarks>The ids of each DomNode's children are kept in an index that is updated with
+    /// the changes of each validation, so that only the added, removed and renamed children are
+    /// checked, rather than all of their siblings. The index for a DomNode is rebuilt, the next
+    /// time it's needed, if its children change outside of a validation.</remarks>
     public class UniquePathIdValidator : IdValidator
     {
         /// <summary>
@@ -24,21 +28,66 @@ protected char SuffixSeparator
         /// Checks all DOM nodes in the subtree for validity</summary>
         protected override void ValidateSubtree()
         {
-            UniqueNamer uniqueNamer = new UniqueNamer(m_suffixSeparator);
-            foreach (DomNode node in DomNode.Subtree)
+            m_childIds.Clear();
+            ValidateNodes(DomNode);
+        }
+
+        /// <summary>
+        /// Checks the DOM nodes in a subtree that was loaded on demand for validity</summary>
+        /// <param name="root">Root of loaded subtree</param>
+        protected override void ValidateLoadedSubtree(DomNode root)
+        {
+            // the parent's children are all loaded together, so check them once, with the first
+            DomNode parent = root.Parent;
+            if (parent != null)
             {
-                foreach (DomNode child in node.Children)
+                foreach (DomNode child in parent.Children)
                 {
-                    if (child.Type.IdAttribute != null)
+                    if (child == root)
+                        ValidateChildren(parent);
+                    break;
+                }
+            }
+
+            ValidateNodes(root);
+        }
+
+        private void ValidateNodes(DomNode root)
+        {
+            foreach (DomNode node in root.LoadedSubtree)
+            {
+                // children that haven't been loaded are checked when they're loaded
+                if (!node.HasUnloadedChildren)
+                    ValidateChildren(node);
+            }
+        }
+
+        private void ValidateChildren(DomNode node)
+        {
+            UniqueNamer uniqueNamer = null;
+            bool collided = false;
+            foreach (DomNode child in node.Children)
+            {
+                if (child.Type.IdAttribute != null)
+                {
+                    if (uniqueNamer == null)
+                        uniqueNamer = new UniqueNamer(m_suffixSeparator);
+
+                    string id = child.GetId();
+                    string uniqueId = uniqueNamer.Name(id);
+                    if (id != uniqueId)
                     {
-                        string id = child.GetId();
-                        string uniqueId = uniqueNamer.Name(id);
-                        if (id != uniqueId)
-                            OnIdCollision(child, uniqueId);
+                        OnIdCollision(child, uniqueId);
+                        collided = true;
                     }
                 }
-                uniqueNamer.Clear();
             }
+
+            // keep the index of the children's ids, unless it may not match the children
+            if (uniqueNamer != null && !collided)
+                m_childIds[node] = uniqueNamer;
+            else
+                m_childIds.Remove(node);
         }
 
         /// <summary>
@@ -47,8 +96,14 @@ protected override void ValidateSubtree()
         /// <param name="e">Event args</param>
         protected override void OnEnding(object sender, EventArgs e)
         {
-            base.OnEnding(sender, e);
-            m_added.Clear();
+            try
+            {
+                base.OnEnding(sender, e);
+            }
+            finally
+            {
+                ClearChanges();
+            }
         }
 
         /// <summary>
@@ -58,7 +113,7 @@ protected override void OnEnding(object sender, EventArgs e)
         protected override void OnCancelled(object sender, EventArgs e)
         {
             base.OnCancelled(sender, e);
-            m_added.Clear();
+            ClearChanges();
         }
 
         /// <summary>
@@ -67,8 +122,29 @@ protected override void OnCancelled(object sender, EventArgs e)
         /// <param name="renamed">Renamed nodes and old ids</param>
         protected override void RemoveNodes(HashSet<DomNode> removed, Dictionary<DomNode, string> renamed)
         {
+            // retire the original ids of the removed children from their former parents' indices
+            foreach (KeyValuePair<DomNode, Pair<DomNode, string>> pair in m_removedFrom)
+            {
+                UniqueNamer uniqueNamer;
+                if (m_childIds.TryGetValue(pair.Value.First, out uniqueNamer))
+                    uniqueNamer.Retire(pair.Value.Second);
+            }
+
             foreach (DomNode node in removed)
                 renamed.Remove(node);
+
+            // retire the original ids of the renamed children, which are named again later
+            foreach (KeyValuePair<DomNode, string> pair in renamed)
+            {
+                DomNode parent = pair.Key.Parent;
+                UniqueNamer uniqueNamer;
+                if (parent != null &&
+                    !m_added.Contains(pair.Key) &&
+                    m_childIds.TryGetValue(parent, out uniqueNamer))
+                {
+                    uniqueNamer.Retire(pair.Value);
+                }
+            }
         }
 
         /// <summary>
@@ -77,38 +153,15 @@ protected override void RemoveNodes(HashSet<DomNode> removed, Dictionary<DomNode
         /// <param name="renamed">Renamed nodes and old ids</param>
         protected override void AddNodes(HashSet<DomNode> added, Dictionary<DomNode, string> renamed)
         {
-            HashSet<DomNode> parents = new HashSet<DomNode>();
             foreach (DomNode node in m_added)
-            {
                 renamed.Remove(node);
-                parents.Add(node.Parent);
-            }
 
-            UniqueNamer uniqueNamer = new UniqueNamer(m_suffixSeparator);
-            foreach (DomNode parent in parents)
+            // generate unique ids for the added children
+            foreach (DomNode node in m_added)
             {
-                // first, initialize namer with the names of the pre-existing children
-                foreach (DomNode child in parent.Children)
-                {
-                    if (child.Type.IdAttribute != null &&
-                        !m_added.Contains(child))
-                    {
-                        string id = child.GetId();
-                        uniqueNamer.Name(id);
-                    }
-                }
-
-                // now, generate unique ids for the added children
-                foreach (DomNode child in parent.Children)
-                {
-                    if (child.Type.IdAttribute != null &&
-                        m_added.Contains(child))
-                    {
-                        NameNode(child, uniqueNamer);
-                    }
-                }
-
-                uniqueNamer.Clear();
+                DomNode parent = node.Parent;
+                if (parent != null)
+                    NameNode(node, GetChildIds(parent, renamed));
             }
         }
 
@@ -117,37 +170,73 @@ protected override void AddNodes(HashSet<DomNode> added, Dictionary<DomNode, str
         /// <param name="renamed">Renamed nodes and old ids</param>
         protected override void RenameNodes(Dictionary<DomNode, string> renamed)
         {
-            HashSet<DomNode> parents = new HashSet<DomNode>();
             foreach (DomNode node in renamed.Keys)
-                if (node.Parent != null)
-                    parents.Add(node.Parent);
+            {
+                DomNode parent = node.Parent;
+                if (parent != null)
+                    NameNode(node, GetChildIds(parent, renamed));
+            }
+        }
 
-            UniqueNamer uniqueNamer = new UniqueNamer(m_suffixSeparator);
-            foreach (DomNode parent in parents)
+        /// <summary>
+        /// Performs custom actions after an attribute in the DOM subtree changes</summary>
+        /// <param name="sender">Sender (root DOM node)</param>
+        /// <param name="e">Attribute change event args</param>
+        protected override void OnAttributeChanged(object sender, AttributeEventArgs e)
+        {
+            if (e.AttributeInfo.Equivalent(e.DomNode.Type.IdAttribute))
             {
-                // first, initialize namer with the names of the children whose names haven't changed
-                foreach (DomNode child in parent.Children)
+                if (!Validating)
                 {
-                    if (child.Type.IdAttribute != null &&
-                        !renamed.ContainsKey(child))
-                    {
-                        string id = child.GetId();
-                        uniqueNamer.Name(id);
-                    }
+                    InvalidateChildIds(e.DomNode.Parent);
                 }
-
-                // now, generate unique ids for the added children
-                foreach (DomNode child in parent.Children)
+                else if (!Naming)
                 {
-                    if (child.Type.IdAttribute != null &&
-                        renamed.ContainsKey(child))
-                    {
-                        NameNode(child, uniqueNamer);
-                    }
+                    // only store the original id
+                    if (!m_originalIds.ContainsKey(e.DomNode))
+                        m_originalIds.Add(e.DomNode, e.OldValue as string);
                 }
+            }
+
+            base.OnAttributeChanged(sender, e);
+        }
+
+        /// <summary>
+        /// Performs custom actions after a child is inserted into the DOM subtree</summary>
+        /// <param name="sender">Sender (root DOM node)</param>
+        /// <param name="e">Child event args</param>
+        protected override void OnChildInserted(object sender, ChildEventArgs e)
+        {
+            if (!Validating)
+                InvalidateChildIds(e.Parent);
+
+            base.OnChildInserted(sender, e);
+        }
 
-                uniqueNamer.Clear();
+        /// <summary>
+        /// Performs custom actions after a child is removed from the DOM subtree</summary>
+        /// <param name="sender">Sender (root DOM node)</param>
+        /// <param name="e">Child event args</param>
+        protected override void OnChildRemoved(object sender, ChildEventArgs e)
+        {
+            if (!Validating)
+            {
+                InvalidateChildIds(e.Parent);
+            }
+            else if (!Naming && e.Child.Type.IdAttribute != null)
+            {
+                // children that were added during the validation aren't in the index yet
+                if (!m_removedAdded.Remove(e.Child) &&
+                    !m_removedFrom.ContainsKey(e.Child))
+                {
+                    string id;
+                    if (!m_originalIds.TryGetValue(e.Child, out id))
+                        id = e.Child.GetId();
+                    m_removedFrom.Add(e.Child, new Pair<DomNode, string>(e.Parent, id));
+                }
             }
+
+            base.OnChildRemoved(sender, e);
         }
 
         /// <summary>
@@ -165,6 +254,58 @@ protected override void AddNode(DomNode node)
             base.AddNode(node);
         }
 
+        /// <summary>
+        /// Performs custom actions for a node that has been removed from the DOM subtree.
+        /// This method is called for each DomNode removed and for that DomNode's children,
+        /// and their children and so on, in depth-first order.</summary>
+        /// <param name="node">Removed node</param>
+        /// <remarks>Method overrides must call the base method.</remarks>
+        protected override void RemoveNode(DomNode node)
+        {
+            m_childIds.Remove(node);
+
+            if (Validating && !Naming && m_added.Remove(node) && node.Parent == null)
+                m_removedAdded.Add(node);
+
+            base.RemoveNode(node);
+        }
+
+        // Gets the index of the ids of the parent's children, building it if necessary from the
+        //  children that aren't waiting to be named.
+        private UniqueNamer GetChildIds(DomNode parent, Dictionary<DomNode, string> renamed)
+        {
+            UniqueNamer uniqueNamer;
+            if (!m_childIds.TryGetValue(parent, out uniqueNamer))
+            {
+                uniqueNamer = new UniqueNamer(m_suffixSeparator);
+                foreach (DomNode child in parent.Children)
+                {
+                    if (child.Type.IdAttribute != null &&
+                        !m_added.Contains(child) &&
+                        !renamed.ContainsKey(child))
+                    {
+                        uniqueNamer.Name(child.GetId());
+                    }
+                }
+                m_childIds[parent] = uniqueNamer;
+            }
+            return uniqueNamer;
+        }
+
+        private void InvalidateChildIds(DomNode parent)
+        {
+            if (parent != null)
+                m_childIds.Remove(parent);
+        }
+
+        private void ClearChanges()
+        {
+            m_added.Clear();
+            m_removedAdded.Clear();
+            m_removedFrom.Clear();
+            m_originalIds.Clear();
+        }
+
         private void NameNode(DomNode node, UniqueNamer namer)
         {
             // if the name isn't unique, make it so
@@ -177,11 +318,24 @@ private void NameNode(DomNode node, UniqueNamer namer)
         }
 
         private char m_suffixSeparator = '_';
-        
+
+        //Map each DomNode to the ids of its children that have an IdAttribute.
+        private readonly Dictionary<DomNode, UniqueNamer> m_childIds = new Dictionary<DomNode, UniqueNamer>();
+
         //This is the set of unique DomNodes added during the transaction that have an IdAttribute.
         //The base class's m_added can be missing nodes that we care about, because IdValidator
         //  assumes that a DomNode that is removed and then added somewhere else in the subtree
         //  can be ignored.
         readonly HashSet<DomNode> m_added = new HashSet<DomNode>();
+
+        //Added DomNodes that were removed again, whose ids never entered the index.
+        private readonly HashSet<DomNode> m_removedAdded = new HashSet<DomNode>();
+
+        //Map removed DomNodes to their former parent and their id when they were removed.
+        private readonly Dictionary<DomNode, Pair<DomNode, string>> m_removedFrom =
+            new Dictionary<DomNode, Pair<DomNode, string>>();
+
+        //Map renamed DomNodes to their ids before the first renaming in the transaction.
+        private readonly Dictionary<DomNode, string> m_originalIds = new Dictionary<DomNode, string>();
     }
 }
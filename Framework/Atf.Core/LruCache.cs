@@ -0,0 +1,239 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+
+namespace Sce.Atf
+{
+    /// <summary>
+    /// A cache that maps keys to values, and evicts the least recently used values once the
+    /// total size of its values exceeds a capacity. Each value's size is given by a sizing
+    /// function, so the capacity can be a number of items or, for example, a number of bytes.
+    /// Keeps hit and miss counts. This class is not thread safe.</summary>
+    /// <typeparam name="TKey">Key type</typeparam>
+    /// <typeparam name="TValue">Value type</typeparam>
+    public class LruCache<TKey, TValue>
+    {
+        /// <summary>
+        /// Constructor for a cache that holds at most 'capacity' values</summary>
+        /// <param name="capacity">Maximum number of values</param>
+        public LruCache(long capacity)
+            : this(capacity, null, null)
+        {
+        }
+
+        /// <summary>
+        /// Constructor</summary>
+        /// <param name="capacity">Maximum total size of the values</param>
+        /// <param name="getSize">Function that returns the size of a value, or null to give
+        /// each value a size of 1</param>
+        /// <param name="comparer">The comparer used to compare keys, or null to use the
+        /// default comparer for the type of the key</param>
+        public LruCache(long capacity, Func<TValue, long> getSize, IEqualityComparer<TKey> comparer)
+        {
+            if (capacity < 0)
+                throw new ArgumentOutOfRangeException("capacity");
+
+            m_capacity = capacity;
+            m_getSize = getSize;
+            m_entries = new Dictionary<TKey, LinkedListNode<Entry>>(comparer);
+        }
+
+        /// <summary>
+        /// Event that is raised after a key and its value are evicted to make room for others, or
+        /// because the capacity was reduced. Not raised by Remove() or Clear().</summary>
+        public event EventHandler<ItemRemovedEventArgs<KeyValuePair<TKey, TValue>>> Evicted;
+
+        /// <summary>
+        /// Gets or sets the maximum total size of the values. Reducing the capacity evicts
+        /// least recently used values as necessary.</summary>
+        public long Capacity
+        {
+            get { return m_capacity; }
+            set
+            {
+                if (value < 0)
+                    throw new ArgumentOutOfRangeException("value");
+
+                m_capacity = value;
+                Trim();
+            }
+        }
+
+        /// <summary>
+        /// Gets the total size of the values currently in the cache</summary>
+        public long Size
+        {
+            get { return m_size; }
+        }
+
+        /// <summary>
+        /// Gets the number of values currently in the cache</summary>
+        public int Count
+        {
+            get { return m_entries.Count; }
+        }
+
+        /// <summary>
+        /// Gets the number of successful lookups by TryGetValue()</summary>
+        public long Hits
+        {
+            get { return m_hits; }
+        }
+
+        /// <summary>
+        /// Gets the number of failed lookups by TryGetValue()</summary>
+        public long Misses
+        {
+            get { return m_misses; }
+        }
+
+        /// <summary>
+        /// Gets the number of values evicted since the cache was created</summary>
+        public long Evictions
+        {
+            get { return m_evictions; }
+        }
+
+        /// <summary>
+        /// Gets the keys in the cache, from most recently to least recently used</summary>
+        public IEnumerable<TKey> Keys
+        {
+            get
+            {
+                foreach (Entry entry in m_lruList)
+                    yield return entry.Key;
+            }
+        }
+
+        /// <summary>
+        /// Looks up the value for a key, making it the most recently used value if found</summary>
+        /// <param name="key">Key</param>
+        /// <param name="value">Value for key, or the default value if not found</param>
+        /// <returns>True iff the key was found</returns>
+        public bool TryGetValue(TKey key, out TValue value)
+        {
+            LinkedListNode<Entry> node;
+            if (m_entries.TryGetValue(key, out node))
+            {
+                m_lruList.Remove(node);
+                m_lruList.AddFirst(node);
+                value = node.Value.Value;
+                m_hits++;
+                return true;
+            }
+
+            value = default(TValue);
+            m_misses++;
+            return false;
+        }
+
+        /// <summary>
+        /// Checks if the cache contains a given key, without counting a hit or miss, or
+        /// changing the order of use</summary>
+        /// <param name="key">Key</param>
+        /// <returns>True iff the cache contains the key</returns>
+        public bool ContainsKey(TKey key)
+        {
+            return m_entries.ContainsKey(key);
+        }
+
+        /// <summary>
+        /// Adds or replaces the value for a key, making it the most recently used value. Evicts
+        /// least recently used values if the capacity is exceeded. A value that is larger than
+        /// the capacity by itself is not kept, and doesn't evict any other values; the key's
+        /// previous value is removed.</summary>
+        /// <param name="key">Key</param>
+        /// <param name="value">Value</param>
+        public void Set(TKey key, TValue value)
+        {
+            Remove(key);
+
+            long size = m_getSize != null ? m_getSize(value) : 1;
+            if (size > m_capacity)
+                return;
+
+            LinkedListNode<Entry> node = m_lruList.AddFirst(new Entry(key, value, size));
+            m_entries.Add(key, node);
+            m_size += size;
+
+            Trim();
+        }
+
+        /// <summary>
+        /// Removes the value for a key</summary>
+        /// <param name="key">Key</param>
+        /// <returns>True iff the key was found and removed</returns>
+        public bool Remove(TKey key)
+        {
+            LinkedListNode<Entry> node;
+            if (!m_entries.TryGetValue(key, out node))
+                return false;
+
+            m_entries.Remove(key);
+            m_lruList.Remove(node);
+            m_size -= node.Value.Size;
+            return true;
+        }
+
+        /// <summary>
+        /// Removes all values. Does not reset the hit and miss counts.</summary>
+        public void Clear()
+        {
+            m_entries.Clear();
+            m_lruList.Clear();
+            m_size = 0;
+        }
+
+        /// <summary>
+        /// Resets the hit, miss and eviction counts to zero</summary>
+        public void ResetStatistics()
+        {
+            m_hits = 0;
+            m_misses = 0;
+            m_evictions = 0;
+        }
+
+        private void Trim()
+        {
+            while (m_size > m_capacity && m_lruList.Count > 0)
+            {
+                LinkedListNode<Entry> node = m_lruList.Last;
+                m_lruList.RemoveLast();
+                m_entries.Remove(node.Value.Key);
+                m_size -= node.Value.Size;
+                m_evictions++;
+
+                EventHandler<ItemRemovedEventArgs<KeyValuePair<TKey, TValue>>> handler = Evicted;
+                if (handler != null)
+                {
+                    handler(this, new ItemRemovedEventArgs<KeyValuePair<TKey, TValue>>(
+                        -1, new KeyValuePair<TKey, TValue>(node.Value.Key, node.Value.Value)));
+                }
+            }
+        }
+
+        private class Entry
+        {
+            public Entry(TKey key, TValue value, long size)
+            {
+                Key = key;
+                Value = value;
+                Size = size;
+            }
+
+            public readonly TKey Key;
+            public readonly TValue Value;
+            public readonly long Size;
+        }
+
+        private long m_capacity;
+        private long m_size;
+        private long m_hits;
+        private long m_misses;
+        private long m_evictions;
+        private readonly Func<TValue, long> m_getSize;
+        private readonly Dictionary<TKey, LinkedListNode<Entry>> m_entries;
+        private readonly LinkedList<Entry> m_lruList = new LinkedList<Entry>();
+    }
+}
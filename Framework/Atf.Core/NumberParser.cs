@@ -0,0 +1,290 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+
+namespace Sce.Atf
+{
+    /// <summary>
+    /// Parses decimal numbers straight from text, without creating strings, for the common numbers
+    /// whose values can be computed exactly. Callers fall back to the CLR's invariant culture parsing
+    /// for the rest, so the results are the same.</summary>
+    /// <remarks>Used to read DOM attribute values and OBJ files. The parser is generic over the text,
+    /// which is a struct, so that it's compiled for strings and byte arrays separately, and reading a
+    /// character is inlined.</remarks>
+    internal static class NumberParser
+    {
+        /// <summary>
+        /// Text that numbers are parsed from</summary>
+        public interface IText
+        {
+            /// <summary>
+            /// Gets the character at the given index</summary>
+            /// <param name="index">Index of the character</param>
+            /// <returns>Character at the index</returns>
+            char this[int index] { get; }
+        }
+
+        /// <summary>
+        /// Text of a string</summary>
+        public struct StringText : IText
+        {
+            /// <summary>
+            /// Constructor</summary>
+            /// <param name="s">String</param>
+            public StringText(string s)
+            {
+                m_s = s;
+            }
+
+            /// <summary>
+            /// Gets the character at the given index</summary>
+            /// <param name="index">Index of the character</param>
+            /// <returns>Character at the index</returns>
+            public char this[int index]
+            {
+                get { return m_s[index]; }
+            }
+
+            private readonly string m_s;
+        }
+
+        /// <summary>
+        /// Text of an array of ASCII or UTF-8 bytes. Numbers only use ASCII characters, and other
+        /// bytes don't match any of them.</summary>
+        public struct AsciiText : IText
+        {
+            /// <summary>
+            /// Constructor</summary>
+            /// <param name="data">Bytes</param>
+            public AsciiText(byte[] data)
+            {
+                m_data = data;
+            }
+
+            /// <summary>
+            /// Gets the character at the given index</summary>
+            /// <param name="index">Index of the character</param>
+            /// <returns>Character at the index</returns>
+            public char this[int index]
+            {
+                get { return (char)m_data[index]; }
+            }
+
+            private readonly byte[] m_data;
+        }
+
+        /// <summary>
+        /// Parses a number of the form [sign]digits[.digits][e[sign]digits] into its sign, its
+        /// significant digits and the power of 10 to scale them by. Leading zeros aren't
+        /// significant, but trailing zeros are, so that a decimal's scale is preserved.</summary>
+        /// <typeparam name="TText">Type of text</typeparam>
+        /// <param name="text">Text</param>
+        /// <param name="index">Index of the number's first character, which is moved past the
+        /// characters that are read. Parsing stops at the first character that can't be part of
+        /// the number, which callers should check is where the number is expected to end.</param>
+        /// <param name="end">Index after the last character of the text that can be read</param>
+        /// <param name="allowExponent">Whether an exponent may follow the digits</param>
+        /// <param name="negative">Whether there is a minus sign</param>
+        /// <param name="mantissa">Significant digits</param>
+        /// <param name="exponent">Power of 10 to scale the significant digits by</param>
+        /// <returns>True iff there are digits, there are at most MaxMantissaDigits significant
+        /// digits, and any exponent has from 1 to MaxExponentDigits digits</returns>
+        public static bool TryParseNumber<TText>(TText text, ref int index, int end, bool allowExponent,
+            out bool negative, out ulong mantissa, out int exponent)
+            where TText : struct, IText
+        {
+            negative = false;
+            mantissa = 0;
+            exponent = 0;
+
+            int i = index;
+            if (i < end && (text[i] == '-' || text[i] == '+'))
+            {
+                negative = text[i] == '-';
+                i++;
+            }
+
+            int digitCount = 0;
+            bool hasDigits = false;
+            bool fraction = false;
+            for (; i < end; i++)
+            {
+                char c = text[i];
+                int digit = c - '0';
+                if ((uint)digit <= 9)
+                {
+                    hasDigits = true;
+                    if (mantissa != 0 || digit != 0)
+                    {
+                        digitCount++;
+                        mantissa = mantissa * 10 + (uint)digit;
+                    }
+                    if (fraction)
+                        exponent--;
+                }
+                else if (c == '.' && !fraction)
+                {
+                    fraction = true;
+                }
+                else
+                {
+                    break;
+                }
+            }
+            if (!hasDigits || digitCount > MaxMantissaDigits)
+            {
+                index = i;
+                return false;
+            }
+
+            if (i < end && allowExponent && (text[i] == 'e' || text[i] == 'E'))
+            {
+                i++;
+                bool negativeExponent = false;
+                if (i < end && (text[i] == '-' || text[i] == '+'))
+                {
+                    negativeExponent = text[i] == '-';
+                    i++;
+                }
+
+                int digitStart = i;
+                int value = 0;
+                for (; i < end; i++)
+                {
+                    int digit = text[i] - '0';
+                    if ((uint)digit > 9)
+                        break;
+                    value = value * 10 + digit;
+                }
+                int exponentDigitCount = i - digitStart;
+                if (exponentDigitCount < 1 || exponentDigitCount > MaxExponentDigits)
+                {
+                    index = i;
+                    return false;
+                }
+                exponent += negativeExponent ? -value : value;
+            }
+
+            index = i;
+            return true;
+        }
+
+        /// <summary>
+        /// Computes the double of a parsed number, if its significant digits and power of 10 are
+        /// both exactly representable as doubles, so that a single multiplication or division gives
+        /// the correctly rounded result. Negative zero is left to the CLR, which reads it
+        /// differently in different versions.</summary>
+        /// <param name="negative">Whether the number is negative</param>
+        /// <param name="mantissa">Significant digits</param>
+        /// <param name="exponent">Power of 10 to scale the significant digits by</param>
+        /// <param name="value">Resulting double</param>
+        /// <returns>True iff the result is exact</returns>
+        public static bool TryGetDouble(bool negative, ulong mantissa, int exponent, out double value)
+        {
+            value = 0;
+            if (!IsExactDouble(mantissa, exponent) || (negative && mantissa == 0))
+                return false;
+
+            value = ToDouble(mantissa, exponent);
+            if (negative)
+                value = -value;
+            return true;
+        }
+
+        /// <summary>
+        /// Computes the float of a parsed number, if it can be computed exactly, as for
+        /// TryGetDouble(), and rounding it to a float gives the correctly rounded float</summary>
+        /// <param name="negative">Whether the number is negative</param>
+        /// <param name="mantissa">Significant digits</param>
+        /// <param name="exponent">Power of 10 to scale the significant digits by</param>
+        /// <param name="value">Resulting float</param>
+        /// <returns>True iff the result is exact</returns>
+        public static bool TryGetSingle(bool negative, ulong mantissa, int exponent, out float value)
+        {
+            value = 0;
+            double result;
+            if (!TryGetDouble(negative, mantissa, exponent, out result) || !IsExactSingle(result))
+                return false;
+
+            value = (float)result;
+            return true;
+        }
+
+        /// <summary>
+        /// Gets whether a number's significant digits and power of 10 are both exactly
+        /// representable as doubles</summary>
+        /// <param name="mantissa">Significant digits</param>
+        /// <param name="exponent">Power of 10 to scale the significant digits by</param>
+        /// <returns>True iff ToDouble() gives the correctly rounded result</returns>
+        public static bool IsExactDouble(ulong mantissa, int exponent)
+        {
+            return
+                mantissa <= MaxExactMantissa &&
+                exponent >= -MaxExactPowerOf10 &&
+                exponent <= MaxExactPowerOf10;
+        }
+
+        /// <summary>
+        /// Computes mantissa * 10^exponent, for an exponent from -MaxExactPowerOf10 to
+        /// MaxExactPowerOf10</summary>
+        /// <param name="mantissa">Significant digits</param>
+        /// <param name="exponent">Power of 10 to scale the significant digits by</param>
+        /// <returns>Resulting double</returns>
+        public static double ToDouble(ulong mantissa, int exponent)
+        {
+            return exponent < 0 ?
+                mantissa / s_powersOf10[-exponent] :
+                mantissa * s_powersOf10[exponent];
+        }
+
+        /// <summary>
+        /// Gets a power of 10 that is exactly representable as a double</summary>
+        /// <param name="exponent">Power, from 0 to MaxExactPowerOf10</param>
+        /// <returns>10^exponent</returns>
+        public static double GetPowerOf10(int exponent)
+        {
+            return s_powersOf10[exponent];
+        }
+
+        /// <summary>
+        /// Determines whether a correctly rounded double converts to the correctly rounded float
+        /// of the same number. Rounding twice only goes wrong if the double lands exactly halfway
+        /// between two floats, or in the range of denormalized floats, which have fewer bits.</summary>
+        /// <param name="value">Correctly rounded double</param>
+        /// <returns>True iff converting the double to a float gives the correctly rounded float</returns>
+        public static bool IsExactSingle(double value)
+        {
+            double magnitude = Math.Abs(value);
+            if (magnitude != 0 && (magnitude < MinNormalSingle || magnitude > Single.MaxValue))
+                return false;
+
+            return (BitConverter.DoubleToInt64Bits(value) & SingleRoundingMask) != SingleHalfway;
+        }
+
+        /// <summary>
+        /// Maximum number of significant digits that are parsed, which can't overflow a ulong</summary>
+        public const int MaxMantissaDigits = 19;
+
+        /// <summary>
+        /// Maximum number of exponent digits that are parsed</summary>
+        public const int MaxExponentDigits = 4;
+
+        /// <summary>
+        /// Largest integer below which all integers are exactly representable as doubles</summary>
+        public const ulong MaxExactMantissa = 1UL << 53;
+
+        /// <summary>
+        /// Largest power of 10 that is exactly representable as a double</summary>
+        public const int MaxExactPowerOf10 = 22;
+
+        private const double MinNormalSingle = 1.1754943508222875E-38; // 2^-126
+        private const long SingleRoundingMask = (1L << 29) - 1; // the bits that a double has beyond a float
+        private const long SingleHalfway = 1L << 28;
+
+        private static readonly double[] s_powersOf10 =
+        {
+            1e0, 1e1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11,
+            1e12, 1e13, 1e14, 1e15, 1e16, 1e17, 1e18, 1e19, 1e20, 1e21, 1e22
+        };
+    }
+}
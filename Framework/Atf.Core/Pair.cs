@@ -9,7 +9,7 @@ namespace Sce.Atf
     /// Standard Pair struct</summary>
     /// <typeparam name="T1">First type</typeparam>
     /// <typeparam name="T2">Second type</typeparam>
-    public struct Pair<T1, T2> : IComparable, IComparable<Pair<T1, T2>>
+    public struct Pair<T1, T2> : IComparable, IComparable<Pair<T1, T2>>, IEquatable<Pair<T1, T2>>
     {
         /// <summary>
         /// Constructor using two values</summary>
@@ -39,4 +39,5 @@
 [assembly: InternalsVisibleTo("Atf.Gui")]
 [assembly: InternalsVisibleTo("Atf.Gui.WinForms")]
 [assembly: InternalsVisibleTo("Atf.Gui.Wpf")]
+[assembly: InternalsVisibleTo("Atf.Obj")]
 [assembly: InternalsVisibleTo("UnitTests")]
@@ -9,7 +9,7 @@ namespace Sce.Atf.Dom
 {
     /// <summary>
     /// A simple class for producing search matches on DomNode names, and for applying a string replace on those search results</summary>
-    public class DomNodeNamePredicate : IQueryPredicate
+    public class DomNodeNamePredicate : IIndexedQueryPredicate
     {
         /// <summary>
         /// Constructor</summary>
@@ -42,7 +42,7 @@ static internal PropertyDescriptorCollection GetDomNodeProperties(DomNode node)
         /// <returns>Value of the Name property as string</returns>
         static internal string GetDomNodeName(DomNode domNode, out PropertyDescriptor nameProperty)
         {
-            string name = "<UNKNOWN>";
+            string name = UnknownName;
             nameProperty = null;
             PropertyDescriptorCollection properties = GetDomNodeProperties(domNode);
             if (properties != null)
@@ -78,7 +78,7 @@ public bool Test(object item, out IList<IQueryMatch> matchList)
             string nodeName = GetDomNodeName(domNode, out namePd);
             if (StringToMatch != null && 
                 StringToMatch.Length > 0 && 
-                nodeName.IndexOf(StringToMatch, StringComparison.InvariantCultureIgnoreCase) != -1)
+                DomNodeQueryIndex.ContainsText(nodeName, StringToMatch))
             {
                 matchList.Add(new DomNodePropertyMatch(namePd, domNode));
                 return true;
@@ -102,6 +102,27 @@ public void Replace(IList<IQueryMatch> matchList, object replaceValue)
         }
         #endregion
 
+        #region IIndexedQueryPredicate members
+
+        /// <summary>
+        /// Gets the nodes that may have a name containing the matching string</summary>
+        /// <param name="index">Index of the document being queried</param>
+        /// <returns>Nodes that may satisfy the predicate, or null if every node must be tested</returns>
+        public IEnumerable<DomNode> GetCandidates(DomNodeQueryIndex index)
+        {
+            if (string.IsNullOrEmpty(StringToMatch))
+                return EmptyEnumerable<DomNode>.Instance;
+
+            // nodes without a Name property match on their placeholder name
+            if (DomNodeQueryIndex.ContainsText(UnknownName, StringToMatch))
+                return null;
+
+            return index.FindText(StringToMatch);
+        }
+        #endregion
+
+        private const string UnknownName = "<UNKNOWN>";
+
         private String m_stringToMatch;
 
         /// <summary>
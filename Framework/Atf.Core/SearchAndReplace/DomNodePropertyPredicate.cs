@@ -10,7 +10,7 @@ namespace Sce.Atf.Dom
 {
     /// <summary>
     /// Linq-query-based searching over DomNode properties</summary>
-    public class DomNodePropertyPredicate : LinqQueryPredicate
+    public class DomNodePropertyPredicate : LinqQueryPredicate, IIndexedQueryPredicate
     {
         /// <summary>
         /// Constructor</summary>
@@ -79,6 +79,27 @@ public override IQueryMatch CreatePredicateMatch(object searchItem, object query
             return (DomNodePropertyMatch)queryMatch;
         }
 
+        /// <summary>
+        /// Gets the nodes that may have a property value satisfying the value searches of this predicate.
+        /// Of the string and numerical value searches that were added, the most selective one is used.</summary>
+        /// <param name="index">Index of the document being queried</param>
+        /// <returns>Nodes that may satisfy the predicate, or null if no value searches were added and
+        /// every node must be tested</returns>
+        public IEnumerable<DomNode> GetCandidates(DomNodeQueryIndex index)
+        {
+            ICollection<DomNode> candidates = null;
+            foreach (string searchString in ValueSearchStrings)
+                candidates = GetSmallest(candidates, index.FindText(searchString));
+            foreach (Pair<double, double> range in ValueRanges)
+                candidates = GetSmallest(candidates, index.FindNumbers(range.First, range.Second));
+            return candidates;
+        }
+
+        private static ICollection<DomNode> GetSmallest(ICollection<DomNode> candidates, ICollection<DomNode> otherCandidates)
+        {
+            return candidates == null || otherCandidates.Count < candidates.Count ? otherCandidates : candidates;
+        }
+
         /// <summary>
         /// Produces an object that, given the specified object, can enumerate over queryable elements owned by that object.
         /// For this implementation, the specified object must be a DomNode.</summary>
@@ -0,0 +1,402 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.ComponentModel;
+
+namespace Sce.Atf.Dom
+{
+    /// <summary>
+    /// DomNodeAdapter, for the root of a document, that indexes the nodes of the document by type and
+    /// by the values of their properties, so that DomNodeQueryable can test only the nodes that may
+    /// satisfy a query instead of every node in the document. Define it as an extension on the root
+    /// node type to enable indexed searches; queries made with predicates that implement
+    /// IIndexedQueryPredicate then use it.</summary>
+    /// <remarks>Property values are read from the node's ICustomTypeDescriptor adapter, as the search
+    /// predicates do. String values are matched ignoring case, as ContainsText() does. The index follows
+    /// the AttributeChanged, ChildInserted and ChildRemoved events of the document; changed nodes are
+    /// re-indexed on the next lookup, along with their ancestors, whose properties may show the values
+    /// of their children, and the nodes that refer to any of these through reference attributes, whose
+    /// properties may show the referenced nodes' names. Properties whose values depend on other nodes
+    /// aren't kept current.</remarks>
+    public class DomNodeQueryIndex : DomNodeAdapter
+    {
+        /// <summary>
+        /// Performs initialization when the adapter is connected to the DOM node, indexing
+        /// the node's subtree</summary>
+        protected override void OnNodeSet()
+        {
+            base.OnNodeSet();
+
+            DomNode.AttributeChanged += DomNode_AttributeChanged;
+            DomNode.ChildInserted += DomNode_ChildInserted;
+            DomNode.ChildRemoved += DomNode_ChildRemoved;
+
+            foreach (DomNode node in DomNode.Subtree)
+                AddChangedNode(node);
+        }
+
+        /// <summary>
+        /// Gets the number of indexed nodes</summary>
+        public int Count
+        {
+            get
+            {
+                Update();
+                return m_entries.Count;
+            }
+        }
+
+        /// <summary>
+        /// Gets the indexed nodes of the given type. Nodes of derived types aren't included.</summary>
+        /// <param name="type">Node type</param>
+        /// <returns>Nodes of the type</returns>
+        public IEnumerable<DomNode> GetNodes(DomNodeType type)
+        {
+            if (type == null)
+                throw new ArgumentNullException("type");
+
+            Update();
+            HashSet<DomNode> nodes;
+            if (m_nodesByType.TryGetValue(type, out nodes))
+                return nodes;
+            return EmptyEnumerable<DomNode>.Instance;
+        }
+
+        /// <summary>
+        /// Gets the indexed nodes that have a property whose value, as a string, contains the
+        /// given text, ignoring case</summary>
+        /// <param name="text">Text to find</param>
+        /// <returns>Nodes with a property value containing the text</returns>
+        public ICollection<DomNode> FindText(string text)
+        {
+            if (text == null)
+                throw new ArgumentNullException("text");
+
+            Update();
+            string lowerText = FoldCase(text);
+            HashSet<DomNode> result = new HashSet<DomNode>();
+
+            // Narrow the values to those that contain the least common trigram of the text
+            IEnumerable<string> values = m_nodesByValue.Keys;
+            if (lowerText.Length >= TrigramLength)
+            {
+                HashSet<string> smallest = null;
+                for (int i = 0; i + TrigramLength <= lowerText.Length; i++)
+                {
+                    HashSet<string> trigramValues;
+                    if (!m_valuesByTrigram.TryGetValue(GetTrigram(lowerText, i), out trigramValues))
+                        return result;
+                    if (smallest == null || trigramValues.Count < smallest.Count)
+                        smallest = trigramValues;
+                }
+                values = smallest;
+            }
+
+            foreach (string value in values)
+            {
+                if (value.IndexOf(lowerText, StringComparison.Ordinal) >= 0)
+                    result.UnionWith(m_nodesByValue[value]);
+            }
+            return result;
+        }
+
+        /// <summary>
+        /// Gets the indexed nodes that have a property whose value is convertible to a number
+        /// within the given range</summary>
+        /// <param name="min">Smallest number in the range</param>
+        /// <param name="max">Largest number in the range</param>
+        /// <returns>Nodes with a property value within the range</returns>
+        public ICollection<DomNode> FindNumbers(double min, double max)
+        {
+            Update();
+            HashSet<DomNode> result = new HashSet<DomNode>();
+            if (min <= max)
+            {
+                foreach (double number in m_numbers.GetViewBetween(min, max))
+                    result.UnionWith(m_nodesByNumber[number]);
+            }
+            return result;
+        }
+
+        /// <summary>
+        /// Gets whether a string contains the given text, ignoring case the way the index does.
+        /// Both are converted to lower case with the invariant culture, and then compared ordinally.
+        /// Searches that are narrowed by the index must ignore case in the same way, or the index
+        /// may leave out nodes that they would match.</summary>
+        /// <param name="value">String to search</param>
+        /// <param name="text">Text to find</param>
+        /// <returns>True iff the string contains the text, ignoring case</returns>
+        internal static bool ContainsText(string value, string text)
+        {
+            return FoldCase(value).IndexOf(FoldCase(text), StringComparison.Ordinal) >= 0;
+        }
+
+        private void DomNode_AttributeChanged(object sender, AttributeEventArgs e)
+        {
+            AddChangedLineage(e.DomNode);
+        }
+
+        private void DomNode_ChildInserted(object sender, ChildEventArgs e)
+        {
+            foreach (DomNode node in e.Child.Subtree)
+                AddChangedNode(node);
+            AddChangedLineage(e.Parent);
+        }
+
+        private void DomNode_ChildRemoved(object sender, ChildEventArgs e)
+        {
+            foreach (DomNode node in e.Child.Subtree)
+                AddChangedReferrers(node);
+
+            foreach (DomNode node in e.Child.Subtree)
+            {
+                m_changedNodes.Remove(node);
+                RemoveEntry(node);
+            }
+            AddChangedLineage(e.Parent);
+        }
+
+        private void AddChangedLineage(DomNode node)
+        {
+            for (; node != null; node = node.Parent)
+            {
+                AddChangedNode(node);
+                if (node == DomNode)
+                    break;
+            }
+        }
+
+        private void AddChangedNode(DomNode node)
+        {
+            // the referrers of a node that is already changed were added along with it
+            if (m_changedNodes.Add(node))
+                AddChangedReferrers(node);
+        }
+
+        private void AddChangedReferrers(DomNode node)
+        {
+            HashSet<DomNode> referrers;
+            if (m_referrers.TryGetValue(node, out referrers))
+            {
+                foreach (DomNode referrer in referrers)
+                    AddChangedLineage(referrer);
+            }
+        }
+
+        private void Update()
+        {
+            if (m_changedNodes.Count == 0)
+                return;
+
+            foreach (DomNode node in m_changedNodes)
+            {
+                RemoveEntry(node);
+                AddEntry(node);
+            }
+            m_changedNodes.Clear();
+        }
+
+        private void AddEntry(DomNode node)
+        {
+            HashSet<string> values = new HashSet<string>();
+            HashSet<double> numbers = new HashSet<double>();
+            ICustomTypeDescriptor descriptor = node.GetAdapter(typeof(ICustomTypeDescriptor)) as ICustomTypeDescriptor;
+            AddPropertyValues(node, descriptor, values, numbers);
+
+            // The name predicate gets its properties from this adapter, which may not be the first
+            //  ICustomTypeDescriptor adapter of the node
+            ICustomTypeDescriptor nameDescriptor =
+                node.GetAdapter(typeof(CustomTypeDescriptorNodeAdapter)) as ICustomTypeDescriptor;
+            if (nameDescriptor != descriptor)
+                AddPropertyValues(node, nameDescriptor, values, numbers);
+
+            List<DomNode> references = new List<DomNode>();
+            foreach (AttributeInfo attributeInfo in node.Type.Attributes)
+            {
+                if (attributeInfo.Type.Type == AttributeTypes.Reference)
+                {
+                    DomNode reference = node.GetAttribute(attributeInfo) as DomNode;
+                    if (reference != null)
+                        references.Add(reference);
+                }
+            }
+
+            Entry entry = new Entry(new string[values.Count], new double[numbers.Count], references.ToArray());
+            values.CopyTo(entry.Values);
+            numbers.CopyTo(entry.Numbers);
+            m_entries.Add(node, entry);
+
+            foreach (DomNode reference in entry.References)
+                GetOrCreate(m_referrers, reference).Add(node);
+
+            GetOrCreate(m_nodesByType, node.Type).Add(node);
+
+            foreach (string value in entry.Values)
+            {
+                HashSet<DomNode> nodes;
+                if (!m_nodesByValue.TryGetValue(value, out nodes))
+                {
+                    nodes = new HashSet<DomNode>();
+                    m_nodesByValue.Add(value, nodes);
+                    for (int i = 0; i + TrigramLength <= value.Length; i++)
+                        GetOrCreate(m_valuesByTrigram, GetTrigram(value, i)).Add(value);
+                }
+                nodes.Add(node);
+            }
+
+            foreach (double number in entry.Numbers)
+            {
+                HashSet<DomNode> nodes;
+                if (!m_nodesByNumber.TryGetValue(number, out nodes))
+                {
+                    nodes = new HashSet<DomNode>();
+                    m_nodesByNumber.Add(number, nodes);
+                    m_numbers.Add(number);
+                }
+                nodes.Add(node);
+            }
+        }
+
+        private void RemoveEntry(DomNode node)
+        {
+            Entry entry;
+            if (!m_entries.TryGetValue(node, out entry))
+                return;
+            m_entries.Remove(node);
+
+            HashSet<DomNode> typeNodes = m_nodesByType[node.Type];
+            typeNodes.Remove(node);
+            if (typeNodes.Count == 0)
+                m_nodesByType.Remove(node.Type);
+
+            foreach (string value in entry.Values)
+            {
+                HashSet<DomNode> nodes = m_nodesByValue[value];
+                nodes.Remove(node);
+                if (nodes.Count == 0)
+                {
+                    m_nodesByValue.Remove(value);
+                    for (int i = 0; i + TrigramLength <= value.Length; i++)
+                    {
+                        // a trigram that occurs more than once in the value is removed the first time
+                        long trigram = GetTrigram(value, i);
+                        HashSet<string> trigramValues;
+                        if (!m_valuesByTrigram.TryGetValue(trigram, out trigramValues))
+                            continue;
+                        trigramValues.Remove(value);
+                        if (trigramValues.Count == 0)
+                            m_valuesByTrigram.Remove(trigram);
+                    }
+                }
+            }
+
+            foreach (double number in entry.Numbers)
+            {
+                HashSet<DomNode> nodes = m_nodesByNumber[number];
+                nodes.Remove(node);
+                if (nodes.Count == 0)
+                {
+                    m_nodesByNumber.Remove(number);
+                    m_numbers.Remove(number);
+                }
+            }
+
+            foreach (DomNode reference in entry.References)
+            {
+                HashSet<DomNode> referrers = m_referrers[reference];
+                referrers.Remove(node);
+                if (referrers.Count == 0)
+                    m_referrers.Remove(reference);
+            }
+        }
+
+        private static void AddPropertyValues(
+            DomNode node, ICustomTypeDescriptor descriptor, HashSet<string> values, HashSet<double> numbers)
+        {
+            if (descriptor == null)
+                return;
+
+            foreach (PropertyDescriptor property in descriptor.GetProperties())
+            {
+                object value;
+                try
+                {
+                    value = property.GetValue(node);
+                }
+                catch (Exception)
+                {
+                    // the query would fail on this property too
+                    continue;
+                }
+                if (value == null)
+                    continue;
+
+                string text = value.ToString();
+                if (text != null)
+                    values.Add(FoldCase(text));
+
+                // convert the value as the numerical query expressions do
+                if (LinqQueryPredicate.IsConvertibleToDouble(value))
+                {
+                    try
+                    {
+                        double number = Convert.ToDouble(value);
+                        if (number == 0)
+                            number = 0; // -0 is equal to 0, but may not have the same hash code
+                        numbers.Add(number);
+                    }
+                    catch (FormatException)
+                    {
+                    }
+                }
+            }
+        }
+
+        private static string FoldCase(string text)
+        {
+            return text.ToLowerInvariant();
+        }
+
+        private static long GetTrigram(string text, int index)
+        {
+            return ((long)text[index] << 32) | ((long)text[index + 1] << 16) | text[index + 2];
+        }
+
+        private static HashSet<TValue> GetOrCreate<TKey, TValue>(Dictionary<TKey, HashSet<TValue>> dictionary, TKey key)
+        {
+            HashSet<TValue> set;
+            if (!dictionary.TryGetValue(key, out set))
+            {
+                set = new HashSet<TValue>();
+                dictionary.Add(key, set);
+            }
+            return set;
+        }
+
+        private class Entry
+        {
+            public Entry(string[] values, double[] numbers, DomNode[] references)
+            {
+                Values = values;
+                Numbers = numbers;
+                References = references;
+            }
+
+            public readonly string[] Values;
+            public readonly double[] Numbers;
+            public readonly DomNode[] References;
+        }
+
+        private const int TrigramLength = 3;
+
+        private readonly HashSet<DomNode> m_changedNodes = new HashSet<DomNode>();
+        private readonly Dictionary<DomNode, Entry> m_entries = new Dictionary<DomNode, Entry>();
+        private readonly Dictionary<DomNodeType, HashSet<DomNode>> m_nodesByType = new Dictionary<DomNodeType, HashSet<DomNode>>();
+        private readonly Dictionary<string, HashSet<DomNode>> m_nodesByValue = new Dictionary<string, HashSet<DomNode>>();
+        private readonly Dictionary<long, HashSet<string>> m_valuesByTrigram = new Dictionary<long, HashSet<string>>();
+        private readonly Dictionary<double, HashSet<DomNode>> m_nodesByNumber = new Dictionary<double, HashSet<DomNode>>();
+        private readonly SortedSet<double> m_numbers = new SortedSet<double>();
+        private readonly Dictionary<DomNode, HashSet<DomNode>> m_referrers = new Dictionary<DomNode, HashSet<DomNode>>();
+    }
+}
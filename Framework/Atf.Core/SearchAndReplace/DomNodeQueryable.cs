@@ -19,19 +19,21 @@ public class DomNodeQueryable : DomNodeAdapter, IQueryableContext, IQueryableRes
         public IEnumerable<object> Query(IQueryPredicate predicate)
         {
             m_results.Clear();
-            // Iterate over all dom nodes under this adapter
-            foreach (DomNode domNode in DomNode.Subtree)
-            {
-                // The results of one DomNode query associate each predicate with matching dom node properties
-                Dictionary<IQueryPredicate, IList<IQueryMatch>> predicateMatchResults 
-                    = new Dictionary<IQueryPredicate, IList<IQueryMatch>>();
 
+            // Iterate over all dom nodes under this adapter, or, if the document is indexed, over the
+            //  nodes that may satisfy the predicate
+            IEnumerable<DomNode> domNodes = GetCandidates(predicate) ?? DomNode.Subtree;
+            foreach (DomNode domNode in domNodes)
+            {
                 // For each queryable item (ie a DomNode) there may be 0 to many "query matches" 
                 // (ie a DomNode property).  On success, predicate.Test() will supply one 
                 // IQueryMatch per DomNode property that matched.
                 IList<IQueryMatch> matchingPropertiesList;
                 if (predicate.Test(domNode, out matchingPropertiesList))
                 {
+                    // The results of one DomNode query associate each predicate with matching dom node properties
+                    Dictionary<IQueryPredicate, IList<IQueryMatch>> predicateMatchResults 
+                        = new Dictionary<IQueryPredicate, IList<IQueryMatch>>();
                     if (matchingPropertiesList != null)
                         predicateMatchResults[predicate] = matchingPropertiesList;
 
@@ -112,6 +114,84 @@ public IEnumerable<object> Replace(object replaceInfo)
         }
         #endregion
 
+        /// <summary>
+        /// Gets the nodes under this adapter that may satisfy the predicate, in the order of
+        /// DomNode.Subtree, from the DomNodeQueryIndex of the document</summary>
+        /// <param name="predicate">Query predicate</param>
+        /// <returns>Nodes that may satisfy the predicate, or null if the document isn't indexed or
+        /// the index can't narrow the query</returns>
+        private IEnumerable<DomNode> GetCandidates(IQueryPredicate predicate)
+        {
+            IIndexedQueryPredicate indexedPredicate = predicate as IIndexedQueryPredicate;
+            if (indexedPredicate == null)
+                return null;
+
+            DomNodeQueryIndex index = DomNode.GetRoot().As<DomNodeQueryIndex>();
+            if (index == null)
+                return null;
+
+            IEnumerable<DomNode> candidates = indexedPredicate.GetCandidates(index);
+            if (candidates == null)
+                return null;
+
+            // Sort the candidates by their paths from this node, skipping those outside of its subtree
+            Dictionary<DomNode, int> childIndices = new Dictionary<DomNode, int>();
+            List<KeyValuePair<int[], DomNode>> sorted = new List<KeyValuePair<int[], DomNode>>();
+            List<int> path = new List<int>();
+            foreach (DomNode candidate in candidates)
+            {
+                path.Clear();
+                DomNode node = candidate;
+                while (node != null && node != DomNode)
+                {
+                    path.Add(GetChildIndex(node, childIndices));
+                    node = node.Parent;
+                }
+                if (node != null)
+                {
+                    path.Reverse();
+                    sorted.Add(new KeyValuePair<int[], DomNode>(path.ToArray(), candidate));
+                }
+            }
+            sorted.Sort((x, y) => ComparePaths(x.Key, y.Key));
+
+            DomNode[] result = new DomNode[sorted.Count];
+            for (int i = 0; i < result.Length; i++)
+                result[i] = sorted[i].Value;
+            return result;
+        }
+
+        private static int GetChildIndex(DomNode child, Dictionary<DomNode, int> childIndices)
+        {
+            int index;
+            if (!childIndices.TryGetValue(child, out index))
+            {
+                // number all of the parent's children at once, in the order that DomNode.Subtree
+                //  visits them, which is the reverse of the order of the parent type's child infos
+                DomNode parent = child.Parent;
+                List<ChildInfo> childInfos = new List<ChildInfo>(parent.Type.Children);
+                int i = 0;
+                for (int j = childInfos.Count - 1; j >= 0; j--)
+                    foreach (DomNode sibling in parent.GetChildren(childInfos[j]))
+                        childIndices[sibling] = i++;
+
+                index = childIndices[child];
+            }
+            return index;
+        }
+
+        private static int ComparePaths(int[] x, int[] y)
+        {
+            int count = Math.Min(x.Length, y.Length);
+            for (int i = 0; i < count; i++)
+            {
+                if (x[i] != y[i])
+                    return x[i] < y[i] ? -1 : 1;
+            }
+            // ancestors come before their descendants
+            return x.Length.CompareTo(y.Length);
+        }
+
         private readonly List<object> m_results =  new List<object>();
     }
 }
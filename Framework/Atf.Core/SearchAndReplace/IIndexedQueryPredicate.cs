@@ -0,0 +1,19 @@
+//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System.Collections.Generic;
+
+namespace Sce.Atf.Dom
+{
+    /// <summary>
+    /// Interface for query predicates that can use a DomNodeQueryIndex to find the DomNodes that
+    /// may satisfy them, so that DomNodeQueryable tests only those nodes</summary>
+    public interface IIndexedQueryPredicate : IQueryPredicate
+    {
+        /// <summary>
+        /// Gets the nodes that may satisfy the predicate</summary>
+        /// <param name="index">Index of the document being queried</param>
+        /// <returns>Nodes that may satisfy the predicate, including every node that does, or null
+        /// if the index can't narrow the query and every node must be tested</returns>
+        IEnumerable<DomNode> GetCandidates(DomNodeQueryIndex index);
+    }
+}
@@ -19,6 +19,8 @@ public LinqQueryPredicate()
         {
             m_lambdaExpression = null;
             m_expressionList = new List<Expression>();
+            m_valueSearchStrings = new List<string>();
+            m_valueRanges = new List<Pair<double, double>>();
 
             // deriving classes MUST initialize this with some call to Expression.Parameter( <yourtype>, "property"),
             // where <yourtype> is a type implementing IQueryMatch, over which the lambda expression will iterate.
@@ -125,6 +127,25 @@ protected void AddExpression(Expression expression)
         }
         private readonly List<Expression> m_expressionList;
 
+        /// <summary>
+        /// Gets the strings that the queryable value, as a string, must contain, ignoring case, for
+        /// an element to match, from the string searches added with AddValueStringSearchExpression().
+        /// Regular expression searches aren't included.</summary>
+        protected IEnumerable<string> ValueSearchStrings
+        {
+            get { return m_valueSearchStrings; }
+        }
+        private readonly List<string> m_valueSearchStrings;
+
+        /// <summary>
+        /// Gets the ranges, from smallest to largest number, that the queryable value must be
+        /// within for an element to match, from the numerical tests that were added</summary>
+        protected IEnumerable<Pair<double, double>> ValueRanges
+        {
+            get { return m_valueRanges; }
+        }
+        private readonly List<Pair<double, double>> m_valueRanges;
+
         /// <summary>
         /// Creates and gets an expression to reference the value of the queryable data</summary>
         /// <value>Expression that resolves to the QueryMatch.GetValue() method call</value>
@@ -220,6 +241,8 @@ public string CreateRegularExpressionPattern(string matchString, UInt64 searchTy
         public void AddValueStringSearchExpression(string matchString, UInt64 searchType, bool isReplacePattern)
         {
             AddStringSearchExpression(QueryableValueString, matchString, searchType, isReplacePattern);
+            if (!string.IsNullOrEmpty(matchString) && searchType != (UInt64)StringQuery.RegularExpression)
+                m_valueSearchStrings.Add(matchString);
         }
 
         /// <summary>
@@ -235,7 +258,8 @@ public void AddStringSearchExpression(Expression sourceStringExp, string matchSt
             if (isReplacePattern)
                 MatchPattern = new StringReplaceQueryPattern(patternString);
 
-            Expression optionsExp = Expression.Constant(RegexOptions.IgnoreCase, typeof(RegexOptions));
+            // ignore case regardless of the current culture, as DomNodeQueryIndex does
+            Expression optionsExp = Expression.Constant(RegexOptions.IgnoreCase | RegexOptions.CultureInvariant, typeof(RegexOptions));
             MethodCallExpression regexMatchTest = Expression.Call(typeof(Regex), "Match", null, new Expression[3] { sourceStringExp, patternStringExp, optionsExp });
             MemberExpression regexSuccess = Expression.Property(regexMatchTest, "Success");
             AddExpression(
@@ -277,6 +301,7 @@ public void AddNumberValueEqualsExpression(Double patternNumber, bool isReplaceP
                 Expression.AndAlso(
                     GetValueIsConvertibleToDoubleExpression(),
                     Expression.Equal(GetConvertToDoubleExpression(), Expression.Constant(patternNumber))));
+            m_valueRanges.Add(new Pair<double, double>(patternNumber, patternNumber));
         }
 
         /// <summary>
@@ -292,6 +317,7 @@ public void AddNumberValueLesserExpression(Double patternNumber, bool isReplaceP
                 Expression.AndAlso(
                     GetValueIsConvertibleToDoubleExpression(),
                     Expression.LessThan(GetConvertToDoubleExpression(), Expression.Constant(patternNumber))));
+            m_valueRanges.Add(new Pair<double, double>(Double.NegativeInfinity, patternNumber));
         }
 
         /// <summary>
@@ -307,6 +333,7 @@ public void AddNumberValueLesserEqualExpression(Double patternNumber, bool isRep
                 Expression.AndAlso(
                     GetValueIsConvertibleToDoubleExpression(),
                     Expression.LessThanOrEqual(GetConvertToDoubleExpression(), Expression.Constant(patternNumber))));
+            m_valueRanges.Add(new Pair<double, double>(Double.NegativeInfinity, patternNumber));
         }
 
         /// <summary>
@@ -322,6 +349,7 @@ public void AddNumberValueGreaterEqualExpression(Double patternNumber, bool isRe
                 Expression.AndAlso(
                     GetValueIsConvertibleToDoubleExpression(),
                     Expression.GreaterThanOrEqual(GetConvertToDoubleExpression(), Expression.Constant(patternNumber))));
+            m_valueRanges.Add(new Pair<double, double>(patternNumber, Double.PositiveInfinity));
         }
 
         /// <summary>
@@ -337,6 +365,7 @@ public void AddNumberValueGreaterExpression(Double patternNumber, bool isReplace
                 Expression.AndAlso(
                     GetValueIsConvertibleToDoubleExpression(),
                     Expression.GreaterThan(GetConvertToDoubleExpression(), Expression.Constant(patternNumber))));
+            m_valueRanges.Add(new Pair<double, double>(patternNumber, Double.PositiveInfinity));
         }
 
         /// <summary>
@@ -373,7 +402,8 @@ public void AddNumberValueBetweenExpression(Double patternNumber1, Double patter
                             Expression.AndAlso(
                                 Expression.LessThanOrEqual(num2Exp, convertToDouble),
                                 Expression.LessThanOrEqual(convertToDouble, num1Exp))))));
-
+            m_valueRanges.Add(new Pair<double, double>(
+                Math.Min(patternNumber1, patternNumber2), Math.Max(patternNumber1, patternNumber2)));
         }
 
         /// <summary>
@@ -472,7 +502,7 @@ public class StringReplaceQueryPattern : IReplacingQueryPattern
             public bool Matches(IQueryMatch itemToMatch)
             {
                 string value = itemToMatch.GetValue().ToString();
-                return Regex.Match(value, m_pattern, RegexOptions.IgnoreCase).Success;
+                return Regex.Match(value, m_pattern, RegexOptions.IgnoreCase | RegexOptions.CultureInvariant).Success;
             }
 
             /// <summary>
@@ -482,7 +512,7 @@ public bool Matches(IQueryMatch itemToMatch)
             public void Replace(IQueryMatch itemToReplace, object replaceWith)
             {
                 string value = itemToReplace.GetValue().ToString();
-                itemToReplace.SetValue(Regex.Replace(value, m_pattern, replaceWith.ToString(), RegexOptions.IgnoreCase));
+                itemToReplace.SetValue(Regex.Replace(value, m_pattern, replaceWith.ToString(), RegexOptions.IgnoreCase | RegexOptions.CultureInvariant));
             }
 
             #endregion
@@ -40,6 +40,20 @@ public Image LoadImage(Stream imageStream)
             }
         }
 
+        /// <summary>
+        /// Gets the size in bytes of a mipmap level of a block compressed image</summary>
+        /// <param name="width">Width of the image's first level</param>
+        /// <param name="height">Height of the image's first level</param>
+        /// <param name="level">Mipmap level</param>
+        /// <param name="blockSize">Size of each 4x4 block, 8 for DXT1 and 16 for DXT3 and DXT5</param>
+        /// <returns>Size of the mipmap level</returns>
+        internal static int GetCompressedSize(int width, int height, int level, int blockSize)
+        {
+            width = Math.Max(width >> level, 1);
+            height = Math.Max(height >> level, 1);
+            return ((width + 3) >> 2) * ((height + 3) >> 2) * blockSize;
+        }
+
         private byte[] ReadPixels(ref DDSURFACEDESC2 ddsd, BinaryReader reader,
             out int glPixelFormat, out int elementsPerPixel)
         {
@@ -61,26 +75,16 @@ public Image LoadImage(Stream imageStream)
 
             if (isCubeMap)
             {   // image is a cubemap
+                int blockSize = glPixelFormat == Gl.GL_COMPRESSED_RGBA_S3TC_DXT1_EXT ? 8 : 16;
                 bufferSize = 0;
                 for (int face = 0; face < 6; face++)
                 {
-                    int width = ddsd.dwWidth;
-                    int height = ddsd.dwHeight;
-
+                    //calculate the bufferSize we are going to read
                     for (int level = 0; level < mipMapCount; level++)
-                    {
-                        //calculate the bufferSize we are going to read
-                        bufferSize += ((width + 3) >> 2) * ((height + 3) >> 2) * 8;
-                        width = width >> 1;
-                        if (width < 1)
-                            width = 1;
-                        height = height >> 1;
-                        if (height < 1)
-                            height = 1;
-                    }
+                        bufferSize += GetCompressedSize(ddsd.dwWidth, ddsd.dwHeight, level, blockSize);
                 }
                 //read the data into pixels: note that all faces and mipmaps are being read
-                pixels = reader.ReadBytes(bufferSize);
+                pixels = ReadBytes(reader.BaseStream, bufferSize);
             }
             else
             {   // image is not a cubemap
@@ -104,13 +108,37 @@ public Image LoadImage(Stream imageStream)
                     long eof = reader.BaseStream.Length;
                     bufferSize = (int)(eof - cur);
                 }
-                pixels = reader.ReadBytes(bufferSize);
+                pixels = ReadBytes(reader.BaseStream, bufferSize);
             }
 
             pixels = converter(pixels);
             return pixels;
         }
 
+        // Reads all of the faces and mipmap levels into a single array, which is handed to
+        //  OpenGL as is. The buffer size can be an overestimate, so it's limited to the length
+        //  of the stream, to avoid reading into a larger array and copying the result.
+        private static byte[] ReadBytes(Stream stream, int bufferSize)
+        {
+            if (stream.CanSeek)
+                bufferSize = (int)Math.Min(bufferSize, stream.Length - stream.Position);
+
+            byte[] pixels = new byte[bufferSize];
+            int offset = 0;
+            while (offset < bufferSize)
+            {
+                int read = stream.Read(pixels, offset, bufferSize - offset);
+                if (read == 0)
+                {
+                    Array.Resize(ref pixels, offset);
+                    break;
+                }
+                offset += read;
+            }
+
+            return pixels;
+        }
+
         private void CalculateImageSettings(
             ref DDSURFACEDESC2 ddsd,
             out int compressionFactor,
@@ -149,7 +177,7 @@ public Image LoadImage(Stream imageStream)
                             0x000000FF))
                         {
                             glPixelFormat = Gl.GL_BGR;
-                            converter = Create32BitTo24BitConverter(0, 1, 2);
+                            converter = Convert32BitTo24Bit;
                             elementsPerPixel = 3;
                         }
                         else if (pixelFormat.HasRedGreenBlueMasks(
@@ -158,7 +186,7 @@ public Image LoadImage(Stream imageStream)
                             0x00FF0000))
                         {
                             glPixelFormat = Gl.GL_RGB;
-                            converter = Create32BitTo24BitConverter(0, 1, 2);
+                            converter = Convert32BitTo24Bit;
                             elementsPerPixel = 3;
                         }
                         else
@@ -246,31 +274,46 @@ private byte[] DoNothingConverter(byte[] source)
             };
         }
 
-        // Returns a delegate that converts each 32 bit pixel to a 24 bit pixel by
-        //  mapping source 8-bit color channels to the destination 8-bit color channels.,
-        //  Source indices are in the range [0,3] and specify which channel goes in to
-        //  the first destination channel, 2nd, and 3rd.
-        private PixelFormatConverter Create32BitTo24BitConverter(
-            int sourceColor1, int sourceColor2, int sourceColor3)
+        // Converts each 32 bit pixel to a 24 bit pixel by dropping its last 8-bit channel.
+        //  Four pixels at a time are packed into three 32 bit words.
+        private static unsafe byte[] Convert32BitTo24Bit(byte[] source)
         {
-            return delegate(byte[] source)
+            int pixelCount = source.Length / 4;
+            byte[] dest = new byte[pixelCount * 3];
+
+            fixed (byte* sourceBytes = source, destBytes = dest)
             {
-                int pixels = source.Length / 4;
-                byte[] dest = new byte[pixels * 3];
+                uint* sourceWords = (uint*)sourceBytes;
+                uint* destWords = (uint*)destBytes;
+                int i = 0;
+                for (; i + 4 <= pixelCount; i += 4)
+                {
+                    uint p0 = sourceWords[0];
+                    uint p1 = sourceWords[1];
+                    uint p2 = sourceWords[2];
+                    uint p3 = sourceWords[3];
+                    destWords[0] = (p0 & 0x00FFFFFF) | (p1 << 24);
+                    destWords[1] = ((p1 >> 8) & 0x0000FFFF) | (p2 << 16);
+                    destWords[2] = ((p2 >> 16) & 0x000000FF) | (p3 << 8);
+
+                    sourceWords += 4;
+                    destWords += 3;
+                }
 
-                int sourceIndex = 0;
-                int destIndex = 0;
-                while (sourceIndex < source.Length)
+                byte* sourcePixel = (byte*)sourceWords;
+                byte* destPixel = (byte*)destWords;
+                for (; i < pixelCount; i++)
                 {
-                    dest[destIndex] = source[sourceIndex + sourceColor1];
-                    dest[destIndex + 1] = source[sourceIndex + sourceColor2];
-                    dest[destIndex + 2] = source[sourceIndex + sourceColor3];
+                    destPixel[0] = sourcePixel[0];
+                    destPixel[1] = sourcePixel[1];
+                    destPixel[2] = sourcePixel[2];
 
-                    sourceIndex += 4;
-                    destIndex += 3;
+                    sourcePixel += 4;
+                    destPixel += 3;
                 }
-                return dest;
-            };
+            }
+
+            return dest;
         }
 
         // This is public only to allow NativeTestHelpers to access it.
@@ -33,6 +33,8 @@ public DesignControl(Scene scene)
             m_renderState.RenderMode = RenderMode.Smooth | RenderMode.CullBackFace | RenderMode.Textured | RenderMode.Lit | RenderMode.Alpha;
             m_renderState.WireframeColor = new Vec4F(0, 0.015f, 0.376f, 1.0f);
             m_renderState.SolidColor = new Vec4F(1,1,1, 1.0f);
+
+            Global<TextureManager>.Instance.TexturesDecoded += textureManager_TexturesDecoded;
         }
 
         #region Events
@@ -179,6 +181,17 @@ public bool IsInvalidated
 
         #region Overrides
 
+        /// <summary>
+        /// Disposes resources</summary>
+        /// <param name="disposing">True to release both managed and unmanaged resources;
+        /// false to release only unmanaged resources</param>
+        protected override void Dispose(bool disposing)
+        {
+            if (disposing)
+                Global<TextureManager>.Instance.TexturesDecoded -= textureManager_TexturesDecoded;
+            base.Dispose(disposing);
+        }
+
         /// <summary>
         /// Gets or sets the background color of the DesignControl</summary>
         public override Color BackColor
@@ -658,6 +671,29 @@ private void RenderAxis(float s)
             Gl.glCallLists(1, Gl.GL_UNSIGNED_BYTE, "z");
         }
 
+        private void textureManager_TexturesDecoded(object sender, EventArgs e)
+        {
+            // Redraw, so that the render action uploads the decoded textures. This is usually
+            //  raised on a worker thread.
+            if (m_invalidated)
+                return;
+
+            if (!InvokeRequired)
+            {
+                Invalidate();
+                return;
+            }
+
+            try
+            {
+                BeginInvoke(new MethodInvoker(Invalidate));
+            }
+            catch (InvalidOperationException)
+            {
+                // the window handle was destroyed
+            }
+        }
+
         private void SetManipulator(IManipulator manipulator, HitRecord[] hits)
         {
             s_isManipulating = true;
@@ -80,77 +80,82 @@ static public string[] GetSupportedExtensions()
         /// <returns>Texture image</returns>
         public Image LoadImage(Stream imageStream)
         {
-            Image image = null;
+            // DevIL keeps the bound image and the error stack in global state, so images that
+            //  are decoded on different threads are loaded one at a time.
+            lock (s_lock)
+            {
+                Image image = null;
 
-            // Don't need to call ilShutDown(). ilInit() can be called multiple times and will only really initialize once.
-            Il.ilInit();
+                // Don't need to call ilShutDown(). ilInit() can be called multiple times and will only really initialize once.
+                Il.ilInit();
 
-            //ilInit() and ilShutDown() do not clear the error stack.
-            ClearErrors();
+                //ilInit() and ilShutDown() do not clear the error stack.
+                ClearErrors();
 
-            int devilImageId = Il.ilGenImage();
+                int devilImageId = Il.ilGenImage();
 
-            try
-            {
-                Il.ilBindImage(devilImageId);
-                CheckError();
-
-                // Don't uncompress DXT1, DXT3 or DXT5 formats. OpenGl can handle them as-is.
-                Il.ilSetInteger(Il.IL_KEEP_DXTC_DATA, Il.IL_TRUE);
-                CheckError();
-
-                // For targa files and others, we need to ensure a consistent origin.
-                Il.ilEnable(Il.IL_ORIGIN_SET);
-                Il.ilSetInteger(Il.IL_ORIGIN_MODE, Il.IL_ORIGIN_UPPER_LEFT);
-                CheckError();
-
-                // Load from the memory stream in to DevIl's internal unmanaged memory.
-                LoadFromStream(imageStream);
-
-                // Determine the target file format. OpenGl supports DXT1, DXT3, and DXT5, so don't convert those.
-                // Get those pixels out of DevIl and into a managed array of bytes.
-                int width = Il.ilGetInteger(Il.IL_IMAGE_WIDTH);
-                int height = Il.ilGetInteger(Il.IL_IMAGE_HEIGHT);
-                int numMipMaps = Il.ilGetInteger(Il.IL_NUM_MIPMAPS);
-                if (numMipMaps == 0)
-                    numMipMaps = 1;
-                CheckError();
-
-                byte[] targetBytes;
-                int targetNumElements;
-                int targetOpenGlFormat;
-
-                int dxtFormat = Il.ilGetInteger(Il.IL_DXTC_DATA_FORMAT);
-                bool isDxt = (dxtFormat != Il.IL_DXT_NO_COMP);
-
-                if (isDxt)
+                try
                 {
-                    targetBytes = GetBytesFromDxt(dxtFormat, out targetNumElements, out targetOpenGlFormat);
+                    Il.ilBindImage(devilImageId);
+                    CheckError();
+
+                    // Don't uncompress DXT1, DXT3 or DXT5 formats. OpenGl can handle them as-is.
+                    Il.ilSetInteger(Il.IL_KEEP_DXTC_DATA, Il.IL_TRUE);
+                    CheckError();
+
+                    // For targa files and others, we need to ensure a consistent origin.
+                    Il.ilEnable(Il.IL_ORIGIN_SET);
+                    Il.ilSetInteger(Il.IL_ORIGIN_MODE, Il.IL_ORIGIN_UPPER_LEFT);
+                    CheckError();
+
+                    // Load from the memory stream in to DevIl's internal unmanaged memory.
+                    LoadFromStream(imageStream);
+
+                    // Determine the target file format. OpenGl supports DXT1, DXT3, and DXT5, so don't convert those.
+                    // Get those pixels out of DevIl and into a managed array of bytes.
+                    int width = Il.ilGetInteger(Il.IL_IMAGE_WIDTH);
+                    int height = Il.ilGetInteger(Il.IL_IMAGE_HEIGHT);
+                    int numMipMaps = Il.ilGetInteger(Il.IL_NUM_MIPMAPS);
+                    if (numMipMaps == 0)
+                        numMipMaps = 1;
+                    CheckError();
+
+                    byte[] targetBytes;
+                    int targetNumElements;
+                    int targetOpenGlFormat;
+
+                    int dxtFormat = Il.ilGetInteger(Il.IL_DXTC_DATA_FORMAT);
+                    bool isDxt = (dxtFormat != Il.IL_DXT_NO_COMP);
+
+                    if (isDxt)
+                    {
+                        targetBytes = GetBytesFromDxt(dxtFormat, out targetNumElements, out targetOpenGlFormat);
+                    }
+                    else
+                    {
+                        targetBytes = GetUncompressedBytes(width, height, out targetNumElements, out targetOpenGlFormat);
+                    }
+
+                    // Create our own Image object and return it.
+                    image = new Image(width, height, targetBytes, numMipMaps, targetOpenGlFormat, targetNumElements);
+
+                    // To-do:
+                    //  To properly support cube maps, we have to have a way of undoing the OpenGl state changes in
+                    //  TextureManager. Also, TextureManager.CompressedTextureLoadPixelDataCUBEMAP() crashed with
+                    //  a cube map in the AllTextureTypes.lvl sample level. Shen worked on this with Herbert Law.
+                    //bool isCubeMap = Il.ilGetInteger(Il.IL_IMAGE_CUBEFLAGS) != 0;
+                    //image.IsCubeMap = isCubeMap;
                 }
-                else
+                finally
                 {
-                    targetBytes = GetUncompressedBytes(width, height, out targetNumElements, out targetOpenGlFormat);
-                }
-
-                // Create our own Image object and return it.
-                image = new Image(width, height, targetBytes, numMipMaps, targetOpenGlFormat, targetNumElements);
+                    Il.ilDeleteImage(devilImageId);
+                    CheckError();
 
-                // To-do:
-                //  To properly support cube maps, we have to have a way of undoing the OpenGl state changes in
-                //  TextureManager. Also, TextureManager.CompressedTextureLoadPixelDataCUBEMAP() crashed with
-                //  a cube map in the AllTextureTypes.lvl sample level. Shen worked on this with Herbert Law.
-                //bool isCubeMap = Il.ilGetInteger(Il.IL_IMAGE_CUBEFLAGS) != 0;
-                //image.IsCubeMap = isCubeMap;
-            }
-            finally
-            {
-                Il.ilDeleteImage(devilImageId);
-                CheckError();
-
-                // For performance reasons, let's keep it going.
-                //Il.ilShutDown();
+                    // For performance reasons, let's keep it going.
+                    //Il.ilShutDown();
+                }
+                return image;
             }
-            return image;
         }
 
         private byte[] LoadFromStream(Stream imageStream)
@@ -280,5 +285,7 @@ private void ClearErrors()
         }
 
         private readonly string m_extension;
+
+        private static readonly object s_lock = new object();
     }
 }
@@ -62,6 +62,8 @@ public virtual void Dispatch(Scene scene, Camera camera)
                 Util3D.RenderStats.TraverseNodeCount = m_traverseList.Count;
                 Util3D.RenderStats.TimeForTraverse = s_stopWatch.ElapsedMilliseconds;
 
+                LoadTextures(m_traverseList, camera);
+
                 s_stopWatch.Reset();
                 s_stopWatch.Start();
                 RenderPass(m_traverseList, camera);
@@ -86,6 +88,8 @@ public virtual void Dispatch(ICollection<TraverseNode> traverseList, Scene scene
             // Dispatch traverse list
             if (m_width > 0 && m_height > 0)
             {
+                LoadTextures(traverseList, camera);
+
                 foreach (TraverseNode node in traverseList)
                 {
                     PushMatrix(node.Transform, false);
@@ -318,6 +322,55 @@ protected void RenderPass(IEnumerable<TraverseNode> traverseList, Camera camera)
             }
         }
 
+        /// <summary>
+        /// Requests the textures of the traverse list from the global TextureManager, prioritized
+        /// by their size on screen, and uploads decoded textures. Called by the Dispatch methods
+        /// before the traverse list is dispatched.</summary>
+        /// <param name="traverseList">Traverse list</param>
+        /// <param name="camera">The camera</param>
+        protected virtual void LoadTextures(ICollection<TraverseNode> traverseList, Camera camera)
+        {
+            TextureManager textureManager = Global<TextureManager>.Instance;
+
+            // the height of the view volume at a distance of 1, or at any distance if orthographic
+            Frustum frustum = camera.Frustum;
+            bool isOrtho = frustum.IsOrtho;
+            float near = frustum.Near;
+            float viewHeight;
+            if (isOrtho)
+                viewHeight = frustum.Top - frustum.Bottom;
+            else
+                viewHeight = 2 * (float)Math.Tan(camera.YFov / 2);
+
+            Matrix4F viewMatrix = camera.ViewMatrix;
+            foreach (TraverseNode node in traverseList)
+            {
+                RenderState renderState = node.RenderState;
+                if ((renderState.RenderMode & RenderMode.Textured) == 0 ||
+                    renderState.TextureName <= 0)
+                    continue;
+
+                // estimate the height of the node on screen, in pixels, from its bounding box
+                float screenSize = 0;
+                Box box = node.WorldSpaceBoundingBox;
+                if (box != null && viewHeight > 0)
+                {
+                    float size = (box.Max - box.Min).Length / viewHeight;
+                    if (!isOrtho)
+                    {
+                        Vec3F center;
+                        viewMatrix.Transform(box.Centroid, out center);
+                        size /= Math.Max(-center.Z, near);
+                    }
+                    screenSize = size * m_height;
+                }
+
+                textureManager.RequestTexture(renderState.TextureName, screenSize);
+            }
+
+            textureManager.UploadTextures();
+        }
+
         /// <summary>
         /// Traverses the render graph in depth-first order and builds the traverse list</summary>
         /// <param name="camera">The camera</param>
@@ -5,6 +5,7 @@
 
 using Sce.Atf.Adaptation;
 using Sce.Atf.Dom;
+using Sce.Atf.Rendering.OpenGL;
 using Sce.Atf.VectorMath;
 
 namespace Sce.Atf.Rendering.Dom
@@ -64,8 +65,11 @@ public virtual TraverseState Traverse(Stack<SceneNode> graphPath, IRenderAction
 
             Box boundingBox = null;
 
+            // the bounding box is used to sort transparent objects, and to prioritize texture loading
             bool alpha = ((state.RenderMode & RenderMode.Alpha) != 0);
-            if (alpha)
+            bool textured = ((state.RenderMode & RenderMode.Textured) != 0) &&
+                Global<TextureManager>.Instance.LoadAsynchronously;
+            if (alpha || textured)
             {
                 boundingBox = GetBoundingBoxObjectSpace();
                 boundingBox.Transform(renderAction.TopMatrix);
@@ -78,9 +82,7 @@ public virtual TraverseState Traverse(Stack<SceneNode> graphPath, IRenderAction
 
                 TraverseNode node = renderAction.GetUnusedNode();
                 node.Init(renderAction.RenderObject, renderAction.TopMatrix, graphPath, state);
-
-                if (alpha)
-                    node.WorldSpaceBoundingBox = boundingBox;
+                node.WorldSpaceBoundingBox = boundingBox;
 
                 traverseList.Add(node);
                 state.RenderMode = origRenderMode;
@@ -139,24 +139,24 @@ private byte[] ReadPixels(BinaryReader reader, TgaHeader header, byte[] colorMap
             int pixelCount = header.imageHeight * header.imageWidth;
             int expectedPayloadSize = pixelCount * bytesPerPixel;
 
-            byte[] pixelPayload;
+            // the pixels are read or decoded straight into the array that is handed to OpenGL
+            byte[] pixelPayload = new byte[expectedPayloadSize];
+            int payloadSize;
 
             if ((ImageDataType)header.dataType == ImageDataType.RleCompressedUnmappedColor)
             {
-                int payloadSize = (int)(reader.BaseStream.Length - reader.BaseStream.Position);
-                pixelPayload = reader.ReadBytes(payloadSize);
-                pixelPayload = DecompressRle(pixelPayload, header);
+                payloadSize = DecompressRle(reader.BaseStream, pixelPayload, GetPixelDepth(header) / 8);
             }
             else
             {
                 // ignore footer
-                pixelPayload = reader.ReadBytes(expectedPayloadSize);
+                payloadSize = Read(reader.BaseStream, pixelPayload, 0, expectedPayloadSize);
             }
 
-            if (pixelPayload.Length != expectedPayloadSize)
+            if (payloadSize != expectedPayloadSize)
             {
                 throw new InvalidDataException("Targa payload size (" +
-                                               pixelPayload.Length +
+                                               payloadSize +
                                                ") does not match expected size (" +
                                                expectedPayloadSize + ")");
             }
@@ -175,40 +175,84 @@ private bool YOriginIsAtBottomOfImage(byte imageDescriptor)
             return ((imageDescriptor & 0x20) == 0);
         }
 
-        private byte[] DecompressRle(byte[] rleCompressedPixels, TgaHeader header)
+        // Reads bytes until the count is reached or the stream ends, returning the number read
+        private static int Read(Stream stream, byte[] buffer, int offset, int count)
         {
-            int bytesPerPixel = GetPixelDepth(header) / 8;
-            int decompressedByteCount = header.imageWidth * header.imageHeight * bytesPerPixel;
-            byte[] decompressedPixels = new byte[decompressedByteCount];
+            int total = 0;
+            while (total < count)
+            {
+                int read = stream.Read(buffer, offset + total, count - total);
+                if (read == 0)
+                    break;
+                total += read;
+            }
+            return total;
+        }
 
-            using (BinaryReader reader = new BinaryReader(new MemoryStream(rleCompressedPixels)))
-            using (BinaryWriter writer = new BinaryWriter(new MemoryStream(decompressedPixels)))
+        // Decodes run-length packets from the stream into the pixels, returning the number of
+        //  bytes decoded. The packets are read through a reusable buffer, runs are filled with
+        //  block copies, and raw packets are copied as one block.
+        private int DecompressRle(Stream stream, byte[] pixels, int bytesPerPixel)
+        {
+            byte[] buffer = GetBuffer();
+            int position = 0;
+            int end = 0;
+            int offset = 0;
+
+            while (offset < pixels.Length)
             {
-                while (writer.BaseStream.Position != writer.BaseStream.Length)
+                // make sure the packet header and at least one pixel are buffered
+                if (end - position < 1 + bytesPerPixel)
+                {
+                    end -= position;
+                    Buffer.BlockCopy(buffer, position, buffer, 0, end);
+                    position = 0;
+                    end += Read(stream, buffer, end, buffer.Length - end);
+                    if (end < 1 + bytesPerPixel)
+                        break;
+                }
+
+                byte packetHeader = buffer[position++];
+
+                int payloadSizeInBytes = ((packetHeader & 0x7F) + 1) * bytesPerPixel;
+                if (payloadSizeInBytes > pixels.Length - offset)
+                    throw new InvalidDataException("Targa run-length packet extends past the end of the image");
+
+                if (PacketPreceedsRlePayload(packetHeader))
                 {
-                    byte packetHeader = reader.ReadByte();
+                    Buffer.BlockCopy(buffer, position, pixels, offset, bytesPerPixel);
+                    position += bytesPerPixel;
 
-                    int pixelCountThisPayload = (packetHeader & 0x7F) + 1;
-                    if (PacketPreceedsRlePayload(packetHeader))
+                    // double the filled part of the run until it's complete
+                    for (int filled = bytesPerPixel; filled < payloadSizeInBytes; filled *= 2)
                     {
-                        byte[] runColor = reader.ReadBytes(bytesPerPixel);
-                        while (pixelCountThisPayload > 0)
-                        {
-                            writer.Write(runColor);
-                            --pixelCountThisPayload;
-                        }
+                        Buffer.BlockCopy(pixels, offset, pixels, offset + filled,
+                            Math.Min(filled, payloadSizeInBytes - filled));
                     }
-                    else
+                }
+                else
+                {
+                    // copy straight through, reading any part that isn't buffered directly
+                    int buffered = Math.Min(end - position, payloadSizeInBytes);
+                    Buffer.BlockCopy(buffer, position, pixels, offset, buffered);
+                    position += buffered;
+                    if (buffered < payloadSizeInBytes)
                     {
-                        // copy straight through
-                        int payloadSizeInBytes = pixelCountThisPayload * bytesPerPixel;
-                        byte[] payload = reader.ReadBytes(payloadSizeInBytes);
-                        writer.Write(payload);
+                        int read = Read(stream, pixels, offset + buffered, payloadSizeInBytes - buffered);
+                        if (read < payloadSizeInBytes - buffered)
+                            return offset + buffered + read;
                     }
                 }
+
+                offset += payloadSizeInBytes;
             }
 
-            return decompressedPixels;
+            return offset;
+        }
+
+        private static byte[] GetBuffer()
+        {
+            return s_buffer ?? (s_buffer = new byte[BufferSize]);
         }
 
         private bool PacketPreceedsRlePayload(byte packetHeader)
@@ -216,7 +260,7 @@ private bool PacketPreceedsRlePayload(byte packetHeader)
             return ((packetHeader & 0x80) != 0);
         }
 
-        private byte[] ExpandPayloadToUnmappedPixels(TgaHeader header, byte[] pixelPayload, byte[] colorMap)
+        private unsafe byte[] ExpandPayloadToUnmappedPixels(TgaHeader header, byte[] pixelPayload, byte[] colorMap)
         {
             int mappedPixelSize = header.bitsPerPixel/8;
             if (mappedPixelSize != 1)
@@ -227,28 +271,41 @@ private byte[] ExpandPayloadToUnmappedPixels(TgaHeader header, byte[] pixelPaylo
                 throw new NotSupportedException("Unmapped pixel elements other than 24bpp and 32bpp are not supported yet.");
             
             int pixelCount = header.imageHeight*header.imageWidth;
+            int colorMapLength = colorMap.Length/unmappedPixelSize;
             
             byte[] unmappedPixels = new byte[unmappedPixelSize*pixelCount];
-            
-            MemoryStream unmappedPixelStream = new MemoryStream(unmappedPixels);
 
-            for (int i = 0; i < pixelCount; ++i)
+            fixed (byte* indices = pixelPayload, map = colorMap, pixels = unmappedPixels)
             {
-                int index = pixelPayload[i];
-                int mapEntry = index*unmappedPixelSize;
-                
                 if (unmappedPixelSize == 3)
                 {
-                    unmappedPixelStream.WriteByte(colorMap[mapEntry]);
-                    unmappedPixelStream.WriteByte(colorMap[mapEntry + 1]);
-                    unmappedPixelStream.WriteByte(colorMap[mapEntry + 2]);
+                    byte* pixel = pixels;
+                    for (int i = 0; i < pixelCount; ++i)
+                    {
+                        int index = indices[i];
+                        if (index >= colorMapLength)
+                            throw new InvalidDataException("Targa color map index is out of range");
+
+                        byte* mapEntry = map + index*3;
+                        pixel[0] = mapEntry[0];
+                        pixel[1] = mapEntry[1];
+                        pixel[2] = mapEntry[2];
+                        pixel += 3;
+                    }
                 }
                 else
                 {
-                    unmappedPixelStream.WriteByte(colorMap[mapEntry]);
-                    unmappedPixelStream.WriteByte(colorMap[mapEntry + 1]);
-                    unmappedPixelStream.WriteByte(colorMap[mapEntry + 2]);
-                    unmappedPixelStream.WriteByte(colorMap[mapEntry + 3]);
+                    // copy each entry as one 32 bit word
+                    uint* mapEntries = (uint*)map;
+                    uint* pixel = (uint*)pixels;
+                    for (int i = 0; i < pixelCount; ++i)
+                    {
+                        int index = indices[i];
+                        if (index >= colorMapLength)
+                            throw new InvalidDataException("Targa color map index is out of range");
+
+                        pixel[i] = mapEntries[index];
+                    }
                 }
             }
 
@@ -291,5 +348,11 @@ private int CalculateOpenGlPixelFormat(TgaHeader header)
                     throw new InvalidOperationException("Unknown pixel depth.");
             }
         }
+
+        // the run-length packets are read through a buffer of this size
+        private const int BufferSize = 8192;
+
+        [ThreadStatic]
+        private static byte[] s_buffer;
     }
 }
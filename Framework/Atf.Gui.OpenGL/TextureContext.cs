@@ -0,0 +1,169 @@
+//Copyright  2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+
+namespace Sce.Atf.Rendering.OpenGL
+{
+    /// <summary>
+    /// Holds a related group of textures for TextureManager, and keeps track of which of them
+    /// are loaded, in order of use, so that the least recently used ones can be unloaded</summary>
+    /// <remarks>This class doesn't call OpenGL, and isn't thread safe.</remarks>
+    internal class TextureContext
+    {
+        /// <summary>
+        /// Constructor</summary>
+        /// <param name="contextId">Context ID</param>
+        public TextureContext(object contextId)
+        {
+            ContextId = contextId;
+        }
+
+        /// <summary>
+        /// Gets the current frame, which is advanced by NextFrame()</summary>
+        public int Frame
+        {
+            get { return m_frame; }
+        }
+
+        /// <summary>
+        /// Gets the estimated size, in bytes, of the loaded textures</summary>
+        public long Size
+        {
+            get { return m_size; }
+        }
+
+        /// <summary>
+        /// Gets the loaded textures, most recently used first</summary>
+        public IEnumerable<Texture> LoadedTextures
+        {
+            get { return m_loadedTextures; }
+        }
+
+        /// <summary>
+        /// Gets whether a texture is used in the current frame</summary>
+        /// <param name="texture">Texture</param>
+        /// <returns>True iff the texture is used in the current frame</returns>
+        public bool IsCurrent(Texture texture)
+        {
+            return texture.LastUsedFrame == m_frame;
+        }
+
+        /// <summary>
+        /// Notes that a texture is used in the current frame, with the given priority. If the
+        /// texture is used more than once in a frame, the highest priority is kept.</summary>
+        /// <param name="texture">Texture</param>
+        /// <param name="priority">Loading priority</param>
+        /// <returns>True iff the texture was unloaded and should be loaded again</returns>
+        public bool Use(Texture texture, float priority)
+        {
+            if (texture.LastUsedFrame != m_frame || priority > texture.Priority)
+                texture.Priority = priority;
+            texture.LastUsedFrame = m_frame;
+
+            if (texture.State == TextureState.Loaded)
+            {
+                // move it to the front of the least recently used list
+                m_loadedTextures.Remove(texture.LoadedNode);
+                m_loadedTextures.AddFirst(texture.LoadedNode);
+            }
+
+            return texture.State == TextureState.Unloaded;
+        }
+
+        /// <summary>
+        /// Adds a texture that has just been loaded, as the most recently used one</summary>
+        /// <param name="texture">Texture, whose State is Loaded and whose Size is set</param>
+        public void AddLoaded(Texture texture)
+        {
+            if (texture.State != TextureState.Loaded)
+                throw new InvalidOperationException("texture isn't loaded");
+
+            texture.LoadedNode = m_loadedTextures.AddFirst(texture);
+            m_size += texture.Size;
+        }
+
+        /// <summary>
+        /// Unloads the least recently used textures until the loaded textures fit in the
+        /// given size. Textures used in the current frame stay, even if they don't fit.</summary>
+        /// <param name="capacity">Maximum size of the loaded textures, in bytes</param>
+        /// <returns>The unloaded textures, whose State is now Unloaded</returns>
+        public List<Texture> Unload(long capacity)
+        {
+            var unloaded = new List<Texture>();
+            while (m_size > capacity)
+            {
+                Texture texture = m_loadedTextures.Last.Value;
+                if (IsCurrent(texture))
+                    break;
+
+                m_loadedTextures.RemoveLast();
+                m_size -= texture.Size;
+                texture.LoadedNode = null;
+                texture.Size = 0;
+                texture.State = TextureState.Unloaded;
+                unloaded.Add(texture);
+            }
+            return unloaded;
+        }
+
+        /// <summary>
+        /// Advances to the next frame</summary>
+        public void NextFrame()
+        {
+            m_frame++;
+        }
+
+        public readonly object ContextId;
+        public readonly Dictionary<String, int> NameMap = new Dictionary<string, int>();
+        public readonly Dictionary<int, TextureInfo> TextureDataMap = new Dictionary<int, TextureInfo>();
+        public readonly List<int> Names = new List<int>();
+        public readonly Dictionary<int, Texture> Textures = new Dictionary<int, Texture>();
+        public bool Destroyed;
+
+        private readonly LinkedList<Texture> m_loadedTextures = new LinkedList<Texture>();
+        private long m_size;
+        private int m_frame;
+    }
+
+    /// <summary>
+    /// Loading states of a texture</summary>
+    internal enum TextureState
+    {
+        Unloaded,
+        Queued,
+        Decoding,
+        Decoded,
+        Loaded,
+        Failed
+    }
+
+    /// <summary>
+    /// Holds the loading state of a texture</summary>
+    internal class Texture
+    {
+        /// <summary>
+        /// Constructor</summary>
+        /// <param name="context">Context that the texture belongs to</param>
+        /// <param name="path">Path to the image file</param>
+        /// <param name="info">Texture data</param>
+        public Texture(TextureContext context, string path, TextureInfo info)
+        {
+            Context = context;
+            Path = path;
+            Info = info;
+        }
+
+        public readonly TextureContext Context;
+        public readonly string Path;
+        public readonly TextureInfo Info;
+        public int Name = -1;
+        public TextureState State;
+        public long Size;
+        public int LastUsedFrame;
+        public float Priority;
+        public LinkedListNode<Texture> LoadedNode;
+        public Image Image; // decoded, waiting to be uploaded
+        public Exception Error; // thrown while decoding
+    }
+}
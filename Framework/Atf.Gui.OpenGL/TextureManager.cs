@@ -2,7 +2,9 @@
 
 using System;
 using System.Collections.Generic;
+using System.Diagnostics;
 using System.IO;
+using System.Threading;
 
 using Tao.OpenGl;
 
@@ -11,6 +13,10 @@ namespace Sce.Atf.Rendering.OpenGL
     /// <summary>
     /// Manages texture bindings in OpenGL, and associates groups of textures with
     /// a user defined context</summary>
+    /// <remarks>Images can be decoded on worker threads by setting LoadAsynchronously. The render
+    /// thread should then call RequestTexture() for each texture that it draws, and UploadTextures()
+    /// once per frame, for the same context, as RenderAction does for the default context. The
+    /// memory used by each context's textures can be limited by setting MemoryCapacity.</remarks>
     public class TextureManager
     {
         /// <summary>
@@ -20,6 +26,75 @@ public ImageLoaderRegistry ImageLoaderRegistry
             get { return m_imageLoaderRegistry; }
         }
 
+        /// <summary>
+        /// Gets or sets whether images are decoded on worker threads. If true, GetTextureName
+        /// returns a texture name that is bound to a placeholder image, and UploadTextures() uploads
+        /// the decoded image to the same name later. The texture's TextureInfo is filled in at
+        /// that time, so single renders, such as thumbnails, may show the placeholder. The default
+        /// is false.</summary>
+        public bool LoadAsynchronously
+        {
+            get { return m_loadAsynchronously; }
+            set { m_loadAsynchronously = value; }
+        }
+
+        /// <summary>
+        /// Gets or sets the maximum number of worker threads that decode images. The default
+        /// leaves one processor for the render thread.</summary>
+        public int MaxDecodeThreads
+        {
+            get { return m_maxDecodeThreads; }
+            set
+            {
+                if (value < 1)
+                    throw new ArgumentOutOfRangeException("value");
+                m_maxDecodeThreads = value;
+            }
+        }
+
+        /// <summary>
+        /// Gets or sets the time, in milliseconds, that each call to UploadTextures() may spend
+        /// uploading decoded images. At least one image of the context is uploaded per call. The
+        /// default is 5.</summary>
+        public double UploadTimeBudget
+        {
+            get { return m_uploadTimeBudget; }
+            set { m_uploadTimeBudget = value; }
+        }
+
+        /// <summary>
+        /// Gets or sets the maximum estimated size, in bytes, of the textures of each context.
+        /// When it's exceeded, UploadTextures() unloads the least recently used textures that
+        /// weren't requested in the current frame. Unloaded textures keep their names, show the
+        /// placeholder image, and are loaded again when they're next requested. The default is
+        /// long.MaxValue.</summary>
+        public long MemoryCapacity
+        {
+            get { return m_memoryCapacity; }
+            set
+            {
+                if (value < 0)
+                    throw new ArgumentOutOfRangeException("value");
+                m_memoryCapacity = value;
+            }
+        }
+
+        /// <summary>
+        /// Gets the number of textures that are waiting to be decoded or uploaded</summary>
+        public int PendingTextureCount
+        {
+            get
+            {
+                lock (this)
+                    return m_queuedTextures.Count + m_decodingTextureCount + m_decodedTextures.Count;
+            }
+        }
+
+        /// <summary>
+        /// Event that is raised when decoded images are waiting for UploadTextures(). It's
+        /// usually raised on a worker thread. Views can handle it by scheduling a redraw.</summary>
+        public event EventHandler TexturesDecoded;
+
         /// <summary>
         /// Binds a texture to the given path</summary>
         /// <param name="image">Path to image file containing texture</param>
@@ -63,7 +138,13 @@ public int GetTextureName(string image, object contextId, bool enableflipimage)
                     TextureInfo texData;
                     texData = new TextureInfo();
                     texData.EnableFlipImage = enableflipimage;
-                    name = BuildImage(image, texData);
+                    Texture texture = new Texture(context, image, texData);
+                    texture.LastUsedFrame = context.Frame;
+                    if (m_loadAsynchronously)
+                        BuildPlaceholder(texture);
+                    else
+                        BuildImage(texture);
+                    name = texture.Name;
 
                     // When textures can't be found, let's note that fact so as to avoid
                     //  hundreds or thousands of IO exceptions that are then printed in
@@ -77,9 +158,21 @@ public int GetTextureName(string image, object contextId, bool enableflipimage)
                         {
                             context.TextureDataMap.Add(name, texData);
                             context.Names.Add(name);
+                            context.Textures.Add(name, texture);
+
+                            if (texture.State == TextureState.Loaded)
+                                context.AddLoaded(texture);
+                            else
+                                QueueTexture(texture);
                         }
                     }
                 }
+                else if (name >= 0)
+                {
+                    Texture texture;
+                    if (context.Textures.TryGetValue(name, out texture))
+                        UseTexture(texture, 0);
+                }
             }
 
             return name;
@@ -102,12 +195,87 @@ public TextureInfo GetTextureInfo(int textureName)
         public TextureInfo GetTextureInfo(int textureName, object contextId)
         {
             TextureInfo result = null;
-            TextureContext texCollection = FindContext(contextId);
-            if (texCollection != null)
-                texCollection.TextureDataMap.TryGetValue(textureName, out result);
+            lock (this)
+            {
+                TextureContext texCollection = FindContext(contextId);
+                if (texCollection != null)
+                    texCollection.TextureDataMap.TryGetValue(textureName, out result);
+            }
             return result;
         }
 
+        /// <summary>
+        /// Notes that a texture of the default context is drawn in the current frame</summary>
+        /// <param name="textureName">OpenGL name of bound texture</param>
+        /// <param name="priority">Loading priority, such as the size of the texture on screen,
+        /// in pixels</param>
+        public void RequestTexture(int textureName, float priority)
+        {
+            RequestTexture(textureName, priority, s_defaultContext);
+        }
+
+        /// <summary>
+        /// Notes that a texture of the given context is drawn in the context's current frame.
+        /// Such textures are decoded and uploaded before others, in order of priority, and aren't
+        /// unloaded to meet the MemoryCapacity. Textures that were unloaded are loaded again.</summary>
+        /// <param name="textureName">OpenGL name of bound texture</param>
+        /// <param name="priority">Loading priority, such as the size of the texture on screen,
+        /// in pixels. If the texture is requested more than once in a frame, the highest
+        /// priority is used.</param>
+        /// <param name="contextId">Context ID of texture</param>
+        public void RequestTexture(int textureName, float priority, object contextId)
+        {
+            lock (this)
+            {
+                TextureContext texCollection = FindContext(contextId);
+                Texture texture;
+                if (texCollection != null && texCollection.Textures.TryGetValue(textureName, out texture))
+                    UseTexture(texture, priority);
+            }
+        }
+
+        /// <summary>
+        /// Uploads decoded images to the textures of the default context</summary>
+        public void UploadTextures()
+        {
+            UploadTextures(s_defaultContext);
+        }
+
+        /// <summary>
+        /// Uploads decoded images to the textures of the given context, in order of priority,
+        /// until UploadTimeBudget is spent, then unloads the context's textures as needed to meet
+        /// the MemoryCapacity, and advances the context to its next frame. Should be called on
+        /// the render thread, with the context's OpenGL context current, once per frame, after
+        /// the frame's textures are requested and before they're drawn.</summary>
+        /// <param name="contextId">Context ID of textures</param>
+        public void UploadTextures(object contextId)
+        {
+            bool moreDecoded;
+            lock (this)
+            {
+                TextureContext texCollection = FindContext(contextId);
+                if (texCollection == null)
+                    return;
+
+                Stopwatch stopwatch = Stopwatch.StartNew();
+                Texture texture;
+                while ((texture = m_decodedTextures.Dequeue(texCollection)) != null)
+                {
+                    UploadDecodedImage(texture);
+                    if (stopwatch.Elapsed.TotalMilliseconds >= m_uploadTimeBudget)
+                        break;
+                }
+
+                UnloadTextures(texCollection);
+
+                texCollection.NextFrame();
+                moreDecoded = m_decodedTextures.Contains(texCollection);
+            }
+
+            if (moreDecoded)
+                OnTexturesDecoded();
+        }
+
         /// <summary>
         /// Destroys all texture bindings for the default context</summary>
         public void DestroyTextures()
@@ -120,21 +288,38 @@ public void DestroyTextures()
         /// <param name="contextId">Context ID of textures to destroy</param>
         public void DestroyTextures(object contextId)
         {
-            TextureContext texCollection = FindContext(contextId);
-            if (texCollection != null)
+            lock (this)
             {
-                if (texCollection.Names.Count > 0)
+                TextureContext texCollection = FindContext(contextId);
+                if (texCollection != null)
                 {
-                    int[] texs = new int[texCollection.Names.Count];
-                    texCollection.Names.CopyTo(texs, 0);
-                    Gl.glDeleteTextures(texs.Length, texs);
-                    Util3D.ReportErrors();
-                }
+                    if (texCollection.Names.Count > 0)
+                    {
+                        int[] texs = new int[texCollection.Names.Count];
+                        texCollection.Names.CopyTo(texs, 0);
+                        Gl.glDeleteTextures(texs.Length, texs);
+                        Util3D.ReportErrors();
+                    }
+
+                    // images that are being decoded are dropped by DecodeImages()
+                    texCollection.Destroyed = true;
+                    m_queuedTextures.RemoveAll(texCollection);
+                    m_decodedTextures.RemoveAll(texCollection);
 
-                m_texCollections.Remove(texCollection);
+                    m_texCollections.Remove(texCollection);
+                }
             }
         }
 
+        /// <summary>
+        /// Raises the TexturesDecoded event</summary>
+        protected virtual void OnTexturesDecoded()
+        {
+            EventHandler handler = TexturesDecoded;
+            if (handler != null)
+                handler(this, EventArgs.Empty);
+        }
+
         private TextureContext FindContext(object contextId)
         {
             foreach (TextureContext texCollection in m_texCollections)
@@ -144,41 +329,235 @@ private TextureContext FindContext(object contextId)
             return null;
         }
 
-        private int BuildImage(string uri, TextureInfo textureInfo)
+        private void BuildImage(Texture texture)
         {
-            int name = -1;
-
             // wrapped in this nasty try/catch because bad memory is touched when we're
             // rendering to a thumbnail (different glContext).  driver bug?  :_(
             try
             {
-                string filename = uri.Replace(@"file:\\\", "");
+                Image image = LoadImage(texture.Path, texture.Info.EnableFlipImage);
 
-                string ext = Path.GetExtension(filename);
-                IImageLoader loader = m_imageLoaderRegistry.GetLoader(ext);
-                Image image;
+                int name = texture.Name;
+                if (name < 0)
+                    Gl.glGenTextures(1, out name);
 
-                using (Stream stream = new FileStream(filename, FileMode.Open, FileAccess.Read))
-                    image = loader.LoadImage(stream);
+                texture.Size = UploadImage(name, image, texture.Info);
+                texture.Name = name;
+                texture.State = TextureState.Loaded;
+            }
+            catch (Exception e)
+            {
+                ReportError(e);
+                texture.State = TextureState.Failed;
+            }
+        }
 
-                name = TryCreateOpenGlTextureFromImage(image, textureInfo);
+        private void BuildPlaceholder(Texture texture)
+        {
+            try
+            {
+                int name;
+                Gl.glGenTextures(1, out name);
+                UploadPlaceholder(name);
+                texture.Name = name;
             }
-            catch (System.IO.IOException e)
+            catch (Exception e)
+            {
+                ReportError(e);
+                texture.State = TextureState.Failed;
+            }
+        }
+
+        private Image LoadImage(string uri, bool flipImage)
+        {
+            string filename = uri.Replace(@"file:\\\", "");
+
+            string ext = Path.GetExtension(filename);
+            IImageLoader loader = m_imageLoaderRegistry.GetLoader(ext);
+            Image image;
+
+            using (Stream stream = new FileStream(filename, FileMode.Open, FileAccess.Read))
+                image = loader.LoadImage(stream);
+
+            // If EnableFlipImage, we want to flip the image up side down
+            if (flipImage)
+                FlipImage(image);
+
+            return image;
+        }
+
+        /// <summary>
+        /// Flips the first level of an image upside down, by swapping whole rows in place.
+        /// Cube maps are left unchanged, because UploadImage turns EnableFlipImage off for them.</summary>
+        /// <param name="image">Image</param>
+        internal static void FlipImage(Image image)
+        {
+            if (image.IsCubeMap)
+                return;
+
+            byte[] pixels = image.Pixels;
+            int bytesPerRow = image.Width * image.ElementsPerPixel;
+            byte[] row = new byte[bytesPerRow];
+            int topOffset = 0;
+            int bottomOffset = bytesPerRow * (image.Height - 1);
+            while (topOffset < bottomOffset)
+            {
+                Buffer.BlockCopy(pixels, topOffset, row, 0, bytesPerRow);
+                Buffer.BlockCopy(pixels, bottomOffset, pixels, topOffset, bytesPerRow);
+                Buffer.BlockCopy(row, 0, pixels, bottomOffset, bytesPerRow);
+
+                topOffset += bytesPerRow;
+                bottomOffset -= bytesPerRow;
+            }
+        }
+
+        private void ReportError(Exception e)
+        {
+            if (e is IOException)
             {
                 // excessive error messages adds minutes to a large level that is missing textures
                 if (m_missingTextureReports++ < 10)
                     Outputs.WriteLine(OutputMessageType.Error,e.Message);
             }
-            catch (Exception e)
+            else
             {
                 Outputs.WriteLine(OutputMessageType.Error, e.Message);
                 Outputs.WriteLine(OutputMessageType.Info, e.StackTrace);
             }
-            
-            return name;
         }
 
-        private int TryCreateOpenGlTextureFromImage(Image image, TextureInfo textureInfo)
+        private void UseTexture(Texture texture, float priority)
+        {
+            if (texture.Context.Use(texture, priority))
+            {
+                if (m_loadAsynchronously)
+                {
+                    QueueTexture(texture);
+                }
+                else
+                {
+                    BuildImage(texture);
+                    if (texture.State == TextureState.Loaded)
+                        texture.Context.AddLoaded(texture);
+                }
+            }
+        }
+
+        private void UnloadTextures(TextureContext context)
+        {
+            // unloaded textures keep their names, which are bound to the placeholder
+            foreach (Texture texture in context.Unload(m_memoryCapacity))
+            {
+                try
+                {
+                    UploadPlaceholder(texture.Name);
+                }
+                catch (Exception e)
+                {
+                    ReportError(e);
+                }
+            }
+        }
+
+        private void QueueTexture(Texture texture)
+        {
+            texture.State = TextureState.Queued;
+            m_queuedTextures.Add(texture);
+
+            if (m_decodeThreadCount < m_maxDecodeThreads)
+            {
+                m_decodeThreadCount++;
+                ThreadPool.QueueUserWorkItem(DecodeImages);
+            }
+        }
+
+        private void DecodeImages(object state)
+        {
+            while (true)
+            {
+                Texture texture;
+                lock (this)
+                {
+                    texture = m_queuedTextures.Dequeue();
+                    if (texture == null)
+                    {
+                        m_decodeThreadCount--;
+                        return;
+                    }
+
+                    texture.State = TextureState.Decoding;
+                    m_decodingTextureCount++;
+                }
+
+                try
+                {
+                    texture.Image = LoadImage(texture.Path, texture.Info.EnableFlipImage);
+                }
+                catch (Exception e)
+                {
+                    texture.Error = e;
+                }
+
+                lock (this)
+                {
+                    m_decodingTextureCount--;
+                    if (texture.Context.Destroyed)
+                        continue;
+
+                    texture.State = TextureState.Decoded;
+                    m_decodedTextures.Add(texture);
+                }
+
+                OnTexturesDecoded();
+            }
+        }
+
+        private void UploadDecodedImage(Texture texture)
+        {
+            Image image = texture.Image;
+            Exception error = texture.Error;
+            texture.Image = null;
+            texture.Error = null;
+
+            if (error == null)
+            {
+                try
+                {
+                    texture.Size = UploadImage(texture.Name, image, texture.Info);
+                    texture.State = TextureState.Loaded;
+                    texture.Context.AddLoaded(texture);
+                    return;
+                }
+                catch (Exception e)
+                {
+                    error = e;
+                }
+            }
+
+            ReportError(error);
+            texture.State = TextureState.Failed;
+        }
+
+        private void UploadPlaceholder(int textureName)
+        {
+            DeleteTextureObject(textureName);
+
+            Gl.glBindTexture(Gl.GL_TEXTURE_2D, textureName);
+            Gl.glTexParameteri(Gl.GL_TEXTURE_2D, Gl.GL_TEXTURE_MIN_FILTER, Gl.GL_NEAREST);
+            Gl.glTexParameteri(Gl.GL_TEXTURE_2D, Gl.GL_TEXTURE_MAG_FILTER, Gl.GL_NEAREST);
+            Gl.glTexImage2D(Gl.GL_TEXTURE_2D, 0, Gl.GL_RGBA, 1, 1, 0, Gl.GL_RGBA, Gl.GL_UNSIGNED_BYTE, s_placeholderPixels);
+            Util3D.ReportErrors();
+        }
+
+        private void DeleteTextureObject(int textureName)
+        {
+            // Replacing a texture object releases all of its memory, and lets the name be bound
+            //  to a different target. The name stays valid, because it's bound again right away.
+            if (Gl.glIsTexture(textureName) != Gl.GL_FALSE)
+                Gl.glDeleteTextures(1, ref textureName);
+        }
+
+        private long UploadImage(int textureName, Image image, TextureInfo textureInfo)
         {
             textureInfo.Format = image.OpenGlPixelFormat;
             textureInfo.Width = image.Width;
@@ -188,8 +567,7 @@ private int TryCreateOpenGlTextureFromImage(Image image, TextureInfo textureInfo
             // Relax pixel data alignment restrictions down from 4 to 1
             Gl.glPixelStorei(Gl.GL_UNPACK_ALIGNMENT, 1);
 
-            int textureName;
-            Gl.glGenTextures(1, out textureName);
+            DeleteTextureObject(textureName);
 
             if (image.IsCubeMap)
             {
@@ -212,27 +590,7 @@ private int TryCreateOpenGlTextureFromImage(Image image, TextureInfo textureInfo
                 Gl.glTexParameteri(Gl.GL_TEXTURE_2D, Gl.GL_TEXTURE_MAG_FILTER, Gl.GL_LINEAR);
             }
 
-            // If EnableFlipImage, we want to flip the image up side down
-            if (textureInfo.EnableFlipImage)
-            {
-                int pixel_size = image.Pixels.Length; 
-                byte[] new_pixels = new byte[pixel_size];
-                for (int i=0; i<image.Height; i++)
-                {
-                    int source_i_offset = (image.Height - i - 1) * image.Width * image.ElementsPerPixel;
-                    int destin_i_offset = (i) * image.Width * image.ElementsPerPixel;
-                    for (int j = 0; j < image.Width; j++)
-                    {
-                        int j_offset = j * image.ElementsPerPixel;
-                        for (int k = 0; k < image.ElementsPerPixel; k++)
-                        {
-                            new_pixels[destin_i_offset + j_offset + k] = image.Pixels[source_i_offset + j_offset + k];
-                        }
-                    }
-                }
-                image.Pixels = new_pixels;
-            }
-
+            long size;
             if ((image.PixelFormat == PixelFormat.DXT1) ||
                 (image.PixelFormat == PixelFormat.DXT3) ||
                 (image.PixelFormat == PixelFormat.DXT5))
@@ -250,8 +608,11 @@ private int TryCreateOpenGlTextureFromImage(Image image, TextureInfo textureInfo
 
                 if (image.IsCubeMap)
                     CompressedTextureLoadPixelDataCUBEMAP(image, image.Levels);
-                else 
+                else
                     CompressedTextureLoadPixelData(image, levels);
+
+                // the pixel data holds all of the faces and mipmap levels
+                size = image.Pixels.Length;
             }
             else
             {
@@ -264,9 +625,12 @@ private int TryCreateOpenGlTextureFromImage(Image image, TextureInfo textureInfo
                     image.OpenGlPixelFormat,
                     Gl.GL_UNSIGNED_BYTE,
                     image.Pixels);
+
+                // the mipmaps add a third to the size of the image
+                size = (long)image.Width * image.Height * image.ElementsPerPixel * 4 / 3;
             }
             Util3D.ReportErrors();
-            return textureName;
+            return size;
         }
 
         private bool CompressedTextureContainsAllMipmaps(Image image)
@@ -354,65 +718,60 @@ private unsafe void CompressedTextureLoadPixelDataCUBEMAP(Image image, int level
                 nBlockSize = 16;
 
             int offset = 0;
-            // Load the mip-map levels
-            for (int face = 0; face < 6; face++)
+            // Load the mip-map levels straight from the pixel data
+            fixed (byte* pixels = image.Pixels)
             {
-                int nWidth = image.Width;
-                int nHeight = image.Height;
-                for (int i = 0; i < levels; ++i)
+                for (int face = 0; face < 6; face++)
                 {
-                    if (nWidth == 0)
-                        nWidth = 1;
-                    if (nHeight == 0)
-                        nHeight = 1;
-
-                    //                    nSize = ((nWidth + 3) / 4) * ((nHeight + 3) / 4) * nBlockSize;                    
-                    int nSize = ((nWidth + 3) >> 2) * ((nHeight + 3) >> 2) * nBlockSize;
-
-                    byte[] pixel = new byte[nSize];
-                    for (int o = offset, j=0; o < offset + nSize; o++, j++)
+                    int nWidth = image.Width;
+                    int nHeight = image.Height;
+                    for (int i = 0; i < levels; ++i)
                     {
-                        pixel[j] = image.Pixels[o];
+                        if (nWidth == 0)
+                            nWidth = 1;
+                        if (nHeight == 0)
+                            nHeight = 1;
+
+                        // the same size that DdsImageLoader reads for each face and level
+                        int nSize = DdsImageLoader.GetCompressedSize(image.Width, image.Height, i, nBlockSize);
+                        if (offset + nSize > image.Pixels.Length)
+                            throw new InvalidOperationException("cube map pixel data is missing faces or mipmap levels");
+
+                        Gl.glCompressedTexImage2DARB(
+                            Gl.GL_TEXTURE_CUBE_MAP_POSITIVE_X + face,
+                            i,
+                            image.OpenGlPixelFormat,
+                            nWidth,
+                            nHeight,
+                            0,
+                            nSize,
+                            new IntPtr(pixels + offset));
+
+                        offset += nSize;
+
+                        // Half the image size for the next mip-map level...
+                        nWidth = (nWidth >> 1);
+                        nHeight = (nHeight >> 1);
                     }
-                    Gl.glCompressedTexImage2DARB(
-                        Gl.GL_TEXTURE_CUBE_MAP_POSITIVE_X + face,
-                        i,
-                        image.OpenGlPixelFormat,
-                        nWidth,
-                        nHeight,
-                        0,
-                        nSize,
-                        pixel);
-
-                    offset += nSize;
-
-                    // Half the image size for the next mip-map level...
-                    nWidth = (nWidth >> 1);
-                    nHeight = (nHeight >> 1);
                 }
             }
             Util3D.ReportErrors();
         }
 
-        /// <summary>
-        /// Holds a related group of textures</summary>
-        private class TextureContext
-        {
-            public TextureContext(object contextId)
-            {
-                ContextId = contextId;
-            }
-
-            public readonly object ContextId;
-            public readonly Dictionary<String, int> NameMap = new Dictionary<string, int>();
-            public readonly Dictionary<int, TextureInfo> TextureDataMap = new Dictionary<int, TextureInfo>();
-            public readonly List<int> Names = new List<int>();
-        }
-
         private readonly List<TextureContext> m_texCollections = new List<TextureContext>();
         private readonly ImageLoaderRegistry m_imageLoaderRegistry = new ImageLoaderRegistry();
         private int m_missingTextureReports;//to avoid overloading the OutputService window
-        
+
+        private bool m_loadAsynchronously;
+        private int m_maxDecodeThreads = Math.Max(1, Environment.ProcessorCount - 1);
+        private double m_uploadTimeBudget = 5;
+        private long m_memoryCapacity = long.MaxValue;
+        private int m_decodeThreadCount;
+        private int m_decodingTextureCount;
+        private readonly TextureQueue m_queuedTextures = new TextureQueue();
+        private readonly TextureQueue m_decodedTextures = new TextureQueue();
+
         private static readonly object s_defaultContext = new object();
+        private static readonly byte[] s_placeholderPixels = { 255, 255, 255, 255 };
     }
 }
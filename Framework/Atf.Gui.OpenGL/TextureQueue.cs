@@ -0,0 +1,96 @@
+//Copyright  2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System.Collections.Generic;
+
+namespace Sce.Atf.Rendering.OpenGL
+{
+    /// <summary>
+    /// Queue of textures that are waiting to be decoded or uploaded, which are taken in order of
+    /// loading priority</summary>
+    /// <remarks>Textures that were used fewer frames ago, counting the frames of their own
+    /// contexts, come first, and then higher priorities first. This class isn't thread
+    /// safe.</remarks>
+    internal class TextureQueue
+    {
+        /// <summary>
+        /// Gets the number of textures in the queue</summary>
+        public int Count
+        {
+            get { return m_textures.Count; }
+        }
+
+        /// <summary>
+        /// Adds a texture to the queue</summary>
+        /// <param name="texture">Texture</param>
+        public void Add(Texture texture)
+        {
+            m_textures.Add(texture);
+        }
+
+        /// <summary>
+        /// Removes and returns the texture with the highest loading priority</summary>
+        /// <returns>Texture with the highest loading priority, or null if the queue is empty</returns>
+        public Texture Dequeue()
+        {
+            return Dequeue(null);
+        }
+
+        /// <summary>
+        /// Removes and returns the texture of the given context with the highest loading
+        /// priority</summary>
+        /// <param name="context">Context, or null for any context</param>
+        /// <returns>Texture with the highest loading priority, or null if there is none</returns>
+        public Texture Dequeue(TextureContext context)
+        {
+            // the queues are short, and their priorities change every frame
+            int index = -1;
+            for (int i = 0; i < m_textures.Count; i++)
+            {
+                Texture texture = m_textures[i];
+                if ((context == null || texture.Context == context) &&
+                    (index < 0 || CompareLoadingPriority(texture, m_textures[index]) < 0))
+                    index = i;
+            }
+
+            if (index < 0)
+                return null;
+
+            Texture result = m_textures[index];
+            m_textures[index] = m_textures[m_textures.Count - 1];
+            m_textures.RemoveAt(m_textures.Count - 1);
+            return result;
+        }
+
+        /// <summary>
+        /// Gets whether the queue holds any textures of the given context</summary>
+        /// <param name="context">Context</param>
+        /// <returns>True iff the queue holds a texture of the context</returns>
+        public bool Contains(TextureContext context)
+        {
+            foreach (Texture texture in m_textures)
+                if (texture.Context == context)
+                    return true;
+            return false;
+        }
+
+        /// <summary>
+        /// Removes all the textures of the given context</summary>
+        /// <param name="context">Context</param>
+        public void RemoveAll(TextureContext context)
+        {
+            m_textures.RemoveAll(texture => texture.Context == context);
+        }
+
+        // Orders textures that were used more recently first, and then higher priorities first
+        private static int CompareLoadingPriority(Texture x, Texture y)
+        {
+            int xAge = x.Context.Frame - x.LastUsedFrame;
+            int yAge = y.Context.Frame - y.LastUsedFrame;
+            if (xAge != yAge)
+                return xAge.CompareTo(yAge);
+            return y.Priority.CompareTo(x.Priority);
+        }
+
+        private readonly List<Texture> m_textures = new List<Texture>();
+    }
+}
@@ -3,7 +3,10 @@
 using System;
 using System.Collections.Generic;
 using System.ComponentModel.Composition;
+using System.Diagnostics;
 using System.IO;
+using System.Net;
+using System.Net.Sockets;
 using System.Runtime.InteropServices;
 using System.Runtime.Remoting;
 using System.Runtime.Remoting.Channels;
@@ -12,6 +15,9 @@
 using System.Windows.Threading;
 using System.Windows.Forms;
 
+using Sce.Atf.Adaptation;
+using Sce.Atf.Dom;
+
 namespace Sce.Atf.Applications
 {
     /// <summary>
@@ -97,6 +103,7 @@ void IInitializable.Initialize()
                 {
                     StartService();
                     s_scriptingService = m_scriptingService;
+                    s_contextRegistry = m_contextRegistry;
                     if (m_settingsService != null)
                     {
                         m_settingsService.SettingsPath = Path.Combine(Environment.CurrentDirectory, "AutomationSettings.xml");
@@ -144,13 +151,89 @@ protected void StartService()
         }
 
         /// <summary>
-        /// Gets a unique port number</summary>
+        /// Gets a unique port number from the first port range. The port is currently free,
+        /// and is never handed out twice by this process, so that several applications under
+        /// test can be launched at the same time without colliding.</summary>
         /// <returns>Unique port number</returns>
         public static int GetUniquePortNumber()
         {
-            const int basePortNumber = 4000;
-            const int rangeSize = 2000;
-            return basePortNumber + (DateTime.Now.Second + DateTime.Now.Millisecond) % rangeSize;
+            return GetUniquePortNumber(0);
+        }
+
+        /// <summary>
+        /// Gets a unique port number from the given port range. The port is currently free,
+        /// and is never handed out twice by this process. Each range holds PortsPerRange ports,
+        /// starting at FirstRangePort, and no two ranges overlap, so test processes that run at
+        /// the same time (such as the shards of a sharded test run) never pick the same port
+        /// as long as each one uses its own range index.</summary>
+        /// <param name="rangeIndex">Index of the port range, from 0 to MaxPortRanges - 1</param>
+        /// <returns>Unique port number</returns>
+        /// <remarks>The ranges lie below the dynamic port range that the operating system uses
+        /// for outgoing connections, so a free port is unlikely to be taken by another program
+        /// between this call and the application under test registering its channel.</remarks>
+        /// <exception cref="ArgumentOutOfRangeException">rangeIndex is negative or not less
+        /// than MaxPortRanges</exception>
+        /// <exception cref="InvalidOperationException">No port in the range is free</exception>
+        public static int GetUniquePortNumber(int rangeIndex)
+        {
+            if (rangeIndex < 0 || rangeIndex >= MaxPortRanges)
+                throw new ArgumentOutOfRangeException("rangeIndex");
+
+            int firstPort = FirstRangePort + rangeIndex * PortsPerRange;
+            lock (s_allocatedPorts)
+            {
+                for (int port = firstPort; port < firstPort + PortsPerRange; port++)
+                {
+                    if (!s_allocatedPorts.Contains(port) && IsPortFree(port))
+                    {
+                        s_allocatedPorts.Add(port);
+                        return port;
+                    }
+                }
+            }
+
+            throw new InvalidOperationException("Unable to allocate a free port for the automation service");
+        }
+
+        /// <summary>
+        /// Port number at which the first range of GetUniquePortNumber(int) starts</summary>
+        public const int FirstRangePort = 20000;
+
+        /// <summary>
+        /// Number of ports in each range of GetUniquePortNumber(int)</summary>
+        public const int PortsPerRange = 100;
+
+        /// <summary>
+        /// Number of ranges available to GetUniquePortNumber(int)</summary>
+        public const int MaxPortRanges = 200;
+
+        /// <summary>
+        /// Releases a port number previously returned by GetUniquePortNumber, so that it may be reused</summary>
+        /// <param name="port">Port number to release</param>
+        public static void ReleasePortNumber(int port)
+        {
+            lock (s_allocatedPorts)
+                s_allocatedPorts.Remove(port);
+        }
+
+        private static bool IsPortFree(int port)
+        {
+            //The listener is released right away, so the application under test can register
+            //its channel on the port
+            TcpListener listener = new TcpListener(IPAddress.Any, port);
+            try
+            {
+                listener.Start();
+                return true;
+            }
+            catch (SocketException)
+            {
+                return false;
+            }
+            finally
+            {
+                listener.Stop();
+            }
         }
 
         /// <summary>
@@ -162,6 +245,11 @@ public static int GetUniquePortNumber()
         /// URI for service type</summary>
         public const string TcpName = "AutomationChannel";
 
+        /// <summary>
+        /// Line written to the standard output once the main window has loaded and the service
+        /// accepts calls. Test clients can wait for this line instead of polling Connect().</summary>
+        public const string ReadySignal = "AutomationService is ready";
+
         /// <summary>
         /// Disposes of unmanaged resources</summary>
         public void Dispose()
@@ -207,7 +295,14 @@ private void Application_ThreadException(object sender, ThreadExceptionEventArgs
 
         private void m_mainWindow_Loaded(object sender, EventArgs e)
         {
+            //Remember the clean script domain, so that a pooled application can be reset between scripts
+            if (s_scriptingService != null)
+                s_scriptingService.SaveScopeSnapshot();
             s_mainFormLoaded = true;
+
+            //Announce readiness, so test clients can connect right away instead of polling
+            Console.WriteLine(ReadySignal);
+            Console.Out.Flush();
         }
         
         /// <summary>
@@ -215,6 +310,11 @@ private void m_mainWindow_Loaded(object sender, EventArgs e)
         /// an error dialog (checked by name and by type of known error dialogs).</summary>
         /// <returns>True iff error occurred</returns>
         public bool CheckUnexpectedErrors()
+        {
+            return CheckUnexpectedErrorsOnMainThread();
+        }
+
+        private static bool CheckUnexpectedErrorsOnMainThread()
         {
             if (s_unhandledException)
             {
@@ -252,6 +352,46 @@ public string ExecuteStatement(string statement)
             return (string)s_dispatcher.Invoke(f, statement);
         }
 
+        /// <summary>
+        /// Executes a sequence of statements, in one call and with one trip to the main thread,
+        /// continuing after statements that fail</summary>
+        /// <param name="statements">Statements to execute</param>
+        /// <returns>Output, success and execution time of each statement</returns>
+        public ScriptStatementResult[] ExecuteBatch(string[] statements)
+        {
+            return ExecuteBatch(statements, false);
+        }
+
+        /// <summary>
+        /// Executes a sequence of statements, in one call and with one trip to the main thread</summary>
+        /// <param name="statements">Statements to execute</param>
+        /// <param name="stopOnFirstError">Whether to skip the remaining statements after one fails</param>
+        /// <returns>Output, success and execution time of each statement that was executed</returns>
+        public ScriptStatementResult[] ExecuteBatch(string[] statements, bool stopOnFirstError)
+        {
+            //Must execute on the main thread to avoid various errors
+            Func<string[], bool, ScriptStatementResult[]> f = ExecuteBatchOnMainThread;
+            return (ScriptStatementResult[])s_dispatcher.Invoke(f, statements, stopOnFirstError);
+        }
+
+        private static ScriptStatementResult[] ExecuteBatchOnMainThread(string[] statements, bool stopOnFirstError)
+        {
+            List<ScriptStatementResult> results = new List<ScriptStatementResult>(statements.Length);
+            Stopwatch stopwatch = new Stopwatch();
+            foreach (string statement in statements)
+            {
+                stopwatch.Restart();
+                bool succeeded;
+                string output = s_scriptingService.ExecuteStatement(statement, out succeeded);
+                stopwatch.Stop();
+
+                results.Add(new ScriptStatementResult(statement, output, succeeded, stopwatch.Elapsed));
+                if (!succeeded && stopOnFirstError)
+                    break;
+            }
+            return results.ToArray();
+        }
+
         /// <summary>
         /// Executes a script file</summary>
         /// <param name="scriptPath">Script file path</param>
@@ -263,6 +403,140 @@ public string ExecuteScript(string scriptPath)
             return (string)s_dispatcher.Invoke(f, scriptPath);
         }
 
+        /// <summary>
+        /// Executes a script file and gets the results that it recorded with the Test script module
+        /// (Test.py): the number of passed assertions, the failures with their stack traces and the
+        /// timed phases. Use this instead of checking that the last line of the output is "Success".
+        /// The output can be followed with OutputPosition and ReadOutput(), as for ExecuteScript().</summary>
+        /// <param name="scriptPath">Script file path</param>
+        /// <returns>Results of the script, or null if the script did not import the Test module</returns>
+        public ScriptTestResult ExecuteScriptForResult(string scriptPath)
+        {
+            //Must execute on the main thread to avoid various errors
+            Func<string, ScriptTestResult> f = ExecuteScriptForResultOnMainThread;
+            return (ScriptTestResult)s_dispatcher.Invoke(f, scriptPath);
+        }
+
+        private static ScriptTestResult ExecuteScriptForResultOnMainThread(string scriptPath)
+        {
+            //The module stays loaded between scripts, so clear the results of the previous script
+            ExecuteTestResultsStatement("Reset()");
+
+            Stopwatch stopwatch = Stopwatch.StartNew();
+            string error;
+            s_scriptingService.ExecuteFile(scriptPath, out error);
+            stopwatch.Stop();
+
+            string payload = ExecuteTestResultsStatement("Serialize()") as string;
+            if (payload == null)
+                return null;
+
+            return ScriptTestResult.Parse(payload, error, stopwatch.Elapsed);
+        }
+
+        private static object ExecuteTestResultsStatement(string call)
+        {
+            try
+            {
+                //Don't import the module; if the script doesn't use it, there are no results
+                return s_scriptingService.ExecuteSilent(string.Format(
+                    "__import__('sys').modules['{0}'].Results.{1} if '{0}' in __import__('sys').modules else None",
+                    TestResultsModuleName, call));
+            }
+            catch (Exception e)
+            {
+                Console.WriteLine("Could not get the test results: {0}", e.Message);
+                return null;
+            }
+        }
+
+        /// <summary>
+        /// Name of the script module that test scripts use to record their results</summary>
+        public const string TestResultsModuleName = "Test";
+
+        /// <summary>
+        /// Gets the position at the end of the script output written so far. To follow the output
+        /// of a script while it runs, get this position before calling ExecuteScript(), and pass it
+        /// to ReadOutput().</summary>
+        public long OutputPosition
+        {
+            get { return s_scriptingService.OutputPosition; }
+        }
+
+        /// <summary>
+        /// Gets the script output written since the given position. Unlike the other methods, this
+        /// does not wait for the main thread, so it can be called while ExecuteScript() or
+        /// ExecuteStatement() is running. Only the output of the script or statement that ran most
+        /// recently is kept; during ExecuteBatch(), that is the current statement.</summary>
+        /// <param name="position">Position from OutputPosition, or from the previous call to this method</param>
+        /// <param name="nextPosition">Position to pass to the next call to this method</param>
+        /// <returns>Output written since the given position, or the empty string if there is none</returns>
+        public string ReadOutput(long position, out long nextPosition)
+        {
+            return s_scriptingService.ReadOutput(position, out nextPosition);
+        }
+
+        /// <summary>
+        /// Compiles the script files in a directory ahead of time, so that later calls to
+        /// ExecuteScript() for them don't pay for compilation</summary>
+        /// <param name="directory">Directory containing script files</param>
+        /// <returns>Number of files compiled</returns>
+        public int Precompile(string directory)
+        {
+            //Must execute on the main thread to avoid various errors
+            Func<string, int> f = s_scriptingService.Precompile;
+            return (int)s_dispatcher.Invoke(f, directory);
+        }
+
+        /// <summary>
+        /// Gets the number of script files and statements that were executed without compiling them</summary>
+        public long CompiledCodeCacheHits
+        {
+            get { return s_scriptingService.CompiledCodeCacheHits; }
+        }
+
+        /// <summary>
+        /// Gets the number of script files and statements that had to be compiled before executing them</summary>
+        public long CompiledCodeCacheMisses
+        {
+            get { return s_scriptingService.CompiledCodeCacheMisses; }
+        }
+
+        /// <summary>
+        /// Returns the application to a clean state so that it can run another script:
+        /// discards all documents, clears the undo history of any remaining contexts and
+        /// restores the script domain to the state it had when the application finished loading.
+        /// Used by test clients that keep one application alive for many scripts.</summary>
+        /// <returns>True iff the application was reset and no unexpected errors have occurred;
+        /// false means the application should not be reused</returns>
+        public bool ResetForNextScript()
+        {
+            //Must execute on the main thread to avoid various errors
+            Func<bool> f = ResetForNextScriptOnMainThread;
+            return (bool)s_dispatcher.Invoke(f);
+        }
+
+        private static bool ResetForNextScriptOnMainThread()
+        {
+            //Not all apps have documents, so an error from the DiscardAll command is okay
+            s_scriptingService.ExecuteStatement("atfFile.DiscardAll()");
+
+            if (s_contextRegistry != null)
+            {
+                foreach (object context in s_contextRegistry.Contexts)
+                {
+                    HistoryContext historyContext = context.As<HistoryContext>();
+                    if (historyContext != null)
+                        historyContext.History.Clear();
+                }
+            }
+
+            if (!s_scriptingService.RestoreScopeSnapshot())
+                return false;
+
+            return !CheckUnexpectedErrorsOnMainThread();
+        }
+
         /// <summary>
         /// Called by test client to verify connection is ready. If this call throws
         /// an exception, most likely the service has not finished starting yet. Returns
@@ -378,6 +652,10 @@ void s_liveConnectService_MessageReceived(object sender, LiveConnectService.Live
 
         [Import(AllowDefault = true)]
         private LiveConnectService m_liveConnectService;
+
+        [NonSerialized]
+        [Import(AllowDefault = true)]
+        private IContextRegistry m_contextRegistry;
         
         /// <summary>
         /// Whether valid command line arguments were passed in to run an automated script</summary>
@@ -397,7 +675,9 @@ void s_liveConnectService_MessageReceived(object sender, LiveConnectService.Live
         private static TcpChannel s_registeredChannel;
         private static Dispatcher s_dispatcher;
         private static LiveConnectService s_liveConnectService;
+        private static IContextRegistry s_contextRegistry;
         private static string s_lastMessage;
+        private static readonly HashSet<int> s_allocatedPorts = new HashSet<int>();
         /// <summary>
         /// Indicates whether main form loaded</summary>
         protected static bool s_mainFormLoaded;
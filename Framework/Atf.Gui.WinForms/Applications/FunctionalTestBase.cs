@@ -1,7 +1,9 @@
 //Copyright  2014 Sony Computer Entertainment America LLC. See License.txt.
 
 using System;
+using System.Collections.Generic;
 using System.Diagnostics;
+using System.Globalization;
 using System.IO;
 using System.Net.Sockets;
 using System.Text;
@@ -34,6 +36,24 @@ public virtual void TestCleanup()
             m_scriptOutput = new StringBuilder();
 
             m_timeOutInSecs = DefaultTimeOutInSeconds;
+
+            //A pooled application that was handed back after a clean run stays alive for the next script
+            if (m_pooledApplication != null)
+            {
+                PooledApplication pooled = m_pooledApplication;
+                m_pooledApplication = null;
+                if (pooled.Available)
+                {
+                    m_automationService = null;
+                    m_process = null;
+                    return;
+                }
+                //The test did not get as far as resetting the application, so don't trust it
+                lock (s_applicationPool)
+                    s_applicationPool.Remove(pooled.ExePath);
+                m_port = pooled.Port;
+            }
+
             try
             {
                 if (m_automationService != null)
@@ -58,6 +78,13 @@ public virtual void TestCleanup()
 
                 m_process = null;
             }
+
+            if (m_port != 0)
+            {
+                if (m_fixedRemoteTestingPort == 0)
+                    AutomationService.ReleasePortNumber(m_port);
+                m_port = 0;
+            }
         }
 
         /// <summary>
@@ -69,6 +96,17 @@ public int FixedRemoteTestingPort
             set { m_fixedRemoteTestingPort = value; }
         }
 
+        /// <summary>
+        /// Get or set the index of the port range that dynamic port numbers are taken from</summary>
+        /// <remarks>The default is 0. Test processes that run at the same time must each use a
+        /// different index, so that they never launch applications on the same port.
+        /// See AutomationService.GetUniquePortNumber(int).</remarks>
+        public int PortRangeIndex
+        {
+            get { return m_portRangeIndex; }
+            set { m_portRangeIndex = value; }
+        }
+
         /// <summary>
         /// Get or set the time out in seconds used for each individual test</summary>
         /// <remarks>The default is 30 seconds</remarks>
@@ -78,6 +116,64 @@ public int TimeOutInSecs
             set { m_timeOutInSecs = value; }
         }
 
+        /// <summary>
+        /// Get or set whether to keep the application under test alive after a script finishes,
+        /// and reuse it for the next script that runs the same application. Between scripts, the
+        /// application is reset (documents discarded, undo history cleared and the script domain
+        /// restored) instead of being closed and launched again. An application that reports an
+        /// unexpected error, or that has run MaxScriptsPerPooledApplication scripts, is closed
+        /// and replaced by a freshly launched one.</summary>
+        /// <remarks>The default is false. Call ShutdownApplicationPool() when all tests have run.</remarks>
+        public bool UseApplicationPool
+        {
+            get { return m_useApplicationPool; }
+            set { m_useApplicationPool = value; }
+        }
+
+        /// <summary>
+        /// Get or set the number of scripts a pooled application may run before it is recycled</summary>
+        /// <remarks>The default is 50. 0 means there is no limit.</remarks>
+        public static int MaxScriptsPerPooledApplication
+        {
+            get { return s_maxScriptsPerPooledApplication; }
+            set { s_maxScriptsPerPooledApplication = value; }
+        }
+
+        /// <summary>
+        /// Closes all applications kept alive by UseApplicationPool. Applications that do not
+        /// close gracefully are killed.</summary>
+        public static void ShutdownApplicationPool()
+        {
+            List<PooledApplication> pooled;
+            lock (s_applicationPool)
+            {
+                pooled = new List<PooledApplication>(s_applicationPool.Values);
+                s_applicationPool.Clear();
+            }
+
+            foreach (PooledApplication application in pooled)
+                application.Shutdown();
+        }
+
+        /// <summary>
+        /// Get or set whether Connect() waits for the application to announce that it is ready,
+        /// rather than polling the automation service until it answers</summary>
+        /// <remarks>The default is true. Applications built with an AutomationService that does not
+        /// write AutomationService.ReadySignal should set this to false.</remarks>
+        public bool WaitForReadySignal
+        {
+            get { return m_waitForReadySignal; }
+            set { m_waitForReadySignal = value; }
+        }
+
+        /// <summary>
+        /// Gets the time the most recently launched application took from launch until the
+        /// automation service was connected</summary>
+        public TimeSpan TimeToReady
+        {
+            get { return m_timeToReady; }
+        }
+
         /// <summary>
         /// Gets the AutomationService object, which is used for 
         /// communicating with the application under test</summary>
@@ -119,16 +215,144 @@ protected void ExecuteFullTest(string scriptPath)
             }
             Console.WriteLine("Starting test script: {0}", scriptPath);
 
-            //Must setup our own app settings before launching the process
-            SetupAppSettings();
-            int port;
-            LaunchTestApplication(GetAppExePath(), out port);
-            Connect(port);
+            if (m_useApplicationPool && AcquirePooledApplication())
+            {
+                Console.WriteLine("Reusing pooled application, process id: {0}", m_process.Id);
+            }
+            else
+            {
+                //Must setup our own app settings before launching the process
+                SetupAppSettings();
+                int port;
+                LaunchTestApplication(GetAppExePath(), out port);
+                Connect(port);
+                if (m_useApplicationPool)
+                    AddToApplicationPool();
+            }
+
             SetupScript(scriptPath);
             ProcessScript(scriptPath);
 
-            CloseApplication();
-            VerifyApplicationClosed();
+            if (m_pooledApplication != null)
+            {
+                ReleasePooledApplication();
+            }
+            else
+            {
+                CloseApplication();
+                VerifyApplicationClosed();
+            }
+        }
+
+        /// <summary>
+        /// Takes a live application for this test's executable from the pool, if there is one</summary>
+        /// <returns>True iff a pooled application was acquired</returns>
+        private bool AcquirePooledApplication()
+        {
+            PooledApplication pooled;
+            lock (s_applicationPool)
+            {
+                if (!s_applicationPool.TryGetValue(GetAppExePath(), out pooled))
+                    return false;
+
+                if (!pooled.Available || pooled.Process.HasExited)
+                {
+                    s_applicationPool.Remove(pooled.ExePath);
+                    pooled.Shutdown();
+                    return false;
+                }
+                pooled.Available = false;
+            }
+
+            pooled.Owner = this;
+            m_pooledApplication = pooled;
+            m_process = pooled.Process;
+            m_automationService = pooled.AutomationService;
+            return true;
+        }
+
+        /// <summary>
+        /// Puts the application that was just launched and connected into the pool</summary>
+        private void AddToApplicationPool()
+        {
+            PooledApplication pooled = new PooledApplication(GetAppExePath(), m_process, m_automationService, m_port);
+            pooled.Owner = this;
+            //The pooled application owns its port and output from now on
+            m_process.OutputDataReceived -= Process_OutputDataReceived;
+            m_process.OutputDataReceived += pooled.Process_OutputDataReceived;
+            m_port = 0;
+
+            lock (s_applicationPool)
+            {
+                PooledApplication previous;
+                if (s_applicationPool.TryGetValue(pooled.ExePath, out previous))
+                    previous.Shutdown();
+                s_applicationPool[pooled.ExePath] = pooled;
+            }
+            m_pooledApplication = pooled;
+        }
+
+        /// <summary>
+        /// Resets the pooled application after a script and makes it available to the next test.
+        /// An application that can't be reset, or has run its share of scripts, is closed.</summary>
+        private void ReleasePooledApplication()
+        {
+            PooledApplication pooled = m_pooledApplication;
+            pooled.ScriptCount++;
+
+            //This will check for error dialogs and if an uncaught exception occurred.
+            bool unexpectedErrors = m_automationService.CheckUnexpectedErrors();
+
+            bool reset = false;
+            if (!unexpectedErrors)
+            {
+                bool result = false;
+                ThreadStart tStart = delegate()
+                {
+                    try
+                    {
+                        result = m_automationService.ResetForNextScript();
+                    }
+                    //Any failure to reset just means the application gets recycled
+                    catch (Exception)
+                    { }
+                };
+                Thread t = new Thread(tStart);
+                t.Start();
+                reset = t.Join(1000 * ResetTimeOutInSeconds) && result;
+            }
+
+            bool expired = s_maxScriptsPerPooledApplication > 0 &&
+                pooled.ScriptCount >= s_maxScriptsPerPooledApplication;
+            if (reset && !expired)
+            {
+                pooled.Owner = null;
+                pooled.Available = true;
+            }
+            else
+            {
+                Console.WriteLine("Recycling pooled application after {0} scripts", pooled.ScriptCount);
+                lock (s_applicationPool)
+                {
+                    PooledApplication current;
+                    if (s_applicationPool.TryGetValue(pooled.ExePath, out current) && current == pooled)
+                        s_applicationPool.Remove(pooled.ExePath);
+                }
+                m_pooledApplication = null;
+                m_port = pooled.Port;
+                if (!reset || unexpectedErrors)
+                {
+                    pooled.Shutdown();
+                    m_process = null;
+                }
+                else
+                {
+                    CloseApplication();
+                    VerifyApplicationClosed();
+                }
+            }
+
+            Check(!unexpectedErrors, "Verify no unexpected errors have occurred");
         }
 
         /// <summary>
@@ -149,6 +373,12 @@ protected virtual void SetupAppSettings()
             string exeDir = Path.GetDirectoryName(GetAppExePath());
             string defaultSettingsDstPath = Path.Combine(exeDir, "AutomationSettings.xml");
             string defaultSettingsSrcPath = Path.Combine(@".\Resources", "AutomationSettings.xml");
+            //Several test processes may launch the same application concurrently, so leave
+            //an identical copy alone rather than deleting it from under another process
+            if (File.Exists(defaultSettingsDstPath) && File.Exists(defaultSettingsSrcPath) &&
+                FilesAreEqual(defaultSettingsSrcPath, defaultSettingsDstPath))
+                return;
+
             if (File.Exists(defaultSettingsDstPath))
             {
                 //More reliable delete if destination is read-only
@@ -162,6 +392,20 @@ protected virtual void SetupAppSettings()
                 Console.WriteLine("AutomationSettings.xml file not found");
         }
 
+        private static bool FilesAreEqual(string path1, string path2)
+        {
+            byte[] bytes1 = File.ReadAllBytes(path1);
+            byte[] bytes2 = File.ReadAllBytes(path2);
+            if (bytes1.Length != bytes2.Length)
+                return false;
+            for (int i = 0; i < bytes1.Length; i++)
+            {
+                if (bytes1[i] != bytes2[i])
+                    return false;
+            }
+            return true;
+        }
+
         /// <summary>
         /// Launches the specified ATF application in automation mode.
         /// "Automation mode" simply means passing an "-automation" flag to the exe, which
@@ -174,9 +418,10 @@ protected Process LaunchTestApplication(string appExePath, out int port)
             Check(File.Exists(appExePath), "Verify app exe exists: " + appExePath);
 
             if (m_fixedRemoteTestingPort == 0)
-                port = AutomationService.GetUniquePortNumber();
+                port = AutomationService.GetUniquePortNumber(m_portRangeIndex);
             else
                 port = m_fixedRemoteTestingPort;
+            m_port = port;
             m_process = new Process();
             m_process.StartInfo.FileName = appExePath;
             m_process.StartInfo.Arguments = string.Format("-automation -port {0}", port);
@@ -184,6 +429,13 @@ protected Process LaunchTestApplication(string appExePath, out int port)
             m_process.StartInfo.UseShellExecute = false;
             m_process.StartInfo.RedirectStandardOutput = true;
 
+            //Set when the application announces it is ready, or when it exits
+            ManualResetEvent readySignal = new ManualResetEvent(false);
+            m_readySignal = readySignal;
+            m_process.EnableRaisingEvents = true;
+            m_process.Exited += delegate { readySignal.Set(); };
+
+            m_launchTimer = Stopwatch.StartNew();
             m_process.Start();
 
             //Process the output as it is received, otherwise long scripts timeout because
@@ -195,35 +447,33 @@ protected Process LaunchTestApplication(string appExePath, out int port)
         }
 
         /// <summary>
-        /// Connects to the AutomationService. Tries multiple times, to allow the application
-        /// time to launch and initialize.</summary>
+        /// Connects to the AutomationService. Waits for the application to announce that it is
+        /// ready (see AutomationService.ReadySignal), then connects. If the application never
+        /// announces itself, or WaitForReadySignal is false, tries multiple times, to allow the
+        /// application time to launch and initialize.</summary>
         /// <param name="port">Port number to use in connection</param>
         /// <returns>AutomationService, when successfully connected</returns>
         protected AutomationService Connect(int port)
         {
             Console.WriteLine("PortNumber: {0}", port);
             bool connected = false;
+
+            if (m_waitForReadySignal && m_readySignal != null)
+            {
+                //The signal is also set if the process exits, so a crash doesn't cost the full timeout
+                if (m_readySignal.WaitOne(1000 * ReadySignalTimeOutInSeconds) && !m_process.HasExited)
+                    connected = TryConnect(port);
+                else
+                    Console.WriteLine("No ready signal received from the application, polling the automation service");
+            }
+
             int cnt = 0;
             //The application may still be initializing, so allow a few tries before failing.
             //The legacy AssetManager is consistently the slowest to initialize, sometimes taking
             //close to a full second.  I'll pad this by 10x in case other machines are slower
             while (!connected && cnt++ < 100)
             {
-                try
-                {
-                    //RemotingConfiguration.CustomErrorsMode = CustomErrorsModes.Off;
-                    string uri = string.Format("tcp://localhost:{0}/{1}",
-                                                port, AutomationService.TcpName);
-
-                    //Getting the object works, even if the service hasn't started yet
-                    m_automationService = (AutomationService)Activator.GetObject(typeof(AutomationService), uri);
-                    //... but calling a method will fail if the service isn't ready
-                    connected = m_automationService.Connect();
-                }
-                catch
-                {
-                    Console.WriteLine("Automation service exception on try#{0}", cnt);
-                }
+                connected = TryConnect(port);
                 if (!connected)
                 {
                     if (m_process.HasExited)
@@ -251,9 +501,57 @@ protected AutomationService Connect(int port)
             }
             Check(connected, "Verify can connect to the automation service");
 
+            RecordTimeToReady();
+
             return m_automationService;
         }
 
+        private bool TryConnect(int port)
+        {
+            try
+            {
+                //RemotingConfiguration.CustomErrorsMode = CustomErrorsModes.Off;
+                string uri = string.Format("tcp://localhost:{0}/{1}",
+                                            port, AutomationService.TcpName);
+
+                //Getting the object works, even if the service hasn't started yet
+                m_automationService = (AutomationService)Activator.GetObject(typeof(AutomationService), uri);
+                //... but calling a method will fail if the service isn't ready
+                return m_automationService.Connect();
+            }
+            catch
+            {
+                return false;
+            }
+        }
+
+        /// <summary>
+        /// Records how long the application took from launch until the automation service was
+        /// connected. The time is printed, and appended to StartupTimes.csv in the current
+        /// directory, so that regressions in startup time show up in the test logs.</summary>
+        private void RecordTimeToReady()
+        {
+            if (m_launchTimer == null)
+                return;
+
+            m_launchTimer.Stop();
+            m_timeToReady = m_launchTimer.Elapsed;
+            m_launchTimer = null;
+
+            string appName = Path.GetFileNameWithoutExtension(GetAppExePath());
+            Console.WriteLine("Time to ready for {0}: {1} ms", appName, (long)m_timeToReady.TotalMilliseconds);
+            try
+            {
+                File.AppendAllText(StartupTimesPath, string.Format(CultureInfo.InvariantCulture,
+                    "{0},{1:s},{2}{3}", appName, DateTime.Now, (long)m_timeToReady.TotalMilliseconds, Environment.NewLine));
+            }
+            catch (IOException e)
+            {
+                //Another test process may be writing to the file; the metric is not worth failing a test for
+                Console.WriteLine("Could not record startup time: {0}", e.Message);
+            }
+        }
+
         /// <summary>
         /// This is one time setup before executing the actual script file</summary>
         /// <param name="scriptPath">Path to the script to be executed</param>
@@ -265,26 +563,51 @@ protected virtual void SetupScript(string scriptPath)
         }
 
         /// <summary>
-        /// Executes script and verifies the result succeeded. The last
-        /// message from the script needs to be "Success" to succeed.</summary>
+        /// Executes script and verifies the result succeeded. Scripts that use the Test module
+        /// succeed if they call Test.Success() at the end and no assertion failed; other scripts
+        /// need to print "Success" as their last message.
+        /// The script's output is printed while the script runs.</summary>
         /// <param name="scriptPath">Script's path</param>
         protected void ProcessScript(string scriptPath)
         {
-            string fullResult = ExecuteScriptSafe(scriptPath);
-
             if (m_tagConsoleOutput)
                 Console.WriteLine("===== Script output ======");
-            Console.WriteLine(fullResult);
-            if (m_tagConsoleOutput)
-                Console.WriteLine("===== End script output ======");
+            StringBuilder output = new StringBuilder();
+            ScriptTestResult result;
+            try
+            {
+                result = ExecuteScriptForResultSafe(scriptPath, m_timeOutInSecs, text =>
+                {
+                    Console.Write(text);
+                    output.Append(text);
+                });
+            }
+            finally
+            {
+                Console.WriteLine();
+                if (m_tagConsoleOutput)
+                    Console.WriteLine("===== End script output ======");
+            }
+
+            if (result != null)
+            {
+                Console.WriteLine("Script result: {0}", result);
+                //Fail on the failures and their stack traces, so the bamboo summary page will show
+                //them without having to dig into the full log.
+                if (!result.Succeeded)
+                    Check(false, result.ToString());
+                return;
+            }
+
+            //The script did not use the Test module, so fall back to checking its output.
             //An empty string from a script is possible, but bad practice, so still fail on an empty string
+            string fullResult = output.ToString();
             Check(!string.IsNullOrEmpty(fullResult), "Verify script returned a result");
             
             //Successfully ran scripts will print "Success" at the end of execution.  Failed scripts
             //will print an exception with some type of error message.  Check the last message, and make sure
             //the expected message was printed.  If not, return an error code
-            string[] resultLines = fullResult.Split(new string[] { "\r\n" }, StringSplitOptions.RemoveEmptyEntries);
-            string lastMsg = resultLines[resultLines.Length - 1];
+            string lastMsg = GetLastLine(fullResult);
 
             if (lastMsg.ToLower().CompareTo("success") != 0)
             {
@@ -295,6 +618,24 @@ protected void ProcessScript(string scriptPath)
             }
         }
 
+        /// <summary>
+        /// Gets the last line of text that is not blank, without splitting the whole text into lines</summary>
+        /// <param name="text">Text, e.g., the output of a script</param>
+        /// <returns>Last non-blank line, trimmed, or the empty string if there is none</returns>
+        protected static string GetLastLine(string text)
+        {
+            int end = text.Length;
+            while (end > 0)
+            {
+                int start = text.LastIndexOf('\n', end - 1) + 1;
+                string line = text.Substring(start, end - start).Trim();
+                if (line.Length > 0)
+                    return line;
+                end = start - 1;
+            }
+            return string.Empty;
+        }
+
         /// <summary>
         /// Some tests require executing a python statement that expects no result</summary>
         /// <param name="statement">Python statement to execute</param>
@@ -329,25 +670,13 @@ protected string ExecuteStatementSafe(string statement)
         /// <returns>The message returned by python</returns>
         protected string ExecuteStatementSafe(string statement, int timeoutInSec)
         {
-            string result = null;
-            ThreadStart tStart = delegate()
-            {
-                try
-                {
-                    result = m_automationService.ExecuteStatement(statement);
-                }
-                    //If this call does timeout, then an exception may cause a crash when the connection is forced closed
-                catch (SocketException)
-                { }
-            };
-            Thread t = new Thread(tStart);
-            t.Start();
-
-            if (!t.Join(1000 * timeoutInSec))
+            RemoteCall<string> call = new RemoteCall<string>(() => m_automationService.ExecuteStatement(statement));
+            if (!call.Wait(1000 * timeoutInSec))
             {
                 throw new TimeoutException(string.Format("Executing statement timedout: {0}", statement));
             }
 
+            string result = call.Result;
             if (!string.IsNullOrEmpty(result))
             {
                 result = result.Trim();
@@ -356,6 +685,27 @@ protected string ExecuteStatementSafe(string statement, int timeoutInSec)
             return result;
         }
 
+        /// <summary>
+        /// Executes a sequence of python statements on the application with one call, which is
+        /// faster than calling ExecuteStatementSafe for each statement. If the statements take
+        /// longer than the timeout altogether, the test is failed.</summary>
+        /// <param name="statements">Python statements to execute</param>
+        /// <param name="stopOnFirstError">Whether to skip the remaining statements after one fails</param>
+        /// <param name="timeoutInSecs">Timeout in seconds for all the statements</param>
+        /// <returns>Output, success and execution time of each statement that was executed</returns>
+        protected ScriptStatementResult[] ExecuteBatchSafe(string[] statements, bool stopOnFirstError, int timeoutInSecs)
+        {
+            RemoteCall<ScriptStatementResult[]> call = new RemoteCall<ScriptStatementResult[]>(
+                () => m_automationService.ExecuteBatch(statements, stopOnFirstError));
+            if (!call.Wait(1000 * timeoutInSecs))
+            {
+                throw new TimeoutException(string.Format("Executing statements timed out: {0}",
+                    string.Join("; ", statements)));
+            }
+
+            return call.Result ?? new ScriptStatementResult[0];
+        }
+
         /// <summary>
         /// Executes a python script on the application in a separate thread 
         /// with a default timeout (30 seconds).  If the statement exceeds the timeout,
@@ -377,27 +727,71 @@ protected string ExecuteScriptSafe(string scriptPath)
         /// <returns>The message returned by python</returns>
         protected string ExecuteScriptSafe(string scriptPath, int timeoutInSecs)
         {
-            string result = null;
-            ThreadStart tStart = delegate()
+            return ExecuteScriptSafe(scriptPath, timeoutInSecs, null);
+        }
+        /// <summary>
+        /// Executes a python script on the application in a separate thread 
+        /// with the specified timeout, and passes the script's output to the given
+        /// callback as it is written.  If the statement exceeds the timeout,
+        /// the test is failed, but the output written up to then has been passed on,
+        /// which helps to find out where the script got stuck.</summary>
+        /// <param name="scriptPath">Path to the python script</param>
+        /// <param name="timeoutInSecs">Timeout in seconds</param>
+        /// <param name="outputWritten">Callback that gets each piece of new output, or null</param>
+        /// <returns>The message returned by python</returns>
+        protected string ExecuteScriptSafe(string scriptPath, int timeoutInSecs, Action<string> outputWritten)
+        {
+            return ExecuteScriptSafe(() => m_automationService.ExecuteScript(scriptPath),
+                scriptPath, timeoutInSecs, outputWritten);
+        }
+        /// <summary>
+        /// Executes a python script on the application in a separate thread 
+        /// with the specified timeout, and gets the results that the script recorded
+        /// with the Test module.  The script's output is passed to the given callback
+        /// as it is written.  If the statement exceeds the timeout, the test is failed.</summary>
+        /// <param name="scriptPath">Path to the python script</param>
+        /// <param name="timeoutInSecs">Timeout in seconds</param>
+        /// <param name="outputWritten">Callback that gets each piece of new output, or null</param>
+        /// <returns>The script's results, or null if the script did not use the Test module</returns>
+        protected ScriptTestResult ExecuteScriptForResultSafe(string scriptPath, int timeoutInSecs, Action<string> outputWritten)
+        {
+            return ExecuteScriptSafe(() => m_automationService.ExecuteScriptForResult(scriptPath),
+                scriptPath, timeoutInSecs, outputWritten);
+        }
+
+        private T ExecuteScriptSafe<T>(Func<T> execute, string scriptPath, int timeoutInSecs, Action<string> outputWritten)
+        {
+            long outputPosition = 0;
+            if (outputWritten != null)
+                outputPosition = m_automationService.OutputPosition;
+
+            RemoteCall<T> call = new RemoteCall<T>(execute);
+
+            bool finished;
+            if (outputWritten == null)
             {
-                try
+                finished = call.Wait(1000 * timeoutInSecs);
+            }
+            else
+            {
+                Stopwatch stopwatch = Stopwatch.StartNew();
+                do
                 {
-                    result = m_automationService.ExecuteScript(scriptPath);
+                    finished = call.Wait(OutputPollIntervalInMs);
+                    string output = m_automationService.ReadOutput(outputPosition, out outputPosition);
+                    if (output.Length > 0)
+                        outputWritten(output);
                 }
-                    //If this call does timeout, then an exception may cause a crash when the connection is forced closed
-                catch (SocketException)
-                { }
-            };
-            Thread t = new Thread(tStart);
-            t.Start();
+                while (!finished && stopwatch.ElapsedMilliseconds < 1000 * timeoutInSecs);
+            }
 
-            if (!t.Join(1000 * timeoutInSecs))
+            if (!finished)
             {
                 Console.WriteLine("Script timed out: {0}", scriptPath);
                 throw new TimeoutException(string.Format("Executing script timed out: {0}", scriptPath));
             }
 
-            return result;
+            return call.Result;
         }
 
         /// <summary>
@@ -405,6 +799,10 @@ protected string ExecuteScriptSafe(string scriptPath, int timeoutInSecs)
         /// 1) Discard all documents (close without saving)
         /// 2) Check the application for any error dialogs
         /// 3) Execute the FileExit command, which closes the application</summary>
+        /// <remarks>Unlike SetupScript, these steps can't be one ExecuteBatchSafe call. The error
+        /// check isn't a script statement, and must run after the documents are discarded and
+        /// before the application exits. FileExit must be the last call, because the application
+        /// closes the connection while executing it.</remarks>
         protected virtual void CloseApplication()
         {
             //Before closing app, close all documents, discarding any unsaved changes
@@ -461,6 +859,65 @@ protected string ConstructScriptPath()
             return path;
         }
 
+        /// <summary>
+        /// A call to the automation service that is made on a thread pool thread, so that the test
+        /// can stop waiting for it after a timeout, without creating a thread for every call</summary>
+        /// <typeparam name="T">Type of the result of the call</typeparam>
+        private class RemoteCall<T>
+        {
+            public RemoteCall(Func<T> call)
+            {
+                m_call = call;
+                ThreadPool.QueueUserWorkItem(Run);
+            }
+
+            /// <summary>
+            /// Waits for the call to finish</summary>
+            /// <param name="millisecondsTimeout">Maximum time to wait</param>
+            /// <returns>True iff the call finished in time</returns>
+            public bool Wait(int millisecondsTimeout)
+            {
+                return m_done.WaitOne(millisecondsTimeout);
+            }
+
+            /// <summary>
+            /// Gets the result of the finished call, which is the default value if the connection
+            /// was closed. Rethrows any other exception thrown by the call.</summary>
+            public T Result
+            {
+                get
+                {
+                    if (m_error != null)
+                        throw m_error;
+                    return m_result;
+                }
+            }
+
+            private void Run(object state)
+            {
+                try
+                {
+                    m_result = m_call();
+                }
+                //If this call does timeout, then an exception may cause a crash when the connection is forced closed
+                catch (SocketException)
+                { }
+                catch (Exception e)
+                {
+                    m_error = e;
+                }
+                finally
+                {
+                    m_done.Set();
+                }
+            }
+
+            private readonly Func<T> m_call;
+            private readonly ManualResetEvent m_done = new ManualResetEvent(false);
+            private T m_result;
+            private Exception m_error;
+        }
+
         /// <summary>
         /// Functional tests exception class</summary>
         public class FunctionalTestException : Exception
@@ -485,16 +942,98 @@ private void Check(bool condition, string message)
         /// <param name="e">Data received event arguments</param>
         protected void Process_OutputDataReceived(object sender, DataReceivedEventArgs e)
         {
+            if (e.Data == AutomationService.ReadySignal && m_readySignal != null)
+                m_readySignal.Set();
             m_scriptOutput.AppendLine(e.Data);
         }
 
+        /// <summary>
+        /// An application under test that is kept alive between scripts</summary>
+        private class PooledApplication
+        {
+            public PooledApplication(string exePath, Process process, AutomationService automationService, int port)
+            {
+                ExePath = exePath;
+                Process = process;
+                AutomationService = automationService;
+                Port = port;
+            }
+
+            public readonly string ExePath;
+            public readonly Process Process;
+            public readonly AutomationService AutomationService;
+            public readonly int Port;
+            public int ScriptCount;
+            public bool Available;
+            public FunctionalTestBase Owner;
+
+            /// <summary>
+            /// Forwards the application's output to the test currently using it</summary>
+            public void Process_OutputDataReceived(object sender, DataReceivedEventArgs e)
+            {
+                FunctionalTestBase owner = Owner;
+                if (owner != null)
+                    owner.Process_OutputDataReceived(sender, e);
+            }
+
+            /// <summary>
+            /// Closes the application, killing it if it does not exit in time</summary>
+            public void Shutdown()
+            {
+                try
+                {
+                    if (!Process.HasExited)
+                    {
+                        AutomationService.ExecuteStatement("atfFile.DiscardAll()");
+                        AutomationService.ExecuteStatement("atfFileExit.DoCommand(StandardCommand.FileExit)");
+                        if (!Process.WaitForExit(10000))
+                            Process.Kill();
+                    }
+                }
+                catch
+                {
+                    try
+                    {
+                        if (!Process.HasExited)
+                            Process.Kill();
+                    }
+                    catch { }
+                }
+
+                try
+                {
+                    AutomationService.Dispose();
+                }
+                catch { }
+
+                if (Port != 0)
+                    AutomationService.ReleasePortNumber(Port);
+            }
+        }
+
         private const int DefaultTimeOutInSeconds = 30;
+        private const int ResetTimeOutInSeconds = 20;
+        private const int ReadySignalTimeOutInSeconds = 20;
+        private const string StartupTimesPath = "StartupTimes.csv";
+        private const int OutputPollIntervalInMs = 200;
 
         private int m_timeOutInSecs = DefaultTimeOutInSeconds;
         private Process m_process;
         private AutomationService m_automationService;
         private StringBuilder m_scriptOutput = new StringBuilder();
         private int m_fixedRemoteTestingPort = 0;
+        private int m_portRangeIndex;
+        private int m_port;
+        private bool m_useApplicationPool;
+        private bool m_waitForReadySignal = true;
+        private ManualResetEvent m_readySignal;
+        private Stopwatch m_launchTimer;
+        private TimeSpan m_timeToReady;
+        private PooledApplication m_pooledApplication;
+
+        private static readonly Dictionary<string, PooledApplication> s_applicationPool =
+            new Dictionary<string, PooledApplication>(StringComparer.OrdinalIgnoreCase);
+        private static int s_maxScriptsPerPooledApplication = 50;
         private bool m_tagConsoleOutput = true;
     }
 }
@@ -0,0 +1,42 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+
+namespace Sce.Atf.Applications
+{
+    /// <summary>
+    /// Result of one statement executed by AutomationService.ExecuteBatch()</summary>
+    [Serializable]
+    public class ScriptStatementResult
+    {
+        /// <summary>
+        /// Constructor</summary>
+        /// <param name="statement">Statement that was executed</param>
+        /// <param name="output">Output of the statement, or the error message if it failed</param>
+        /// <param name="succeeded">Whether the statement ran without raising an error</param>
+        /// <param name="duration">Time taken to execute the statement</param>
+        public ScriptStatementResult(string statement, string output, bool succeeded, TimeSpan duration)
+        {
+            Statement = statement;
+            Output = output;
+            Succeeded = succeeded;
+            Duration = duration;
+        }
+
+        /// <summary>
+        /// Statement that was executed</summary>
+        public readonly string Statement;
+
+        /// <summary>
+        /// Output of the statement, or the error message if it failed</summary>
+        public readonly string Output;
+
+        /// <summary>
+        /// Whether the statement ran without raising an error</summary>
+        public readonly bool Succeeded;
+
+        /// <summary>
+        /// Time taken to execute the statement</summary>
+        public readonly TimeSpan Duration;
+    }
+}
@@ -0,0 +1,207 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.Globalization;
+using System.Text;
+
+namespace Sce.Atf.Applications
+{
+    /// <summary>
+    /// Results that a test script recorded with the Test script module, returned by
+    /// AutomationService.ExecuteScriptForResult(). Test clients can check Succeeded instead of
+    /// parsing the script output.</summary>
+    [Serializable]
+    public class ScriptTestResult
+    {
+        /// <summary>
+        /// Constructor</summary>
+        /// <param name="passed">Number of assertions that passed</param>
+        /// <param name="failures">Failed assertions and errors</param>
+        /// <param name="phases">Timed phases of the script, in the order they finished</param>
+        /// <param name="completed">Whether the script ran to the end and reported success</param>
+        /// <param name="duration">Time taken to execute the script</param>
+        public ScriptTestResult(int passed, Failure[] failures, Phase[] phases, bool completed, TimeSpan duration)
+        {
+            Passed = passed;
+            Failures = failures;
+            Phases = phases;
+            Completed = completed;
+            Duration = duration;
+        }
+
+        /// <summary>
+        /// Creates a result from the payload that the Test script module serializes</summary>
+        /// <param name="payload">Serialized results, from TestResults.Serialize() in Test.py</param>
+        /// <param name="error">Error that stopped the script, including the stack trace, or null</param>
+        /// <param name="duration">Time taken to execute the script</param>
+        /// <returns>Result of the script. If there was an error, it is attached to the last failed
+        /// assertion, which raised it, or is added as a failure of its own.</returns>
+        public static ScriptTestResult Parse(string payload, string error, TimeSpan duration)
+        {
+            string[] lines = payload.Split('\n');
+            string[] header = lines[0].Split(' ');
+            if (header.Length != 3)
+                throw new FormatException("Invalid script test result: " + lines[0]);
+
+            int passed = int.Parse(header[0], CultureInfo.InvariantCulture);
+            bool completed = header[2] == "1";
+            List<Failure> failures = new List<Failure>();
+            List<Phase> phases = new List<Phase>();
+            for (int i = 1; i < lines.Length; i++)
+            {
+                string line = lines[i];
+                if (line.StartsWith("P"))
+                {
+                    int tab = line.IndexOf('\t');
+                    double seconds = double.Parse(line.Substring(1, tab - 1), CultureInfo.InvariantCulture);
+                    phases.Add(new Phase(Unescape(line.Substring(tab + 1)), TimeSpan.FromSeconds(seconds)));
+                }
+                else if (line.StartsWith("F"))
+                {
+                    failures.Add(new Failure(Unescape(line.Substring(1)), null));
+                }
+            }
+
+            if (error != null)
+            {
+                if (failures.Count > 0 && error.Contains(failures[failures.Count - 1].Message))
+                    failures[failures.Count - 1] = new Failure(failures[failures.Count - 1].Message, error);
+                else
+                    failures.Add(new Failure(GetLastLine(error), error));
+            }
+
+            return new ScriptTestResult(passed, failures.ToArray(), phases.ToArray(), completed, duration);
+        }
+
+        /// <summary>
+        /// Gets whether the script ran to the end, reported success and had no failures</summary>
+        public bool Succeeded
+        {
+            get { return Completed && Failures.Length == 0; }
+        }
+
+        /// <summary>
+        /// Gets a description of the result, listing the failures with their stack traces</summary>
+        /// <returns>Description of the result</returns>
+        public override string ToString()
+        {
+            StringBuilder sb = new StringBuilder();
+            sb.AppendFormat("{0} assertions passed, {1} failed in {2:0.000} s", Passed, Failures.Length,
+                Duration.TotalSeconds);
+            if (!Completed && Failures.Length == 0)
+                sb.Append("; the script did not report success");
+
+            foreach (Phase phase in Phases)
+            {
+                sb.AppendLine();
+                sb.AppendFormat("  {0}: {1:0.000} s", phase.Name, phase.Duration.TotalSeconds);
+            }
+            foreach (Failure failure in Failures)
+            {
+                sb.AppendLine();
+                sb.Append(failure.Traceback ?? failure.Message);
+            }
+            return sb.ToString();
+        }
+
+        /// <summary>
+        /// Number of assertions that passed</summary>
+        public readonly int Passed;
+
+        /// <summary>
+        /// Failed assertions and errors</summary>
+        public readonly Failure[] Failures;
+
+        /// <summary>
+        /// Timed phases of the script, in the order they finished</summary>
+        public readonly Phase[] Phases;
+
+        /// <summary>
+        /// Whether the script ran to the end and reported success</summary>
+        public readonly bool Completed;
+
+        /// <summary>
+        /// Time taken to execute the script</summary>
+        public readonly TimeSpan Duration;
+
+        /// <summary>
+        /// A failed assertion, or an error that stopped the script</summary>
+        [Serializable]
+        public class Failure
+        {
+            /// <summary>
+            /// Constructor</summary>
+            /// <param name="message">Failure message</param>
+            /// <param name="traceback">Formatted error, including the script's stack trace, or null</param>
+            public Failure(string message, string traceback)
+            {
+                Message = message;
+                Traceback = traceback;
+            }
+
+            /// <summary>
+            /// Failure message</summary>
+            public readonly string Message;
+
+            /// <summary>
+            /// Formatted error, including the script's stack trace, or null if the failure
+            /// did not stop the script</summary>
+            public readonly string Traceback;
+        }
+
+        /// <summary>
+        /// A timed phase of a script</summary>
+        [Serializable]
+        public class Phase
+        {
+            /// <summary>
+            /// Constructor</summary>
+            /// <param name="name">Phase name</param>
+            /// <param name="duration">Time taken by the phase</param>
+            public Phase(string name, TimeSpan duration)
+            {
+                Name = name;
+                Duration = duration;
+            }
+
+            /// <summary>
+            /// Phase name</summary>
+            public readonly string Name;
+
+            /// <summary>
+            /// Time taken by the phase</summary>
+            public readonly TimeSpan Duration;
+        }
+
+        private static string Unescape(string text)
+        {
+            if (text.IndexOf('\\') < 0)
+                return text;
+
+            StringBuilder sb = new StringBuilder(text.Length);
+            for (int i = 0; i < text.Length; i++)
+            {
+                char c = text[i];
+                if (c == '\\' && i + 1 < text.Length)
+                {
+                    c = text[++i];
+                    if (c == 't')
+                        c = '\t';
+                    else if (c == 'r')
+                        c = '\r';
+                    else if (c == 'n')
+                        c = '\n';
+                }
+                sb.Append(c);
+            }
+            return sb.ToString();
+        }
+
+        private static string GetLastLine(string text)
+        {
+            string[] lines = text.Trim().Split('\n');
+            return lines[lines.Length - 1].Trim();
+        }
+    }
+}
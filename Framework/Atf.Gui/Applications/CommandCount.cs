@@ -39,6 +39,14 @@ public bool CanDecrement
             get { return m_current > 0; }
         }
 
+        /// <summary>
+        /// Gets whether the "clean" point can be reached by undoing or redoing. It can't once the
+        /// commands leading to it are removed from the history, until Dirty is set to false.</summary>
+        public bool CanRevert
+        {
+            get { return m_clean != NoCleanPoint; }
+        }
+
         /// <summary>
         /// Gets or sets a value indicating whether the command count is at its "clean" point</summary>
         /// <remarks>Setting this property to false sets the "clean" point. Setting
@@ -94,12 +102,41 @@ public void Decrement()
             CheckDirtyChanged(oldState);
         }
 
+        /// <summary>
+        /// Adjusts the count after the oldest commands are removed from the history. If the
+        /// "clean" point is among them, it can no longer be reached, and the count stays dirty
+        /// until Dirty is set to false.</summary>
+        /// <param name="count">Number of commands removed; must not be greater than Current</param>
+        public void RemoveOldest(int count)
+        {
+            if (count < 0 || count > m_current)
+                throw new ArgumentOutOfRangeException("count");
+
+            bool oldState = Dirty;
+            m_current -= count;
+            if (m_clean != NoCleanPoint && m_clean >= count)
+            {
+                m_clean -= count;
+            }
+            else
+            {
+                m_clean = NoCleanPoint;
+                m_forceDirty = true;
+            }
+            CheckDirtyChanged(oldState);
+        }
+
         /// <summary>
         /// Reverts the command count by undoing or redoing to the "clean" point</summary>
         /// <param name="history">Command history to undo or redo</param>
         /// <remarks>Use this method to revert in a multi-document, single command history scenario</remarks>
+        /// <exception cref="InvalidOperationException">The "clean" point can't be reached; see CanRevert</exception>
         public void Revert(CommandHistory history)
         {
+            // don't leave the document partially reverted
+            if (!CanRevert)
+                throw new InvalidOperationException("Can't revert; the clean point was removed from the history");
+
             // need to undo?
             while (m_clean < m_current)
             {
@@ -128,5 +165,7 @@ private void CheckDirtyChanged(bool oldState)
         private int m_current;
         private int m_clean;
         private bool m_forceDirty;
+
+        private const int NoCleanPoint = -1;
     }
 }
@@ -2,6 +2,7 @@
 
 using System;
 using System.Collections.Generic;
+using System.IO;
 
 namespace Sce.Atf.Applications
 {
@@ -13,7 +14,7 @@ public class CommandHistory
         /// Constructor</summary>
         public CommandHistory()
         {
-            m_commands = new List<Command>();
+            m_commands = new List<Entry>();
             m_commandCount = new CommandCount();
             m_commandCount.DirtyChanged += commandCount_DirtyChanged;
         }
@@ -35,9 +36,10 @@ public int Count
 
         /// <summary>
         /// Gets command at the given index</summary>        
+        /// <remarks>The command may be spilled; see IsSpilled().</remarks>
         public Command this[int index]
         {
-            get { return m_commands[index];}
+            get { return m_commands[index].Command;}
         }
 
         /// <summary>
@@ -46,6 +48,91 @@ public void Clear()
         {
             m_commandCount.Reset();
             m_commands.Clear();
+            m_memorySize = 0;
+            CloseSpillStream();
+        }
+
+        /// <summary>
+        /// Gets or sets the maximum estimated memory, in bytes, used by the commands in the
+        /// history. When commands are added, the oldest done commands are spilled to disk, if
+        /// SpillDirectory is set and the commands support spilling, and are otherwise removed
+        /// until the history is within the budget. The last done command is always kept. Undo and
+        /// Redo don't spill or remove other commands, so restoring spilled commands may exceed
+        /// the budget until the next command is added. The default is long.MaxValue, i.e., no limit.</summary>
+        public long MemoryBudget
+        {
+            get { return m_memoryBudget; }
+            set
+            {
+                if (value < 0)
+                    throw new ArgumentOutOfRangeException("value");
+
+                m_memoryBudget = value;
+                EnforceMemoryBudget();
+            }
+        }
+
+        /// <summary>
+        /// Gets or sets the directory for the temporary file that spilled commands are written
+        /// to, or null to remove commands instead of spilling them. The file is deleted when the
+        /// history is cleared and when the application exits. The default is null.</summary>
+        public string SpillDirectory
+        {
+            get { return m_spillDirectory; }
+            set { m_spillDirectory = value; }
+        }
+
+        /// <summary>
+        /// Gets the estimated memory used by all the commands in the history, in bytes</summary>
+        public long MemorySize
+        {
+            get { return m_memorySize; }
+        }
+
+        /// <summary>
+        /// Gets the estimated memory used by the command at the given index, in bytes, as of
+        /// when it was last added, spilled, restored, done or undone</summary>
+        /// <param name="index">Command index</param>
+        /// <returns>Estimated memory used by the command</returns>
+        public long GetMemorySize(int index)
+        {
+            return m_commands[index].MemorySize;
+        }
+
+        /// <summary>
+        /// Updates the estimated memory used by a command in the history after it has changed,
+        /// e.g., by having later changes merged into it, and spills or removes the oldest done
+        /// commands if the history is now over its budget</summary>
+        /// <param name="command">Command, which must not be spilled</param>
+        public void UpdateMemorySize(Command command)
+        {
+            if (command == null)
+                throw new ArgumentNullException("command");
+
+            // changed commands are usually the most recent ones
+            for (int i = m_commands.Count - 1; i >= 0; i--)
+            {
+                Entry entry = m_commands[i];
+                if (entry.Command == command)
+                {
+                    if (entry.SpillPosition >= 0)
+                        throw new InvalidOperationException("Command is spilled");
+
+                    UpdateMemorySize(entry);
+                    EnforceMemoryBudget();
+                    return;
+                }
+            }
+        }
+
+        /// <summary>
+        /// Gets whether the command at the given index has been spilled to disk. Spilled
+        /// commands are restored automatically before they are undone or redone.</summary>
+        /// <param name="index">Command index</param>
+        /// <returns>True iff the command has been spilled</returns>
+        public bool IsSpilled(int index)
+        {
+            return m_commands[index].SpillPosition >= 0;
         }
 
         /// <summary>
@@ -84,6 +171,12 @@ public bool Dirty
         /// Event that is raised when the Dirty state changes</summary>
         public event EventHandler DirtyChanged;
 
+        /// <summary>
+        /// Event that is raised after commands are spilled or removed to keep the history within
+        /// its memory budget. Listeners that hold on to parts of commands, in order to change them
+        /// later, should release them.</summary>
+        public event EventHandler CommandsEvicted;
+
         /// <summary>
         /// Gets the description of the next undoable command</summary>
         public string UndoDescription
@@ -93,7 +186,7 @@ public string UndoDescription
                 string name = "";
                 if (CanUndo)
                 {
-                    Command command = m_commands[m_commandCount.Current - 1];
+                    Command command = m_commands[m_commandCount.Current - 1].Command;
                     name = command.Description;
                 }
                 return name;
@@ -109,7 +202,7 @@ public string RedoDescription
                 string name = "";
                 if (CanRedo)
                 {
-                    Command command = m_commands[m_commandCount.Current];
+                    Command command = m_commands[m_commandCount.Current].Command;
                     name = command.Description;
                 }
                 return name;
@@ -124,7 +217,7 @@ public Command LastDone
             get
             {
                 int i = m_commandCount.Current - 1;
-                return i >= 0 ? m_commands[i] : null;
+                return i >= 0 ? m_commands[i].Command : null;
             }
         }
 
@@ -140,10 +233,13 @@ public void Add(Command command)
             // remove any un-done commands
             ClearUndoneCommands();
 
-            Command last = LastDone;
-            m_commands.Add(command);
+            Entry entry = new Entry(command);
+            m_commands.Add(entry);
+            m_memorySize += entry.MemorySize;
             m_commandCount.Increment();
 
+            EnforceMemoryBudget();
+
             OnCommandDone();
         }
 
@@ -155,11 +251,17 @@ public Command Undo()
             if (!CanUndo)
                 throw new InvalidOperationException("Can't undo");
 
-            Command command = m_commands[m_commandCount.Current - 1];
+            Entry entry = m_commands[m_commandCount.Current - 1];
+            Command command = entry.Command;
+            RestoreCommand(entry);
             m_commandCount.Decrement();
 
             command.Undo();
 
+            // the budget is only enforced when commands are added, so that undoing a command
+            //  doesn't evict others
+            UpdateMemorySize(entry);
+
             OnCommandUndone();
 
             return command;
@@ -173,21 +275,38 @@ public Command Redo()
             if (!CanRedo)
                 throw new InvalidOperationException("Can't redo");
 
-            Command command = m_commands[m_commandCount.Current];
+            Entry entry = m_commands[m_commandCount.Current];
+            Command command = entry.Command;
+            RestoreCommand(entry);
             m_commandCount.Increment();
 
             command.Do();
 
+            UpdateMemorySize(entry);
+
             OnCommandDone();
 
             return command;
         }
 
+        /// <summary>
+        /// Gets whether the history can be reverted to its "clean" point. It can't once the
+        /// commands leading to it are removed to keep the history within its memory budget.</summary>
+        public bool CanRevert
+        {
+            get { return m_commandCount.CanRevert; }
+        }
+
         /// <summary>
         /// Undoes commands until the history is not dirty, or there are no more
         /// commands</summary>
+        /// <exception cref="InvalidOperationException">The "clean" point can't be reached; see CanRevert</exception>
         public void Revert()
         {
+            // don't leave the document partially reverted
+            if (!CanRevert)
+                throw new InvalidOperationException("Can't revert; the clean point was removed from the history");
+
             while (Dirty && CanUndo)
                 Undo();
         }
@@ -200,7 +319,11 @@ public Command[] Collapse()
             // remove any un-done commands
             ClearUndoneCommands();
             Command[] result = new Command[m_commands.Count];
-            m_commands.CopyTo(result);
+            for (int i = 0; i < result.Length; i++)
+            {
+                RestoreCommand(m_commands[i]);
+                result[i] = m_commands[i].Command;
+            }
             Clear();
             return result;
         }
@@ -210,7 +333,97 @@ private void ClearUndoneCommands()
             int i = m_commandCount.Current - 1;
             int numUndone = m_commands.Count - (i + 1);
             if (numUndone > 0)
+            {
+                for (int j = i + 1; j < m_commands.Count; j++)
+                    m_memorySize -= m_commands[j].MemorySize;
                 m_commands.RemoveRange(i + 1, numUndone);
+            }
+        }
+
+        private void EnforceMemoryBudget()
+        {
+            // the last done command is kept in memory, so that merging with it is possible
+            int last = m_commandCount.Current - 1;
+
+            bool evicted = false;
+
+            // spill the oldest done commands first
+            if (m_spillDirectory != null)
+            {
+                for (int i = 0; i < last && m_memorySize > m_memoryBudget; i++)
+                {
+                    Entry entry = m_commands[i];
+                    if (entry.SpillPosition < 0)
+                        evicted |= SpillCommand(entry);
+                }
+            }
+
+            // then remove them
+            int removeCount = 0;
+            while (removeCount < last && m_memorySize > m_memoryBudget)
+            {
+                m_memorySize -= m_commands[removeCount].MemorySize;
+                removeCount++;
+            }
+            if (removeCount > 0)
+            {
+                m_commands.RemoveRange(0, removeCount);
+                m_commandCount.RemoveOldest(removeCount);
+                evicted = true;
+            }
+
+            if (evicted)
+                OnCommandsEvicted();
+        }
+
+        private bool SpillCommand(Entry entry)
+        {
+            if (m_spillStream == null)
+            {
+                string path = Path.Combine(m_spillDirectory, Path.GetRandomFileName());
+                m_spillStream = new FileStream(
+                    path, FileMode.CreateNew, FileAccess.ReadWrite, FileShare.None, 4096, FileOptions.DeleteOnClose);
+            }
+
+            long position = m_spillStream.Length;
+            m_spillStream.Position = position;
+            if (entry.Command.Spill(m_spillStream))
+            {
+                entry.SpillPosition = position;
+                UpdateMemorySize(entry);
+                return true;
+            }
+
+            m_spillStream.SetLength(position);
+            return false;
+        }
+
+        private void RestoreCommand(Entry entry)
+        {
+            if (entry.SpillPosition >= 0)
+            {
+                // the space in the file isn't reused until the history is cleared
+                m_spillStream.Position = entry.SpillPosition;
+                entry.Command.Restore(m_spillStream);
+                entry.SpillPosition = -1;
+                UpdateMemorySize(entry);
+            }
+        }
+
+        private void UpdateMemorySize(Entry entry)
+        {
+            long size = entry.Command.MemorySize;
+            m_memorySize += size - entry.MemorySize;
+            entry.MemorySize = size;
+        }
+
+        private void CloseSpillStream()
+        {
+            if (m_spillStream != null)
+            {
+                m_spillStream.Dispose();
+                m_spillStream = null;
+            }
         }
 
         private void commandCount_DirtyChanged(object sender, EventArgs e)
@@ -228,14 +441,39 @@ private void OnCommandUndone()
             CommandUndone.Raise(this, EventArgs.Empty);
         }
 
+        private void OnCommandsEvicted()
+        {
+            CommandsEvicted.Raise(this, EventArgs.Empty);
+        }
+
         IEnumerable<Command> Commands
         {
             get
             {
-                return m_commands;
+                foreach (Entry entry in m_commands)
+                    yield return entry.Command;
+            }
+        }
+
+        private class Entry
+        {
+            public Entry(Command command)
+            {
+                Command = command;
+                MemorySize = command.MemorySize;
+                SpillPosition = -1;
             }
+
+            public readonly Command Command;
+            public long MemorySize;
+            public long SpillPosition;
         }
-        private readonly List<Command> m_commands;
+
+        private readonly List<Entry> m_commands;
         private readonly CommandCount m_commandCount;                
+        private long m_memorySize;
+        private long m_memoryBudget = long.MaxValue;
+        private string m_spillDirectory;
+        private FileStream m_spillStream;
     }
 }
@@ -1,5 +1,8 @@
 //Copyright  2014 Sony Computer Entertainment America LLC. See License.txt.
 
+using System;
+using System.IO;
+
 namespace Sce.Atf.Applications
 {
     /// <summary>
@@ -37,6 +40,32 @@ public string Description
         /// Undo the command</summary>
         public abstract void Undo();
 
+        /// <summary>
+        /// Gets an estimate of the memory used by the command, in bytes. CommandHistory uses
+        /// this to limit its memory use. By default, only the description is counted.</summary>
+        public virtual long MemorySize
+        {
+            get { return 4 * IntPtr.Size + (m_description != null ? 2L * m_description.Length : 0); }
+        }
+
+        /// <summary>
+        /// Writes the command's bulky data to a stream and releases it from memory, to reduce
+        /// the memory used by a CommandHistory. Restore() is called before the command is done
+        /// or undone again. By default, the command isn't spilled.</summary>
+        /// <param name="stream">Stream to write to</param>
+        /// <returns>True iff the command released any data</returns>
+        public virtual bool Spill(Stream stream)
+        {
+            return false;
+        }
+
+        /// <summary>
+        /// Reads the data that was written by Spill() back into memory</summary>
+        /// <param name="stream">Stream, positioned where Spill() started writing</param>
+        public virtual void Restore(Stream stream)
+        {
+        }
+
         private string m_description;
     }
 }
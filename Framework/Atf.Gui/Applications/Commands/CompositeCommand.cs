@@ -63,6 +63,19 @@ public override void Undo()
                 m_commands[i].Undo();
         }
 
+        /// <summary>
+        /// Gets an estimate of the memory used by the command and its sub-commands, in bytes</summary>
+        public override long MemorySize
+        {
+            get
+            {
+                long size = base.MemorySize;
+                foreach (Command command in m_commands)
+                    size += command.MemorySize;
+                return size;
+            }
+        }
+
         /// <summary>
         /// Adds a new command to the end of this composite command</summary>
         /// <param name="command">Command to add to the end</param>
@@ -0,0 +1,23 @@
+//Copyright  2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+
+namespace Sce.Atf.Applications
+{
+    /// <summary>
+    /// Arguments for the ScriptingService.OutputWritten event</summary>
+    public class ScriptOutputEventArgs : EventArgs
+    {
+        /// <summary>
+        /// Constructor</summary>
+        /// <param name="text">Text written by the script</param>
+        public ScriptOutputEventArgs(string text)
+        {
+            Text = text;
+        }
+
+        /// <summary>
+        /// Text written by the script since the last event</summary>
+        public readonly string Text;
+    }
+}
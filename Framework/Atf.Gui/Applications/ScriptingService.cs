@@ -1,6 +1,7 @@
 ﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
 
 using System;
+using System.Collections.Generic;
 using System.IO;
 using System.Text;
 using System.Reflection;
@@ -21,6 +22,12 @@ public string DisplayName
         {
             get { return m_engine.Setup.DisplayName; }
         }
+        /// <summary>
+        /// Event that is raised each time a script writes output, e.g., by printing, so that the
+        /// output of a long-running script can be followed while the script runs. Errors that stop
+        /// a script are written as output, too. Raised on the thread that runs the script.</summary>
+        public event EventHandler<ScriptOutputEventArgs> OutputWritten;
+
         /// <summary>
         /// Loads assembly into script domain</summary>
         /// <param name="assembly">Assembly</param>
@@ -68,13 +75,58 @@ public void RemoveVariable(string name)
             m_scope.RemoveVariable(name);
         }
 
+        /// <summary>
+        /// Records the variables currently defined in the script domain, so that
+        /// RestoreScopeSnapshot() can later return the script domain to this state</summary>
+        public virtual void SaveScopeSnapshot()
+        {
+            m_scopeSnapshot = new Dictionary<string, object>();
+            foreach (KeyValuePair<string, dynamic> item in m_scope.GetItems())
+                m_scopeSnapshot[item.Key] = item.Value;
+        }
+
+        /// <summary>
+        /// Returns the script domain to the state recorded by SaveScopeSnapshot(), removing
+        /// variables defined since then and restoring the values of the recorded variables.
+        /// Does nothing if no snapshot was saved.</summary>
+        /// <returns>True iff a snapshot was restored</returns>
+        public virtual bool RestoreScopeSnapshot()
+        {
+            if (m_scopeSnapshot == null)
+                return false;
+
+            foreach (string name in new List<string>(m_scope.GetVariableNames()))
+            {
+                if (!m_scopeSnapshot.ContainsKey(name))
+                    m_scope.RemoveVariable(name);
+            }
+
+            foreach (KeyValuePair<string, object> item in m_scopeSnapshot)
+                m_scope.SetVariable(item.Key, item.Value);
+
+            m_stream.Reset();
+            return true;
+        }
+
         /// <summary>
         /// Executes a single script statement. The statement does not need a carriage return.</summary>
         /// <param name="statement">Script statement</param>
         /// <returns>String that statement returns</returns>
         public string ExecuteStatement(string statement)
         {
-            return ExecuteStatement(statement, false);
+            bool succeeded;
+            return ExecuteStatement(statement, false, out succeeded);
+        }
+
+        /// <summary>
+        /// Executes a single script statement, and reports whether it succeeded. The statement
+        /// does not need a carriage return.</summary>
+        /// <param name="statement">Script statement</param>
+        /// <param name="succeeded">Whether the statement ran without raising an error</param>
+        /// <returns>String that statement returns, or the error message if it failed</returns>
+        public string ExecuteStatement(string statement, out bool succeeded)
+        {
+            return ExecuteStatement(statement, false, out succeeded);
         }
 
         /// <summary>
@@ -83,7 +135,8 @@ public string ExecuteStatement(string statement)
         /// <returns>String that last statement returns</returns>
         public string ExecuteStatements(string statements)
         {
-            return ExecuteStatement(statements, true);
+            bool succeeded;
+            return ExecuteStatement(statements, true, out succeeded);
         }
 
         /// <summary>
@@ -95,19 +148,20 @@ public dynamic ExecuteSilent(string statement)
             return m_engine.Execute(statement, m_scope);
         }
 
-        private string ExecuteStatement(string statement, bool multiStatements)
+        private string ExecuteStatement(string statement, bool multiStatements, out bool succeeded)
         {
             string result = string.Empty;
+            succeeded = true;
 
             if (string.IsNullOrEmpty(statement))
                 return result;
 
+            m_stream.Reset();
             try
             {
                 SourceCodeKind sourceKind = multiStatements ? SourceCodeKind.Statements
                     : SourceCodeKind.SingleStatement;
-                ScriptSource source =
-                    m_engine.CreateScriptSourceFromString(statement, sourceKind);
+                CompiledCode compiled = GetCompiledStatement(statement, sourceKind);
                 
                 // JAL - 7/18/2012 - 
                 // 
@@ -132,17 +186,18 @@ private string ExecuteStatement(string statement, bool multiStatements)
                 //
                 //  UPDATE:  Ron disabled the zipimport feature as a more reliable workaround (see BasicPythonService.cs)
                 //   
-                source.Execute(m_scope);
+                compiled.Execute(m_scope);
                 result = m_stream.Text;
             }
             catch (Exception ex)
             {
                 ExceptionOperations eo
                     = m_engine.GetService<ExceptionOperations>();
-                result = m_stream.Text + eo.FormatException(ex);
+                m_stream.Write(eo.FormatException(ex));
+                result = m_stream.Text;
+                succeeded = false;
             }
 
-            m_stream.Reset();
             return result;
         }
 
@@ -151,30 +206,140 @@ ExceptionOperations eo
         /// <param name="fileName">Full file path</param>
         /// <returns>Script output text</returns>
         public string ExecuteFile(string fileName)
+        {
+            string error;
+            return ExecuteFile(fileName, out error);
+        }
+
+        /// <summary>
+        /// Executes the given file, and reports the error that stopped it, if any</summary>
+        /// <param name="fileName">Full file path</param>
+        /// <param name="error">Formatted error, including the script's stack trace, or null if the
+        /// script ran without raising an error</param>
+        /// <returns>Script output text, which ends with the error if there was one</returns>
+        public string ExecuteFile(string fileName, out string error)
         {
             string result = string.Empty;
+            error = null;
+            m_stream.Reset();
             try
             {
                 FileInfo finfo = new FileInfo(fileName);
                 if (!finfo.Exists)
                     throw new FileNotFoundException(finfo.FullName);
 
-                ScriptSource source =
-                    m_engine.CreateScriptSourceFromFile(finfo.FullName);
+                CompiledCode compiled = GetCompiledFile(finfo);
 
-                source.Execute(m_scope);
+                compiled.Execute(m_scope);
                 result = m_stream.Text;
             }
             catch (Exception ex)
             {
                 ExceptionOperations eo
                     = m_engine.GetService<ExceptionOperations>();
-                result = m_stream.Text + eo.FormatException(ex);
+                error = eo.FormatException(ex);
+                m_stream.Write(error);
+                result = m_stream.Text;
             }
-            m_stream.Reset();
             return result;
         }
 
+        /// <summary>
+        /// Compiles all the script files in the given directory that the scripting language
+        /// recognizes by extension, and adds them to the compiled code cache, so that later
+        /// calls to ExecuteFile() for these files don't need to compile them. Files that fail
+        /// to compile are skipped; their errors are reported when they are executed.</summary>
+        /// <param name="directory">Directory containing script files</param>
+        /// <returns>Number of files compiled</returns>
+        public int Precompile(string directory)
+        {
+            int count = 0;
+            foreach (string extension in m_engine.Setup.FileExtensions)
+            {
+                foreach (string path in Directory.GetFiles(directory, "*" + extension))
+                {
+                    try
+                    {
+                        GetCompiledFile(new FileInfo(path));
+                        count++;
+                    }
+                    catch (SyntaxErrorException)
+                    {
+                    }
+                }
+            }
+            return count;
+        }
+
+        /// <summary>
+        /// Gets or sets the maximum number of compiled files and statements kept for reuse by
+        /// ExecuteFile(), ExecuteStatement() and ExecuteStatements(). Files are recompiled when
+        /// their last write time changes. 0 turns off caching.</summary>
+        /// <remarks>The default is 256</remarks>
+        public int CompiledCodeCacheCapacity
+        {
+            get { return (int)m_compiledCode.Capacity; }
+            set { m_compiledCode.Capacity = value; }
+        }
+
+        /// <summary>
+        /// Gets the number of times a file or statement was executed without compiling it</summary>
+        public long CompiledCodeCacheHits
+        {
+            get { return m_compiledCode.Hits; }
+        }
+
+        /// <summary>
+        /// Gets the number of times a file or statement had to be compiled before executing it</summary>
+        public long CompiledCodeCacheMisses
+        {
+            get { return m_compiledCode.Misses; }
+        }
+
+        /// <summary>
+        /// Removes all compiled files and statements from the cache, and resets the hit and miss counts</summary>
+        public void ClearCompiledCodeCache()
+        {
+            m_compiledCode.Clear();
+            m_compiledCode.ResetStatistics();
+        }
+
+        private CompiledCode GetCompiledStatement(string statement, SourceCodeKind sourceKind)
+        {
+            string key = (sourceKind == SourceCodeKind.Statements ? "statements:" : "statement:") + statement;
+            CompiledCode compiled;
+            if (!m_compiledCode.TryGetValue(key, out compiled))
+            {
+                ScriptSource source =
+                    m_engine.CreateScriptSourceFromString(statement, sourceKind);
+                compiled = source.Compile();
+                m_compiledCode.Set(key, compiled);
+            }
+            return compiled;
+        }
+
+        private CompiledCode GetCompiledFile(FileInfo finfo)
+        {
+            //Including the last write time means an edited file is never run from a stale compilation
+            string key = string.Format("file:{0}|{1}", finfo.FullName, finfo.LastWriteTimeUtc.Ticks);
+            CompiledCode compiled;
+            if (!m_compiledCode.TryGetValue(key, out compiled))
+            {
+                ScriptSource source =
+                    m_engine.CreateScriptSourceFromFile(finfo.FullName);
+                compiled = source.Compile();
+                m_compiledCode.Set(key, compiled);
+            }
+            return compiled;
+        }
+
+        /// <summary>
+        /// Gets the scripting engine</summary>
+        protected ScriptEngine Engine
+        {
+            get { return m_engine; }
+        }
+
         /// <summary>
         /// Sets scripting engine</summary>
         /// <param name="engine">Scripting engine</param>
@@ -187,13 +352,22 @@ protected void SetEngine(ScriptEngine engine)
                 throw new ArgumentNullException("engine");
 
             m_engine = engine;
-            m_stream = new ScriptOutStream();
+            m_stream = new ScriptOutStream(this);
             m_engine.Runtime.IO.SetOutput(m_stream, Encoding.ASCII);
-            m_scope = m_engine.CreateScope();
+            m_scope = CreateScope(m_engine);
 
             LoadDefaultAssemblies(m_engine.Runtime);
         }
 
+        /// <summary>
+        /// Creates the scope that holds the script variables. Called by SetEngine.</summary>
+        /// <param name="engine">Scripting engine</param>
+        /// <returns>New script scope</returns>
+        protected virtual ScriptScope CreateScope(ScriptEngine engine)
+        {
+            return engine.CreateScope();
+        }
+
         /// <summary>
         /// Loads the initial assemblies into the given ScriptRuntime</summary>
         /// <param name="runtime">ScriptRuntime</param>
@@ -219,14 +393,86 @@ protected virtual void LoadDefaultAssemblies(ScriptRuntime runtime)
             //END: for backwards compatibility with ATF 3.1
         }
 
-        // Custom stream class for capturing script output
+        /// <summary>
+        /// Gets the position at the end of the script output written so far. To follow the output
+        /// of a script while it runs, get this position before executing the script, and pass it
+        /// to ReadOutput().</summary>
+        public long OutputPosition
+        {
+            get { return m_stream.End; }
+        }
+
+        /// <summary>
+        /// Gets the script output written since the given position. This can be called from any
+        /// thread, including while a script runs on another thread. Only the output of the most
+        /// recent call to ExecuteStatement(), ExecuteStatements() or ExecuteFile() is kept.</summary>
+        /// <param name="position">Position from OutputPosition, or from the previous call to this method</param>
+        /// <param name="nextPosition">Position to pass to the next call to this method</param>
+        /// <returns>Output written since the given position, or the empty string if there is none</returns>
+        public string ReadOutput(long position, out long nextPosition)
+        {
+            return m_stream.Read(position, out nextPosition);
+        }
+
+        /// <summary>
+        /// Raises the OutputWritten event</summary>
+        /// <param name="e">Event args</param>
+        protected virtual void OnOutputWritten(ScriptOutputEventArgs e)
+        {
+            OutputWritten.Raise(this, e);
+        }
+
+        // Custom stream class for capturing script output. The output of each execution is kept in
+        //  an append-only buffer until the next execution starts, so that other threads can read it
+        //  while the script runs, and is passed on to OutputWritten as it is written.
         private class ScriptOutStream : Stream
         {
+            public ScriptOutStream(ScriptingService owner)
+            {
+                m_owner = owner;
+            }
+
             public void Reset()
             {
-                m_output = string.Empty;
+                lock (m_output)
+                {
+                    m_start += m_output.Length;
+                    m_output.Length = 0;
+                }
+                m_decoder.Reset();
+            }
+
+            public string Text
+            {
+                get
+                {
+                    lock (m_output)
+                        return m_output.ToString();
+                }
+            }
+
+            // Position after the last character written, counting the output of earlier executions
+            public long End
+            {
+                get
+                {
+                    lock (m_output)
+                        return m_start + m_output.Length;
+                }
+            }
+
+            public string Read(long position, out long nextPosition)
+            {
+                lock (m_output)
+                {
+                    long start = Math.Max(position - m_start, 0);
+                    nextPosition = m_start + m_output.Length;
+                    if (start >= m_output.Length)
+                        return string.Empty;
+
+                    return m_output.ToString((int)start, m_output.Length - (int)start);
+                }
             }
-            public string Text { get { return m_output; } }
 
             public override bool CanRead { get { return false; } }
 
@@ -261,14 +507,33 @@ public override void SetLength(long value)
 
             public override void Write(byte[] buffer, int offset, int count)
             {
-                m_output += Encoding.UTF8.GetString(buffer, offset, count);
+                // The decoder keeps any partial character until the next write
+                char[] chars = new char[m_decoder.GetCharCount(buffer, offset, count)];
+                int charCount = m_decoder.GetChars(buffer, offset, count, chars, 0);
+                if (charCount > 0)
+                    Write(new string(chars, 0, charCount));
             }
 
-            private string m_output = string.Empty;
+            public void Write(string text)
+            {
+                lock (m_output)
+                    m_output.Append(text);
+                m_owner.OnOutputWritten(new ScriptOutputEventArgs(text));
+            }
+
+            private readonly ScriptingService m_owner;
+            private readonly StringBuilder m_output = new StringBuilder();
+            private readonly Decoder m_decoder = Encoding.UTF8.GetDecoder();
+            private long m_start;
         }
 
         private ScriptEngine m_engine;
         private ScriptScope m_scope;
         private ScriptOutStream m_stream;
+        private Dictionary<string, object> m_scopeSnapshot;
+        private readonly LruCache<string, CompiledCode> m_compiledCode =
+            new LruCache<string, CompiledCode>(DefaultCompiledCodeCacheCapacity);
+
+        private const int DefaultCompiledCodeCacheCapacity = 256;
     }
 }
@@ -2,6 +2,7 @@
 
 using System;
 using System.Collections.Generic;
+using System.IO;
 using System.Linq;
 using Sce.Atf.Adaptation;
 using Sce.Atf.Applications;
@@ -18,6 +19,9 @@ public class HistoryContext : TransactionContext, IHistoryContext
         public HistoryContext()
         {
             History = new CommandHistory();
+
+            // repeated changes to an attribute in a transaction are undone and redone as one
+            CompactOperations = true;
         }
 
         /// <summary>
@@ -48,6 +52,7 @@ public CommandHistory History
                     if (m_history != null)
                     {
                         m_history.CommandUndone -= history_CommandUndone;
+                        m_history.CommandsEvicted -= history_CommandsEvicted;
                         m_history.DirtyChanged -= history_DirtyChanged;
                     }
 
@@ -56,6 +61,7 @@ public CommandHistory History
                     if (m_history != null)
                     {
                         m_history.CommandUndone += history_CommandUndone;
+                        m_history.CommandsEvicted += history_CommandsEvicted;
                         m_history.DirtyChanged += history_DirtyChanged;
                     }
                 }
@@ -205,6 +211,8 @@ protected override void  OnEnded()
 
             // if operations can be combined with pending set operations, combine and remove them
             IList<Operation> operations = TransactionOperations;
+            var newPendingChanges = new List<PendingChange>();
+            var changedCommands = new List<TransactionCommand>();
             int i = 0;
             while (i < operations.Count)
             {
@@ -213,22 +221,30 @@ protected override void  OnEnded()
                 if (setOp != null)
                 {
                     var id = new Pair<DomNode, AttributeInfo>(setOp.DomNode, setOp.AttributeInfo);
-                    AttributeChangedOperation pendingSetOp;
-                    if (m_pendingChanges.TryGetValue(id, out pendingSetOp))
+                    PendingChange pendingChange;
+                    if (m_pendingChanges.TryGetValue(id, out pendingChange))
                     {
-                        pendingSetOp.NewValue = setOp.NewValue;
+                        pendingChange.Operation.NewValue = setOp.NewValue;
+                        if (pendingChange.Command != null && !changedCommands.Contains(pendingChange.Command))
+                            changedCommands.Add(pendingChange.Command);
                         operations.RemoveAt(i);
                         continue; // don't increment i
                     }
                     else
                     {
-                        m_pendingChanges.Add(id, setOp);
+                        pendingChange = new PendingChange(setOp);
+                        m_pendingChanges.Add(id, pendingChange);
+                        newPendingChanges.Add(pendingChange);
                     }
                 }
 
                 i++;
             }
 
+            // the commands that changes were merged into may have grown or shrunk
+            foreach (TransactionCommand command in changedCommands)
+                m_history.UpdateMemorySize(command);
+
             if (operations.Count > 0)
             {
                 SetSelectionCommand setSelectionCommand = null;
@@ -240,7 +256,11 @@ protected override void  OnEnded()
                         SnapshotSelection());
                 }
 
-                m_history.Add(new TransactionCommand(this, TransactionName, operations.ToArray(), setSelectionCommand));
+                var command = new TransactionCommand(this, TransactionName, operations.ToArray(), setSelectionCommand);
+                foreach (PendingChange pendingChange in newPendingChanges)
+                    pendingChange.Command = command;
+
+                m_history.Add(command);
             }
 
             m_lastSelection = null;
@@ -254,6 +274,13 @@ private void history_CommandUndone(object sender, EventArgs e)
             m_pendingChanges.Clear();
         }
 
+        private void history_CommandsEvicted(object sender, EventArgs e)
+        {
+            // pending set operations may belong to commands that were spilled or removed, which
+            //  can no longer be changed
+            m_pendingChanges.Clear();
+        }
+
         private void history_DirtyChanged(object sender, EventArgs e)
         {
             DirtyChanged.Raise(this, e);
@@ -311,15 +338,58 @@ public override void Undo()
                     m_setSelectionCommand.Undo();
             }
 
+            public override long MemorySize
+            {
+                get
+                {
+                    long size = base.MemorySize + (long)IntPtr.Size * m_operations.Length;
+                    foreach (Operation operation in m_operations)
+                        size += operation.MemorySize;
+                    if (m_setSelectionCommand != null)
+                        size += m_setSelectionCommand.MemorySize;
+                    return size;
+                }
+            }
+
+            public override bool Spill(Stream stream)
+            {
+                // don't dispose the writer, which would close the history's stream
+                var writer = new BinaryWriter(stream);
+                bool spilled = false;
+                foreach (Operation operation in m_operations)
+                    spilled |= operation.Spill(writer);
+                writer.Flush();
+                return spilled;
+            }
+
+            public override void Restore(Stream stream)
+            {
+                var reader = new BinaryReader(stream);
+                foreach (Operation operation in m_operations)
+                    operation.Restore(reader);
+            }
+
             private readonly HistoryContext m_context;
             private readonly Operation[] m_operations;
             private readonly SetSelectionCommand m_setSelectionCommand;
         }
 
+        // A pending set-attribute operation, and the command that it belongs to
+        private class PendingChange
+        {
+            public PendingChange(AttributeChangedOperation operation)
+            {
+                Operation = operation;
+            }
+
+            public readonly AttributeChangedOperation Operation;
+            public TransactionCommand Command;
+        }
+
         // Dictionary holding pending set-attribute operations, so that rapid sequences of such
         //  operations can be combined into a single logical command for undo/redo
-        private readonly Dictionary<Pair<DomNode, AttributeInfo>, AttributeChangedOperation> m_pendingChanges =
-            new Dictionary<Pair<DomNode, AttributeInfo>, AttributeChangedOperation>();
+        private readonly Dictionary<Pair<DomNode, AttributeInfo>, PendingChange> m_pendingChanges =
+            new Dictionary<Pair<DomNode, AttributeInfo>, PendingChange>();
 
         // Rather than use a timer, just record the time of attribute-set operations and combine
         //  if new set operations with any pending set operations. There isn't a leak problem with
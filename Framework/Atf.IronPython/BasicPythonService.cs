@@ -8,14 +8,17 @@
 using IronPython;
 using IronPython.Hosting;
 using IronPython.Runtime;
+using IronPython.Runtime.Exceptions;
+using Microsoft.Scripting.Actions;
 using Microsoft.Scripting.Hosting;
 
 namespace Sce.Atf.Applications
 {
     /// <summary>
     /// Basic Python service that provides the Python scripting engine and imports many common
-    /// .NET and ATF types into the Python namespace. Consider using ScriptConsole and
-    /// AtfScriptVariables as additional MEF components.</summary>
+    /// .NET and ATF types into the Python namespace. By default, a type is imported the first
+    /// time a script uses its name; set UseEagerImports to import all the types at startup.
+    /// Consider using ScriptConsole and AtfScriptVariables as additional MEF components.</summary>
     [Export(typeof(IInitializable))]
     [Export(typeof(ScriptingService))]
     [PartCreationPolicy(CreationPolicy.Shared)]
@@ -31,6 +34,20 @@ public BasicPythonService()
             Initialize();
         }
 
+        /// <summary>
+        /// Gets or sets whether services created from now on import all the types of the common
+        /// namespaces when they are initialized, by running a "from namespace import *" statement
+        /// for each namespace. This is how earlier versions worked. Otherwise, each type is imported
+        /// the first time a script uses its name, which makes startup faster. Set this before the
+        /// service is created, e.g., before composing the MEF container.</summary>
+        /// <remarks>The default is false. With lazy imports, dir() lists only the types that
+        /// scripts have used so far.</remarks>
+        public static bool UseEagerImports
+        {
+            get { return s_useEagerImports; }
+            set { s_useEagerImports = value; }
+        }
+
         /// <summary>
         /// Creates the Python engine with some default options and common assembly imports.
         /// Called by the constructor.</summary>
@@ -54,32 +71,45 @@ protected virtual ScriptEngine CreateEngine()
             return engine;
         }
 
+        /// <summary>
+        /// Creates the scope that holds the script variables. Unless UseEagerImports is set, the
+        /// scope imports types from the namespaces given to ImportAllTypes() on demand.</summary>
+        /// <param name="engine">Python engine</param>
+        /// <returns>New script scope</returns>
+        protected override ScriptScope CreateScope(ScriptEngine engine)
+        {
+            if (UseEagerImports)
+                return base.CreateScope(engine);
+
+            m_lazyImports = new LazyImportDictionary(engine);
+            return engine.CreateScope(m_lazyImports);
+        }
+
         /// <summary>
         /// Initializes the current Python engine with some common assembly imports.
         /// Called by the constructor after CreateEngine.</summary>
         protected virtual void Initialize()
         {
-            StringBuilder importStatement = new StringBuilder();
-            importStatement.AppendLine("import clr");
-            importStatement.AppendLine("import System");
-
             // These namespaces are guaranteed to exist because Atf.IronPython depends on assemblies
             //  that contain these namespaces.
-            importStatement.AppendLine("from System import *");
-            importStatement.AppendLine("from System.Drawing import *");
-            importStatement.AppendLine("from System.Collections.Generic import *");
-            importStatement.AppendLine("from System.Collections.ObjectModel import *");
-            importStatement.AppendLine("from System.Windows.Forms import *");
-            importStatement.AppendLine("from System.Text import *");
-            importStatement.AppendLine("from System.IO import *");
-            importStatement.AppendLine("from System.Xml.Schema import *");
-            importStatement.AppendLine("from System.Xml.XPath import *");
-            importStatement.AppendLine("from System.Xml.Serialization import *");
-            importStatement.AppendLine("from Sce.Atf import *");
-            importStatement.AppendLine("from Sce.Atf.Applications import *");
-            importStatement.AppendLine("from Sce.Atf.VectorMath import *");
-            importStatement.AppendLine("from Sce.Atf.Adaptation import *");
-            importStatement.AppendLine("from Sce.Atf.Dom import *");
+            List<string> namespaces = new List<string>
+            {
+                "System",
+                "System.Drawing",
+                "System.Collections.Generic",
+                "System.Collections.ObjectModel",
+                "System.Windows.Forms",
+                "System.Text",
+                "System.IO",
+                "System.Xml.Schema",
+                "System.Xml.XPath",
+                "System.Xml.Serialization",
+                "Sce.Atf",
+                "Sce.Atf.Applications",
+                "Sce.Atf.VectorMath",
+                "Sce.Atf.Adaptation",
+                "Sce.Atf.Dom",
+            };
 
             Assembly[] assemblies = AppDomain.CurrentDomain.GetAssemblies();
             foreach (Assembly assembly in assemblies)
@@ -92,29 +122,55 @@ protected virtual void Initialize()
 
                 if (assembly.FullName.StartsWith("Atf.Gui.WinForms"))
                 {
-                    importStatement.AppendLine("from Sce.Atf.Controls import *");
-                    importStatement.AppendLine("from Sce.Atf.Controls.Adaptable import *");
+                    namespaces.Add("Sce.Atf.Controls");
+                    namespaces.Add("Sce.Atf.Controls.Adaptable");
                 }
                 else if (assembly.FullName.StartsWith("Scea.Core"))
                 {
-                    importStatement.AppendLine("from Scea.Editors.Host.Internal import *");
+                    namespaces.Add("Scea.Editors.Host.Internal");
                 }
                 else if (assembly.FullName.StartsWith("Scea.Dom"))
                 {
-                    importStatement.AppendLine("from Scea.Dom import *");
+                    namespaces.Add("Scea.Dom");
                 }
             }
 
+            StringBuilder importStatement = new StringBuilder();
+            importStatement.AppendLine("import clr");
+            importStatement.AppendLine("import System");
+            foreach (string nmspace in namespaces)
+            {
+                if (m_lazyImports != null)
+                    m_lazyImports.AddNamespace(nmspace);
+                else
+                    importStatement.AppendLine(string.Format("from {0} import *", nmspace));
+            }
+
             //Console.WriteLine("BasicPythonService loading:\n" + importStatement);
             ExecuteStatements(importStatement.ToString());
         }
 
+        /// <summary>
+        /// Loads assembly into script domain</summary>
+        /// <param name="assembly">Assembly</param>
+        public override void LoadAssembly(Assembly assembly)
+        {
+            base.LoadAssembly(assembly);
+
+            // The assembly may add types to namespaces that are imported on demand
+            if (m_lazyImports != null)
+                m_lazyImports.Refresh();
+        }
+
         /// <summary>
         /// Imports all types from a given namespace</summary>
         /// <param name="nmspace">Namespace</param>
         public override void ImportAllTypes(string nmspace)
         {
-            ExecuteStatement(string.Format("from {0} import *", nmspace));            
+            if (m_lazyImports != null)
+                m_lazyImports.AddNamespace(nmspace);
+            else
+                ExecuteStatement(string.Format("from {0} import *", nmspace));
         }
 
         /// <summary>
@@ -126,6 +182,44 @@ public override void ImportType(string nmspace, string typename)
             ExecuteStatement(string.Format("from {0} import {1}", nmspace, typename));
         }
 
+        /// <summary>
+        /// Records the variables currently defined in the script domain, along with the
+        /// module search path and the loaded modules</summary>
+        public override void SaveScopeSnapshot()
+        {
+            base.SaveScopeSnapshot();
+
+            ScriptScope sys = Engine.GetSysModule();
+            m_sysPathSnapshot = new List<object>(sys.GetVariable<IList<object>>("path"));
+            m_sysModulesSnapshot = new HashSet<object>(sys.GetVariable<IDictionary<object, object>>("modules").Keys);
+        }
+
+        /// <summary>
+        /// Returns the script domain to the state recorded by SaveScopeSnapshot(). Also restores
+        /// the module search path and unloads modules imported since the snapshot, so that
+        /// the next script imports fresh copies of them.</summary>
+        /// <returns>True iff a snapshot was restored</returns>
+        public override bool RestoreScopeSnapshot()
+        {
+            if (!base.RestoreScopeSnapshot())
+                return false;
+
+            ScriptScope sys = Engine.GetSysModule();
+            IList<object> path = sys.GetVariable<IList<object>>("path");
+            path.Clear();
+            foreach (object item in m_sysPathSnapshot)
+                path.Add(item);
+
+            IDictionary<object, object> modules = sys.GetVariable<IDictionary<object, object>>("modules");
+            foreach (object name in new List<object>(modules.Keys))
+            {
+                if (!m_sysModulesSnapshot.Contains(name))
+                    modules.Remove(name);
+            }
+
+            return true;
+        }
+
         #region IInitializable Members
 
         void IInitializable.Initialize()
@@ -133,5 +227,209 @@ void IInitializable.Initialize()
         }
 
         #endregion
+
+        /// <summary>
+        /// Storage for script variables that imports a type or a namespace from a list of namespaces
+        /// the first time a script looks up its name, as if "from namespace import *" had been run
+        /// for each namespace in the list</summary>
+        private class LazyImportDictionary : IDictionary<string, object>
+        {
+            public LazyImportDictionary(ScriptEngine engine)
+            {
+                m_engine = engine;
+            }
+
+            public void AddNamespace(string nmspace)
+            {
+                m_namespaces.Add(nmspace);
+
+                // The new namespace hides names imported from earlier ones, so import those again
+                foreach (KeyValuePair<string, object> import in m_imports)
+                {
+                    object value;
+                    if (m_variables.TryGetValue(import.Key, out value) && value == import.Value)
+                        m_variables.Remove(import.Key);
+                }
+                m_imports.Clear();
+                m_unresolvedNames.Clear();
+            }
+
+            public void Refresh()
+            {
+                m_unresolvedNames.Clear();
+                foreach (string nmspace in new List<string>(m_trackers.Keys))
+                {
+                    if (m_trackers[nmspace] == null)
+                        m_trackers.Remove(nmspace);
+                }
+            }
+
+            public bool TryGetValue(string key, out object value)
+            {
+                if (m_variables.TryGetValue(key, out value))
+                    return true;
+
+                if (TryImport(key, out value))
+                {
+                    m_variables[key] = value;
+                    m_imports[key] = value;
+                    return true;
+                }
+
+                return false;
+            }
+
+            public object this[string key]
+            {
+                get
+                {
+                    object value;
+                    if (!TryGetValue(key, out value))
+                        throw new KeyNotFoundException(key);
+                    return value;
+                }
+                set { m_variables[key] = value; }
+            }
+
+            public bool ContainsKey(string key)
+            {
+                object value;
+                return TryGetValue(key, out value);
+            }
+
+            public void Add(string key, object value)
+            {
+                m_variables.Add(key, value);
+            }
+
+            public bool Remove(string key)
+            {
+                m_imports.Remove(key);
+                return m_variables.Remove(key);
+            }
+
+            public ICollection<string> Keys
+            {
+                get { return m_variables.Keys; }
+            }
+
+            public ICollection<object> Values
+            {
+                get { return m_variables.Values; }
+            }
+
+            public int Count
+            {
+                get { return m_variables.Count; }
+            }
+
+            public bool IsReadOnly
+            {
+                get { return false; }
+            }
+
+            public void Add(KeyValuePair<string, object> item)
+            {
+                m_variables.Add(item.Key, item.Value);
+            }
+
+            public bool Contains(KeyValuePair<string, object> item)
+            {
+                return ((ICollection<KeyValuePair<string, object>>)m_variables).Contains(item);
+            }
+
+            public bool Remove(KeyValuePair<string, object> item)
+            {
+                m_imports.Remove(item.Key);
+                return ((ICollection<KeyValuePair<string, object>>)m_variables).Remove(item);
+            }
+
+            public void Clear()
+            {
+                m_variables.Clear();
+                m_imports.Clear();
+            }
+
+            public void CopyTo(KeyValuePair<string, object>[] array, int arrayIndex)
+            {
+                ((ICollection<KeyValuePair<string, object>>)m_variables).CopyTo(array, arrayIndex);
+            }
+
+            public IEnumerator<KeyValuePair<string, object>> GetEnumerator()
+            {
+                return m_variables.GetEnumerator();
+            }
+
+            System.Collections.IEnumerator System.Collections.IEnumerable.GetEnumerator()
+            {
+                return GetEnumerator();
+            }
+
+            private bool TryImport(string name, out object value)
+            {
+                value = null;
+
+                // Like "import *", leave special names such as __builtins__ and __doc__ alone.
+                //  Names that weren't found are remembered, because every use of a built-in
+                //  function, e.g., len(), looks here first.
+                if (name.StartsWith("__") || m_unresolvedNames.Contains(name))
+                    return false;
+
+                // Later namespaces hide earlier ones
+                for (int i = m_namespaces.Count - 1; i >= 0; i--)
+                {
+                    NamespaceTracker tracker = GetNamespace(m_namespaces[i]);
+                    if (tracker != null && tracker.ContainsKey(name))
+                    {
+                        value = m_engine.Operations.GetMember(tracker, name);
+                        return true;
+                    }
+                }
+
+                m_unresolvedNames.Add(name);
+                return false;
+            }
+
+            private NamespaceTracker GetNamespace(string nmspace)
+            {
+                NamespaceTracker tracker;
+                if (!m_trackers.TryGetValue(nmspace, out tracker))
+                {
+                    if (m_importNamespace == null)
+                    {
+                        // With a from-list, __import__() returns the namespace itself, not the
+                        //  top-level namespace. Compile this once, rather than an import
+                        //  statement for each namespace.
+                        m_importNamespace = m_engine.Execute(
+                            "lambda name: __import__(name, None, None, ['*'])", m_engine.CreateScope());
+                    }
+
+                    try
+                    {
+                        tracker = m_engine.Operations.Invoke(m_importNamespace, nmspace) as NamespaceTracker;
+                    }
+                    catch (ImportException)
+                    {
+                        // No loaded assembly has this namespace; try again after Refresh()
+                    }
+                    m_trackers.Add(nmspace, tracker);
+                }
+                return tracker;
+            }
+
+            private readonly ScriptEngine m_engine;
+            private object m_importNamespace;
+            private readonly Dictionary<string, object> m_variables = new Dictionary<string, object>();
+            private readonly Dictionary<string, object> m_imports = new Dictionary<string, object>();
+            private readonly HashSet<string> m_unresolvedNames = new HashSet<string>();
+            private readonly List<string> m_namespaces = new List<string>();
+            private readonly Dictionary<string, NamespaceTracker> m_trackers = new Dictionary<string, NamespaceTracker>();
+        }
+
+        private LazyImportDictionary m_lazyImports;
+        private List<object> m_sysPathSnapshot;
+        private HashSet<object> m_sysModulesSnapshot;
+
+        private static bool s_useEagerImports;
     }   
 }
@@ -3,6 +3,7 @@
 using System;
 using System.Collections.Generic;
 using System.IO;
+using System.Threading.Tasks;
 
 using Sce.Atf.Dom;
 
@@ -12,6 +13,11 @@ namespace Sce.Atf.Obj
     /// Object file</summary>
     public class ObjFile
     {
+        /// <summary>
+        /// Gets or sets whether large files are parsed on multiple threads, by splitting them
+        /// into chunks of lines. Default is false.</summary>
+        public bool ParallelParsing { get; set; }
+
         /// <summary>
         /// Read object file</summary>
         /// <param name="strm">Stream to read data into</param>
@@ -20,8 +26,7 @@ public void Read(Stream strm, Uri resolvedUri)
         {
             m_resolvedUri = resolvedUri;
 
-            // Create an instance of StreamReader to read from a file
-            Parse(new StreamReader(strm));
+            Parse(ReadAllBytes(strm));
         }
         
         /// <summary>
@@ -30,11 +35,42 @@ public void Read(Stream strm, Uri resolvedUri)
         /// <param name="node">Node to populate</param>
         /// <param name="resolvedUri">URI representing object file</param>
         public static void PopulateDomNode(Stream stream, ref DomNode node, Uri resolvedUri)
+        {
+            PopulateDomNode(stream, ref node, resolvedUri, false);
+        }
+
+        /// <summary>
+        /// Populates DomNode with data from stream data</summary>
+        /// <param name="stream">Stream to read data into</param>
+        /// <param name="node">Node to populate</param>
+        /// <param name="resolvedUri">URI representing object file</param>
+        /// <param name="parallelParsing">Whether large files are parsed on multiple threads</param>
+        public static void PopulateDomNode(Stream stream, ref DomNode node, Uri resolvedUri, bool parallelParsing)
+        {
+            PopulateDomNode(stream, ref node, resolvedUri, parallelParsing, null);
+        }
+
+        /// <summary>
+        /// Populates DomNode with data from stream data</summary>
+        /// <param name="stream">Stream to read data into</param>
+        /// <param name="node">Node to populate</param>
+        /// <param name="resolvedUri">URI representing object file</param>
+        /// <param name="parallelParsing">Whether large files are parsed on multiple threads</param>
+        /// <param name="materialFiles">Collection that the paths of the material (.mtl) files referenced
+        /// by the object file are added to, or null</param>
+        public static void PopulateDomNode(Stream stream, ref DomNode node, Uri resolvedUri, bool parallelParsing,
+            ICollection<string> materialFiles)
         {
             // Parse .obj file
-            var obj = new ObjFile();
+            var obj = new ObjFile { ParallelParsing = parallelParsing };
             obj.Read(stream, resolvedUri);
 
+            if (materialFiles != null)
+            {
+                foreach (string materialFile in obj.m_materialFiles)
+                    materialFiles.Add(materialFile);
+            }
+
             if (node == null)
                 node = new DomNode(Schema.nodeType.Type);
 
@@ -99,22 +135,22 @@ public static void PopulateDomNode(Stream stream, ref DomNode node, Uri resolved
 
             // Populate array data
             DomNode array;
-            if (obj.m_normals.Count > 0)
+            if (obj.m_normals.Length > 0)
             {
                 array = new DomNode(Schema.vertexArray_array.Type);
-                array.SetAttribute(Schema.vertexArray_array.Attribute, obj.m_normals.ToArray());
-                array.SetAttribute(Schema.vertexArray_array.countAttribute, obj.m_normals.Count / 3);
+                array.SetAttribute(Schema.vertexArray_array.Attribute, obj.m_normals);
+                array.SetAttribute(Schema.vertexArray_array.countAttribute, obj.m_normals.Length / 3);
                 array.SetAttribute(Schema.vertexArray_array.nameAttribute, "normal");
                 array.SetAttribute(Schema.vertexArray_array.strideAttribute, 3);
 
                 vertexArray.GetChildList(Schema.meshType_vertexArray.arrayChild).Add(array);
             }
 
-            if (obj.m_texcoords.Count > 0)
+            if (obj.m_texcoords.Length > 0)
             {
                 array = new DomNode(Schema.vertexArray_array.Type);
-                array.SetAttribute(Schema.vertexArray_array.Attribute, obj.m_texcoords.ToArray());
-                array.SetAttribute(Schema.vertexArray_array.countAttribute, obj.m_texcoords.Count / 2);
+                array.SetAttribute(Schema.vertexArray_array.Attribute, obj.m_texcoords);
+                array.SetAttribute(Schema.vertexArray_array.countAttribute, obj.m_texcoords.Length / 2);
                 array.SetAttribute(Schema.vertexArray_array.nameAttribute, "map1");
                 array.SetAttribute(Schema.vertexArray_array.strideAttribute, 2);
 
@@ -122,8 +158,8 @@ public static void PopulateDomNode(Stream stream, ref DomNode node, Uri resolved
             }
 
             array = new DomNode(Schema.vertexArray_array.Type);
-            array.SetAttribute(Schema.vertexArray_array.Attribute, obj.m_positions.ToArray());
-            array.SetAttribute(Schema.vertexArray_array.countAttribute, obj.m_positions.Count / 3);
+            array.SetAttribute(Schema.vertexArray_array.Attribute, obj.m_positions);
+            array.SetAttribute(Schema.vertexArray_array.countAttribute, obj.m_positions.Length / 3);
             array.SetAttribute(Schema.vertexArray_array.nameAttribute, "position");
             array.SetAttribute(Schema.vertexArray_array.strideAttribute, 3);
 
@@ -134,119 +170,193 @@ public static void PopulateDomNode(Stream stream, ref DomNode node, Uri resolved
             node.SetChild(Schema.nodeType.meshChild, mesh);
         }
 
-        private void Parse(TextReader sr)
+        private static byte[] ReadAllBytes(Stream stream)
         {
-            string buf;
+            if (stream.CanSeek)
+            {
+                var data = new byte[stream.Length - stream.Position];
+                int count = 0;
+                while (count < data.Length)
+                {
+                    int read = stream.Read(data, count, data.Length - count);
+                    if (read == 0)
+                        break;
+                    count += read;
+                }
+
+                if (count < data.Length)
+                    Array.Resize(ref data, count);
+                return data;
+            }
+
+            using (var memoryStream = new MemoryStream())
+            {
+                stream.CopyTo(memoryStream);
+                return memoryStream.ToArray();
+            }
+        }
+
+        private void Parse(byte[] data)
+        {
+            List<Chunk> chunks = CreateChunks(data);
 
-            // Read lines from the file until EOF
-            while ((buf = sr.ReadLine()) != null)
+            // Count the vertex data first, so that it can be parsed straight into arrays of the right size
+            ForEachChunk(chunks, chunk => chunk.CountVertices(data));
+
+            int positionCount = 0;
+            int normalCount = 0;
+            int texCoordCount = 0;
+            foreach (Chunk chunk in chunks)
+            {
+                chunk.PositionOffset = positionCount;
+                chunk.NormalOffset = normalCount;
+                chunk.TexCoordOffset = texCoordCount;
+                positionCount += chunk.PositionCount * 3;
+                normalCount += chunk.NormalCount * 3;
+                texCoordCount += chunk.TexCoordCount * 2;
+            }
+
+            m_positions = new float[positionCount];
+            m_normals = new float[normalCount];
+            m_texcoords = new float[texCoordCount];
+
+            ForEachChunk(chunks, chunk => chunk.Parse(data, m_positions, m_normals, m_texcoords));
+
+            // Groups, materials and faces depend on the statements before them, so apply them in file order
+            foreach (Chunk chunk in chunks)
+                foreach (Statement statement in chunk.Statements)
+                    Apply(chunk, statement);
+
+            if (m_groups.Count == 0)
+                m_groups.Add(m_currentGroup.Name, m_currentGroup);
+            if (m_currentGroup.FaceSets.Count == 0)
+                m_currentGroup.FaceSets[m_currentFaceSet.MaterialName] = m_currentFaceSet;
+
+            // Remove empty FaceSets and mark empty Groups
+            var delGrpList = new List<string>();
+            foreach (Group grp in m_groups.Values)
             {
-                buf = buf.Trim();
-                if (string.IsNullOrEmpty(buf)) continue;
-                if (buf[0] == '#') continue;
+                var delList = new List<string>();
 
-                string[] split = buf.Split(s_stringDelimiters, StringSplitOptions.RemoveEmptyEntries);
-                switch (buf[0])
+                foreach (FaceSet fs in grp.FaceSets.Values)
                 {
-                    case 'v': // vertex
-                        switch (buf[1])
-                        {
-                            case ' ':
-                            case '\t':
-                                if (split.Length != 4) // v + 3 floats
-                                    throw new ApplicationException("Parse: Vertex split.Length is invalid");
-                                m_positions.Add(float.Parse(split[1]));
-                                m_positions.Add(float.Parse(split[2]));
-                                m_positions.Add(float.Parse(split[3]));
-                                break;
-                            case 'n':
-                                if (split.Length != 4) // vn + 3 floats
-                                    throw new ApplicationException("Parse: Normal split.Length is invalid");
-                                m_normals.Add(float.Parse(split[1]));
-                                m_normals.Add(float.Parse(split[2]));
-                                m_normals.Add(float.Parse(split[3]));
-                                break;
-                            case 't':
-                                if (split.Length != 3) // vt + 2 floats
-                                    throw new ApplicationException("Parse: TexCoord split.Length is invalid");
-                                m_texcoords.Add(float.Parse(split[1]));
-                                m_texcoords.Add(float.Parse(split[2]));
-                                break;
-                            default:
-                                break;
-                        }
-                        break;
+                    if (fs.Indices.Count == 0)
+                        delList.Add(fs.MaterialName);
+                }
+                foreach (string fsName in delList)
+                    grp.FaceSets.Remove(fsName);
+                if (grp.FaceSets.Count == 0)
+                    delGrpList.Add(grp.Name);
+            }
 
-                    case 'f': // face 
-                        if (split.Length < 4) // f v/vt/vn v/vt/vn v/vt/vn ...
-                            throw new ApplicationException("Parse: Face split.Length is invalid");
-                        m_currentFaceSet.Sizes.Add(split.Length - 1);
-                        for (int vi = 1; vi < split.Length; vi++)
-                        {
-                            string[] ptn = split[vi].Split('/');
-                            if (ptn.Length == 3) // v/vt/vn or v//vn
-                            {
-                                m_currentFaceSet.Indices.Add(int.Parse(ptn[2]) - 1);
-                                m_currentFaceSet.HasNormals = true;
-
-                                if (!string.IsNullOrEmpty(ptn[1]))
-                                {
-                                    m_currentFaceSet.Indices.Add(int.Parse(ptn[1]) - 1);
-                                    m_currentFaceSet.HasTexCoords = true;
-                                }
-                            }
-                            else if (ptn.Length == 2) // v/vt/
-                            {
-                                m_currentFaceSet.Indices.Add(int.Parse(ptn[1]) - 1);
-                                m_currentFaceSet.HasTexCoords = true;
-                            }
-                            m_currentFaceSet.Indices.Add(int.Parse(ptn[0]) - 1); // v or v// or v/vt/vn
-                        }
-                        break;
+            // Remove empty groups
+            foreach (string grpn in delGrpList)
+                m_groups.Remove(grpn);
+        }
 
-                    case 'm': // material
-                        if (split.Length == 2)
-                        {
-                            var uri = new Uri(m_resolvedUri, split[1]);
-                            string fullPath = Uri.UnescapeDataString(uri.AbsolutePath);
+        private List<Chunk> CreateChunks(byte[] data)
+        {
+            int start = ObjTokenReader.GetDataStart(data);
+            int chunkCount = 1;
+            if (ParallelParsing)
+                chunkCount = Math.Max(1, Math.Min(Environment.ProcessorCount, (data.Length - start) / MinChunkLength));
 
-                            m_mtl = new MtlFile { Name = Path.GetFileName(fullPath) };
-                            m_mtl.Read(fullPath);
-                        }
+            var chunks = new List<Chunk>(chunkCount);
+            for (int i = chunkCount; i > 0; i--)
+            {
+                // Chunks end after a line break, so that no line is split between chunks
+                int end = start + (data.Length - start) / i;
+                while (end < data.Length && end > 0 && data[end - 1] != '\n')
+                    end++;
 
-                        break;
+                chunks.Add(new Chunk(start, end));
+                start = end;
+            }
 
-                    case 'g': // group
-                    case 'o': // object
-                        if (split.Length >= 2) // g + groupName + ...
-                        {
-                            string curMatName = m_currentFaceSet.MaterialName;
+            return chunks;
+        }
 
-                            // Find group, otherwise create new group
-                            if (!m_groups.TryGetValue(split[1], out m_currentGroup))
+        private static void ForEachChunk(List<Chunk> chunks, Action<Chunk> action)
+        {
+            if (chunks.Count == 1)
+            {
+                action(chunks[0]);
+                return;
+            }
+
+            var errors = new Exception[chunks.Count];
+            Parallel.For(0, chunks.Count, i =>
+            {
+                try
+                {
+                    action(chunks[i]);
+                }
+                catch (Exception e)
+                {
+                    errors[i] = e;
+                }
+            });
+
+            // Report the error that parsing the chunks in order would have
+            foreach (Exception error in errors)
+                if (error != null)
+                    throw error;
+        }
+
+        private void Apply(Chunk chunk, Statement statement)
+        {
+            switch (statement.Keyword)
+            {
+                case 'f': // faces
+                    for (int i = statement.IndexStart; i < statement.IndexEnd; i++)
+                        m_currentFaceSet.Indices.Add(chunk.Indices[i]);
+                    for (int i = statement.SizeStart; i < statement.SizeEnd; i++)
+                        m_currentFaceSet.Sizes.Add(chunk.Sizes[i]);
+                    if (statement.HasNormals)
+                        m_currentFaceSet.HasNormals = true;
+                    if (statement.HasTexCoords)
+                        m_currentFaceSet.HasTexCoords = true;
+                    break;
+
+                case 'm': // material
+                    {
+                        var uri = new Uri(m_resolvedUri, statement.Name);
+                        string fullPath = Uri.UnescapeDataString(uri.AbsolutePath);
+
+                        m_mtl = new MtlFile { Name = Path.GetFileName(fullPath) };
+                        m_mtl.Read(fullPath);
+                        m_materialFiles.Add(fullPath);
+                    }
+                    break;
+
+                case 'g': // group or object
+                    {
+                        string curMatName = m_currentFaceSet.MaterialName;
+
+                        // Find group, otherwise create new group
+                        if (!m_groups.TryGetValue(statement.Name, out m_currentGroup))
+                        {
+                            m_currentGroup = new Group { Name = statement.Name };
+                            m_groups.Add(m_currentGroup.Name, m_currentGroup);
+                            m_currentFaceSet = new FaceSet(curMatName);
+                            m_currentGroup.FaceSets.Add(curMatName, m_currentFaceSet);
+                        }
+                        // Group exists
+                        else
+                        {
+                            // Find faceset with current material, otherwise create new faceset with current material
+                            if (!m_currentGroup.FaceSets.TryGetValue(curMatName, out m_currentFaceSet))
                             {
-                                m_currentGroup = new Group { Name = split[1] };
-                                m_groups.Add(m_currentGroup.Name, m_currentGroup);
                                 m_currentFaceSet = new FaceSet(curMatName);
                                 m_currentGroup.FaceSets.Add(curMatName, m_currentFaceSet);
                             }
-                            // Group exists
-                            else
-                            {
-                                // Find faceset with current material, otherwise create new faceset with current material
-                                if (!m_currentGroup.FaceSets.TryGetValue(curMatName, out m_currentFaceSet))
-                                {
-                                    m_currentFaceSet = new FaceSet(curMatName);
-                                    m_currentGroup.FaceSets.Add(curMatName, m_currentFaceSet);
-                                }
-                            }
                         }
-                        break;
+                    }
+                    break;
 
-                    case 'u':
-                        if (split.Length != 2) // usemtl + mat name
-                            throw new ApplicationException("Parse: Usemtl split.Length is invalid");
-                        string matName = split[1];
+                case 'u': // usemtl
+                    {
+                        string matName = statement.Name;
                         // Find material by name
                         if (m_mtl.Materials.ContainsKey(matName))
                         {
@@ -259,51 +369,217 @@ private void Parse(TextReader sr)
                         }
                         else
                             Outputs.WriteLine(OutputMessageType.Warning, "Material not found: {0}", matName);
-                        break;
+                    }
+                    break;
+            }
+        }
 
-                    default:
-                        break;
+        /// <summary>
+        /// Lines of the file that are parsed together. Vertex data is parsed straight into the
+        /// file's arrays, and everything else is recorded as statements, to be applied in order.</summary>
+        private class Chunk
+        {
+            public Chunk(int start, int end)
+            {
+                Start = start;
+                End = end;
+            }
+
+            public readonly int Start;
+            public readonly int End;
+
+            public int PositionCount;
+            public int NormalCount;
+            public int TexCoordCount;
+
+            public int PositionOffset;
+            public int NormalOffset;
+            public int TexCoordOffset;
+
+            public readonly List<int> Indices = new List<int>();
+            public readonly List<int> Sizes = new List<int>();
+            public readonly List<Statement> Statements = new List<Statement>();
+
+            public void CountVertices(byte[] data)
+            {
+                var reader = new ObjTokenReader(data, Start, End);
+                while (reader.NextLine())
+                {
+                    if (reader.GetLineChar(0) != 'v')
+                        continue;
+
+                    switch (reader.GetLineChar(1))
+                    {
+                        case ' ':
+                        case '\t':
+                            PositionCount++;
+                            break;
+                        case 'n':
+                            NormalCount++;
+                            break;
+                        case 't':
+                            TexCoordCount++;
+                            break;
+                    }
                 }
             }
 
-            if (m_groups.Count == 0)
-                m_groups.Add(m_currentGroup.Name, m_currentGroup);
-            if (m_currentGroup.FaceSets.Count == 0)
-                m_currentGroup.FaceSets[m_currentFaceSet.MaterialName] = m_currentFaceSet;
+            public void Parse(byte[] data, float[] positions, float[] normals, float[] texCoords)
+            {
+                var reader = new ObjTokenReader(data, Start, End);
+                int position = PositionOffset;
+                int normal = NormalOffset;
+                int texCoord = TexCoordOffset;
+                while (reader.NextLine())
+                {
+                    switch (reader.GetLineChar(0))
+                    {
+                        case 'v': // vertex
+                            switch (reader.GetLineChar(1))
+                            {
+                                case ' ':
+                                case '\t': // v + 3 floats
+                                    position = ReadFloats(reader, positions, position, 3, "Parse: Vertex split.Length is invalid");
+                                    break;
+                                case 'n': // vn + 3 floats
+                                    normal = ReadFloats(reader, normals, normal, 3, "Parse: Normal split.Length is invalid");
+                                    break;
+                                case 't': // vt + 2 floats
+                                    texCoord = ReadFloats(reader, texCoords, texCoord, 2, "Parse: TexCoord split.Length is invalid");
+                                    break;
+                            }
+                            break;
+
+                        case 'f': // face
+                            ReadFace(reader);
+                            break;
+
+                        case 'm': // material
+                            if (reader.CountTokens() == 2)
+                                AddStatement('m', reader);
+                            break;
+
+                        case 'g': // group
+                        case 'o': // object
+                            if (reader.CountTokens() >= 2) // g + groupName + ...
+                                AddStatement('g', reader);
+                            break;
+
+                        case 'u':
+                            if (reader.CountTokens() != 2) // usemtl + mat name
+                                throw new ApplicationException("Parse: Usemtl split.Length is invalid");
+                            AddStatement('u', reader);
+                            break;
+                    }
+                }
+            }
 
-            // Remove empty FaceSets and mark empty Groups
-            var delGrpList = new List<string>();
-            foreach (Group grp in m_groups.Values)
+            private static int ReadFloats(ObjTokenReader reader, float[] values, int index, int count, string error)
             {
-                var delList = new List<string>();
+                if (reader.CountTokens() != count + 1)
+                    throw new ApplicationException(error);
 
-                foreach (FaceSet fs in grp.FaceSets.Values)
+                for (int i = 0; i < count; i++)
                 {
-                    if (fs.Indices.Count == 0)
-                        delList.Add(fs.MaterialName);
+                    reader.NextToken();
+                    values[index++] = reader.ParseFloat();
                 }
-                foreach (string fsName in delList)
-                    grp.FaceSets.Remove(fsName);
-                if (grp.FaceSets.Count == 0)
-                    delGrpList.Add(grp.Name);
+
+                return index;
             }
 
-            // Remove empty groups
-            foreach (string grpn in delGrpList)
-                m_groups.Remove(grpn);
+            private void ReadFace(ObjTokenReader reader)
+            {
+                int tokenCount = reader.CountTokens();
+                if (tokenCount < 4) // f v/vt/vn v/vt/vn v/vt/vn ...
+                    throw new ApplicationException("Parse: Face split.Length is invalid");
+
+                Statement faces = Statements.Count > 0 ? Statements[Statements.Count - 1] : null;
+                if (faces == null || faces.Keyword != 'f')
+                {
+                    faces = new Statement('f', null);
+                    faces.IndexStart = Indices.Count;
+                    faces.SizeStart = Sizes.Count;
+                    Statements.Add(faces);
+                }
+
+                Sizes.Add(tokenCount - 1);
+                while (reader.NextToken())
+                {
+                    int start = reader.TokenStart;
+                    int end = reader.TokenEnd;
+                    int vertexEnd = reader.IndexOf('/', start, end);
+                    if (vertexEnd < 0) // v
+                    {
+                        vertexEnd = end;
+                    }
+                    else
+                    {
+                        int texCoordEnd = reader.IndexOf('/', vertexEnd + 1, end);
+                        if (texCoordEnd < 0) // v/vt
+                        {
+                            Indices.Add(reader.ParseInt(vertexEnd + 1, end) - 1);
+                            faces.HasTexCoords = true;
+                        }
+                        else if (reader.IndexOf('/', texCoordEnd + 1, end) < 0) // v/vt/vn or v//vn
+                        {
+                            Indices.Add(reader.ParseInt(texCoordEnd + 1, end) - 1);
+                            faces.HasNormals = true;
+
+                            if (texCoordEnd > vertexEnd + 1)
+                            {
+                                Indices.Add(reader.ParseInt(vertexEnd + 1, texCoordEnd) - 1);
+                                faces.HasTexCoords = true;
+                            }
+                        }
+                    }
+                    Indices.Add(reader.ParseInt(start, vertexEnd) - 1);
+                }
+
+                faces.IndexEnd = Indices.Count;
+                faces.SizeEnd = Sizes.Count;
+            }
+
+            private void AddStatement(char keyword, ObjTokenReader reader)
+            {
+                reader.NextToken();
+                Statements.Add(new Statement(keyword, reader.GetTokenString()));
+            }
+        }
+
+        /// <summary>
+        /// A material, group or usemtl statement, or a run of faces</summary>
+        private class Statement
+        {
+            public Statement(char keyword, string name)
+            {
+                Keyword = keyword;
+                Name = name;
+            }
+
+            public readonly char Keyword;
+            public readonly string Name;
+
+            public int IndexStart;
+            public int IndexEnd;
+            public int SizeStart;
+            public int SizeEnd;
+            public bool HasNormals;
+            public bool HasTexCoords;
         }
 
         private MtlFile m_mtl = new MtlFile();
+        private readonly List<string> m_materialFiles = new List<string>();
         private readonly Dictionary<string, Group> m_groups = new Dictionary<string, Group>();
 
-        private readonly List<float> m_positions = new List<float>();
-        private readonly List<float> m_normals = new List<float>();
-        private readonly List<float> m_texcoords = new List<float>();
+        private float[] m_positions;
+        private float[] m_normals;
+        private float[] m_texcoords;
 
         private Group m_currentGroup = new Group();
         private FaceSet m_currentFaceSet = new FaceSet();
         private Uri m_resolvedUri;
 
-        private static readonly char[] s_stringDelimiters = new[] { ' ', '\t' };
+        private const int MinChunkLength = 256 * 1024;
     }
 }
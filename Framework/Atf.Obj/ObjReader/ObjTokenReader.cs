@@ -0,0 +1,281 @@
+//Sony Computer Entertainment Confidential
+
+using System;
+using System.Globalization;
+using System.Text;
+
+namespace Sce.Atf.Obj
+{
+    /// <summary>
+    /// Reads the lines and the space or tab separated tokens of OBJ and MTL file data, without
+    /// creating a string for each line or token. Numbers are parsed with the invariant culture.</summary>
+    internal class ObjTokenReader
+    {
+        /// <summary>
+        /// Constructor</summary>
+        /// <param name="data">File data</param>
+        /// <param name="start">Index of the first byte to read</param>
+        /// <param name="end">Index after the last byte to read</param>
+        public ObjTokenReader(byte[] data, int start, int end)
+        {
+            m_data = data;
+            m_position = start;
+            m_end = end;
+        }
+
+        /// <summary>
+        /// Gets the index of the first byte of file data that follows any UTF-8 byte order mark</summary>
+        /// <param name="data">File data</param>
+        /// <returns>Index of the first byte of file data that follows any UTF-8 byte order mark</returns>
+        public static int GetDataStart(byte[] data)
+        {
+            if (data.Length >= 3 && data[0] == 0xEF && data[1] == 0xBB && data[2] == 0xBF)
+                return 3;
+            return 0;
+        }
+
+        /// <summary>
+        /// Gets the index of the first byte of the current token</summary>
+        public int TokenStart
+        {
+            get { return m_tokenStart; }
+        }
+
+        /// <summary>
+        /// Gets the index after the last byte of the current token</summary>
+        public int TokenEnd
+        {
+            get { return m_tokenEnd; }
+        }
+
+        /// <summary>
+        /// Moves to the first token of the next line that isn't blank or a comment</summary>
+        /// <returns>True iff there was another line</returns>
+        public bool NextLine()
+        {
+            byte[] data = m_data;
+            int index = m_position;
+            while (index < m_end)
+            {
+                byte c = data[index];
+                if (c == '\n' || c == '\r' || IsWhiteSpace(c))
+                {
+                    index++;
+                    continue;
+                }
+
+                int lineEnd = index + 1;
+                while (lineEnd < m_end && data[lineEnd] != '\n' && data[lineEnd] != '\r')
+                    lineEnd++;
+
+                if (c != '#')
+                {
+                    m_lineStart = index;
+                    m_lineEnd = lineEnd;
+                    m_position = lineEnd;
+                    m_tokenStart = index;
+                    m_tokenEnd = SkipToken(index);
+                    return true;
+                }
+
+                index = lineEnd;
+            }
+
+            m_position = m_end;
+            return false;
+        }
+
+        /// <summary>
+        /// Moves to the next token on the current line</summary>
+        /// <returns>True iff there was another token on the line</returns>
+        public bool NextToken()
+        {
+            int index = m_tokenEnd;
+            while (index < m_lineEnd && IsWhiteSpace(m_data[index]))
+                index++;
+
+            m_tokenStart = index;
+            if (index == m_lineEnd)
+            {
+                m_tokenEnd = index;
+                return false;
+            }
+
+            m_tokenEnd = SkipToken(index);
+            return true;
+        }
+
+        /// <summary>
+        /// Gets a character of the current line, counting from its first token</summary>
+        /// <param name="offset">Offset of the character from the start of the first token</param>
+        /// <returns>Character at the offset, or '\0' if the offset is past the end of the line</returns>
+        public char GetLineChar(int offset)
+        {
+            int index = m_lineStart + offset;
+            return index < m_lineEnd ? (char)m_data[index] : '\0';
+        }
+
+        /// <summary>
+        /// Counts the tokens on the current line, including the first</summary>
+        /// <returns>Number of tokens on the current line</returns>
+        public int CountTokens()
+        {
+            byte[] data = m_data;
+            int count = 0;
+            int index = m_lineStart;
+            while (index < m_lineEnd)
+            {
+                if (IsWhiteSpace(data[index]))
+                {
+                    index++;
+                    continue;
+                }
+
+                count++;
+                index = SkipToken(index);
+            }
+
+            return count;
+        }
+
+        /// <summary>
+        /// Gets whether the current token is the given ASCII string</summary>
+        /// <param name="value">ASCII string</param>
+        /// <returns>True iff the current token is the string</returns>
+        public bool TokenEquals(string value)
+        {
+            if (m_tokenEnd - m_tokenStart != value.Length)
+                return false;
+
+            for (int i = 0; i < value.Length; i++)
+                if (m_data[m_tokenStart + i] != value[i])
+                    return false;
+
+            return true;
+        }
+
+        /// <summary>
+        /// Gets the current token as a string</summary>
+        /// <returns>Current token</returns>
+        public string GetTokenString()
+        {
+            return GetString(m_tokenStart, m_tokenEnd);
+        }
+
+        /// <summary>
+        /// Parses the current token as a floating point number</summary>
+        /// <returns>Parsed number</returns>
+        public float ParseFloat()
+        {
+            return ParseFloat(m_tokenStart, m_tokenEnd);
+        }
+
+        /// <summary>
+        /// Parses a range of the file data as a floating point number</summary>
+        /// <param name="start">Index of the first byte of the number</param>
+        /// <param name="end">Index after the last byte of the number</param>
+        /// <returns>Parsed number</returns>
+        /// <exception cref="FormatException">The range isn't a number</exception>
+        public float ParseFloat(int start, int end)
+        {
+            // parse simple decimal numbers directly, and leave the rest to the CLR
+            int index = start;
+            bool negative;
+            ulong mantissa;
+            int exponent;
+            float value;
+            if (NumberParser.TryParseNumber(new NumberParser.AsciiText(m_data), ref index, end, true,
+                    out negative, out mantissa, out exponent) &&
+                index == end &&
+                NumberParser.TryGetSingle(negative, mantissa, exponent, out value))
+            {
+                return value;
+            }
+
+            return ParseFloatString(start, end);
+        }
+
+        /// <summary>
+        /// Parses a range of the file data as an integer</summary>
+        /// <param name="start">Index of the first byte of the integer</param>
+        /// <param name="end">Index after the last byte of the integer</param>
+        /// <returns>Parsed integer</returns>
+        /// <exception cref="FormatException">The range isn't an integer</exception>
+        public int ParseInt(int start, int end)
+        {
+            byte[] data = m_data;
+            int index = start;
+            bool negative = false;
+            if (index < end && (data[index] == '-' || data[index] == '+'))
+            {
+                negative = data[index] == '-';
+                index++;
+            }
+
+            // up to 9 digits always fit in an int
+            if (index < end && end - index <= 9)
+            {
+                int value = 0;
+                for (; index < end; index++)
+                {
+                    int digit = data[index] - '0';
+                    if (digit < 0 || digit > 9)
+                        break;
+                    value = value * 10 + digit;
+                }
+
+                if (index == end)
+                    return negative ? -value : value;
+            }
+
+            return int.Parse(GetString(start, end), NumberStyles.Integer, CultureInfo.InvariantCulture);
+        }
+
+        /// <summary>
+        /// Finds a character in a range of the file data</summary>
+        /// <param name="value">ASCII character to find</param>
+        /// <param name="start">Index of the first byte of the range</param>
+        /// <param name="end">Index after the last byte of the range</param>
+        /// <returns>Index of the first occurrence of the character in the range, or -1 if it isn't found</returns>
+        public int IndexOf(char value, int start, int end)
+        {
+            for (int i = start; i < end; i++)
+                if (m_data[i] == value)
+                    return i;
+            return -1;
+        }
+
+        private float ParseFloatString(int start, int end)
+        {
+            return float.Parse(
+                GetString(start, end),
+                NumberStyles.Float | NumberStyles.AllowThousands,
+                CultureInfo.InvariantCulture);
+        }
+
+        private string GetString(int start, int end)
+        {
+            return Encoding.UTF8.GetString(m_data, start, end - start);
+        }
+
+        private int SkipToken(int index)
+        {
+            while (index < m_lineEnd && !IsWhiteSpace(m_data[index]))
+                index++;
+            return index;
+        }
+
+        private static bool IsWhiteSpace(byte c)
+        {
+            return c == ' ' || c == '\t';
+        }
+
+        private readonly byte[] m_data;
+        private readonly int m_end;
+        private int m_position;
+        private int m_lineStart;
+        private int m_lineEnd;
+        private int m_tokenStart;
+        private int m_tokenEnd;
+    }
+}
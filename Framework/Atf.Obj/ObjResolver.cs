@@ -16,6 +16,19 @@ namespace Sce.Atf.Obj
     [Export(typeof(IResourceResolver))]
     public class ObjResolver : IInitializable, IResourceResolver
     {
+        /// <summary>
+        /// Gets or sets whether large files are parsed on multiple threads. Default is true.</summary>
+        public bool ParallelParsing
+        {
+            get { return m_parallelParsing; }
+            set { m_parallelParsing = value; }
+        }
+
+        /// <summary>
+        /// Gets or sets the cache of parsed files. If null, files are parsed every time that
+        /// they're resolved.</summary>
+        [Import(AllowDefault = true)]
+        public DomResourceCache Cache { get; set; }
 
         #region IInitializable Members
 
@@ -48,9 +61,23 @@ public IResource Resolve(Uri uri)
             DomNode domNode = null;
             try
             {
-                using (Stream stream = File.OpenRead(fileName))
+                DomResourceCache cache = Cache;
+                if (cache != null)
+                {
+                    // the cached tree also depends on the .mtl files, which aren't in the .obj file
+                    domNode = cache.Load(fileName, m_loader.GetNodeType, (stream, dependencies) =>
+                    {
+                        DomNode node = null;
+                        ObjFile.PopulateDomNode(stream, ref node, uri, m_parallelParsing, dependencies);
+                        return node;
+                    });
+                }
+                else
                 {
-                    ObjFile.PopulateDomNode(stream, ref domNode, uri);
+                    using (Stream stream = File.OpenRead(fileName))
+                    {
+                        ObjFile.PopulateDomNode(stream, ref domNode, uri, m_parallelParsing);
+                    }
                 }
             }
             catch (IOException e)
@@ -73,6 +100,7 @@ public IResource Resolve(Uri uri)
 
         private bool Initialized { get; set; }
 
+        private bool m_parallelParsing = true;
         private readonly ObjSchemaTypeLoader m_loader = new ObjSchemaTypeLoader();
     }
 }
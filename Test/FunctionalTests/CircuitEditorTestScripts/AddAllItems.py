@@ -99,4 +99,4 @@ Test.Equal(6, circuitContainer.Wires.Count, "Verify connection count after addin
 totalItemCount = circuitContainer.Elements.Count + circuitContainer.Annotations.Count + circuitContainer.Wires.Count
 Test.Equal(totalItemCount, Test.GetEnumerableCount(editingContext.Items), "Verify item count at end")
 
-print Test.SUCCESS
+Test.Success()
@@ -77,4 +77,4 @@ atfEdit.Paste()
 Test.Equal(16, circuitContainer.Elements.Count, "verify 16 modules")
 Test.Equal(14, circuitContainer.Wires.Count, "verify 14 connections")
 
-print Test.SUCCESS
\ No newline at end of file
+Test.Success()
\ No newline at end of file
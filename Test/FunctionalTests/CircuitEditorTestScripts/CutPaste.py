@@ -78,4 +78,4 @@ atfEdit.Paste()
 Test.Equal(1, circuitContainer.Annotations.Count, "verify comment replaced")
 Test.Equal(circuitContainer.Annotations[0].Text, "I am a comment", "Verify name")
 
-print Test.SUCCESS
\ No newline at end of file
+Test.Success()
\ No newline at end of file
@@ -95,4 +95,4 @@ for module in inputs:
 for module in circuitContainer.Elements:
     Test.True(module.Visible, "Verifying all modules are visible after deleting all layers: " + module.Name)
     
-print Test.SUCCESS
+Test.Success()
@@ -57,4 +57,4 @@ atfFile.Close(doc)
 docNew = atfFile.OpenExistingDocument(editor, Uri(filePath))
 CircuitEditorUtil.VerifyCircuit(circuitContainer, modules, annotations, connections)
 
-print Test.SUCCESS
+Test.Success()
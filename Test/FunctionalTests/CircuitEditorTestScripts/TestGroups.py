@@ -149,4 +149,4 @@ atfEdit.Delete()
 Test.Equal(baselineCnt + 2, editingContext.CircuitContainer.Elements.Count)
 
     
-print Test.SUCCESS
+Test.Success()
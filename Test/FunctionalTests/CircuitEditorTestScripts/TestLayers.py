@@ -122,4 +122,4 @@ for module in inputs:
 
 #Not tested: layers within layers, deleting layers, copy/paste layers
     
-print Test.SUCCESS
+Test.Success()
@@ -93,4 +93,4 @@ while (hist.CanRedo):
 Test.Equal(numElemsAfterEditing,  circuitContainer.Elements.Count, "Verify same number of elements as original graph")
 Test.Equal(numEdgesAfterEditing,  circuitContainer.Wires.Count, "Verify same number of edges as original graph")
 
-print(Test.SUCCESS)
+Test.Success()
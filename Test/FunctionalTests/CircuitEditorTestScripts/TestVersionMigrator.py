@@ -31,4 +31,4 @@ samplePath = Test.GetDataFilePath("OldGroupReference.circuit", "CircuitEditorTes
 doc = atfDocService.OpenExistingDocument(editor, Uri(samplePath))
 Test.Equal(cntOg + 2, Test.GetEnumerableCount(atfDocReg.Documents), "Verify document count increased")
 
-print(Test.SUCCESS)
+Test.Success()
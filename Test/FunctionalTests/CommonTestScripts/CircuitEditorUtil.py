@@ -31,50 +31,14 @@ def VerifyCircuit(newCircuitContainer, modules, annotations, connections):
     Test.Equal(annotations.Count, newCircuitContainer.Annotations.Count, "Verify annotations count")
     Test.Equal(connections.Count, newCircuitContainer.Wires.Count, "Verify connections count")
     
-    for i in range(modules.Count):
-        VerifyModule(modules[i], newCircuitContainer.Elements[i])
-    for i in range(annotations.Count):
-        VerifyAnnotation(annotations[i], newCircuitContainer.Annotations[i])
-    for i in range(connections.Count):
-        VerifyConnection(connections[i], newCircuitContainer.Wires[i])
-    
-    return
-
-def VerifyModule(expected, actual):
-    Test.Equal(expected.Id, actual.Id, "Verify module id")
-    Test.Equal(expected.Name, actual.Name, "Verify module name")
-    Test.Equal(expected.Position.X, actual.Position.X, "Verify module X pos")
-    Test.Equal(expected.Position.Y, actual.Position.Y, "Verify module Y pos")
-    Test.Equal(expected.Type.Name, actual.Type.Name, "Verify module type name")
-    Test.Equal(expected.Type.Inputs.Count, actual.Type.Inputs.Count, "Verify inputs count")
-    Test.Equal(expected.Type.Outputs.Count, actual.Type.Outputs.Count, "Verify outputs count")
-    for i in range(expected.Type.Inputs.Count):
-        VerifyPin(expected.Type.Inputs[i], actual.Type.Inputs[i])
-    for i in range(expected.Type.Outputs.Count):
-        VerifyPin(expected.Type.Outputs[i], actual.Type.Outputs[i])
-    
-    return
-
-def VerifyAnnotation(expected, actual):
-    Test.Equal(expected.Text, actual.Text, "Verify annotation text")
-    Test.Equal(expected.Location.X, actual.Location.X, "Verify annotation X pos")
-    Test.Equal(expected.Location.Y, actual.Location.Y, "Verify annotation Y pos")
-    
-    return
-    
-def VerifyConnection(expected, actual):
-    Test.Equal(expected.Label, actual.Label, "Verify connection label")
-    VerifyModule(expected.OutputElement, actual.OutputElement)
-    VerifyModule(expected.InputElement, actual.InputElement)
-    VerifyPin(expected.OutputPin, actual.OutputPin)
-    VerifyPin(expected.InputPin, actual.InputPin)
-    
-    return
-    
-def VerifyPin(expected, actual):
-    Test.Equal(expected.Name, actual.Name, "Verify pin name")
-    Test.Equal(expected.TypeName, actual.TypeName, "Verify pin TypeName")
-    Test.Equal(expected.Index, actual.Index, "Verify pin Index")
+    #Compare each list of items in one call, instead of field by field, but only the fields
+    #that have always been verified
+    Test.DomEqual(modules, newCircuitContainer.Elements, "Verify modules",
+        Test.DomCompareFields(["name", "label", "x", "y"], []))
+    Test.DomEqual(annotations, newCircuitContainer.Annotations, "Verify annotations",
+        Test.DomCompareFields(["text", "x", "y"], []))
+    Test.DomEqual(connections, newCircuitContainer.Wires, "Verify connections",
+        Test.DomCompareFields(["label", "outputModule", "outputPin", "inputModule", "inputPin"], []))
     
     return
 
@@ -23,4 +23,4 @@ Test.NotNull(doc, "Verify new document created")
 Test.NotNull(atfDocService.ActiveDocument, "Verify we have an active document")
 Test.Equal(doc.PathName, atfDocService.ActiveDocument.PathName, "Verify new document is the active document")
 
-print Test.SUCCESS
+Test.Success()
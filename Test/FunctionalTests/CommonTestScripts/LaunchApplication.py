@@ -7,4 +7,4 @@ import Test
 print "Nothing to do really, just make sure something is initialized:"
 Test.NotNull(atfCommands)
 
-print Test.SUCCESS
+Test.Success()
@@ -6,52 +6,143 @@ sys.path.append("./CommonTestScripts")
 
 SUCCESS = "Success"
 
+# How much the assertions print: QUIET only prints failures and a summary at the end,
+# VERBOSE also prints every assertion that passes. Set Test.Verbosity, or the
+# ATF_TEST_VERBOSITY environment variable, to change it.
+QUIET = 0
+VERBOSE = 1
+Verbosity = int(System.Environment.GetEnvironmentVariable("ATF_TEST_VERBOSITY") or QUIET)
+
+# ============================================================
+# Structured results, recorded while the script runs.
+# AutomationService.ExecuteScriptForResult() resets them before the script runs,
+# and reads them back with Serialize() when it is done.
+# ============================================================
+from System.Diagnostics import Stopwatch
+
+ASSERTIONS = ("Equal", "NotEqual", "True", "False", "NotNull", "GreaterThan", "FuzzyCompare", "DomEqual")
+
+class TestResults(object):
+    def __init__(self):
+        self.Reset()
+
+    # (True and False are assertions in this module, so use 1 and 0 instead)
+    def Reset(self):
+        self.Counts = dict.fromkeys(ASSERTIONS, 0)
+        self.Failures = []
+        self.Phases = []
+        self.Completed = 0
+
+    # Number of assertions that passed
+    def GetPassed(self):
+        return sum(self.Counts.values())
+
+    # Compact form of the results: a header line "<passed> <failed> <completed>",
+    # then one line per phase ("P<seconds>\t<name>") and per failure ("F<message>")
+    def Serialize(self):
+        lines = ["%d %d %d" % (self.GetPassed(), len(self.Failures), self.Completed)]
+        for name, seconds in self.Phases:
+            lines.append("P%.6f\t%s" % (seconds, _Escape(name)))
+        for msg in self.Failures:
+            lines.append("F" + _Escape(msg))
+        return "\n".join(lines)
+
+    # One line with the number of assertions that passed, by kind
+    def GetSummary(self):
+        counts = ["%s: %d" % (name, self.Counts[name]) for name in ASSERTIONS if self.Counts[name]]
+        return "Assertions passed: %d (%s)" % (self.GetPassed(), ", ".join(counts))
+
+def _Escape(text):
+    return unicode(text).replace("\\", "\\\\").replace("\t", "\\t").replace("\r", "\\r").replace("\n", "\\n")
+
+Results = TestResults()
+
+# Marks the script as finished. Call this at the very end of a script; a script that
+# stops before calling it fails, even without an error.
+def Success():
+    Results.Completed = 1
+    print Results.GetSummary()
+    print SUCCESS
+
+# Times a phase of the script, e.g.:
+#   with Test.Phase("Add modules"):
+#       ...
+class Phase(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = Stopwatch.GetTimestamp()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        seconds = float(Stopwatch.GetTimestamp() - self.start) / Stopwatch.Frequency
+        Results.Phases.append((self.name, seconds))
+
+# Records a failed assertion, and stops the script
+def Fail(msg):
+    print msg
+    Results.Failures.append(msg)
+    raise Exception(msg)
+
+# The message of an assertion can be a function that returns it, for messages that are
+# expensive to build, e.g. lambda: "Verify name of " + node.Name. It is only called
+# when the message is printed.
+def _Message(msg):
+    if (callable(msg)):
+        return msg()
+    return msg
+
 # ============================================================
 # "Evaluate" functions, same idea as NUnit's Assert.*
+# Passing assertions only count themselves, unless Verbosity is VERBOSE, so that
+# the messages are only formatted when needed.
 # ============================================================
 def Equal(val1, val2, msg = "Testing equality"):
     if (val1 == val2):
-        print msg + ": " + unicode(val1) + "==" + unicode(val2)
+        Results.Counts["Equal"] += 1
+        if (Verbosity):
+            print _Message(msg) + ": " + unicode(val1) + "==" + unicode(val2)
     else:
-            msg = "Error: " + msg + ": " + unicode(val1) + "!=" + unicode(val2)
-            print msg
-            raise Exception(msg)
+        Fail("Error: " + _Message(msg) + ": " + unicode(val1) + "!=" + unicode(val2))
 
 def NotEqual(val1, val2, msg = "Testing inequality"):
     if (val1 != val2):
-        print msg + ": " + unicode(val1) + "!=" + unicode(val2)
+        Results.Counts["NotEqual"] += 1
+        if (Verbosity):
+            print _Message(msg) + ": " + unicode(val1) + "!=" + unicode(val2)
     else:
-            msg = "Error: " + msg + ": " + unicode(val1) + "==" + unicode(val2)
-            print msg
-            raise Exception(msg)
+        Fail("Error: " + _Message(msg) + ": " + unicode(val1) + "==" + unicode(val2))
 
 def True(val, msg = "Testing true"):
     if (val):
-        print msg + ": " + unicode(val) + " is true"
+        Results.Counts["True"] += 1
+        if (Verbosity):
+            print _Message(msg) + ": " + unicode(val) + " is true"
     else:
-            msg = "Error: " + msg + ": " + unicode(val) + " should be true"
-            print msg
-            raise Exception(msg)
+        Fail("Error: " + _Message(msg) + ": " + unicode(val) + " should be true")
 
 def False(val, msg = "Testing false"):
     if (not val):
-        print msg + ": " + unicode(val) + " is false"
+        Results.Counts["False"] += 1
+        if (Verbosity):
+            print _Message(msg) + ": " + unicode(val) + " is false"
     else:
-            msg = "Error: " + msg + ": " + unicode(val) + " should be false"
-            print msg
-            raise Exception(msg)
+        Fail("Error: " + _Message(msg) + ": " + unicode(val) + " should be false")
 
 def NotNull(val, msg = "Testing not null"):
     #Python will throw a NameExcpetion if val is not defined, so no need to test the value
-    print msg + ": " + unicode(val) + " is not null"
+    Results.Counts["NotNull"] += 1
+    if (Verbosity):
+        print _Message(msg) + ": " + unicode(val) + " is not null"
 
 def GreaterThan(val1, val2, msg = "Testing greater than"):
     if (val1 > val2):
-        print msg + ": " + unicode(val1) + " > " + unicode(val2)
+        Results.Counts["GreaterThan"] += 1
+        if (Verbosity):
+            print _Message(msg) + ": " + unicode(val1) + " > " + unicode(val2)
     else:
-        msg = "Error: " + msg + ": " + unicode(val1) + " <= " + unicode(val2)
-        print msg
-        raise Exception(msg)
+        Fail("Error: " + _Message(msg) + ": " + unicode(val1) + " <= " + unicode(val2))
 
 #For comparing numbers that might not match exactly.
 #(Try converting numbers to Decimal and comparing first, but there
@@ -59,11 +150,37 @@ def GreaterThan(val1, val2, msg = "Testing greater than"):
 #are converted from radians to degrees)
 def FuzzyCompare(val1, val2, msg = "Testing fuzzy equality", threshold = 0.001):
     if (System.Math.Abs(val1 - val2) <= threshold):
-        print msg + ": " + unicode(val1) + "~=" + unicode(val2)
+        Results.Counts["FuzzyCompare"] += 1
+        if (Verbosity):
+            print _Message(msg) + ": " + unicode(val1) + "~=" + unicode(val2)
     else:
-        msg = "Error in fuzzy compare: " + msg + ": " + unicode(val1) + "!~=" + unicode(val2)
-        print msg
-        raise Exception(msg)
+        Fail("Error in fuzzy compare: " + _Message(msg) + ": " + unicode(val1) + "!~=" + unicode(val2))
+
+#Compares two DOM node subtrees, or two lists of DOM nodes or their adapters (e.g. the
+#modules of two circuits), in one call: types, attributes, children and references.
+#options is a Sce.Atf.Dom.DomCompareOptions, e.g. for a float tolerance, or None.
+def DomEqual(expected, actual, msg = "Testing DOM equality", options = None):
+    from Sce.Atf.Dom import DomCompare
+    differences = DomCompare.Diff(expected, actual, options)
+    if (differences.Count == 0):
+        Results.Counts["DomEqual"] += 1
+        if (Verbosity):
+            print _Message(msg) + ": equal"
+    else:
+        Fail("Error: " + _Message(msg) + ":\n" + "\n".join(differences))
+
+#Creates DomEqual options that compare only the named attributes and children, e.g. the
+#fields that a script used to check one by one. None compares all of them, and an empty
+#list of children compares only the nodes themselves.
+def DomCompareFields(attributes, children = None):
+    from Sce.Atf.Dom import DomCompareOptions
+    from System.Collections.Generic import List
+    options = DomCompareOptions()
+    if (attributes is not None):
+        options.ComparedAttributes = List[str](attributes)
+    if (children is not None):
+        options.ComparedChildren = List[str](children)
+    return options
 
 # ============================================================
 # Common file/path functions
@@ -76,6 +193,10 @@ from System import Environment
 # Central function for defining a common output folder
 def GetOutputDir():
     path = Path.Combine(Environment.CurrentDirectory, "tests/TestOutput")
+    # When the tests run in several shards at once, keep each shard's files apart
+    shard = Environment.GetEnvironmentVariable("ATF_TEST_SHARD")
+    if (shard):
+        path = Path.Combine(path, "shard" + shard)
     if (not Directory.Exists(path)):
         Directory.CreateDirectory(path) 
     return path
@@ -27,4 +27,4 @@ Test.NotNull(doc, "Verify new document created")
 Test.NotNull(atfDocReg.ActiveDocument, "Verify we have an active document")
 Test.Equal(doc.Uri.LocalPath, atfDocReg.ActiveDocument.Uri.LocalPath, "Verify new document is the active document")
 
-print Test.SUCCESS
+Test.Success()
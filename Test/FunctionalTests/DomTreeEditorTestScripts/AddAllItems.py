@@ -204,4 +204,4 @@ Test.Equal(Test.GetEnumerableCount(treeLister.TreeView.GetChildren(animation.Dom
 editingContext.Insert[UIAnimation](DomNode(UISchema.UIAnimationType.Type), animation.DomNode)
 Test.Equal(Test.GetEnumerableCount(treeLister.TreeView.GetChildren(animation.DomNode)), animCount, "Verify animation child count does not increase when adding an animation")
 
-print Test.SUCCESS
+Test.Success()
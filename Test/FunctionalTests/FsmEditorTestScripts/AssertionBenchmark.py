@@ -0,0 +1,30 @@
+#Copyright (c) 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+# Measures the cost of a passing assertion when it is printed, as every assertion used
+# to be, and when it only counts itself, which is the default (Test.QUIET).
+
+import sys
+sys.path.append("./CommonTestScripts")
+import Test
+from System.Diagnostics import Stopwatch
+
+COUNT = 5000
+
+# Returns the time per assertion in microseconds
+def MeasureAssertions(verbosity):
+    previous = Test.Verbosity
+    Test.Verbosity = verbosity
+    stopwatch = Stopwatch.StartNew()
+    for i in range(COUNT):
+        Test.Equal(i, i, "Verify module id")
+        Test.True(i >= 0, "Verify module is visible")
+        Test.FuzzyCompare(i * 0.5, i * 0.5, "Verify module X pos")
+    stopwatch.Stop()
+    Test.Verbosity = previous
+    return stopwatch.Elapsed.TotalMilliseconds * 1000 / (3 * COUNT)
+
+printed = MeasureAssertions(Test.VERBOSE)
+quiet = MeasureAssertions(Test.QUIET)
+print "Microseconds per passing assertion: %.2f printed, %.2f quiet" % (printed, quiet)
+
+Test.Success()
@@ -52,4 +52,4 @@ Test.Equal(fsm.Transitions[0].Label, fsm.Transitions[1].Label, "Verify pasted al
 Test.Equal(fsm.Transitions[0].FromState.Name, fsm.Transitions[1].FromState.Name, "Verify pasted all FromState name")
 Test.Equal(fsm.Transitions[0].ToState.Name, fsm.Transitions[1].ToState.Name, "Verify pasted all ToState name")
 
-print Test.SUCCESS
\ No newline at end of file
+Test.Success()
\ No newline at end of file
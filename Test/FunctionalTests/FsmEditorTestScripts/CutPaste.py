@@ -61,4 +61,4 @@ Test.Equal(transition1.Label, fsm.Transitions[0].Label, "Verify pasted all trans
 Test.Equal(transition1.FromState.Name, fsm.Transitions[0].FromState.Name, "Verify pasted all FromState name")
 Test.Equal(transition1.ToState.Name, fsm.Transitions[0].ToState.Name, "Verify pasted all ToState name")
 
-print Test.SUCCESS
\ No newline at end of file
+Test.Success()
\ No newline at end of file
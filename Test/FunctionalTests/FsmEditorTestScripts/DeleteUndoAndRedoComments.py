@@ -40,4 +40,4 @@ for i in range(commentsCnt, 0, -1):
     hist.Redo()
     Test.Equal(i - 1, fsm.Annotations.Count, "Verify comments count after redo");
 
-print Test.SUCCESS
+Test.Success()
@@ -41,4 +41,4 @@ for i in range(statesCnt, 0, -1):
     hist.Redo()
     Test.Equal(i - 1, fsm.States.Count, "Verify states count after redo");
 
-print Test.SUCCESS
+Test.Success()
@@ -52,4 +52,4 @@ for i in range(transitionsCnt, 0, -1):
     hist.Redo()
     Test.Equal(i - 1, fsm.Transitions.Count, "Verify transitions count after redo")
 	
-print Test.SUCCESS
\ No newline at end of file
+Test.Success()
\ No newline at end of file
@@ -65,5 +65,5 @@ for i in range(transitions.Count):
     Test.Equal(transitions[i].FromState.Name, fsm.Transitions[i].FromState.Name, "Verify FromState name")
     Test.Equal(transitions[i].ToState.Name, fsm.Transitions[i].ToState.Name, "Verify ToState name")
     
-print Test.SUCCESS
+Test.Success()
     
\ No newline at end of file
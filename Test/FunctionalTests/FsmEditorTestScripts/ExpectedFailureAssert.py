@@ -10,4 +10,4 @@ print "Next line will fail"
 Test.Equal(2, 3)
 
 # Should never reach here:
-print Test.SUCCESS
+Test.Success()
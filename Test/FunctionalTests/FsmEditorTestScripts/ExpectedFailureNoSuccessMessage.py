@@ -8,4 +8,4 @@ Test.Equal(1, 1)
 Test.Equal(2, 2)
 
 #Intentionally commented, we want this script to fail
-#print Test.SUCCESS
\ No newline at end of file
+#Test.Success()
\ No newline at end of file
@@ -11,4 +11,4 @@ print "5 minutes is up!"
 
 # Should never get here (supposed to timeout in automation), 
 # but just in case make sure to return/print success message
-print Test.SUCCESS
\ No newline at end of file
+Test.Success()
\ No newline at end of file
@@ -28,4 +28,4 @@ FsmUtil.AddNewCommentAndVerify(editingContext, anchorX + 5*spacing, anchorY + 5*
 
 FsmUtil.AddNewCommentAndVerify(editingContext, anchorX + 10*spacing, anchorY, "mmm  you get the point ...")
 
-print Test.SUCCESS
+Test.Success()
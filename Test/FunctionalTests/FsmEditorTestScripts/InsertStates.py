@@ -34,4 +34,4 @@ FsmUtil.AddNewStateAndVerify(editingContext, anchorX + 5*spacing, anchorY + 4*sp
 FsmUtil.AddNewStateAndVerify(editingContext, anchorX + 4*spacing, anchorY + 4*spacing, "i")
 FsmUtil.AddNewStateAndVerify(editingContext, anchorX + 6*spacing, anchorY + 4*spacing, "i")
 
-print Test.SUCCESS
+Test.Success()
@@ -27,4 +27,4 @@ for i in range(trnCnt):
 for i in range(trnCnt):
     Test.Equal("Transition#" + unicode(i), transitions[i].Label)
 
-print Test.SUCCESS
+Test.Success()
@@ -34,4 +34,4 @@ for comment in fsm.Annotations:
     Test.Equal("comment#" + unicode(cnt), comment.Text, "Verify name of comment is consistent after redo")
     cnt = cnt + 1
 
-print Test.SUCCESS
+Test.Success()
@@ -34,4 +34,4 @@ for state in fsm.States:
     Test.Equal("state#" + unicode(cnt), state.Name, "Verify name of state is consistent after redo")
     cnt = cnt + 1
 
-print Test.SUCCESS
+Test.Success()
@@ -43,4 +43,4 @@ for transition in fsm.Transitions:
     Test.Equal("Transition#" + unicode(cnt), transition.Label, "Verify label of transition is consistent after redo")
     cnt = cnt + 1
 
-print Test.SUCCESS
+Test.Success()
@@ -23,6 +23,13 @@ public void CreateNewDocument()
             ExecuteFullTest(scriptPath);
         }
 
+        [Test, Explicit]
+        [Category(Consts.PerformanceTestCategory)]
+        public void AssertionBenchmark()
+        {
+            ExecuteFullTest(ConstructScriptPath());
+        }
+
         [Test]
         public void CopyPaste()
         {
@@ -11,4 +11,4 @@ atfFile.OpenExistingDocument(viewer, Uri(System.IO.Path.GetFullPath("./tests/Res
 
 Test.Equal(1, Test.GetEnumerableCount(atfDocReg.Documents))
 
-print Test.SUCCESS
+Test.Success()
@@ -5,6 +5,7 @@
 using System.Diagnostics;
 using System.IO;
 using System.Reflection;
+using System.Xml;
 using System.Xml.Xsl;
 
 using NUnit.Core;
@@ -42,15 +43,39 @@ public static int RunAllTests(string displayName)
         {
             TestRunner runner = MakeTestRunner(displayName);
             string category = ParseTestCategory();
-            runner.Run(new UnitTestListener(), new TestFilter(category));
-            XmlResultWriter writer = new XmlResultWriter("TestResult.xml");
-            writer.SaveTestResult(runner.TestResult);
+
+            //A shard runs only the tests it was given by the parent process, and leaves
+            //merging and the JUnit conversion to the parent
+            int shardIndex = ShardedTestRunner.GetShardIndex();
+            if (shardIndex >= 0)
+            {
+                runner.Run(new UnitTestListener(), new TestFilter(category, ShardedTestRunner.GetShardTestNames()));
+                XmlResultWriter shardWriter = new XmlResultWriter(ShardedTestRunner.GetShardResultPath(shardIndex));
+                shardWriter.SaveTestResult(runner.TestResult);
+                return runner.TestResult.IsFailure ? -1 : 0;
+            }
+
+            bool failed;
+            int shardCount = ShardedTestRunner.GetShardCount();
+            if (shardCount > 1)
+            {
+                XmlDocument results = ShardedTestRunner.Run(runner, new TestFilter(category), category, shardCount, "TestResult.xml");
+                failed = results.DocumentElement.GetAttribute("failures") != "0" ||
+                    results.DocumentElement.GetAttribute("errors") != "0";
+            }
+            else
+            {
+                runner.Run(new UnitTestListener(), new TestFilter(category));
+                XmlResultWriter writer = new XmlResultWriter("TestResult.xml");
+                writer.SaveTestResult(runner.TestResult);
+                failed = runner.TestResult.IsFailure;
+            }
 
             XslCompiledTransform xsl = new XslCompiledTransform();
             xsl.Load("Resources/NUnitToJUnit.xslt");
             xsl.Transform("TestResult.xml", "TestResult.JUnit.xml");
 
-            if (runner.TestResult.IsFailure)
+            if (failed)
                 return -1;
 
             return 0;
@@ -144,8 +169,18 @@ public void TestFinished(TestResult result)
     internal class TestFilter : ITestFilter
     {
         public TestFilter(string category)
+            : this(category, null)
+        {
+        }
+
+        /// <summary>
+        /// Constructs a filter that only passes the named tests in the category</summary>
+        /// <param name="category">Test category, or null for all categories</param>
+        /// <param name="testNames">Full names of the tests to run, or null for all tests</param>
+        public TestFilter(string category, ICollection<string> testNames)
         {
             m_category = category;
+            m_testNames = testNames;
         }
 
         /// <summary>
@@ -178,6 +213,11 @@ public bool Pass(ITest test)
                 return true;
             }
 
+            if (m_testNames != null && !m_testNames.Contains(test.TestName.FullName))
+            {
+                return false;
+            }
+
             if (string.IsNullOrEmpty(m_category) || 
                 m_category.ToLower() == TestBase.Consts.RunAllTestsCategory.ToLower())
             {
@@ -188,6 +228,7 @@ public bool Pass(ITest test)
         }
 
         private readonly string m_category;
+        private readonly ICollection<string> m_testNames;
     }
 
     internal class DesktopRecorderLauncher
@@ -0,0 +1,585 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.Globalization;
+using System.IO;
+using System.Linq;
+using System.Xml;
+
+using NUnit.Core;
+
+namespace FunctionalTests
+{
+    /// <summary>
+    /// Runs the functional tests in several child processes at once. Each child process runs
+    /// its own subset (shard) of the tests, and so keeps its own application under test alive,
+    /// while this process waits for all shards and merges their results into a single
+    /// TestResult.xml. Tests are distributed using their durations from previous runs, so
+    /// that all shards finish at about the same time.</summary>
+    internal static class ShardedTestRunner
+    {
+        /// <summary>
+        /// Command line flag giving the number of shards to run, e.g. "-shards:4"</summary>
+        public const string ShardsFlag = "-shards:";
+
+        /// <summary>
+        /// Command line flag passed to a child process, giving the file that lists its tests</summary>
+        public const string ShardListFlag = "-shardlist:";
+
+        /// <summary>
+        /// Command line flag passed to a child process, giving its shard index</summary>
+        public const string ShardIndexFlag = "-shard:";
+
+        /// <summary>
+        /// Environment variable that tells test scripts which shard they run in, so that
+        /// concurrently running scripts can write to separate output folders</summary>
+        public const string ShardEnvironmentVariable = "ATF_TEST_SHARD";
+
+        /// <summary>
+        /// Runs the tests matching the category in the given number of shards, merges the results
+        /// and records the test durations for scheduling the next run</summary>
+        /// <param name="runner">Loaded test runner, used to enumerate the tests</param>
+        /// <param name="filter">Filter selecting the tests to run</param>
+        /// <param name="category">Test category passed on to the shards, or null</param>
+        /// <param name="shardCount">Number of child processes to run at once</param>
+        /// <param name="resultPath">Path of the merged NUnit result file</param>
+        /// <returns>The merged results document</returns>
+        public static XmlDocument Run(TestRunner runner, TestFilter filter, string category, int shardCount, string resultPath)
+        {
+            List<string> testNames = new List<string>();
+            CollectTestNames(runner.Test, filter, testNames);
+
+            Dictionary<string, double> durations = LoadDurations(DurationsPath);
+            List<string>[] shards = Schedule(testNames, durations, shardCount);
+
+            string exePath = Process.GetCurrentProcess().MainModule.FileName;
+            List<Process> processes = new List<Process>();
+            List<Shard> startedShards = new List<Shard>();
+            for (int i = 0; i < shards.Length; i++)
+            {
+                if (shards[i].Count == 0)
+                    continue;
+
+                string listPath = string.Format("Shard{0}.txt", i);
+                File.WriteAllLines(listPath, shards[i].ToArray());
+                Shard shard = new Shard(i, shards[i]);
+                if (File.Exists(shard.ResultPath))
+                    File.Delete(shard.ResultPath);
+                startedShards.Add(shard);
+
+                Process process = new Process();
+                process.StartInfo.FileName = exePath;
+                process.StartInfo.Arguments = string.Format("{0}{1} {2}{3}", ShardIndexFlag, i, ShardListFlag, listPath);
+                if (!string.IsNullOrEmpty(category))
+                    process.StartInfo.Arguments += " -category:" + category;
+                process.StartInfo.UseShellExecute = false;
+                process.StartInfo.RedirectStandardOutput = true;
+                process.StartInfo.EnvironmentVariables[ShardEnvironmentVariable] = i.ToString(CultureInfo.InvariantCulture);
+                int shardIndex = i;
+                process.OutputDataReceived += (sender, e) =>
+                {
+                    if (e.Data != null)
+                        Console.WriteLine("[shard {0}] {1}", shardIndex, e.Data);
+                };
+                Console.WriteLine("Starting shard {0} with {1} tests", i, shards[i].Count);
+                process.Start();
+                process.BeginOutputReadLine();
+                processes.Add(process);
+            }
+
+            for (int i = 0; i < processes.Count; i++)
+            {
+                processes[i].WaitForExit();
+                startedShards[i].ExitCode = processes[i].ExitCode;
+            }
+
+            XmlDocument merged = MergeResults(startedShards);
+            merged.Save(resultPath);
+            SaveDurations(DurationsPath, durations, merged);
+
+            return merged;
+        }
+
+        /// <summary>
+        /// Gets the shard index passed on the command line, or -1 if this process is not a shard</summary>
+        /// <returns>Shard index or -1</returns>
+        public static int GetShardIndex()
+        {
+            string value = GetArgument(ShardIndexFlag);
+            int index;
+            if (value != null && int.TryParse(value, out index))
+                return index;
+            return -1;
+        }
+
+        /// <summary>
+        /// Gets the number of shards requested on the command line, or 1</summary>
+        /// <returns>Number of shards</returns>
+        public static int GetShardCount()
+        {
+            string value = GetArgument(ShardsFlag);
+            int count;
+            if (value != null && int.TryParse(value, out count) && count > 0)
+                return count;
+            return 1;
+        }
+
+        /// <summary>
+        /// Gets the full names of the tests this shard should run, or null if this process
+        /// is not a shard</summary>
+        /// <returns>Test names or null</returns>
+        public static ICollection<string> GetShardTestNames()
+        {
+            string listPath = GetArgument(ShardListFlag);
+            if (listPath == null)
+                return null;
+            return new HashSet<string>(File.ReadAllLines(listPath));
+        }
+
+        /// <summary>
+        /// Gets the path of the NUnit result file written by the given shard</summary>
+        /// <param name="shardIndex">Shard index</param>
+        /// <returns>Result file path</returns>
+        public static string GetShardResultPath(int shardIndex)
+        {
+            return string.Format("TestResult.shard{0}.xml", shardIndex);
+        }
+
+        /// <summary>
+        /// Distributes the tests over the shards, longest first, each test going to the shard
+        /// with the least total expected duration so far</summary>
+        /// <param name="testNames">Full test names</param>
+        /// <param name="durations">Known durations in seconds, by test name</param>
+        /// <param name="shardCount">Number of shards</param>
+        /// <returns>Array of test name lists, one per shard</returns>
+        public static List<string>[] Schedule(IEnumerable<string> testNames, IDictionary<string, double> durations, int shardCount)
+        {
+            //Tests that have never run are assumed to take as long as a typical test
+            double defaultDuration = DefaultDurationInSecs;
+            if (durations.Count > 0)
+            {
+                List<double> known = new List<double>(durations.Values);
+                known.Sort();
+                defaultDuration = known[known.Count / 2];
+            }
+
+            List<KeyValuePair<string, double>> estimates = new List<KeyValuePair<string, double>>();
+            foreach (string name in testNames)
+            {
+                double duration;
+                if (!durations.TryGetValue(name, out duration))
+                    duration = defaultDuration;
+                estimates.Add(new KeyValuePair<string, double>(name, duration));
+            }
+            estimates.Sort((x, y) => y.Value.CompareTo(x.Value));
+
+            List<string>[] shards = new List<string>[shardCount];
+            double[] totals = new double[shardCount];
+            for (int i = 0; i < shardCount; i++)
+                shards[i] = new List<string>();
+
+            foreach (KeyValuePair<string, double> estimate in estimates)
+            {
+                int shortest = 0;
+                for (int i = 1; i < shardCount; i++)
+                {
+                    if (totals[i] < totals[shortest])
+                        shortest = i;
+                }
+                shards[shortest].Add(estimate.Key);
+                totals[shortest] += estimate.Value;
+            }
+
+            return shards;
+        }
+
+        /// <summary>
+        /// Merges the NUnit result files of all shards into one document with the layout
+        /// of a single-process run, recomputing the suite results and the totals. A shard
+        /// whose result file is missing or unreadable, or that exited with an error without
+        /// reporting any failed tests, is reported as an error, as are the tests it didn't
+        /// report, so that a crashed shard fails the run.</summary>
+        /// <param name="shards">Shards that were run, with their exit codes</param>
+        /// <returns>Merged results document</returns>
+        public static XmlDocument MergeResults(IEnumerable<Shard> shards)
+        {
+            XmlDocument merged = null;
+            List<KeyValuePair<Shard, string>> failedShards = new List<KeyValuePair<Shard, string>>();
+            foreach (Shard shard in shards)
+            {
+                string error;
+                XmlDocument document = ReadShardResults(shard, out error);
+                if (error != null)
+                {
+                    Console.WriteLine("Shard {0} failed: {1}", shard.Index, error);
+                    failedShards.Add(new KeyValuePair<Shard, string>(shard, error));
+                }
+
+                if (document == null)
+                    continue;
+
+                if (merged == null)
+                {
+                    merged = document;
+                    continue;
+                }
+
+                XmlElement mergedAssembly = (XmlElement)merged.DocumentElement.SelectSingleNode("test-suite");
+                XmlElement shardAssembly = (XmlElement)document.DocumentElement.SelectSingleNode("test-suite");
+                if (mergedAssembly != null && shardAssembly != null)
+                    MergeSuite(mergedAssembly, shardAssembly);
+            }
+
+            if (merged == null)
+                merged = CreateEmptyResults();
+
+            XmlElement assembly = (XmlElement)merged.DocumentElement.SelectSingleNode("test-suite");
+            if (failedShards.Count > 0)
+            {
+                HashSet<string> reportedTests = new HashSet<string>();
+                foreach (XmlElement testCase in merged.SelectNodes("//test-case").OfType<XmlElement>())
+                {
+                    if (testCase.GetAttribute("executed") == "True")
+                        reportedTests.Add(testCase.GetAttribute("name"));
+                }
+
+                foreach (KeyValuePair<Shard, string> failedShard in failedShards)
+                    AddShardFailure(assembly, failedShard.Key, failedShard.Value, reportedTests);
+            }
+
+            UpdateSuite(assembly);
+            UpdateTotals(merged.DocumentElement);
+
+            return merged;
+        }
+
+        /// <summary>
+        /// A child process running a subset of the tests</summary>
+        public class Shard
+        {
+            /// <summary>
+            /// Constructor</summary>
+            /// <param name="index">Shard index</param>
+            /// <param name="testNames">Full names of the tests the shard runs</param>
+            public Shard(int index, ICollection<string> testNames)
+            {
+                Index = index;
+                TestNames = testNames;
+                ResultPath = GetShardResultPath(index);
+            }
+
+            /// <summary>
+            /// Gets the shard index</summary>
+            public int Index { get; private set; }
+
+            /// <summary>
+            /// Gets the full names of the tests the shard runs</summary>
+            public ICollection<string> TestNames { get; private set; }
+
+            /// <summary>
+            /// Gets or sets the path of the NUnit result file written by the shard</summary>
+            public string ResultPath { get; set; }
+
+            /// <summary>
+            /// Gets or sets the exit code of the shard's process</summary>
+            public int ExitCode { get; set; }
+        }
+
+        // Reads a shard's result file, returning null if it's missing or unreadable, and sets
+        //  'error' if the shard failed without reporting failed tests
+        private static XmlDocument ReadShardResults(Shard shard, out string error)
+        {
+            error = null;
+            if (!File.Exists(shard.ResultPath))
+            {
+                error = string.Format("no result file was written, exit code {0}", shard.ExitCode);
+                return null;
+            }
+
+            XmlDocument document = new XmlDocument();
+            try
+            {
+                document.Load(shard.ResultPath);
+            }
+            catch (XmlException e)
+            {
+                error = string.Format("unreadable result file, exit code {0}: {1}", shard.ExitCode, e.Message);
+                return null;
+            }
+            catch (IOException e)
+            {
+                error = string.Format("unreadable result file, exit code {0}: {1}", shard.ExitCode, e.Message);
+                return null;
+            }
+
+            if (document.DocumentElement == null ||
+                document.DocumentElement.SelectSingleNode("test-suite") == null)
+            {
+                error = string.Format("result file has no test results, exit code {0}", shard.ExitCode);
+                return null;
+            }
+
+            //A shard's exit code is non-zero when its tests fail, which the results already show
+            if (shard.ExitCode != 0 &&
+                document.DocumentElement.GetAttribute("failures") == "0" &&
+                document.DocumentElement.GetAttribute("errors") == "0")
+            {
+                error = string.Format("exited with code {0}", shard.ExitCode);
+            }
+
+            return document;
+        }
+
+        private static XmlDocument CreateEmptyResults()
+        {
+            XmlDocument document = new XmlDocument();
+            XmlElement root = document.CreateElement("test-results");
+            root.SetAttribute("name", "FunctionalTests");
+            document.AppendChild(root);
+            XmlElement assembly = document.CreateElement("test-suite");
+            assembly.SetAttribute("type", "Assembly");
+            assembly.SetAttribute("name", "FunctionalTests");
+            root.AppendChild(assembly);
+            assembly.AppendChild(document.CreateElement("results"));
+            return document;
+        }
+
+        // Adds a suite for the failed shard, holding an error for the shard itself and for each
+        //  of its tests that no shard reported. The errors have no time, so that they're left
+        //  out of the recorded durations.
+        private static void AddShardFailure(XmlElement assembly, Shard shard, string error, ICollection<string> reportedTests)
+        {
+            XmlDocument document = assembly.OwnerDocument;
+            XmlElement results = (XmlElement)assembly.SelectSingleNode("results");
+            if (results == null)
+            {
+                results = document.CreateElement("results");
+                assembly.AppendChild(results);
+            }
+
+            string shardName = string.Format("Shard{0}", shard.Index);
+            XmlElement suite = document.CreateElement("test-suite");
+            suite.SetAttribute("type", "TestFixture");
+            suite.SetAttribute("name", shardName);
+            results.AppendChild(suite);
+            XmlElement suiteResults = document.CreateElement("results");
+            suite.AppendChild(suiteResults);
+
+            string message = string.Format("Shard {0} failed: {1}", shard.Index, error);
+            suiteResults.AppendChild(CreateErrorTestCase(document, shardName, message));
+            foreach (string testName in shard.TestNames)
+            {
+                if (!reportedTests.Contains(testName))
+                    suiteResults.AppendChild(CreateErrorTestCase(document, testName, message));
+            }
+        }
+
+        private static XmlElement CreateErrorTestCase(XmlDocument document, string name, string message)
+        {
+            XmlElement testCase = document.CreateElement("test-case");
+            testCase.SetAttribute("name", name);
+            testCase.SetAttribute("executed", "True");
+            testCase.SetAttribute("result", "Error");
+            testCase.SetAttribute("success", "False");
+            XmlElement failure = document.CreateElement("failure");
+            XmlElement messageElement = document.CreateElement("message");
+            messageElement.AppendChild(document.CreateCDataSection(message));
+            failure.AppendChild(messageElement);
+            testCase.AppendChild(failure);
+            return testCase;
+        }
+
+        private static void CollectTestNames(ITest test, TestFilter filter, ICollection<string> testNames)
+        {
+            if (test.IsSuite)
+            {
+                if (test.Tests != null)
+                {
+                    foreach (ITest child in test.Tests)
+                        CollectTestNames(child, filter, testNames);
+                }
+            }
+            else if (filter.Pass(test))
+            {
+                testNames.Add(test.TestName.FullName);
+            }
+        }
+
+        private static void MergeSuite(XmlElement target, XmlElement source)
+        {
+            XmlElement sourceResults = (XmlElement)source.SelectSingleNode("results");
+            if (sourceResults == null)
+                return;
+
+            XmlElement targetResults = (XmlElement)target.SelectSingleNode("results");
+            if (targetResults == null)
+            {
+                targetResults = target.OwnerDocument.CreateElement("results");
+                target.AppendChild(targetResults);
+            }
+
+            foreach (XmlElement sourceChild in sourceResults.ChildNodes.OfType<XmlElement>())
+            {
+                XmlElement targetChild = FindChild(targetResults, sourceChild.Name, sourceChild.GetAttribute("name"));
+                if (sourceChild.Name == "test-suite" && targetChild != null)
+                {
+                    MergeSuite(targetChild, sourceChild);
+                }
+                else if (targetChild == null)
+                {
+                    targetResults.AppendChild(target.OwnerDocument.ImportNode(sourceChild, true));
+                }
+                else if (sourceChild.GetAttribute("executed") == "True")
+                {
+                    //A test that ran in this shard replaces a placeholder for the same test from another shard
+                    targetResults.ReplaceChild(target.OwnerDocument.ImportNode(sourceChild, true), targetChild);
+                }
+            }
+        }
+
+        private static XmlElement FindChild(XmlElement results, string elementName, string name)
+        {
+            foreach (XmlElement child in results.ChildNodes.OfType<XmlElement>())
+            {
+                if (child.Name == elementName && child.GetAttribute("name") == name)
+                    return child;
+            }
+            return null;
+        }
+
+        private static void UpdateSuite(XmlElement suite)
+        {
+            bool executed = false;
+            bool success = true;
+            double time = 0;
+
+            XmlElement results = (XmlElement)suite.SelectSingleNode("results");
+            if (results != null)
+            {
+                foreach (XmlElement child in results.ChildNodes.OfType<XmlElement>())
+                {
+                    if (child.Name == "test-suite")
+                        UpdateSuite(child);
+
+                    if (child.GetAttribute("executed") != "True")
+                        continue;
+                    executed = true;
+                    if (child.GetAttribute("success") != "True")
+                        success = false;
+                    time += ParseTime(child);
+                }
+            }
+
+            suite.SetAttribute("executed", executed ? "True" : "False");
+            if (executed)
+            {
+                suite.SetAttribute("result", success ? "Success" : "Failure");
+                suite.SetAttribute("success", success ? "True" : "False");
+                suite.SetAttribute("time", time.ToString("0.000", CultureInfo.InvariantCulture));
+            }
+        }
+
+        private static void UpdateTotals(XmlElement root)
+        {
+            int total = 0, errors = 0, failures = 0, notRun = 0, inconclusive = 0, ignored = 0, skipped = 0, invalid = 0;
+            foreach (XmlElement testCase in root.SelectNodes("//test-case").OfType<XmlElement>())
+            {
+                string result = testCase.GetAttribute("result");
+                if (testCase.GetAttribute("executed") == "True")
+                {
+                    total++;
+                    if (result == "Error")
+                        errors++;
+                    else if (result == "Failure")
+                        failures++;
+                    else if (result == "Inconclusive")
+                        inconclusive++;
+                }
+                else
+                {
+                    notRun++;
+                    if (result == "Ignored")
+                        ignored++;
+                    else if (result == "Skipped")
+                        skipped++;
+                    else if (result == "NotRunnable")
+                        invalid++;
+                }
+            }
+
+            root.SetAttribute("total", total.ToString(CultureInfo.InvariantCulture));
+            root.SetAttribute("errors", errors.ToString(CultureInfo.InvariantCulture));
+            root.SetAttribute("failures", failures.ToString(CultureInfo.InvariantCulture));
+            root.SetAttribute("not-run", notRun.ToString(CultureInfo.InvariantCulture));
+            root.SetAttribute("inconclusive", inconclusive.ToString(CultureInfo.InvariantCulture));
+            root.SetAttribute("ignored", ignored.ToString(CultureInfo.InvariantCulture));
+            root.SetAttribute("skipped", skipped.ToString(CultureInfo.InvariantCulture));
+            root.SetAttribute("invalid", invalid.ToString(CultureInfo.InvariantCulture));
+        }
+
+        private static double ParseTime(XmlElement element)
+        {
+            double time;
+            if (double.TryParse(element.GetAttribute("time"), NumberStyles.Float, CultureInfo.InvariantCulture, out time))
+                return time;
+            return 0;
+        }
+
+        private static Dictionary<string, double> LoadDurations(string path)
+        {
+            Dictionary<string, double> durations = new Dictionary<string, double>();
+            if (!File.Exists(path))
+                return durations;
+
+            try
+            {
+                XmlDocument doc = new XmlDocument();
+                doc.Load(path);
+                foreach (XmlElement test in doc.DocumentElement.SelectNodes("test").OfType<XmlElement>())
+                    durations[test.GetAttribute("name")] = ParseTime(test);
+            }
+            catch (XmlException e)
+            {
+                Console.WriteLine("Ignoring unreadable test durations file {0}: {1}", path, e.Message);
+            }
+
+            return durations;
+        }
+
+        private static void SaveDurations(string path, Dictionary<string, double> durations, XmlDocument results)
+        {
+            foreach (XmlElement testCase in results.SelectNodes("//test-case").OfType<XmlElement>())
+            {
+                if (testCase.GetAttribute("executed") == "True" && testCase.HasAttribute("time"))
+                    durations[testCase.GetAttribute("name")] = ParseTime(testCase);
+            }
+
+            XmlDocument doc = new XmlDocument();
+            XmlElement root = doc.CreateElement("durations");
+            doc.AppendChild(root);
+            foreach (KeyValuePair<string, double> duration in durations.OrderBy(x => x.Key))
+            {
+                XmlElement test = doc.CreateElement("test");
+                test.SetAttribute("name", duration.Key);
+                test.SetAttribute("time", duration.Value.ToString("0.000", CultureInfo.InvariantCulture));
+                root.AppendChild(test);
+            }
+            doc.Save(path);
+        }
+
+        private static string GetArgument(string flag)
+        {
+            foreach (string arg in Environment.GetCommandLineArgs())
+            {
+                if (arg.ToLower().StartsWith(flag))
+                    return arg.Substring(flag.Length);
+            }
+            return null;
+        }
+
+        private const string DurationsPath = "TestDurations.xml";
+        private const double DefaultDurationInSecs = 30;
+    }
+}
@@ -0,0 +1,103 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System.IO;
+using System.Linq;
+using System.Xml;
+
+using NUnit.Framework;
+
+namespace FunctionalTests
+{
+    [TestFixture]
+    public class ShardedTestRunnerTests
+    {
+        [SetUp]
+        public void SetUp()
+        {
+            m_directory = Path.Combine(Path.GetTempPath(), Path.GetRandomFileName());
+            Directory.CreateDirectory(m_directory);
+        }
+
+        [TearDown]
+        public void TearDown()
+        {
+            Directory.Delete(m_directory, true);
+        }
+
+        [Test]
+        [Category(TestBase.Consts.SmokeTestCategory)]
+        public void MergeResultsOfCrashedShard()
+        {
+            ShardedTestRunner.Shard first = CreateShard(0, "FunctionalTests.AppTests.A");
+            WriteResults(first.ResultPath, "FunctionalTests.AppTests.A");
+
+            // the second shard crashed before writing its results
+            ShardedTestRunner.Shard second = CreateShard(1, "FunctionalTests.AppTests.B", "FunctionalTests.AppTests.C");
+            second.ExitCode = -532462766;
+
+            XmlDocument merged = ShardedTestRunner.MergeResults(new[] { first, second });
+            XmlElement root = merged.DocumentElement;
+            Assert.AreEqual(root.GetAttribute("total"), "4");
+            Assert.AreEqual(root.GetAttribute("errors"), "3");
+            Assert.AreEqual(GetResult(merged, "FunctionalTests.AppTests.A"), "Success");
+            Assert.AreEqual(GetResult(merged, "FunctionalTests.AppTests.B"), "Error");
+            Assert.AreEqual(GetResult(merged, "FunctionalTests.AppTests.C"), "Error");
+            Assert.AreEqual(GetResult(merged, "Shard1"), "Error");
+            Assert.AreEqual(((XmlElement)root.SelectSingleNode("test-suite")).GetAttribute("success"), "False");
+        }
+
+        [Test]
+        [Category(TestBase.Consts.SmokeTestCategory)]
+        public void MergeResultsOfFailedShards()
+        {
+            // a shard that exited with an error without reporting a failure
+            ShardedTestRunner.Shard first = CreateShard(0, "FunctionalTests.AppTests.A");
+            WriteResults(first.ResultPath, "FunctionalTests.AppTests.A");
+            first.ExitCode = 1;
+
+            // and a shard whose result file is unreadable
+            ShardedTestRunner.Shard second = CreateShard(1, "FunctionalTests.AppTests.B");
+            File.WriteAllText(second.ResultPath, "<test-results");
+
+            XmlDocument merged = ShardedTestRunner.MergeResults(new[] { first, second });
+            Assert.AreEqual(merged.DocumentElement.GetAttribute("errors"), "3");
+            Assert.AreEqual(GetResult(merged, "FunctionalTests.AppTests.A"), "Success");
+            Assert.AreEqual(GetResult(merged, "FunctionalTests.AppTests.B"), "Error");
+            Assert.AreEqual(GetResult(merged, "Shard0"), "Error");
+            Assert.AreEqual(GetResult(merged, "Shard1"), "Error");
+
+            // with no results at all, the run still fails
+            File.Delete(first.ResultPath);
+            merged = ShardedTestRunner.MergeResults(new[] { first, second });
+            Assert.AreEqual(merged.DocumentElement.GetAttribute("errors"), "4");
+        }
+
+        private ShardedTestRunner.Shard CreateShard(int index, params string[] testNames)
+        {
+            ShardedTestRunner.Shard shard = new ShardedTestRunner.Shard(index, testNames);
+            shard.ResultPath = Path.Combine(m_directory, ShardedTestRunner.GetShardResultPath(index));
+            return shard;
+        }
+
+        private static void WriteResults(string path, params string[] testNames)
+        {
+            string testCases = string.Concat(testNames.Select(name =>
+                "<test-case name=\"" + name + "\" executed=\"True\" result=\"Success\" success=\"True\" time=\"1.000\" asserts=\"0\" />"));
+            File.WriteAllText(path,
+                "<test-results name=\"FunctionalTests.exe\" total=\"" + testNames.Length + "\" errors=\"0\" failures=\"0\">" +
+                "<test-suite type=\"Assembly\" name=\"FunctionalTests.exe\" executed=\"True\" result=\"Success\" success=\"True\"><results>" +
+                "<test-suite type=\"TestFixture\" name=\"AppTests\" executed=\"True\" result=\"Success\" success=\"True\"><results>" +
+                testCases +
+                "</results></test-suite></results></test-suite></test-results>");
+        }
+
+        private static string GetResult(XmlDocument results, string testName)
+        {
+            XmlElement testCase = results.SelectNodes("//test-case").OfType<XmlElement>()
+                .Single(x => x.GetAttribute("name") == testName);
+            return testCase.GetAttribute("result");
+        }
+
+        private string m_directory;
+    }
+}
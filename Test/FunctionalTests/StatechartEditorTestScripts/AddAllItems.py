@@ -77,4 +77,4 @@ Test.Equal(7, Test.GetEnumerableCount(editingContext.Edges), "Verify edge count"
 parentStateToConditionalState = editingContext.Connect(stateParent, BoundaryRoute(0.5), conditionalState, BoundaryRoute(1.5), None)
 Test.Equal(8, Test.GetEnumerableCount(editingContext.Edges), "Verify edge count")
 
-print Test.SUCCESS
+Test.Success()
@@ -68,5 +68,5 @@ editor.Open(Uri(filePath))
 
 StatechartEditorUtil.VerifyStatechart(editingContext, states, comments, edges)
 
-print Test.SUCCESS
+Test.Success()
 
@@ -115,4 +115,4 @@ Test.Equal(2, Test.GetEnumerableCount(editingContext.Edges), "another edge added
 stateToFinal = editingContext.Connect(theState, BoundaryRoute(1.5), theFinalState, BoundaryRoute(0), None)
 Test.Equal(3, Test.GetEnumerableCount(editingContext.Edges), "another edge added")
 
-print Test.SUCCESS
\ No newline at end of file
+Test.Success()
\ No newline at end of file
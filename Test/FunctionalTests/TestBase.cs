@@ -11,12 +11,33 @@ namespace FunctionalTests
 {
     public abstract class TestBase : FunctionalTestBase
     {
+        protected TestBase()
+        {
+            //Pass "-pool" to keep each application alive across the scripts of its fixture
+            foreach (string arg in Environment.GetCommandLineArgs())
+            {
+                if (arg.ToLower() == "-pool")
+                    UseApplicationPool = true;
+            }
+
+            //Shards run at the same time, so each one launches its applications on its own ports
+            int shardIndex = ShardedTestRunner.GetShardIndex();
+            if (shardIndex >= 0)
+                PortRangeIndex = shardIndex;
+        }
+
         [TearDown]
         public virtual void TearDown()
         {
             TestCleanup();
         }
 
+        [TestFixtureTearDown]
+        public virtual void FixtureTearDown()
+        {
+            ShutdownApplicationPool();
+        }
+
         /// <summary>
         /// This is one time setup before executing the actual script file
         /// </summary>
@@ -26,12 +47,14 @@ protected override void SetupScript(string scriptPath)
             string commonScriptDirPath = Path.Combine(Path.GetDirectoryName(scriptPath), @"..\CommonTestScripts");
             //Python doesn't always like back slashes
             commonScriptDirPath = commonScriptDirPath.Replace("\\", "/");
-            //Add the common scripts folder to the path
-            ExecuteStatementSafe(string.Format("import sys; sys.path.append(\"{0}\")", commonScriptDirPath));
-
-            //It's also always good to have the current folder in the path
+            //Add the common scripts folder to the path, and it's also always good to have the current
+            //folder in the path. One batch makes a single call to the application.
             string curScriptDir = Path.GetDirectoryName(scriptPath).Replace("\\", "/");
-            ExecuteStatementSafe(string.Format("sys.path.append(\"{0}\")", curScriptDir));
+            ExecuteBatchSafe(new[]
+                {
+                    string.Format("import sys; sys.path.append(\"{0}\")", commonScriptDirPath),
+                    string.Format("sys.path.append(\"{0}\")", curScriptDir)
+                }, true, SetupTimeOutInSeconds);
         }
 
         protected abstract string GetAppName();
@@ -46,16 +69,28 @@ protected override string GetScriptsDirectoryPath()
             return Path.GetFullPath(string.Format(@".\{0}TestScripts", GetAppName()));
         }
 
+        /// <summary>
+        /// Timeout for the statements run by SetupScript</summary>
+        protected const int SetupTimeOutInSeconds = 2;
+
         public class Consts
         {
             public const string RunAllTestsCategory = "All";
             public const string SmokeTestCategory = "SmokeTest";
+            public const string PerformanceTestCategory = "Performance";
             public const string ReloadFileWindowTitle = "File Changed, Reload?";
         }
     }
 
     public abstract class TestBaseLegacy : TestBase
     {
+        protected TestBaseLegacy()
+        {
+            //Legacy applications can't be reset between scripts, and don't announce when they are ready
+            UseApplicationPool = false;
+            WaitForReadySignal = false;
+        }
+
         protected override string GetAppExePath()
         {
             return Path.GetFullPath(string.Format(@"..\Legacy\{0}.exe", GetAppName()));
@@ -69,11 +104,14 @@ protected override void SetupScript(string scriptPath)
         {
             string commonScriptDirPath = Path.Combine(Path.GetDirectoryName(scriptPath), @"..\..\CommonTestScripts");
             commonScriptDirPath = commonScriptDirPath.Replace("\\", "/");
-            ExecuteStatementSafe(string.Format("import sys; sys.path.append(\"{0}\")", commonScriptDirPath));
 
             //It's also always good to have the current folder in the path
             string curScriptDir = Path.GetDirectoryName(scriptPath).Replace("\\", "/");
-            ExecuteStatementSafe(string.Format("sys.path.append(\"{0}\")", curScriptDir));
+            ExecuteBatchSafe(new[]
+                {
+                    string.Format("import sys; sys.path.append(\"{0}\")", commonScriptDirPath),
+                    string.Format("sys.path.append(\"{0}\")", curScriptDir)
+                }, true, SetupTimeOutInSeconds);
         }
 
         protected override void CloseApplication()
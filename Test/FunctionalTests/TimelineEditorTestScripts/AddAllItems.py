@@ -74,4 +74,4 @@ Test.Equal("markie mark", doc.Timeline.Markers[0].Name)
 #Verify the name of the reference (no group)
 Test.Equal("upon request", doc.Timeline.References[0].Name)
 
-print Test.SUCCESS
\ No newline at end of file
+Test.Success()
\ No newline at end of file
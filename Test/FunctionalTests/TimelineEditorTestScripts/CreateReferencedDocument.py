@@ -39,4 +39,4 @@ Test.Equal(1, docParent.Timeline.References.Count, "Verify reopened document has
 Test.NotNull(docParent.Timeline.References[0].Target)
 TimelineEditorUtil.VerifyTimeline(docParent.Timeline.References[0].Target, docChild.Timeline.Groups, docChild.Timeline.Markers, docChild.Timeline.References)
 
-print Test.SUCCESS
\ No newline at end of file
+Test.Success()
\ No newline at end of file
@@ -46,4 +46,4 @@ editor.Close(doc)
 docNew = editor.Open(Uri(filePath))
 TimelineEditorUtil.VerifyTimeline(docNew.Timeline, groups, markers, references)
 
-print Test.SUCCESS
\ No newline at end of file
+Test.Success()
\ No newline at end of file
@@ -0,0 +1,416 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.IO;
+using System.Linq;
+
+using NUnit.Framework;
+
+using Sce.Atf.Rendering;
+using Sce.Atf.Rendering.OpenGL;
+
+namespace UnitTests.Atf.Rendering
+{
+    [TestFixture]
+    public class TestImageLoaders
+    {
+        [Test]
+        public void TestTargaRle()
+        {
+            byte[] pixels = CreatePixels(5, 3, 4, new Random(1));
+
+            // the runs and raw packets cross the rows
+            byte[] uncompressed = WriteTarga(5, 3, 4, pixels, false, true);
+            byte[] compressed = WriteTarga(5, 3, 4, pixels, true, true);
+            Assert.Less(compressed.Length, uncompressed.Length);
+
+            Image image = Load(new TargaImageLoader(), compressed);
+            Assert.AreEqual(image.Width, 5);
+            Assert.AreEqual(image.Height, 3);
+            Assert.AreEqual(image.ElementsPerPixel, 4);
+            Assert.AreEqual(image.Pixels, pixels);
+            Assert.AreEqual(Load(new TargaImageLoader(), uncompressed).Pixels, pixels);
+
+            // rows are stored bottom up, unless the image descriptor says otherwise
+            byte[] flipped = WriteTarga(5, 3, 4, pixels, true, false);
+            byte[] expected = new byte[pixels.Length];
+            for (int row = 0; row < 3; row++)
+                Buffer.BlockCopy(pixels, row * 20, expected, (2 - row) * 20, 20);
+            Assert.AreEqual(Load(new TargaImageLoader(), flipped).Pixels, expected);
+
+            // a truncated payload is an error; the last 26 bytes are the footer
+            Array.Resize(ref compressed, compressed.Length - 28);
+            Assert.Throws<InvalidDataException>(() => Load(new TargaImageLoader(), compressed));
+        }
+
+        [Test]
+        public void TestTargaRleBuffering()
+        {
+            // the payloads are several times larger than the decoder's buffer, so that packets
+            //  cross the refills; noise gives long raw packets, the others a mix of short raw
+            //  packets and runs
+            foreach (int bytesPerPixel in new[] { 3, 4 })
+            {
+                var random = new Random(bytesPerPixel);
+                var noise = new byte[97 * 89 * bytesPerPixel];
+                random.NextBytes(noise);
+                foreach (byte[] pixels in new[] { noise, CreatePixels(97, 89, bytesPerPixel, random), CreateRunPixels(97, 89, bytesPerPixel, random) })
+                {
+                    Image image = Load(new TargaImageLoader(), WriteTarga(97, 89, bytesPerPixel, pixels, true, true));
+                    Assert.AreEqual(image.ElementsPerPixel, bytesPerPixel);
+                    Assert.AreEqual(image.Pixels, pixels);
+                }
+            }
+        }
+
+        [Test]
+        public void TestTargaColorMap()
+        {
+            byte[] colorMap = { 1, 2, 3, 4, 5, 6, 7, 8, 9 };
+            byte[] indices = { 2, 0, 1, 1 };
+
+            Image image = Load(new TargaImageLoader(), WriteMappedTarga(2, 2, colorMap, indices, 3));
+            Assert.AreEqual(image.ElementsPerPixel, 3);
+            Assert.AreEqual(image.Pixels, new byte[] { 7, 8, 9, 1, 2, 3, 4, 5, 6, 4, 5, 6 });
+
+            indices[3] = 3;
+            Assert.Throws<InvalidDataException>(
+                () => Load(new TargaImageLoader(), WriteMappedTarga(2, 2, colorMap, indices, 3)));
+
+            // 32-bit color map entries
+            colorMap = new byte[] { 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12 };
+            indices[3] = 1;
+            image = Load(new TargaImageLoader(), WriteMappedTarga(2, 2, colorMap, indices, 4));
+            Assert.AreEqual(image.ElementsPerPixel, 4);
+            Assert.AreEqual(image.Pixels, new byte[] { 9, 10, 11, 12, 1, 2, 3, 4, 5, 6, 7, 8, 5, 6, 7, 8 });
+        }
+
+        [Test]
+        public void TestDdsMipmaps()
+        {
+            foreach (int fourCC in new[] { Dxt1, Dxt5 })
+            {
+                // the linear size isn't the size of the mipmap chain
+                int size;
+                byte[] data = WriteCompressedDds(16, 8, fourCC, new Random(1), out size);
+                Image image = Load(new DdsImageLoader(), data);
+                Assert.AreEqual(image.Levels, 5);
+                Assert.AreEqual(image.Pixels.Length, size);
+                Assert.AreEqual(image.Pixels, data.Skip(128).ToArray());
+            }
+        }
+
+        [Test]
+        public void TestDdsCubeMap()
+        {
+            foreach (int fourCC in new[] { Dxt1, Dxt3, Dxt5 })
+            {
+                // 16x4, 8x2, 4x1, 2x1 and 1x1 levels for each of the six faces, followed by bytes
+                //  that aren't part of the image
+                int blockSize = fourCC == Dxt1 ? 8 : 16;
+                int size = 6 * (4 + 2 + 1 + 1 + 1) * blockSize;
+                var pixels = new byte[size + 100];
+                new Random(fourCC).NextBytes(pixels);
+
+                var stream = new MemoryStream();
+                var writer = new BinaryWriter(stream);
+                WriteDdsHeader(writer, 16, 4, DdsMipMapCount | DdsLinearSize, 4 * blockSize, 5,
+                    DdpfFourCC, fourCC, 0, 0, 0, 0, DdsCaps2CubeMap);
+                writer.Write(pixels);
+
+                Image image = Load(new DdsImageLoader(), stream.ToArray());
+                Assert.AreEqual(image.Levels, 5);
+                Assert.AreEqual(image.Pixels, pixels.Take(size).ToArray());
+
+                // the texture manager uploads the faces using the same sizes
+                int total = 0;
+                for (int face = 0; face < 6; face++)
+                    for (int level = 0; level < 5; level++)
+                        total += DdsImageLoader.GetCompressedSize(16, 4, level, blockSize);
+                Assert.AreEqual(total, size);
+            }
+        }
+
+        [Test]
+        public void TestDds32BitTo24Bit()
+        {
+            // an odd number of pixels, with a meaningless fourth channel that's dropped
+            byte[] pixels = CreatePixels(7, 1, 4, new Random(1));
+            Image image = Load(new DdsImageLoader(), WriteUncompressedDds(7, 1, pixels));
+            Assert.AreEqual(image.ElementsPerPixel, 3);
+
+            var expected = new List<byte>();
+            for (int i = 0; i < pixels.Length; i += 4)
+                expected.AddRange(new[] { pixels[i], pixels[i + 1], pixels[i + 2] });
+            Assert.AreEqual(image.Pixels, expected.ToArray());
+        }
+
+        [Test]
+        public void TestFlipImage()
+        {
+            // an odd number of rows leaves the middle row in place
+            foreach (int height in new[] { 1, 2, 3, 4 })
+            {
+                byte[] pixels = CreatePixels(5, height, 3, new Random(height));
+                var image = new Image(5, height, (byte[])pixels.Clone(), 1, PixelFormat.RGB24, 3);
+                TextureManager.FlipImage(image);
+
+                byte[] expected = new byte[pixels.Length];
+                for (int row = 0; row < height; row++)
+                    Buffer.BlockCopy(pixels, row * 15, expected, (height - 1 - row) * 15, 15);
+                Assert.AreEqual(image.Pixels, expected);
+            }
+        }
+
+        [Test]
+        public void TestFlipImageSkipsCubeMap()
+        {
+            byte[] pixels = CreatePixels(4, 4 * 6, 3, new Random(1));
+            var image = new Image(4, 4, (byte[])pixels.Clone(), 1, PixelFormat.RGB24, 3);
+            image.IsCubeMap = true;
+            TextureManager.FlipImage(image);
+            Assert.AreEqual(image.Pixels, pixels);
+        }
+
+        [Test, Explicit, Category("Performance")]
+        public void TestLoadPerformance()
+        {
+            // 1024 by 1024 images with full mipmap chains, and run-length encoded Targa files
+            //  with a mix of runs and raw packets
+            string directory = Path.Combine(Path.GetTempPath(), Path.GetRandomFileName());
+            Directory.CreateDirectory(directory);
+            try
+            {
+                var random = new Random(1);
+                int size;
+                var files = new[]
+                {
+                    new KeyValuePair<string, byte[]>("dxt1.dds", WriteCompressedDds(1024, 1024, Dxt1, random, out size)),
+                    new KeyValuePair<string, byte[]>("dxt5.dds", WriteCompressedDds(1024, 1024, Dxt5, random, out size)),
+                    new KeyValuePair<string, byte[]>("rgb.tga", WriteTarga(1024, 1024, 3, CreateRunPixels(1024, 1024, 3, random), true, true)),
+                    new KeyValuePair<string, byte[]>("rgba.tga", WriteTarga(1024, 1024, 4, CreateRunPixels(1024, 1024, 4, random), true, true)),
+                };
+
+                AppDomain.MonitoringIsEnabled = true;
+                foreach (KeyValuePair<string, byte[]> file in files)
+                {
+                    string path = Path.Combine(directory, file.Key);
+                    File.WriteAllBytes(path, file.Value);
+                    IImageLoader loader = path.EndsWith(".dds") ? (IImageLoader)new DdsImageLoader() : new TargaImageLoader();
+
+                    // report the fastest of several runs
+                    const int count = 5;
+                    long ticks = long.MaxValue;
+                    long allocated = AppDomain.CurrentDomain.MonitoringTotalAllocatedMemorySize;
+                    int decodedSize = 0;
+                    for (int i = 0; i < count; i++)
+                    {
+                        Stopwatch stopwatch = Stopwatch.StartNew();
+                        using (Stream stream = new FileStream(path, FileMode.Open, FileAccess.Read))
+                            decodedSize = loader.LoadImage(stream).Pixels.Length;
+                        ticks = Math.Min(ticks, stopwatch.ElapsedTicks);
+                    }
+                    allocated = AppDomain.CurrentDomain.MonitoringTotalAllocatedMemorySize - allocated;
+
+                    double seconds = (double)ticks / Stopwatch.Frequency;
+                    Console.WriteLine("{0}: {1} bytes loaded at {2:0} MB/s, allocating {3} bytes per image for {4} bytes of pixels",
+                        file.Key, file.Value.Length, file.Value.Length / seconds / (1024 * 1024), allocated / count, decodedSize);
+                }
+            }
+            finally
+            {
+                Directory.Delete(directory, true);
+            }
+        }
+
+        private static Image Load(IImageLoader loader, byte[] data)
+        {
+            using (var stream = new MemoryStream(data))
+                return loader.LoadImage(stream);
+        }
+
+        private static byte[] CreatePixels(int width, int height, int bytesPerPixel, Random random)
+        {
+            var pixels = new byte[width * height * bytesPerPixel];
+            random.NextBytes(pixels);
+
+            // repeat some pixels, to make runs
+            for (int i = bytesPerPixel; i < pixels.Length; i += bytesPerPixel)
+                if (random.Next(2) == 0)
+                    Buffer.BlockCopy(pixels, i - bytesPerPixel, pixels, i, bytesPerPixel);
+            return pixels;
+        }
+
+        // Creates pixels with long runs of a color, and some noise in between
+        private static byte[] CreateRunPixels(int width, int height, int bytesPerPixel, Random random)
+        {
+            var pixels = new byte[width * height * bytesPerPixel];
+            random.NextBytes(pixels);
+            int i = bytesPerPixel;
+            while (i < pixels.Length)
+            {
+                int noise = random.Next(32) * bytesPerPixel;
+                int run = Math.Min(random.Next(256) * bytesPerPixel, pixels.Length - i - noise);
+                i += noise;
+                for (int end = i + run; i < end; i += bytesPerPixel)
+                    Buffer.BlockCopy(pixels, i - bytesPerPixel, pixels, i, bytesPerPixel);
+            }
+            return pixels;
+        }
+
+        // Writes an unmapped Targa file; 'pixels' holds the rows from top to bottom
+        private static byte[] WriteTarga(int width, int height, int bytesPerPixel, byte[] pixels, bool compressed, bool topOrigin)
+        {
+            var stream = new MemoryStream();
+            var writer = new BinaryWriter(stream);
+            WriteTargaHeader(writer, 0, compressed ? 10 : 2, 0, 0, width, height, bytesPerPixel * 8, topOrigin ? 0x20 : 0);
+            if (!compressed)
+            {
+                writer.Write(pixels);
+                return stream.ToArray();
+            }
+
+            int pixelCount = width * height;
+            int pixel = 0;
+            while (pixel < pixelCount)
+            {
+                int run = 1;
+                while (run < 128 && pixel + run < pixelCount && PixelsEqual(pixels, pixel, pixel + run, bytesPerPixel))
+                    run++;
+
+                if (run > 1)
+                {
+                    writer.Write((byte)(0x80 | (run - 1)));
+                    writer.Write(pixels, pixel * bytesPerPixel, bytesPerPixel);
+                    pixel += run;
+                }
+                else
+                {
+                    int raw = 1;
+                    while (raw < 128 && pixel + raw < pixelCount &&
+                        (pixel + raw + 1 == pixelCount || !PixelsEqual(pixels, pixel + raw, pixel + raw + 1, bytesPerPixel)))
+                        raw++;
+
+                    writer.Write((byte)(raw - 1));
+                    writer.Write(pixels, pixel * bytesPerPixel, raw * bytesPerPixel);
+                    pixel += raw;
+                }
+            }
+
+            // the footer isn't part of the payload
+            writer.Write(new byte[26]);
+            return stream.ToArray();
+        }
+
+        private static byte[] WriteMappedTarga(int width, int height, byte[] colorMap, byte[] indices, int bytesPerEntry)
+        {
+            var stream = new MemoryStream();
+            var writer = new BinaryWriter(stream);
+            WriteTargaHeader(writer, 1, 1, colorMap.Length / bytesPerEntry, bytesPerEntry * 8, width, height, 8, 0x20);
+            writer.Write(colorMap);
+            writer.Write(indices);
+            return stream.ToArray();
+        }
+
+        private static void WriteTargaHeader(BinaryWriter writer, int colorMapType, int dataType, int colorMapLength, int colorMapDepth,
+            int width, int height, int bitsPerPixel, int imageDescriptor)
+        {
+            writer.Write((byte)0);
+            writer.Write((byte)colorMapType);
+            writer.Write((byte)dataType);
+            writer.Write((short)0);
+            writer.Write((short)colorMapLength);
+            writer.Write((byte)colorMapDepth);
+            writer.Write((short)0);
+            writer.Write((short)0);
+            writer.Write((short)width);
+            writer.Write((short)height);
+            writer.Write((byte)bitsPerPixel);
+            writer.Write((byte)imageDescriptor);
+        }
+
+        private static bool PixelsEqual(byte[] pixels, int first, int second, int bytesPerPixel)
+        {
+            for (int i = 0; i < bytesPerPixel; i++)
+                if (pixels[first * bytesPerPixel + i] != pixels[second * bytesPerPixel + i])
+                    return false;
+            return true;
+        }
+
+        // Writes a DXT1 or DXT5 file with a full mipmap chain of random blocks
+        private static byte[] WriteCompressedDds(int width, int height, int fourCC, Random random, out int size)
+        {
+            int blockSize = fourCC == Dxt1 ? 8 : 16;
+            int levels = 1;
+            size = 0;
+            for (int w = width, h = height; ; w = Math.Max(w / 2, 1), h = Math.Max(h / 2, 1), levels++)
+            {
+                size += ((w + 3) / 4) * ((h + 3) / 4) * blockSize;
+                if (w == 1 && h == 1)
+                    break;
+            }
+
+            var pixels = new byte[size];
+            random.NextBytes(pixels);
+
+            var stream = new MemoryStream();
+            var writer = new BinaryWriter(stream);
+            WriteDdsHeader(writer, width, height, DdsMipMapCount | DdsLinearSize, (width / 4) * (height / 4) * blockSize, levels,
+                DdpfFourCC, fourCC, 0, 0, 0, 0, 0);
+            writer.Write(pixels);
+            return stream.ToArray();
+        }
+
+        private static byte[] WriteUncompressedDds(int width, int height, byte[] pixels)
+        {
+            var stream = new MemoryStream();
+            var writer = new BinaryWriter(stream);
+            WriteDdsHeader(writer, width, height, 0, 0, 0, DdpfRgb, 0, 32, 0x00FF0000, 0x0000FF00, 0x000000FF, 0);
+            writer.Write(pixels);
+            return stream.ToArray();
+        }
+
+        private static void WriteDdsHeader(BinaryWriter writer, int width, int height, int flags, int linearSize, int levels,
+            int pixelFormatFlags, int fourCC, int bitCount, uint redMask, uint greenMask, uint blueMask, int caps2)
+        {
+            writer.Write(new[] { (byte)'D', (byte)'D', (byte)'S', (byte)' ' });
+            writer.Write(124);
+            writer.Write(DdsCaps | DdsHeight | DdsWidth | DdsPixelFormat | flags);
+            writer.Write(height);
+            writer.Write(width);
+            writer.Write(linearSize);
+            writer.Write(0);
+            writer.Write(levels);
+            writer.Write(new byte[4 * 11]);
+
+            writer.Write(32);
+            writer.Write(pixelFormatFlags);
+            writer.Write(fourCC);
+            writer.Write(bitCount);
+            writer.Write(redMask);
+            writer.Write(greenMask);
+            writer.Write(blueMask);
+            writer.Write(0);
+
+            writer.Write(0);
+            writer.Write(caps2);
+            writer.Write(new byte[4 * 3]);
+        }
+
+        private const int Dxt1 = 'D' + ('X' << 8) + ('T' << 16) + ('1' << 24);
+        private const int Dxt3 = 'D' + ('X' << 8) + ('T' << 16) + ('3' << 24);
+        private const int Dxt5 = 'D' + ('X' << 8) + ('T' << 16) + ('5' << 24);
+
+        private const int DdsCaps = 0x1;
+        private const int DdsHeight = 0x2;
+        private const int DdsWidth = 0x4;
+        private const int DdsPixelFormat = 0x1000;
+        private const int DdsMipMapCount = 0x20000;
+        private const int DdsLinearSize = 0x80000;
+        private const int DdpfFourCC = 0x4;
+        private const int DdpfRgb = 0x40;
+        private const int DdsCaps2CubeMap = 0x200;
+    }
+}
@@ -0,0 +1,84 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System.Linq;
+
+using NUnit.Framework;
+
+using Sce.Atf.Rendering;
+using Sce.Atf.Rendering.OpenGL;
+
+namespace UnitTests.Atf.Rendering
+{
+    [TestFixture]
+    public class TestTextureContext
+    {
+        [Test]
+        public void TestLeastRecentlyUsed()
+        {
+            var context = new TextureContext(new object());
+            Texture a = CreateLoadedTexture(context, "a", 100);
+            Texture b = CreateLoadedTexture(context, "b", 100);
+            Texture c = CreateLoadedTexture(context, "c", 100);
+            Assert.AreEqual(context.Size, 300);
+            CollectionAssert.AreEqual(context.LoadedTextures.ToArray(), new[] { c, b, a });
+
+            // textures used in the current frame aren't unloaded, even if they don't fit
+            CollectionAssert.IsEmpty(context.Unload(0));
+            Assert.AreEqual(context.Size, 300);
+
+            context.NextFrame();
+            Assert.IsFalse(context.Use(a, 1));
+            CollectionAssert.AreEqual(context.LoadedTextures.ToArray(), new[] { a, c, b });
+
+            CollectionAssert.AreEqual(context.Unload(250), new[] { b });
+            Assert.AreEqual(b.State, TextureState.Unloaded);
+            Assert.AreEqual(b.Size, 0);
+            Assert.AreEqual(context.Size, 200);
+            CollectionAssert.AreEqual(context.LoadedTextures.ToArray(), new[] { a, c });
+
+            // the unused texture goes, and the used one stays
+            CollectionAssert.AreEqual(context.Unload(0), new[] { c });
+            Assert.AreEqual(context.Size, 100);
+            Assert.AreEqual(a.State, TextureState.Loaded);
+
+            // unloaded textures are loaded again when they're used
+            Assert.IsTrue(context.Use(b, 1));
+            b.Size = 50;
+            b.State = TextureState.Loaded;
+            context.AddLoaded(b);
+            Assert.AreEqual(context.Size, 150);
+            CollectionAssert.AreEqual(context.LoadedTextures.ToArray(), new[] { b, a });
+        }
+
+        [Test]
+        public void TestPriority()
+        {
+            var context = new TextureContext(new object());
+            var texture = new Texture(context, "a", new TextureInfo());
+
+            // the highest priority in a frame is kept
+            context.Use(texture, 2);
+            context.Use(texture, 5);
+            context.Use(texture, 3);
+            Assert.AreEqual(texture.Priority, 5);
+            Assert.IsTrue(context.IsCurrent(texture));
+
+            // and replaced in the next frame
+            context.NextFrame();
+            Assert.IsFalse(context.IsCurrent(texture));
+            context.Use(texture, 1);
+            Assert.AreEqual(texture.Priority, 1);
+            Assert.AreEqual(texture.LastUsedFrame, 1);
+        }
+
+        private static Texture CreateLoadedTexture(TextureContext context, string path, long size)
+        {
+            var texture = new Texture(context, path, new TextureInfo());
+            context.Use(texture, 0);
+            texture.Size = size;
+            texture.State = TextureState.Loaded;
+            context.AddLoaded(texture);
+            return texture;
+        }
+    }
+}
@@ -0,0 +1,85 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using NUnit.Framework;
+
+using Sce.Atf.Rendering;
+using Sce.Atf.Rendering.OpenGL;
+
+namespace UnitTests.Atf.Rendering
+{
+    [TestFixture]
+    public class TestTextureQueue
+    {
+        [Test]
+        public void TestOrder()
+        {
+            var context = new TextureContext(new object());
+            var queue = new TextureQueue();
+            Texture old = AddTexture(queue, context, 100);
+            context.NextFrame();
+            Texture low = AddTexture(queue, context, 1);
+            Texture high = AddTexture(queue, context, 10);
+            Texture middle = AddTexture(queue, context, 5);
+            Assert.AreEqual(queue.Count, 4);
+
+            // textures used in the current frame come first, highest priority first
+            Assert.AreSame(queue.Dequeue(), high);
+            Assert.AreSame(queue.Dequeue(), middle);
+            Assert.AreSame(queue.Dequeue(), low);
+            Assert.AreSame(queue.Dequeue(), old);
+            Assert.IsNull(queue.Dequeue());
+            Assert.AreEqual(queue.Count, 0);
+        }
+
+        [Test]
+        public void TestRequeue()
+        {
+            // priorities are compared when textures are taken, not when they're added
+            var context = new TextureContext(new object());
+            var queue = new TextureQueue();
+            Texture first = AddTexture(queue, context, 1);
+            Texture second = AddTexture(queue, context, 2);
+            context.NextFrame();
+            context.Use(first, 0);
+            Assert.AreSame(queue.Dequeue(), first);
+            Assert.AreSame(queue.Dequeue(), second);
+        }
+
+        [Test]
+        public void TestContexts()
+        {
+            // frames are counted per context
+            var context1 = new TextureContext(new object());
+            var context2 = new TextureContext(new object());
+            for (int i = 0; i < 10; i++)
+                context1.NextFrame();
+
+            var queue = new TextureQueue();
+            Texture texture1 = AddTexture(queue, context1, 1);
+            Texture texture2 = AddTexture(queue, context2, 2);
+            Texture texture3 = AddTexture(queue, context1, 3);
+            Assert.IsTrue(queue.Contains(context1));
+
+            Assert.AreSame(queue.Dequeue(context2), texture2);
+            Assert.IsNull(queue.Dequeue(context2));
+            Assert.IsFalse(queue.Contains(context2));
+
+            AddTexture(queue, context2, 4);
+            queue.RemoveAll(context2);
+            Assert.IsFalse(queue.Contains(context2));
+            Assert.AreEqual(queue.Count, 2);
+
+            Assert.AreSame(queue.Dequeue(), texture3);
+            Assert.AreSame(queue.Dequeue(context1), texture1);
+            Assert.IsFalse(queue.Contains(context1));
+        }
+
+        private static Texture AddTexture(TextureQueue queue, TextureContext context, float priority)
+        {
+            var texture = new Texture(context, "texture", new TextureInfo());
+            context.Use(texture, priority);
+            queue.Add(texture);
+            return texture;
+        }
+    }
+}
@@ -44,6 +44,15 @@ if not %errorlevel% == 0 (
   exit /b %errorlevel%
 )
 
+echo Run OpenGL unit tests
+OpenGLUnitTests.exe
+if not %errorlevel% == 0 (
+  echo Error running OpenGL unit tests
+  popd
+  if %PAUSE%==true pause
+  exit /b %errorlevel%
+)
+
 echo Run functional tests
 FunctionalTests.exe -category:%TEST_CATEGORY%
 if not %errorlevel% == 0 (
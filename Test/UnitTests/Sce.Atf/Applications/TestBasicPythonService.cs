@@ -0,0 +1,210 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Diagnostics;
+using System.IO;
+using System.Text;
+
+using NUnit.Framework;
+
+using Sce.Atf.Applications;
+using Sce.Atf.Dom;
+
+namespace UnitTests.Atf
+{
+    [TestFixture]
+    public class TestBasicPythonService
+    {
+        [TearDown]
+        public void TearDown()
+        {
+            BasicPythonService.UseEagerImports = false;
+        }
+
+        [Test]
+        public void TestImports()
+        {
+            foreach (bool eager in new[] { false, true })
+            {
+                BasicPythonService.UseEagerImports = eager;
+                var service = new BasicPythonService();
+
+                Assert.AreEqual(service.ExecuteSilent("StringBuilder('abc').Length"), 3);
+                Assert.AreEqual(service.ExecuteSilent("Int32.MaxValue"), int.MaxValue);
+                Assert.AreSame(service.ExecuteSilent("DomNodeType.BaseOfAllTypes"), DomNodeType.BaseOfAllTypes);
+                Assert.AreEqual(service.ExecuteSilent("IO.Path.GetExtension('a/b.txt')"), ".txt");
+                StringAssert.Contains("NameError", service.ExecuteStatement("NoSuchType"));
+                StringAssert.Contains("NameError", service.ExecuteStatement("Keys"));
+
+                // variables hide imported types
+                service.ExecuteStatement("StringBuilder = 5");
+                Assert.AreEqual(service.ExecuteSilent("StringBuilder"), 5);
+                Assert.AreEqual(service.ExecuteSilent("len('abc')"), 3);
+            }
+        }
+
+        [Test]
+        public void TestImportAllTypes()
+        {
+            foreach (bool eager in new[] { false, true })
+            {
+                BasicPythonService.UseEagerImports = eager;
+                var service = new BasicPythonService();
+
+                // namespaces imported later hide types with the same name in earlier namespaces
+                service.ExecuteStatement("timer = Timer");
+                service.ImportAllTypes("System.Threading");
+                Assert.AreEqual(service.ExecuteSilent("clr.GetClrType(Timer)"), typeof(System.Threading.Timer));
+            }
+        }
+
+        [Test]
+        public void TestExecuteStatementSucceeded()
+        {
+            var service = new BasicPythonService();
+            bool succeeded;
+
+            Assert.AreEqual(service.ExecuteStatement("x = 1", out succeeded), string.Empty);
+            Assert.True(succeeded);
+
+            StringAssert.Contains("ZeroDivisionError", service.ExecuteStatement("x / 0", out succeeded));
+            Assert.False(succeeded);
+        }
+
+        [Test]
+        public void TestOutputWritten()
+        {
+            var service = new BasicPythonService();
+            var output = new StringBuilder();
+            int count = 0;
+            service.OutputWritten += (sender, e) =>
+            {
+                output.Append(e.Text);
+                count++;
+            };
+
+            string result = service.ExecuteStatements("print 'first'\nprint 'second'\nraise ValueError('third')");
+            Assert.AreEqual(output.ToString(), result);
+            Assert.Greater(count, 1);
+            StringAssert.StartsWith("first", result);
+            StringAssert.Contains("second", result);
+            StringAssert.Contains("ValueError: third", result);
+        }
+
+        [Test]
+        public void TestReadOutput()
+        {
+            var service = new BasicPythonService();
+            long position = service.OutputPosition;
+
+            string result = service.ExecuteStatements("print 'first'\nprint 'second'");
+            long next;
+            Assert.AreEqual(service.ReadOutput(position, out next), result);
+            Assert.AreEqual(next, service.OutputPosition);
+            Assert.AreEqual(service.ReadOutput(next, out next), string.Empty);
+
+            // the next execution discards the output of the previous one
+            position = service.OutputPosition;
+            result = service.ExecuteStatement("print 'third'");
+            Assert.AreEqual(service.ReadOutput(0, out next), result);
+            Assert.AreEqual(service.ReadOutput(position, out next), result);
+        }
+
+        [Test]
+        public void TestCompiledCodeCache()
+        {
+            var service = new BasicPythonService();
+            service.ClearCompiledCodeCache();
+
+            // repeated statements are compiled once; changed statements are compiled again
+            service.ExecuteStatement("x = 1");
+            service.ExecuteStatement("x = 1");
+            Assert.AreEqual(service.CompiledCodeCacheMisses, 1);
+            Assert.AreEqual(service.CompiledCodeCacheHits, 1);
+            service.ExecuteStatement("x = 2");
+            Assert.AreEqual(service.CompiledCodeCacheMisses, 2);
+            Assert.AreEqual(service.ExecuteSilent("x"), 2);
+
+            // files are compiled again when they're edited
+            string path = Path.Combine(Path.GetTempPath(), Path.GetRandomFileName() + ".py");
+            try
+            {
+                File.WriteAllText(path, "print 'first'");
+                StringAssert.Contains("first", service.ExecuteFile(path));
+                StringAssert.Contains("first", service.ExecuteFile(path));
+                Assert.AreEqual(service.CompiledCodeCacheMisses, 3);
+                Assert.AreEqual(service.CompiledCodeCacheHits, 2);
+
+                DateTime lastWriteTime = File.GetLastWriteTimeUtc(path);
+                File.WriteAllText(path, "print 'second'");
+                File.SetLastWriteTimeUtc(path, lastWriteTime.AddSeconds(1));
+                StringAssert.Contains("second", service.ExecuteFile(path));
+                Assert.AreEqual(service.CompiledCodeCacheMisses, 4);
+                Assert.AreEqual(service.CompiledCodeCacheHits, 2);
+            }
+            finally
+            {
+                File.Delete(path);
+            }
+
+            // the least recently used code is evicted when the cache is full
+            service.ClearCompiledCodeCache();
+            service.CompiledCodeCacheCapacity = 2;
+            service.ExecuteStatement("a = 1");
+            service.ExecuteStatement("b = 1");
+            service.ExecuteStatement("a = 1");
+            service.ExecuteStatement("c = 1");
+            Assert.AreEqual(service.CompiledCodeCacheMisses, 3);
+            Assert.AreEqual(service.CompiledCodeCacheHits, 1);
+            service.ExecuteStatement("a = 1");
+            Assert.AreEqual(service.CompiledCodeCacheHits, 2);
+            service.ExecuteStatement("b = 1");
+            Assert.AreEqual(service.CompiledCodeCacheMisses, 4);
+        }
+
+        [Test, Explicit, Category("Performance")]
+        public void TestStartupTime()
+        {
+            // Each measurement runs in a new AppDomain, so that IronPython starts cold, as it
+            //  does when an application is launched.
+            foreach (bool eager in new[] { false, true })
+            {
+                const int count = 3;
+                long created = 0, firstScript = 0;
+                for (int i = 0; i < count; i++)
+                {
+                    AppDomain domain = AppDomain.CreateDomain("TestStartupTime", null,
+                        AppDomain.CurrentDomain.SetupInformation);
+                    try
+                    {
+                        var timer = (StartupTimer)domain.CreateInstanceAndUnwrap(
+                            typeof(StartupTimer).Assembly.FullName, typeof(StartupTimer).FullName);
+                        long[] times = timer.Measure(eager);
+                        created += times[0];
+                        firstScript += times[1];
+                    }
+                    finally
+                    {
+                        AppDomain.Unload(domain);
+                    }
+                }
+
+                Console.WriteLine("{0} imports: created in {1} ms, first script done in {2} ms",
+                    eager ? "Eager" : "Lazy", created / count, firstScript / count);
+            }
+        }
+
+        public class StartupTimer : MarshalByRefObject
+        {
+            public long[] Measure(bool eager)
+            {
+                BasicPythonService.UseEagerImports = eager;
+                var stopwatch = Stopwatch.StartNew();
+                var service = new BasicPythonService();
+                long created = stopwatch.ElapsedMilliseconds;
+                service.ExecuteStatements("s = StringBuilder('abc')\nn = DomNode(DomNodeType.BaseOfAllTypes)");
+                return new[] { created, stopwatch.ElapsedMilliseconds };
+            }
+        }
+    }
+}
@@ -1,6 +1,7 @@
 ﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
 
 using System;
+using System.IO;
 using NUnit.Framework;
 using Sce.Atf.Applications;
 
@@ -81,6 +82,123 @@ public void TestCompositeCommand()
             Assert.IsTrue(x.Value == 0); // make sure command was backed out
         }
 
+        [Test]
+        public void TestMemoryBudget()
+        {
+            CommandHistory test = new CommandHistory();
+            for (int i = 0; i < 4; i++)
+                test.Add(new DataCommand(1000));
+            Assert.AreEqual(test.Count, 4);
+            long size = test.GetMemorySize(0);
+            Assert.Greater(size, 1000);
+            Assert.AreEqual(test.MemorySize, 4 * size);
+
+            // the oldest commands are removed, but the last done command is kept
+            test.Dirty = false;
+            test.MemoryBudget = 2 * size;
+            Assert.AreEqual(test.Count, 2);
+            Assert.AreEqual(test.MemorySize, 2 * size);
+            test.MemoryBudget = 0;
+            Assert.AreEqual(test.Count, 1);
+            Assert.IsTrue(test.CanUndo);
+            Assert.IsTrue(!test.Dirty);
+            test.Undo();
+            Assert.IsTrue(!test.CanUndo);
+            Assert.IsTrue(test.Dirty);
+        }
+
+        [Test]
+        public void TestRevertAfterCleanPointRemoved()
+        {
+            PositiveInt x = new PositiveInt();
+            CommandHistory test = new CommandHistory();
+            test.Add(new IncCommand(x));
+            test.Dirty = false;
+            for (int i = 0; i < 3; i++)
+                test.Add(new IncCommand(x));
+            x.Value = 4;
+            Assert.IsTrue(test.CanRevert);
+
+            // the clean point is removed with the oldest commands
+            test.MemoryBudget = 0;
+            Assert.AreEqual(test.Count, 1);
+            Assert.IsTrue(test.Dirty);
+            Assert.IsTrue(!test.CanRevert);
+
+            // reverting doesn't undo part of the way
+            Assert.Throws<InvalidOperationException>(test.Revert);
+            Assert.AreEqual(x.Value, 4);
+            Assert.AreEqual(test.Current, 1);
+
+            // the history stays dirty, even at its oldest command, until a new clean point is set
+            test.Undo();
+            Assert.IsTrue(test.Dirty);
+            test.Dirty = false;
+            Assert.IsTrue(!test.Dirty);
+            Assert.IsTrue(test.CanRevert);
+        }
+
+        [Test]
+        public void TestUndoRedoKeepCommands()
+        {
+            CommandHistory test = new CommandHistory();
+            test.SpillDirectory = Path.GetTempPath();
+            for (int i = 0; i < 3; i++)
+                test.Add(new DataCommand(1000));
+            long size = test.GetMemorySize(0);
+            test.MemoryBudget = 2 * size + 500;
+            Assert.IsTrue(test.IsSpilled(0));
+
+            // restoring the spilled command doesn't spill the others
+            test.Undo();
+            test.Undo();
+            test.Undo();
+            test.Redo();
+            test.Redo();
+            test.Redo();
+            Assert.AreEqual(test.Count, 3);
+            for (int i = 0; i < 3; i++)
+                Assert.IsTrue(!test.IsSpilled(i));
+
+            // adding a command enforces the budget again
+            test.Add(new DataCommand(1000));
+            Assert.IsTrue(test.IsSpilled(0));
+            Assert.IsTrue(test.IsSpilled(1));
+
+            test.Clear();
+        }
+
+        [Test]
+        public void TestSpill()
+        {
+            CommandHistory test = new CommandHistory();
+            test.SpillDirectory = Path.GetTempPath();
+            DataCommand first = new DataCommand(1000);
+            test.Add(first);
+            test.Add(new DataCommand(1000));
+            long size = test.MemorySize;
+
+            // the oldest command is spilled instead of removed
+            test.MemoryBudget = size - 500;
+            Assert.AreEqual(test.Count, 2);
+            Assert.IsTrue(test.IsSpilled(0));
+            Assert.IsTrue(!test.IsSpilled(1));
+            Assert.Less(test.MemorySize, size - 500);
+            Assert.IsNull(first.Data);
+
+            // spilled commands are restored when they are undone
+            test.MemoryBudget = long.MaxValue;
+            test.Undo();
+            test.Undo();
+            Assert.IsTrue(!test.IsSpilled(0));
+            Assert.AreEqual(first.Data.Length, 1000);
+            Assert.AreEqual(first.Data[999], 999 % 256);
+            Assert.AreEqual(test.MemorySize, size);
+
+            test.Clear();
+            Assert.AreEqual(test.MemorySize, 0);
+        }
+
         /// <summary>
         /// Simple class to act like data repository</summary>
         private class PositiveInt
@@ -155,5 +273,45 @@ public DecCommand(PositiveInt target)
 
             private PositiveInt target;
         }
+
+        /// <summary>
+        /// Simple class to implement command that holds data, which can be spilled</summary>
+        private class DataCommand : Command
+        {
+            public DataCommand(int length)
+                : base("DataCommand")
+            {
+                Data = new byte[length];
+                for (int i = 0; i < length; i++)
+                    Data[i] = (byte)i;
+            }
+
+            public byte[] Data;
+
+            public override void Do() { }
+
+            public override void Undo() { }
+
+            public override long MemorySize
+            {
+                get { return base.MemorySize + (Data != null ? Data.Length : 0); }
+            }
+
+            public override bool Spill(Stream stream)
+            {
+                BinaryWriter writer = new BinaryWriter(stream);
+                writer.Write(Data.Length);
+                writer.Write(Data);
+                writer.Flush();
+                Data = null;
+                return true;
+            }
+
+            public override void Restore(Stream stream)
+            {
+                BinaryReader reader = new BinaryReader(stream);
+                Data = reader.ReadBytes(reader.ReadInt32());
+            }
+        }
     }
 }
@@ -0,0 +1,49 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+
+using NUnit.Framework;
+
+using Sce.Atf.Applications;
+
+namespace UnitTests.Atf
+{
+    [TestFixture]
+    public class TestScriptTestResult
+    {
+        [Test]
+        public void TestParse()
+        {
+            ScriptTestResult result = ScriptTestResult.Parse("12 0 1\nP0.250000\tAdd\\tmodules", null, TimeSpan.FromSeconds(2));
+            Assert.True(result.Succeeded);
+            Assert.AreEqual(result.Passed, 12);
+            Assert.AreEqual(result.Failures.Length, 0);
+            Assert.AreEqual(result.Phases.Length, 1);
+            Assert.AreEqual(result.Phases[0].Name, "Add\tmodules");
+            Assert.AreEqual(result.Phases[0].Duration, TimeSpan.FromSeconds(0.25));
+            Assert.AreEqual(result.Duration, TimeSpan.FromSeconds(2));
+
+            // a script that stops early fails, even without an error
+            result = ScriptTestResult.Parse("3 0 0", null, TimeSpan.Zero);
+            Assert.False(result.Succeeded);
+        }
+
+        [Test]
+        public void TestFailures()
+        {
+            // the error raised by the failed assertion becomes its traceback
+            const string error = "Traceback (most recent call last):\n  File \"a.py\", line 5\nException: Error: a\\b\n1!=2";
+            ScriptTestResult result = ScriptTestResult.Parse("1 1 0\nFError: a\\\\b\\n1!=2", error, TimeSpan.Zero);
+            Assert.False(result.Succeeded);
+            Assert.AreEqual(result.Failures.Length, 1);
+            Assert.AreEqual(result.Failures[0].Message, "Error: a\\b\n1!=2");
+            Assert.AreEqual(result.Failures[0].Traceback, error);
+
+            // other errors are added as failures of their own
+            result = ScriptTestResult.Parse("1 0 0", "Traceback (most recent call last):\nNameError: x", TimeSpan.Zero);
+            Assert.AreEqual(result.Failures.Length, 1);
+            Assert.AreEqual(result.Failures[0].Message, "NameError: x");
+            StringAssert.Contains("NameError: x", result.ToString());
+        }
+    }
+}
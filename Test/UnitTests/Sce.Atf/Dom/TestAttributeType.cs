@@ -1,7 +1,9 @@
 ﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
 
 using System;
+using System.Diagnostics;
 using System.Globalization;
+using System.Linq;
 
 using NUnit.Framework;
 
@@ -468,5 +470,157 @@ private void TestConvertFromString<T>(T value1, T value2)
             object converted = arrayTest.Convert(valueString1 + " " + valueString2);
             Assert.AreEqual(converted, new T[] { value1, value2 });
         }
+
+        [Test]
+        public void TestConvertArrayFromString()
+        {
+            // each value is read as if it were parsed on its own
+            string[] integers =
+            {
+                "0", "1", "-1", "+7", "-0", "007", "127", "128", "-128", "-129", "255", "256", "65535",
+                "-32768", "2147483647", "-2147483648", "4294967295", "4294967296",
+                "9223372036854775807", "-9223372036854775808", "9223372036854775808",
+                "18446744073709551615", "18446744073709551616", "000000000000000000000012",
+                "1.5", "1e3", "-", "+", "x", "1,000", "\r5", "5\r"
+            };
+            TestConvertArrayFromString<SByte>(integers, (string s, out SByte v) => SByte.TryParse(s, NumberStyles.Integer, CultureInfo.InvariantCulture, out v));
+            TestConvertArrayFromString<Byte>(integers, (string s, out Byte v) => Byte.TryParse(s, NumberStyles.Integer, CultureInfo.InvariantCulture, out v));
+            TestConvertArrayFromString<Int16>(integers, (string s, out Int16 v) => Int16.TryParse(s, NumberStyles.Integer, CultureInfo.InvariantCulture, out v));
+            TestConvertArrayFromString<UInt16>(integers, (string s, out UInt16 v) => UInt16.TryParse(s, NumberStyles.Integer, CultureInfo.InvariantCulture, out v));
+            TestConvertArrayFromString<Int32>(integers, (string s, out Int32 v) => Int32.TryParse(s, NumberStyles.Integer, CultureInfo.InvariantCulture, out v));
+            TestConvertArrayFromString<UInt32>(integers, (string s, out UInt32 v) => UInt32.TryParse(s, NumberStyles.Integer, CultureInfo.InvariantCulture, out v));
+            TestConvertArrayFromString<Int64>(integers, (string s, out Int64 v) => Int64.TryParse(s, NumberStyles.Integer, CultureInfo.InvariantCulture, out v));
+            TestConvertArrayFromString<UInt64>(integers, (string s, out UInt64 v) => UInt64.TryParse(s, NumberStyles.Integer, CultureInfo.InvariantCulture, out v));
+
+            string[] numbers =
+            {
+                "0", "-0", "0.0", "1", "-1", "+2.5", ".5", "5.", ".", "1.2.3", "0.1", "0.30000000000000004",
+                "3.14159265", "-123.456", "1e10", "1E-10", "1e+3", "2.5e-3", "1e", "1e-", "1e22", "1e23",
+                "1e-22", "1e-23", "1e39", "1e-40", "1e400", "1e-400", "3.4028235e38", "3.4028236e38",
+                "1.17549435e-38", "16777217", "9007199254740993", "123456789012345678901234567890",
+                "0.000000000000000000000000000000001", "1.50", "0.00", "-0.00", "1,000.5", "NaN",
+                "Infinity", "-Infinity", "x", "1f"
+            };
+            TestConvertArrayFromString<Single>(numbers, (string s, out Single v) => Single.TryParse(s, NumberStyles.Float, CultureInfo.InvariantCulture, out v));
+            TestConvertArrayFromString<Double>(numbers, (string s, out Double v) => Double.TryParse(s, NumberStyles.Float, CultureInfo.InvariantCulture, out v));
+            TestConvertArrayFromString<Decimal>(numbers, (string s, out Decimal v) => Decimal.TryParse(s, NumberStyles.Number, CultureInfo.InvariantCulture, out v));
+
+            string[] booleans = { "true", "false", "True", "FALSE", "yes", "1", "truex" };
+            TestConvertArrayFromString<Boolean>(booleans, Boolean.TryParse);
+
+            // decimals keep their scale
+            var decimalTest = new AttributeType("test", typeof(Decimal[]), Int32.MaxValue);
+            Assert.AreEqual(decimalTest.Convert(decimalTest.Convert("1.50 -0.010 7")), "1.50 -0.010 7");
+
+            // all separators are skipped, and the array has the type's length
+            var test = new AttributeType("test", typeof(Int32[]), Int32.MaxValue);
+            Assert.AreEqual(test.Convert("  1\t2\n\n 3  "), new[] { 1, 2, 3 });
+            Assert.AreEqual(test.Convert(" \t\n"), new Int32[0]);
+            test = new AttributeType("test", typeof(Int32[]), 3);
+            Assert.AreEqual(test.Convert("1 2 3 4 5"), new[] { 1, 2, 3 });
+            Assert.AreEqual(test.Convert("1"), new[] { 1, 0, 0 });
+        }
+
+        private delegate bool TryParse<T>(string s, out T value);
+
+        private void TestConvertArrayFromString<T>(string[] values, TryParse<T> tryParse)
+        {
+            var expected = new T[values.Length];
+            for (int i = 0; i < values.Length; i++)
+                tryParse(values[i], out expected[i]);
+
+            var test = new AttributeType("test", typeof(T[]), Int32.MaxValue);
+            var actual = (T[])test.Convert(string.Join(" ", values));
+            Assert.AreEqual(actual.Length, expected.Length);
+            for (int i = 0; i < values.Length; i++)
+            {
+                // compare the bits, to distinguish negative zero
+                if (typeof(T) == typeof(Double))
+                    Assert.AreEqual(BitConverter.DoubleToInt64Bits((double)(object)actual[i]), BitConverter.DoubleToInt64Bits((double)(object)expected[i]), values[i]);
+                else if (typeof(T) == typeof(Single))
+                    Assert.AreEqual(BitConverter.DoubleToInt64Bits((float)(object)actual[i]), BitConverter.DoubleToInt64Bits((float)(object)expected[i]), values[i]);
+                else
+                    Assert.AreEqual(actual[i], expected[i], values[i]);
+            }
+        }
+
+        [Test]
+        public void TestConvertArrayRoundTrip()
+        {
+            // integers are written as their invariant strings
+            var int64Test = new AttributeType("test", typeof(Int64[]), Int32.MaxValue);
+            var int64s = new[] { 0, -1, 10, Int64.MinValue, Int64.MaxValue };
+            Assert.AreEqual(int64Test.Convert(int64s), string.Join(" ", int64s.Select(x => x.ToString(CultureInfo.InvariantCulture))));
+            var uint64Test = new AttributeType("test", typeof(UInt64[]), Int32.MaxValue);
+            Assert.AreEqual(uint64Test.Convert(new[] { UInt64.MaxValue, 0UL }), "18446744073709551615 0");
+            var sbyteTest = new AttributeType("test", typeof(SByte[]), Int32.MaxValue);
+            Assert.AreEqual(sbyteTest.Convert(new SByte[] { -128, 127 }), "-128 127");
+            Assert.AreEqual(sbyteTest.Convert(new SByte[0]), string.Empty);
+
+            // floating point values are written with the fewest digits that read back as the
+            //  same value
+            var singleTest = new AttributeType("test", typeof(Single[]), Int32.MaxValue);
+            var doubleTest = new AttributeType("test", typeof(Double[]), Int32.MaxValue);
+            Assert.AreEqual(singleTest.Convert(new[] { 0.1f, -2.5f, 100.0f, 0.00125f, 0.0f }), "0.1 -2.5 100 0.00125 0");
+            Assert.AreEqual(doubleTest.Convert(new[] { 0.1, 0.1 + 0.2, 1e14 }), "0.1 0.30000000000000004 100000000000000");
+
+            var random = new Random(1);
+            var singles = new Single[10000];
+            var doubles = new Double[singles.Length];
+            for (int i = 0; i < singles.Length; i++)
+            {
+                // cover the whole range of exponents
+                singles[i] = BitConverter.ToSingle(BitConverter.GetBytes(random.Next()), 0) * (random.Next(2) == 0 ? 1 : -1);
+                doubles[i] = (random.NextDouble() - 0.5) * Math.Pow(10, random.Next(-30, 30));
+            }
+            singles[0] = -0.0f;
+            singles[1] = Single.MaxValue;
+            singles[2] = Single.Epsilon;
+            singles[3] = Single.PositiveInfinity;
+            doubles[0] = -0.0;
+            doubles[1] = Double.MaxValue;
+            doubles[2] = Double.Epsilon;
+
+            float[] singleResult = (float[])singleTest.Convert(singleTest.Convert(singles));
+            double[] doubleResult = (double[])doubleTest.Convert(doubleTest.Convert(doubles));
+            for (int i = 0; i < singles.Length; i++)
+            {
+                if (!float.IsNaN(singles[i]))
+                    Assert.AreEqual(BitConverter.DoubleToInt64Bits(singleResult[i]), BitConverter.DoubleToInt64Bits(singles[i]));
+                Assert.AreEqual(BitConverter.DoubleToInt64Bits(doubleResult[i]), BitConverter.DoubleToInt64Bits(doubles[i]));
+            }
+        }
+
+        [Test, Explicit, Category("Performance")]
+        public void TestArrayConversionPerformance()
+        {
+            // a mesh's worth of vertex data, like an ATGI data set or a Collada source
+            const int count = 3000000;
+            var random = new Random(1);
+            var values = new float[count];
+            for (int i = 0; i < count; i++)
+                values[i] = (float)Math.Round((random.NextDouble() - 0.5) * 200, random.Next(1, 7));
+
+            // report the fastest of several runs
+            var test = new AttributeType("test", typeof(float[]), Int32.MaxValue);
+            string text = null;
+            float[] result = null;
+            long writeMilliseconds = long.MaxValue;
+            long readMilliseconds = long.MaxValue;
+            long before = GC.CollectionCount(0);
+            for (int i = 0; i < 5; i++)
+            {
+                Stopwatch stopwatch = Stopwatch.StartNew();
+                text = test.Convert(values);
+                writeMilliseconds = Math.Min(writeMilliseconds, stopwatch.ElapsedMilliseconds);
+                stopwatch.Restart();
+                result = (float[])test.Convert(text);
+                readMilliseconds = Math.Min(readMilliseconds, stopwatch.ElapsedMilliseconds);
+            }
+
+            Assert.AreEqual(result, values);
+            Console.WriteLine("{0} floats ({1} chars): written in {2} ms, read in {3} ms, {4} gen 0 collections",
+                count, text.Length, writeMilliseconds, readMilliseconds, GC.CollectionCount(0) - before);
+        }
     }
 }
@@ -112,6 +112,52 @@ public void TestChildCountInvalid()
                 () => m_validationContext.RaiseEnded());
         }
 
+        [Test]
+        public void TestBatchedChildCount()
+        {
+            var childType = new DomNodeType("batchedChild");
+            var parentType = new DomNodeType("batchedParent");
+            parentType.Define(new ExtensionInfo<TransactionContext>());
+            parentType.Define(new ExtensionInfo<DataValidator>());
+            var childInfo = new ChildInfo("child", childType, true);
+            childInfo.AddRule(new ChildCountRule(2, 3));
+            parentType.Define(childInfo);
+            var subChildInfo = new ChildInfo("subChild", childType, true);
+            subChildInfo.AddRule(new ChildCountRule(0, 1));
+            childType.Define(subChildInfo);
+
+            var parent = new DomNode(parentType);
+            parent.InitializeExtensions();
+            var context = parent.As<TransactionContext>();
+            context.BatchNotifications = true;
+            IList<DomNode> childList = parent.GetChildList(childInfo);
+            childList.Add(new DomNode(childType));
+            childList.Add(new DomNode(childType));
+
+            // temporarily invalid, but valid at the end
+            Assert.IsTrue(context.DoTransaction(() =>
+            {
+                childList.RemoveAt(0);
+                childList.Add(new DomNode(childType));
+                childList.Add(new DomNode(childType));
+            }, "valid"));
+            Assert.AreEqual(childList.Count, 3);
+
+            Assert.IsFalse(context.DoTransaction(() => childList.Add(new DomNode(childType)), "too many children"));
+            Assert.AreEqual(childList.Count, 3);
+
+            // changes to inserted subtrees aren't in the change set, but are still checked
+            Assert.IsFalse(context.DoTransaction(() =>
+                {
+                    var child = new DomNode(childType);
+                    childList.RemoveAt(0);
+                    childList.Add(child);
+                    child.GetChildList(subChildInfo).Add(new DomNode(childType));
+                    child.GetChildList(subChildInfo).Add(new DomNode(childType));
+                }, "too many sub-children"));
+            Assert.AreEqual(childList.Count, 3);
+        }
+
         DomNodeType m_parentType, m_childType;
         ChildInfo m_childInfo;
         ChildCountRule m_childCountRule;
@@ -0,0 +1,214 @@
+//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.IO;
+using System.Linq;
+using System.Xml;
+using System.Xml.Schema;
+
+using NUnit.Framework;
+
+using Sce.Atf;
+using Sce.Atf.Adaptation;
+using Sce.Atf.Dom;
+
+namespace UnitTests.Atf.Dom
+{
+    [TestFixture]
+    public class TestDomBinaryPersistence
+    {
+        [Test]
+        public void TestRoundTrip()
+        {
+            XmlSchemaTypeLoader loader = CreateLoader("float");
+            DomNode root = CreateTree(loader);
+
+            MemoryStream stream = new MemoryStream();
+            new DomBinaryWriter(loader).Write(root, stream, null);
+            stream.Position = 0;
+            Assert.IsTrue(DomBinaryFormat.IsBinaryDocument(stream));
+            Assert.AreEqual(stream.Position, 0);
+
+            DomBinaryReader reader = new DomBinaryReader(loader);
+            DomNode result = reader.Read(stream, null);
+            Assert.IsTrue(reader.WasBinary);
+            Assert.IsTrue(reader.SchemaMatched);
+            Assert.AreEqual(result.ChildInfo, root.ChildInfo);
+            CollectionAssert.IsEmpty(DomCompare.Diff(root, result));
+
+            DomNodeType itemType = loader.GetNodeType("test:itemType");
+            ChildInfo itemsInfo = result.Type.GetChildInfo("item");
+            DomNode b = result.GetChildList(itemsInfo)[1];
+            DomNode c = result.GetChildList(itemsInfo)[2];
+            Assert.AreSame(b.GetAttribute(itemType.GetAttributeInfo("ref")), c);
+        }
+
+        [Test]
+        public void TestXmlFallback()
+        {
+            XmlSchemaTypeLoader loader = CreateLoader("float");
+            DomNode root = CreateTree(loader);
+
+            MemoryStream stream = new MemoryStream();
+            new DomXmlWriter(loader.GetTypeCollection(Namespace)).Write(root, stream, null);
+            stream.Position = 0;
+            Assert.IsFalse(DomBinaryFormat.IsBinaryDocument(stream));
+
+            DomBinaryReader reader = new DomBinaryReader(loader);
+            DomNode result = reader.Read(stream, null);
+            Assert.IsFalse(reader.WasBinary);
+            CollectionAssert.IsEmpty(DomCompare.Diff(root, result));
+        }
+
+        [Test]
+        public void TestSchemaChange()
+        {
+            XmlSchemaTypeLoader oldLoader = CreateLoader("float");
+            DomNode root = CreateTree(oldLoader);
+
+            MemoryStream stream = new MemoryStream();
+            new DomBinaryWriter(oldLoader).Write(root, stream, null);
+            stream.Position = 0;
+
+            // the new schema stores weights as doubles and no longer has "extra" children
+            XmlSchemaTypeLoader newLoader = CreateLoader("double");
+            DomBinaryReader reader = new DomBinaryReader(newLoader);
+            DomNode result = reader.Read(stream, null);
+            Assert.IsTrue(reader.WasBinary);
+            Assert.IsFalse(reader.SchemaMatched);
+
+            DomNodeType itemType = newLoader.GetNodeType("test:itemType");
+            AttributeInfo weightInfo = itemType.GetAttributeInfo("weight");
+            ChildInfo itemsInfo = result.Type.GetChildInfo("item");
+            Assert.IsNull(result.Type.GetChildInfo("extra"));
+            Assert.AreEqual(result.GetChildList(itemsInfo).Count, 3);
+
+            DomNode a = result.GetChildList(itemsInfo)[0];
+            DomNode b = result.GetChildList(itemsInfo)[1];
+            DomNode c = result.GetChildList(itemsInfo)[2];
+            Assert.AreEqual(a.GetAttribute(weightInfo), 1.5);
+            Assert.AreEqual(a.GetAttribute(itemType.GetAttributeInfo("values")), new[] { 1.0f, 2.0f, 3.0f });
+            Assert.AreEqual(b.GetAttribute(itemType.GetAttributeInfo("name")), "b");
+            Assert.AreSame(b.GetAttribute(itemType.GetAttributeInfo("ref")), c);
+        }
+
+        [Test]
+        public void TestExternalReference()
+        {
+            XmlSchemaTypeLoader loader = CreateLoader("float");
+            DomNodeType rootType = loader.GetNodeType("test:rootType");
+            DomNodeType itemType = loader.GetNodeType("test:itemType");
+            rootType.Define(new ExtensionInfo<TestResource>());
+            DomNode root = CreateTree(loader);
+
+            // reference an item in another document, which is written relative to this one
+            DomNode otherRoot = new DomNode(rootType, loader.GetRootElement(Namespace + ":root"));
+            otherRoot.As<TestResource>().Uri = new Uri("file:///C:/data/shared/library.xml");
+            DomNode other = new DomNode(itemType);
+            other.SetAttribute(itemType.GetAttributeInfo("id"), "other");
+            otherRoot.GetChildList(rootType.GetChildInfo("item")).Add(other);
+
+            AttributeInfo refInfo = itemType.GetAttributeInfo("ref");
+            DomNode b = root.GetChildList(rootType.GetChildInfo("item"))[1];
+            b.SetAttribute(refInfo, other);
+
+            Uri uri = new Uri("file:///C:/data/scenes/scene.xml");
+            MemoryStream stream = new MemoryStream();
+            new DomBinaryWriter(loader).Write(root, stream, uri);
+            stream.Position = 0;
+
+            DomBinaryReader reader = new DomBinaryReader(loader);
+            reader.Read(stream, uri);
+            XmlNodeReference reference = reader.UnresolvedReferences.Single();
+            Assert.AreEqual(reference.Value, "../shared/library.xml#other");
+        }
+
+        private static XmlSchemaTypeLoader CreateLoader(string weightType)
+        {
+            string extraElement = weightType == "float"
+                ? "<xs:element name='extra' type='test:itemType' minOccurs='0' maxOccurs='unbounded'/>"
+                : string.Empty;
+            string schemaText =
+                "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema' xmlns:test='" + Namespace + "'" +
+                "    targetNamespace='" + Namespace + "' elementFormDefault='qualified'>" +
+                "  <xs:complexType name='itemType'>" +
+                "    <xs:attribute name='id' type='xs:ID'/>" +
+                "    <xs:attribute name='name' type='xs:string'/>" +
+                "    <xs:attribute name='weight' type='xs:" + weightType + "'/>" +
+                "    <xs:attribute name='values' type='test:floatList'/>" +
+                "    <xs:attribute name='ref' type='xs:IDREF'/>" +
+                "  </xs:complexType>" +
+                "  <xs:simpleType name='floatList'><xs:list itemType='xs:float'/></xs:simpleType>" +
+                "  <xs:complexType name='rootType'>" +
+                "    <xs:sequence>" +
+                extraElement +
+                "      <xs:element name='item' type='test:itemType' minOccurs='0' maxOccurs='unbounded'/>" +
+                "    </xs:sequence>" +
+                "    <xs:attribute name='name' type='xs:string'/>" +
+                "  </xs:complexType>" +
+                "  <xs:element name='root' type='test:rootType'/>" +
+                "</xs:schema>";
+
+            XmlSchemaSet schemaSet = new XmlSchemaSet();
+            using (XmlReader xmlReader = XmlReader.Create(new StringReader(schemaText)))
+                schemaSet.Add(XmlSchema.Read(xmlReader, null));
+            schemaSet.Compile();
+
+            XmlSchemaTypeLoader loader = new XmlSchemaTypeLoader();
+            loader.Load(schemaSet);
+            return loader;
+        }
+
+        private static DomNode CreateTree(XmlSchemaTypeLoader loader)
+        {
+            DomNodeType rootType = loader.GetNodeType("test:rootType");
+            DomNodeType itemType = loader.GetNodeType("test:itemType");
+            AttributeInfo idInfo = itemType.GetAttributeInfo("id");
+            AttributeInfo nameInfo = itemType.GetAttributeInfo("name");
+            AttributeInfo refInfo = itemType.GetAttributeInfo("ref");
+
+            DomNode root = new DomNode(rootType, loader.GetRootElement(Namespace + ":root"));
+            root.SetAttribute(rootType.GetAttributeInfo("name"), "root");
+
+            ChildInfo extraInfo = rootType.GetChildInfo("extra");
+            DomNode extra = new DomNode(itemType);
+            extra.SetAttribute(idInfo, "x");
+            root.GetChildList(extraInfo).Add(extra);
+
+            ChildInfo itemsInfo = rootType.GetChildInfo("item");
+            DomNode a = new DomNode(itemType);
+            a.SetAttribute(idInfo, "a");
+            a.SetAttribute(nameInfo, "a");
+            a.SetAttribute(itemType.GetAttributeInfo("weight"), 1.5f);
+            a.SetAttribute(itemType.GetAttributeInfo("values"), new[] { 1.0f, 2.0f, 3.0f });
+            DomNode b = new DomNode(itemType);
+            b.SetAttribute(idInfo, "b");
+            b.SetAttribute(nameInfo, "b");
+            DomNode c = new DomNode(itemType);
+            c.SetAttribute(idInfo, "c");
+            b.SetAttribute(refInfo, c);
+            root.GetChildList(itemsInfo).Add(a);
+            root.GetChildList(itemsInfo).Add(b);
+            root.GetChildList(itemsInfo).Add(c);
+            return root;
+        }
+
+        private class TestResource : DomNodeAdapter, IResource
+        {
+            public string Type
+            {
+                get { return "test"; }
+            }
+
+            public Uri Uri { get; set; }
+
+            public event EventHandler<UriChangedEventArgs> UriChanged
+            {
+                add { }
+                remove { }
+            }
+        }
+
+        private const string Namespace = "test";
+    }
+}
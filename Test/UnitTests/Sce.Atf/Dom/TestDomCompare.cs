@@ -0,0 +1,197 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System.Collections.Generic;
+
+using NUnit.Framework;
+
+using Sce.Atf.Adaptation;
+using Sce.Atf.Dom;
+
+namespace UnitTests.Atf.Dom
+{
+    [TestFixture]
+    public class TestDomCompare
+    {
+        public TestDomCompare()
+        {
+            m_type = new DomNodeType("type");
+            m_nameInfo = new AttributeInfo("name", AttributeType.StringType);
+            m_xInfo = new AttributeInfo("x", AttributeType.FloatType);
+            m_refInfo = new AttributeInfo("ref", new AttributeType("ref", typeof(DomNode)));
+            m_childInfo = new ChildInfo("child", m_type, true);
+            m_type.Define(m_nameInfo);
+            m_type.Define(m_xInfo);
+            m_type.Define(m_refInfo);
+            m_type.Define(m_childInfo);
+            m_type.SetIdAttribute(m_nameInfo);
+        }
+
+        [Test]
+        public void TestEqualSubtrees()
+        {
+            DomNode expected = CreateTree();
+            DomNode actual = CreateTree();
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, actual));
+        }
+
+        [Test]
+        public void TestAttributes()
+        {
+            DomNode expected = CreateTree();
+            DomNode actual = CreateTree();
+            DomNode child = actual.GetChildList(m_childInfo)[1];
+            child.SetAttribute(m_nameInfo, "other");
+            child.SetAttribute(m_xInfo, 2.0001f);
+
+            IList<string> differences = DomCompare.Diff(expected, actual);
+            Assert.AreEqual(differences.Count, 2);
+            Assert.AreEqual(differences[0], "/child[1]: attribute 'name' is 'other', expected 'b'");
+            StringAssert.StartsWith("/child[1]: attribute 'x' is", differences[1]);
+
+            DomCompareOptions options = new DomCompareOptions();
+            options.Tolerance = 0.001;
+            options.IgnoredAttributes.Add("name");
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, actual, options));
+        }
+
+        [Test]
+        public void TestComparedAttributes()
+        {
+            DomNode expected = CreateTree();
+            DomNode actual = CreateTree();
+            actual.GetChildList(m_childInfo)[1].SetAttribute(m_xInfo, 5.0f);
+
+            // attributes that aren't in the list may differ
+            DomCompareOptions options = new DomCompareOptions();
+            options.ComparedAttributes = new[] { "name" };
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, actual, options));
+
+            actual.GetChildList(m_childInfo)[1].SetAttribute(m_nameInfo, "other");
+            IList<string> differences = DomCompare.Diff(expected, actual, options);
+            Assert.AreEqual(differences.Count, 1);
+            Assert.AreEqual(differences[0], "/child[1]: attribute 'name' is 'other', expected 'b'");
+        }
+
+        [Test]
+        public void TestComparedChildren()
+        {
+            DomNode expected = CreateTree();
+            DomNode actual = CreateTree();
+            actual.GetChildList(m_childInfo).RemoveAt(0);
+
+            DomCompareOptions options = new DomCompareOptions();
+            options.ComparedChildren = new string[0];
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, actual, options));
+
+            options.ComparedChildren = new[] { "child" };
+            Assert.AreEqual(DomCompare.Diff(expected, actual, options)[0], "/: 'child' has 1 children, expected 2");
+        }
+
+        [Test]
+        public void TestUnexpectedMembers()
+        {
+            // a type with the same name, but another attribute and child
+            DomNodeType otherType = new DomNodeType("type");
+            otherType.Define(new AttributeInfo("name", AttributeType.StringType));
+            otherType.Define(new AttributeInfo("x", AttributeType.FloatType));
+            otherType.Define(new AttributeInfo("y", AttributeType.FloatType));
+            otherType.Define(new AttributeInfo("ref", new AttributeType("ref", typeof(DomNode))));
+            otherType.Define(new ChildInfo("child", otherType, true));
+            otherType.Define(new ChildInfo("extra", otherType));
+
+            DomNode expected = new DomNode(m_type);
+            DomNode actual = new DomNode(otherType);
+            IList<string> differences = DomCompare.Diff(expected, actual);
+            Assert.AreEqual(differences.Count, 2);
+            Assert.AreEqual(differences[0], "/: attribute 'y' is unexpected");
+            Assert.AreEqual(differences[1], "/: child 'extra' is unexpected");
+
+            DomCompareOptions options = new DomCompareOptions();
+            options.IgnoredAttributes.Add("y");
+            options.IgnoredChildren.Add("extra");
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, actual, options));
+        }
+
+        [Test]
+        public void TestChildren()
+        {
+            DomNode expected = CreateTree();
+            DomNode actual = CreateTree();
+            actual.GetChildList(m_childInfo).RemoveAt(0);
+
+            IList<string> differences = DomCompare.Diff(expected, actual);
+            Assert.AreEqual(differences[0], "/: 'child' has 1 children, expected 2");
+
+            DomCompareOptions options = new DomCompareOptions();
+            options.IgnoredChildren.Add("child");
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, actual, options));
+        }
+
+        [Test]
+        public void TestReferences()
+        {
+            DomNode expected = CreateTree();
+            DomNode actual = CreateTree();
+
+            // internal references must refer to the matching node
+            IList<DomNode> children = actual.GetChildList(m_childInfo);
+            children[0].SetAttribute(m_refInfo, children[0]);
+            IList<string> differences = DomCompare.Diff(expected, actual);
+            Assert.AreEqual(differences.Count, 1);
+            Assert.AreEqual(differences[0], "/child[0]: reference 'ref' is /child[0], expected /child[1]");
+
+            DomCompareOptions options = new DomCompareOptions();
+            options.CompareReferences = false;
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, actual, options));
+
+            // other references may refer to an equivalent node, with the same id
+            expected = CreateTree().GetChildList(m_childInfo)[0];
+            actual = CreateTree().GetChildList(m_childInfo)[0];
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, actual));
+            actual.GetAttribute(m_refInfo).As<DomNode>().SetAttribute(m_nameInfo, "c");
+            Assert.AreEqual(DomCompare.Diff(expected, actual)[0], "/: reference 'ref' is type 'c', expected type 'b'");
+
+            // nodes without an id are compared by their place in the document
+            actual.GetAttribute(m_refInfo).As<DomNode>().SetAttribute(m_nameInfo, null);
+            expected.GetAttribute(m_refInfo).As<DomNode>().SetAttribute(m_nameInfo, null);
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, actual));
+            actual.SetAttribute(m_refInfo, actual.Parent);
+            Assert.AreEqual(DomCompare.Diff(expected, actual).Count, 1);
+        }
+
+        [Test]
+        public void TestMaxDifferences()
+        {
+            DomNode expected = CreateTree();
+            DomNode actual = CreateTree();
+            foreach (DomNode child in actual.GetChildList(m_childInfo))
+                child.SetAttribute(m_xInfo, 5.0f);
+
+            DomCompareOptions options = new DomCompareOptions();
+            options.MaxDifferences = 1;
+            Assert.AreEqual(DomCompare.Diff(expected, actual, options).Count, 1);
+        }
+
+        // creates a root with children "a" and "b", where "a" refers to "b"
+        private DomNode CreateTree()
+        {
+            DomNode root = new DomNode(m_type);
+            DomNode a = new DomNode(m_type);
+            DomNode b = new DomNode(m_type);
+            a.SetAttribute(m_nameInfo, "a");
+            a.SetAttribute(m_xInfo, 1.0f);
+            b.SetAttribute(m_nameInfo, "b");
+            b.SetAttribute(m_xInfo, 2.0f);
+            root.GetChildList(m_childInfo).Add(a);
+            root.GetChildList(m_childInfo).Add(b);
+            a.SetAttribute(m_refInfo, b);
+            return root;
+        }
+
+        private readonly DomNodeType m_type;
+        private readonly AttributeInfo m_nameInfo;
+        private readonly AttributeInfo m_xInfo;
+        private readonly AttributeInfo m_refInfo;
+        private readonly ChildInfo m_childInfo;
+    }
+}
@@ -2,6 +2,7 @@
 
 using System;
 using System.Collections.Generic;
+using System.Diagnostics;
 
 using NUnit.Framework;
 
@@ -392,6 +393,161 @@ public void TestSetAttribute()
             Assert.False(test.IsAttributeSet(info));
         }
 
+        [Test]
+        public void TestTypedAttributes()
+        {
+            DomNodeType type = new DomNodeType("child");
+            AttributeInfo floatInfo = new AttributeInfo("float", AttributeType.FloatType);
+            AttributeInfo intInfo = GetIntAttribute("int");
+            AttributeInfo boolInfo = new AttributeInfo("bool", AttributeType.BooleanType);
+            floatInfo.DefaultValue = 1.5f;
+            type.Define(floatInfo);
+            type.Define(intInfo);
+            type.Define(boolInfo);
+            DomNode test = new DomNode(type);
+
+            Assert.AreEqual(test.GetFloat(floatInfo), 1.5f);
+            Assert.AreEqual(test.GetInt(intInfo), 0);
+            Assert.False(test.GetBool(boolInfo));
+
+            // setting the default value sets the attribute, as SetAttribute does
+            test.SetFloat(floatInfo, 1.5f);
+            Assert.True(test.IsAttributeSet(floatInfo));
+            Assert.True(test.IsAttributeDefault(floatInfo));
+
+            test.SetFloat(floatInfo, 2.5f);
+            test.SetInt(intInfo, 3);
+            test.SetBool(boolInfo, true);
+            Assert.AreEqual(test.GetFloat(floatInfo), 2.5f);
+            Assert.AreEqual(test.GetAttribute(floatInfo), 2.5f);
+            Assert.AreEqual(test.GetLocalAttribute(intInfo), 3);
+            Assert.True((bool)test.GetAttribute(boolInfo));
+            Assert.False(test.IsAttributeDefault(floatInfo));
+
+            // the boxed and unboxed accessors see the same values
+            test.SetAttribute(floatInfo, 4.0f);
+            Assert.AreEqual(test.GetFloat(floatInfo), 4.0f);
+            test.SetAttribute(intInfo, null);
+            Assert.False(test.IsAttributeSet(intInfo));
+            Assert.AreEqual(test.GetInt(intInfo), 0);
+
+            DomNode copy = DomNode.Copy(test);
+            Assert.AreEqual(copy.GetFloat(floatInfo), 4.0f);
+            Assert.True(copy.GetBool(boolInfo));
+        }
+
+        [Test]
+        public void TestTypedAttributeEvents()
+        {
+            DomNodeType type = new DomNodeType("child");
+            AttributeInfo info = new AttributeInfo("float", AttributeType.FloatType);
+            type.Define(info);
+            DomNode test = new DomNode(type);
+            DomNodeListener listener = new DomNodeListener(test);
+
+            test.SetFloat(info, 2.0f);
+            AttributeEventArgs expected = new AttributeEventArgs(test, info, 0.0f, 2.0f);
+            Assert.True(Equals(listener.AttributeChangingArgs, expected));
+            Assert.True(Equals(listener.AttributeChangedArgs, expected));
+
+            listener.AttributeChangedArgs = null;
+            test.SetFloat(info, 2.0f);
+            Assert.Null(listener.AttributeChangedArgs);
+
+            test.SetFloat(info, 3.0f);
+            expected = new AttributeEventArgs(test, info, 2.0f, 3.0f);
+            Assert.True(Equals(listener.AttributeChangedArgs, expected));
+        }
+
+        [Test, Explicit, Category("Performance")]
+        public void TestAttributeAllocations()
+        {
+            // a synthetic scene of 1M nodes, each with a transform's worth of scalar attributes
+            const int nodeCount = 1000000;
+            DomNodeType type = new DomNodeType("node");
+            AttributeInfo[] infos = new AttributeInfo[9];
+            for (int i = 0; i < infos.Length; i++)
+            {
+                infos[i] = new AttributeInfo("value" + i, AttributeType.FloatType);
+                type.Define(infos[i]);
+            }
+            type.Define(new ExtensionInfo<ValueAdapter>());
+
+            foreach (bool typed in new[] { false, true })
+            {
+                GC.Collect();
+                GC.WaitForPendingFinalizers();
+                long startMemory = GC.GetTotalMemory(true);
+                int startCollections = GC.CollectionCount(0);
+                Stopwatch stopwatch = Stopwatch.StartNew();
+
+                DomNode[] nodes = new DomNode[nodeCount];
+                for (int i = 0; i < nodeCount; i++)
+                {
+                    DomNode node = new DomNode(type);
+                    for (int j = 0; j < infos.Length; j++)
+                    {
+                        if (typed)
+                            node.SetFloat(infos[j], i + j);
+                        else
+                            node.SetAttribute(infos[j], (float)(i + j));
+                    }
+                    nodes[i] = node;
+                }
+                long createMilliseconds = stopwatch.ElapsedMilliseconds;
+                long memory = GC.GetTotalMemory(true) - startMemory;
+
+                // update every value, as an animation or a transform tool would
+                stopwatch.Restart();
+                int updateCollections = GC.CollectionCount(0);
+                foreach (DomNode node in nodes)
+                {
+                    for (int j = 0; j < infos.Length; j++)
+                    {
+                        if (typed)
+                            node.SetFloat(infos[j], node.GetFloat(infos[j]) + 1);
+                        else
+                            node.SetAttribute(infos[j], (float)node.GetAttribute(infos[j]) + 1);
+                    }
+                }
+                long updateMilliseconds = stopwatch.ElapsedMilliseconds;
+
+                // read every value through an adapter, as rendering code would
+                foreach (DomNode node in nodes)
+                    node.As<ValueAdapter>();
+                stopwatch.Restart();
+                int readCollections = GC.CollectionCount(0);
+                float sum = 0;
+                foreach (DomNode node in nodes)
+                {
+                    ValueAdapter adapter = node.As<ValueAdapter>();
+                    for (int j = 0; j < infos.Length; j++)
+                    {
+                        if (typed)
+                            sum += adapter.GetValue(infos[j]);
+                        else
+                            sum += (float)node.GetAttribute(infos[j]);
+                    }
+                }
+
+                Console.WriteLine("{0}: created in {1} ms, {2:F1} MB, {3} gen0 collections; updated in {4} ms, {5} gen0 collections; read in {6} ms, {7} gen0 collections",
+                    typed ? "SetFloat" : "SetAttribute", createMilliseconds, memory / (1024.0 * 1024.0),
+                    updateCollections - startCollections, updateMilliseconds,
+                    readCollections - updateCollections, stopwatch.ElapsedMilliseconds,
+                    GC.CollectionCount(0) - readCollections);
+                GC.KeepAlive(nodes);
+                GC.KeepAlive(sum);
+            }
+        }
+
+        private class ValueAdapter : DomNodeAdapter
+        {
+            public float GetValue(AttributeInfo attributeInfo)
+            {
+                return GetAttribute<float>(attributeInfo);
+            }
+        }
+
         [Test]
         public void TestGetIdDefault()
         {
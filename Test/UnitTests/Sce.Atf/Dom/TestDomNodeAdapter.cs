@@ -105,6 +105,36 @@ public void TestGetSetAttribute()
             Assert.AreEqual(test.GetAttribute<string>(stringInfo), "foo");
         }
 
+        [Test]
+        public void TestGetScalarAttributes()
+        {
+            DomNodeType type = new DomNodeType("type");
+            AttributeInfo floatInfo = new AttributeInfo("float", AttributeType.FloatType);
+            type.Define(floatInfo);
+            AttributeInfo doubleInfo = new AttributeInfo("double", new AttributeType("double", typeof(double)));
+            type.Define(doubleInfo);
+            AttributeInfo boolInfo = new AttributeInfo("bool", AttributeType.BooleanType);
+            type.Define(boolInfo);
+            type.Define(new ExtensionInfo<VisibleAdapter>());
+            DomNode node = new DomNode(type);
+            VisibleAdapter test = node.As<VisibleAdapter>();
+
+            // default values, and values stored unboxed, are read the same way
+            Assert.AreEqual(test.GetAttribute<float>(floatInfo), 0.0f);
+            Assert.AreEqual(test.GetAttribute<double>(doubleInfo), 0.0);
+            Assert.AreEqual(test.GetAttribute<bool>(boolInfo), false);
+            test.SetAttribute(floatInfo, 1.5f);
+            test.SetAttribute(doubleInfo, 2.5);
+            test.SetAttribute(boolInfo, true);
+            Assert.AreEqual(test.GetAttribute<float>(floatInfo), 1.5f);
+            Assert.AreEqual(test.GetAttribute<double>(doubleInfo), 2.5);
+            Assert.AreEqual(test.GetAttribute<bool>(boolInfo), true);
+
+            // reading as another type is still an invalid cast
+            Assert.Throws<InvalidCastException>(() => test.GetAttribute<double>(floatInfo));
+            Assert.AreEqual(test.GetAttribute<object>(floatInfo), 1.5f);
+        }
+
         // Currently, non-null values can't be used as the default values for attributes
         //  that are reference types (or at least DomNode reference types). A solution exists,
         //  but it would complicate DomNode.
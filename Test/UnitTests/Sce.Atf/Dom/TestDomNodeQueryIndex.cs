@@ -0,0 +1,245 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.ComponentModel;
+using System.Globalization;
+using System.Threading;
+
+using NUnit.Framework;
+
+using Sce.Atf;
+using Sce.Atf.Adaptation;
+using Sce.Atf.Dom;
+
+namespace UnitTests.Atf.Dom
+{
+    [TestFixture]
+    public class TestDomNodeQueryIndex
+    {
+        public TestDomNodeQueryIndex()
+        {
+            m_type = new DomNodeType("type");
+            m_nameInfo = new AttributeInfo("name", AttributeType.StringType);
+            m_weightInfo = new AttributeInfo("weight", AttributeType.FloatType);
+            m_referenceInfo = new AttributeInfo("reference", new AttributeType("reference", typeof(DomNode)));
+            m_firstInfo = new ChildInfo("first", m_type, true);
+            m_secondInfo = new ChildInfo("second", m_type, true);
+            m_type.Define(m_nameInfo);
+            m_type.Define(m_weightInfo);
+            m_type.Define(m_referenceInfo);
+            m_type.Define(m_firstInfo);
+            m_type.Define(m_secondInfo);
+            m_type.Define(new ExtensionInfo<CustomTypeDescriptorNodeAdapter>());
+            m_type.Define(new ExtensionInfo<DomNodeQueryable>());
+            m_type.SetTag(new PropertyDescriptorCollection(new System.ComponentModel.PropertyDescriptor[]
+            {
+                new AttributePropertyDescriptor("Name", m_nameInfo, "Category", "Name", false),
+                new AttributePropertyDescriptor("Weight", m_weightInfo, "Category", "Weight", false),
+                new ReferenceNamePropertyDescriptor("Reference", m_referenceInfo, m_nameInfo),
+            }));
+
+            m_indexedType = new DomNodeType("indexedType", m_type);
+            m_indexedType.Define(new ExtensionInfo<DomNodeQueryIndex>());
+        }
+
+        [Test]
+        public void TestQueryResults()
+        {
+            DomNode root = CreateTree(m_type);
+            DomNode indexedRoot = CreateTree(m_indexedType);
+
+            var namePredicate = new DomNodeNamePredicate();
+            namePredicate.StringToMatch = "APPLE";
+            CheckSameResults(root, indexedRoot, namePredicate, "apple pie", "apple");
+
+            var stringPredicate = new DomNodePropertyPredicate();
+            stringPredicate.AddValueStringSearchExpression("an", (ulong)StringQuery.Contains, false);
+            CheckSameResults(root, indexedRoot, stringPredicate, "banana");
+
+            var beginsPredicate = new DomNodePropertyPredicate();
+            beginsPredicate.AddValueStringSearchExpression("pie", (ulong)StringQuery.BeginsWith, false);
+            CheckSameResults(root, indexedRoot, beginsPredicate);
+
+            var numberPredicate = new DomNodePropertyPredicate();
+            numberPredicate.AddNumberValueGreaterExpression(1, false);
+            numberPredicate.AddNumberValueLesserEqualExpression(4, false);
+            CheckSameResults(root, indexedRoot, numberPredicate, "cherry", "apple pie", "banana");
+
+            // regular expressions can't be narrowed by the index, so every node is tested
+            var regexPredicate = new DomNodePropertyPredicate();
+            regexPredicate.AddValueStringSearchExpression("^[ab]", (ulong)StringQuery.RegularExpression, false);
+            CheckSameResults(root, indexedRoot, regexPredicate, "apple pie", "apple", "banana");
+        }
+
+        [Test]
+        public void TestChanges()
+        {
+            DomNode root = CreateTree(m_indexedType);
+            DomNodeQueryIndex index = root.As<DomNodeQueryIndex>();
+            Assert.AreEqual(index.Count, 5);
+            Assert.AreEqual(GetSortedNames(index.FindText("apple")), new[] { "apple", "apple pie" });
+            Assert.AreEqual(GetSortedNames(index.GetNodes(m_type)), new[] { "apple", "apple pie", "banana", "cherry" });
+
+            DomNode apple = root.GetChildList(m_firstInfo)[0];
+            apple.SetAttribute(m_nameInfo, "apricot");
+            apple.SetAttribute(m_weightInfo, 10.0f);
+            Assert.AreEqual(GetSortedNames(index.FindText("apple")), new[] { "apple pie" });
+            Assert.AreEqual(GetSortedNames(index.FindText("APR")), new[] { "apricot" });
+            Assert.AreEqual(GetSortedNames(index.FindNumbers(5, 20)), new[] { "apricot" });
+
+            DomNode pie = root.GetChildList(m_secondInfo)[0].GetChildList(m_firstInfo)[0];
+            pie.RemoveFromParent();
+            Assert.AreEqual(index.Count, 4);
+            CollectionAssert.IsEmpty(index.FindText("apple"));
+            CollectionAssert.IsEmpty(index.FindNumbers(4, 4));
+
+            root.GetChildList(m_firstInfo).Add(pie);
+            Assert.AreEqual(index.Count, 5);
+            Assert.AreEqual(GetSortedNames(index.FindText("apple")), new[] { "apple pie" });
+            Assert.AreEqual(GetSortedNames(index.FindNumbers(4, 4)), new[] { "apple pie" });
+        }
+
+        [Test]
+        public void TestReferences()
+        {
+            // the pie shows the name of the node that it refers to
+            DomNode root = CreateTree(m_indexedType);
+            DomNodeQueryIndex index = root.As<DomNodeQueryIndex>();
+            DomNode apple = root.GetChildList(m_firstInfo)[0];
+            DomNode banana = root.GetChildList(m_firstInfo)[1];
+            DomNode pie = root.GetChildList(m_secondInfo)[0].GetChildList(m_firstInfo)[0];
+            pie.SetAttribute(m_referenceInfo, banana);
+            Assert.AreEqual(GetSortedNames(index.FindText("banana")), new[] { "apple pie", "banana" });
+
+            banana.SetAttribute(m_nameInfo, "blueberry");
+            CollectionAssert.IsEmpty(index.FindText("banana"));
+            Assert.AreEqual(GetSortedNames(index.FindText("blueberry")), new[] { "apple pie", "blueberry" });
+
+            // referrers of removed and re-inserted nodes are re-indexed too
+            apple.RemoveFromParent();
+            pie.SetAttribute(m_referenceInfo, apple);
+            apple.SetAttribute(m_nameInfo, "apricot");
+            root.GetChildList(m_firstInfo).Add(apple);
+            apple.SetAttribute(m_nameInfo, "avocado");
+            Assert.AreEqual(GetSortedNames(index.FindText("blueberry")), new[] { "blueberry" });
+            Assert.AreEqual(GetSortedNames(index.FindText("avocado")), new[] { "apple pie", "avocado" });
+        }
+
+        [Test]
+        public void TestCaseFolding()
+        {
+            // case is ignored in the same way with and without the index, whatever the culture is;
+            //  in Turkish, 'I' is the upper case of 'ı', and not of 'i'
+            CultureInfo culture = Thread.CurrentThread.CurrentCulture;
+            Thread.CurrentThread.CurrentCulture = new CultureInfo("tr-TR");
+            try
+            {
+                DomNode root = CreateTree(m_type);
+                DomNode indexedRoot = CreateTree(m_indexedType);
+                foreach (DomNode node in new[] { root, indexedRoot })
+                {
+                    node.GetChildList(m_firstInfo).Add(CreateNode("TITLE", 5));
+                    node.GetChildList(m_firstInfo).Add(CreateNode("DI\u015e", 6));
+                }
+
+                var namePredicate = new DomNodeNamePredicate();
+                namePredicate.StringToMatch = "title";
+                CheckSameResults(root, indexedRoot, namePredicate, "TITLE");
+                namePredicate.StringToMatch = "d\u0131\u015f";
+                CheckSameResults(root, indexedRoot, namePredicate);
+
+                var stringPredicate = new DomNodePropertyPredicate();
+                stringPredicate.AddValueStringSearchExpression("title", (ulong)StringQuery.Contains, false);
+                CheckSameResults(root, indexedRoot, stringPredicate, "TITLE");
+
+                stringPredicate = new DomNodePropertyPredicate();
+                stringPredicate.AddValueStringSearchExpression("d\u0131\u015f", (ulong)StringQuery.Contains, false);
+                CheckSameResults(root, indexedRoot, stringPredicate);
+            }
+            finally
+            {
+                Thread.CurrentThread.CurrentCulture = culture;
+            }
+        }
+
+        private void CheckSameResults(DomNode root, DomNode indexedRoot, IQueryPredicate predicate, params string[] expected)
+        {
+            Assert.AreEqual(GetResultNames(root.As<DomNodeQueryable>().Query(predicate)), expected);
+            Assert.AreEqual(GetResultNames(indexedRoot.As<DomNodeQueryable>().Query(predicate)), expected);
+        }
+
+        private List<string> GetResultNames(IEnumerable<object> results)
+        {
+            var names = new List<string>();
+            foreach (DomNodeQueryMatch match in results)
+                names.Add((string)match.DomNode.GetAttribute(m_nameInfo));
+            return names;
+        }
+
+        private List<string> GetSortedNames(IEnumerable<DomNode> nodes)
+        {
+            var names = new List<string>();
+            foreach (DomNode node in nodes)
+                names.Add((string)node.GetAttribute(m_nameInfo));
+            names.Sort();
+            return names;
+        }
+
+        private DomNode CreateTree(DomNodeType rootType)
+        {
+            DomNode root = new DomNode(rootType);
+            root.SetAttribute(m_nameInfo, "root");
+            root.GetChildList(m_firstInfo).Add(CreateNode("apple", 1));
+            root.GetChildList(m_firstInfo).Add(CreateNode("banana", 2));
+            DomNode cherry = CreateNode("cherry", 3);
+            cherry.GetChildList(m_firstInfo).Add(CreateNode("apple pie", 4));
+            root.GetChildList(m_secondInfo).Add(cherry);
+            return root;
+        }
+
+        private DomNode CreateNode(string name, float weight)
+        {
+            DomNode node = new DomNode(m_type);
+            node.SetAttribute(m_nameInfo, name);
+            node.SetAttribute(m_weightInfo, weight);
+            return node;
+        }
+
+        // Shows the name of the node that a reference attribute refers to
+        private class ReferenceNamePropertyDescriptor : System.ComponentModel.PropertyDescriptor
+        {
+            public ReferenceNamePropertyDescriptor(string name, AttributeInfo referenceInfo, AttributeInfo nameInfo)
+                : base(name, null)
+            {
+                m_referenceInfo = referenceInfo;
+                m_nameInfo = nameInfo;
+            }
+
+            public override object GetValue(object component)
+            {
+                DomNode reference = (DomNode)((DomNode)component).GetAttribute(m_referenceInfo);
+                return reference != null ? reference.GetAttribute(m_nameInfo) : string.Empty;
+            }
+
+            public override Type ComponentType { get { return typeof(DomNode); } }
+            public override bool IsReadOnly { get { return true; } }
+            public override Type PropertyType { get { return typeof(string); } }
+            public override bool CanResetValue(object component) { return false; }
+            public override void ResetValue(object component) { }
+            public override void SetValue(object component, object value) { }
+            public override bool ShouldSerializeValue(object component) { return false; }
+
+            private readonly AttributeInfo m_referenceInfo;
+            private readonly AttributeInfo m_nameInfo;
+        }
+
+        private readonly DomNodeType m_type;
+        private readonly DomNodeType m_indexedType;
+        private readonly AttributeInfo m_nameInfo;
+        private readonly AttributeInfo m_weightInfo;
+        private readonly AttributeInfo m_referenceInfo;
+        private readonly ChildInfo m_firstInfo;
+        private readonly ChildInfo m_secondInfo;
+    }
+}
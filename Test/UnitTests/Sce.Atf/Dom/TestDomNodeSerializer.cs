@@ -0,0 +1,145 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Linq;
+
+using NUnit.Framework;
+
+using Sce.Atf.Dom;
+
+namespace UnitTests.Atf.Dom
+{
+    [TestFixture]
+    public class TestDomNodeSerializer
+    {
+        public TestDomNodeSerializer()
+        {
+            m_type = new DomNodeType("node");
+            m_nameInfo = new AttributeInfo("name", AttributeType.StringType);
+            m_valuesInfo = new AttributeInfo("values", new AttributeType("floatArray", typeof(float[]), int.MaxValue));
+            m_refInfo = new AttributeInfo("ref", new AttributeType("ref", typeof(DomNode)));
+            m_childInfo = new ChildInfo("child", m_type);
+            m_childrenInfo = new ChildInfo("children", m_type, true);
+            m_type.Define(m_nameInfo);
+            m_type.Define(m_valuesInfo);
+            m_type.Define(m_refInfo);
+            m_type.Define(m_childInfo);
+            m_type.Define(m_childrenInfo);
+        }
+
+        [Test]
+        public void TestRoundTrip()
+        {
+            DomNode external = CreateNode("external");
+            DomNode a = CreateNode("a");
+            DomNode b = CreateNode("b");
+            DomNode c = CreateNode("c");
+            a.SetAttribute(m_valuesInfo, new[] { 1.0f, 2.0f, 3.0f });
+            a.GetChildList(m_childrenInfo).Add(c);
+            a.SetChild(m_childInfo, CreateNode("d"));
+            a.SetAttribute(m_refInfo, b);
+            b.SetAttribute(m_refInfo, c);
+            c.SetAttribute(m_refInfo, external);
+
+            DomNodeSerializer serializer = new DomNodeSerializer();
+            byte[] data = serializer.Serialize(new[] { a, b });
+            DomNode[] result = serializer.Deserialize(data, GetNodeType).ToArray();
+
+            Assert.AreEqual(result.Length, 2);
+            c.SetAttribute(m_refInfo, null); // references outside of the nodes are dropped
+            CollectionAssert.IsEmpty(DomCompare.Diff(new[] { a, b }, result, null));
+            DomNode resultC = result[0].GetChildList(m_childrenInfo)[0];
+            Assert.AreSame(result[0].GetAttribute(m_refInfo), result[1]);
+            Assert.AreSame(result[1].GetAttribute(m_refInfo), resultC);
+            Assert.IsNull(resultC.GetAttribute(m_refInfo));
+
+            // the stream overloads write and read the same data, and leave the stream open
+            MemoryStream stream = new MemoryStream();
+            serializer.Serialize(new[] { a, b }, stream);
+            CollectionAssert.AreEqual(stream.ToArray(), data);
+            stream.Position = 0;
+            result = serializer.Deserialize(stream, GetNodeType).ToArray();
+            CollectionAssert.IsEmpty(DomCompare.Diff(new[] { a, b }, result, null));
+            Assert.AreEqual(stream.Position, stream.Length);
+        }
+
+        [Test]
+        public void TestDeserializeVersion1()
+        {
+            // the original format: a node count, and then each node's type name, its attributes
+            //  as strings and reference ids, and its children
+            MemoryStream stream = new MemoryStream();
+            BinaryWriter writer = new BinaryWriter(stream);
+            writer.Write(1);
+            writer.Write("node");
+            writer.Write(true);
+            writer.Write("a");
+            writer.Write(true);
+            writer.Write("1 2");
+            writer.Write(false);
+            writer.Write(false);
+            writer.Write(1);
+            {
+                writer.Write("node");
+                writer.Write(true);
+                writer.Write("b");
+                writer.Write(false);
+                writer.Write(true);
+                writer.Write(0);
+                writer.Write(false);
+                writer.Write(0);
+            }
+            writer.Flush();
+
+            DomNode[] result = new DomNodeSerializer().Deserialize(stream.ToArray(), GetNodeType).ToArray();
+            Assert.AreEqual(result.Length, 1);
+            DomNode a = result[0];
+            DomNode b = a.GetChildList(m_childrenInfo)[0];
+            Assert.AreEqual(a.GetAttribute(m_nameInfo), "a");
+            Assert.AreEqual(a.GetAttribute(m_valuesInfo), new[] { 1.0f, 2.0f });
+            Assert.AreEqual(b.GetAttribute(m_nameInfo), "b");
+            Assert.AreSame(b.GetAttribute(m_refInfo), a);
+        }
+
+        [Test]
+        public void TestDuplicateNodes()
+        {
+            DomNode a = CreateNode("a");
+            DomNode b = CreateNode("b");
+            a.GetChildList(m_childrenInfo).Add(b);
+
+            DomNodeSerializer serializer = new DomNodeSerializer();
+            Assert.Throws<InvalidOperationException>(() => serializer.Serialize(new[] { a, a }));
+            Assert.Throws<InvalidOperationException>(() => serializer.Serialize(new[] { a, b }));
+        }
+
+        [Test]
+        public void TestUnknownVersion()
+        {
+            byte[] data = new DomNodeSerializer().Serialize(new[] { CreateNode("a") });
+            data[4] = DomNodeSerializer.Version + 1;
+            Assert.Throws<InvalidDataException>(() => new DomNodeSerializer().Deserialize(data, GetNodeType));
+        }
+
+        private DomNode CreateNode(string name)
+        {
+            DomNode node = new DomNode(m_type);
+            node.SetAttribute(m_nameInfo, name);
+            return node;
+        }
+
+        private DomNodeType GetNodeType(string name)
+        {
+            return name == m_type.Name ? m_type : null;
+        }
+
+        private readonly DomNodeType m_type;
+        private readonly AttributeInfo m_nameInfo;
+        private readonly AttributeInfo m_valuesInfo;
+        private readonly AttributeInfo m_refInfo;
+        private readonly ChildInfo m_childInfo;
+        private readonly ChildInfo m_childrenInfo;
+    }
+}
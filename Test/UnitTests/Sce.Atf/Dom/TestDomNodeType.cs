@@ -463,5 +463,75 @@ public void TestGetDescendantInfo()
             Assert.AreSame(parentType.GetDescendantInfo("child"), childInfo);
             Assert.AreSame(parentType.GetDescendantInfo("child:grandChild"), grandChildInfo);
         }
+
+        private class TestAdapterCreator : IAdapterCreator
+        {
+            public bool CanAdapt(object adaptee, Type type)
+            {
+                return type == typeof(TestAdapter1);
+            }
+
+            public object GetAdapter(object adaptee, Type type)
+            {
+                return Adapter;
+            }
+
+            public readonly TestAdapter1 Adapter = new TestAdapter1();
+        }
+
+        [Test]
+        public void TestAdapterLookups()
+        {
+            DomNodeType baseType = new DomNodeType("base");
+            baseType.Define(new ExtensionInfo<TestAdapter1>());
+            DomNodeType type = new DomNodeType("type");
+            type.BaseType = baseType;
+            type.Define(new ExtensionInfo<TestAdapter2>());
+            DomNode node = new DomNode(type);
+
+            Assert.AreSame(node.As<DomNode>(), node);
+            Assert.AreSame(node.GetAdapter(typeof(object)), node);
+            Assert.IsInstanceOf<TestAdapter1>(node.As<TestAdapter1>());
+            Assert.AreSame(node.As<TestAdapter1>().DomNode, node);
+            Assert.IsInstanceOf<TestAdapter2>(node.As<DomNodeAdapter>());
+            Assert.IsNull(node.As<DomNodeQueryable>());
+            Assert.IsNull(node.As<DomNodeQueryable>());
+
+            // creators added later take part in lookups, in order
+            TestAdapterCreator creator = new TestAdapterCreator();
+            type.AddAdapterCreator(creator);
+            Assert.AreSame(node.As<TestAdapter1>(), creator.Adapter);
+            Assert.AreEqual(node.GetDecorators(typeof(TestAdapter1)).Count(), 2);
+        }
+
+        [Test]
+        public void TestAdapterLookupCounts()
+        {
+            DomNodeType type = new DomNodeType("counted");
+            type.Define(new ExtensionInfo<TestAdapter1>());
+            DomNode node = new DomNode(type);
+
+            DomNodeType.ResetAdapterLookupCounts();
+            DomNodeType.CountAdapterLookups = true;
+            try
+            {
+                for (int i = 0; i < 3; i++)
+                    node.As<TestAdapter1>();
+                node.As<TestAdapter2>();
+            }
+            finally
+            {
+                DomNodeType.CountAdapterLookups = false;
+            }
+
+            var counts = DomNodeType.GetAdapterLookupCounts();
+            Assert.AreEqual(counts.Count, 2);
+            Assert.AreEqual(counts[0].Key, "counted -> " + typeof(TestAdapter1).FullName);
+            Assert.AreEqual(counts[0].Value, 3);
+            Assert.AreEqual(counts[1].Value, 1);
+
+            DomNodeType.ResetAdapterLookupCounts();
+            CollectionAssert.IsEmpty(DomNodeType.GetAdapterLookupCounts());
+        }
     }
 }
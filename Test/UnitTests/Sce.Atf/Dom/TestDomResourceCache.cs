@@ -0,0 +1,301 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Linq;
+
+using NUnit.Framework;
+
+using Sce.Atf;
+using Sce.Atf.Dom;
+
+namespace UnitTests.Atf.Dom
+{
+    [TestFixture]
+    public class TestDomResourceCache
+    {
+        public TestDomResourceCache()
+        {
+            m_type = new DomNodeType("node");
+            m_valuesInfo = new AttributeInfo("values", new AttributeType("floatArray", typeof(float[]), int.MaxValue));
+            m_type.Define(m_valuesInfo);
+        }
+
+        [SetUp]
+        public void SetUp()
+        {
+            m_directory = Path.Combine(Path.GetTempPath(), Path.GetRandomFileName());
+            Directory.CreateDirectory(m_directory);
+            m_readCount = 0;
+        }
+
+        [TearDown]
+        public void TearDown()
+        {
+            Directory.Delete(m_directory, true);
+        }
+
+        [Test]
+        public void TestMemoryCache()
+        {
+            string path = WriteFile("a.txt", "1 2 3");
+            var cache = new DomResourceCache();
+
+            DomNode first = cache.Load(path, GetNodeType, Read);
+            DomNode second = cache.Load(path, GetNodeType, Read);
+            Assert.AreEqual(m_readCount, 1);
+            Assert.AreEqual(cache.Misses, 1);
+            Assert.AreEqual(cache.MemoryHits, 1);
+            Assert.AreNotSame(first, second);
+            CollectionAssert.IsEmpty(DomCompare.Diff(first, second));
+            Assert.AreEqual(second.GetAttribute(m_valuesInfo), new[] { 1.0f, 2.0f, 3.0f });
+
+            // a changed file is read again
+            WriteFile("a.txt", "1 2 3 4");
+            Assert.AreEqual(cache.Load(path, GetNodeType, Read).GetAttribute(m_valuesInfo), new[] { 1.0f, 2.0f, 3.0f, 4.0f });
+            Assert.AreEqual(m_readCount, 2);
+
+            // so is a file with the same size and a new write time, if its contents changed
+            WriteFile("a.txt", "1 2 3 5");
+            File.SetLastWriteTimeUtc(path, File.GetLastWriteTimeUtc(path).AddMinutes(1));
+            Assert.AreEqual(cache.Load(path, GetNodeType, Read).GetAttribute(m_valuesInfo), new[] { 1.0f, 2.0f, 3.0f, 5.0f });
+            Assert.AreEqual(m_readCount, 3);
+
+            // but not a file that was only touched
+            File.SetLastWriteTimeUtc(path, File.GetLastWriteTimeUtc(path).AddMinutes(1));
+            cache.Load(path, GetNodeType, Read);
+            Assert.AreEqual(m_readCount, 3);
+
+            cache.Invalidate(path);
+            cache.Load(path, GetNodeType, Read);
+            Assert.AreEqual(m_readCount, 4);
+        }
+
+        [Test]
+        public void TestDiskCache()
+        {
+            string path = WriteFile("a.txt", "1 2 3");
+            string cacheDirectory = Path.Combine(m_directory, "cache");
+            new DomResourceCache(0, cacheDirectory).Load(path, GetNodeType, Read);
+
+            // the data outlives the cache, and isn't kept in memory when it doesn't fit
+            var cache = new DomResourceCache(0, cacheDirectory);
+            Assert.AreEqual(cache.Load(path, GetNodeType, Read).GetAttribute(m_valuesInfo), new[] { 1.0f, 2.0f, 3.0f });
+            Assert.AreEqual(cache.Load(path, GetNodeType, Read).GetAttribute(m_valuesInfo), new[] { 1.0f, 2.0f, 3.0f });
+            Assert.AreEqual(m_readCount, 1);
+            Assert.AreEqual(cache.DiskHits, 2);
+            Assert.AreEqual(cache.Size, 0);
+
+            WriteFile("a.txt", "4 5");
+            Assert.AreEqual(cache.Load(path, GetNodeType, Read).GetAttribute(m_valuesInfo), new[] { 4.0f, 5.0f });
+            Assert.AreEqual(m_readCount, 2);
+
+            cache.Clear();
+            CollectionAssert.IsEmpty(Directory.GetFiles(cacheDirectory));
+            new DomResourceCache(0, cacheDirectory).Load(path, GetNodeType, Read);
+            Assert.AreEqual(m_readCount, 3);
+        }
+
+        [Test]
+        public void TestCapacity()
+        {
+            var paths = new List<string>();
+            for (int i = 0; i < 4; i++)
+                paths.Add(WriteFile(i + ".txt", "1 2 3"));
+
+            // find the size of one file's data
+            var cache = new DomResourceCache();
+            cache.Load(paths[0], GetNodeType, Read);
+            long size = cache.Size;
+
+            cache = new DomResourceCache(size * 2, null);
+            var watcher = new FileWatcher();
+            cache.FileWatcherService = watcher;
+            foreach (string path in paths)
+                cache.Load(path, GetNodeType, Read);
+            Assert.AreEqual(cache.Size, size * 2);
+            CollectionAssert.AreEquivalent(watcher.Files, paths.Skip(2));
+
+            // the least recently used data is evicted
+            m_readCount = 0;
+            cache.Load(paths[3], GetNodeType, Read);
+            cache.Load(paths[0], GetNodeType, Read);
+            Assert.AreEqual(m_readCount, 1);
+            CollectionAssert.AreEquivalent(watcher.Files, new[] { paths[3], paths[0] });
+        }
+
+        [Test]
+        public void TestFileWatcherService()
+        {
+            string path = WriteFile("a.txt", "1 2 3");
+            var watcher = new FileWatcher();
+            var cache = new DomResourceCache(long.MaxValue, Path.Combine(m_directory, "cache"));
+            cache.FileWatcherService = watcher;
+
+            cache.Load(path, GetNodeType, Read);
+            CollectionAssert.AreEqual(watcher.Files, new[] { path });
+
+            // changes invalidate the file's data in memory and on disk
+            watcher.RaiseFileChanged(path);
+            CollectionAssert.IsEmpty(watcher.Files);
+            CollectionAssert.IsEmpty(Directory.GetFiles(Path.Combine(m_directory, "cache")));
+            cache.Load(path, GetNodeType, Read);
+            Assert.AreEqual(m_readCount, 2);
+
+            cache.FileWatcherService = null;
+            CollectionAssert.IsEmpty(watcher.Files);
+        }
+
+        [Test]
+        public void TestSchemaChange()
+        {
+            string path = WriteFile("a.txt", "1 2 3");
+            string cacheDirectory = Path.Combine(m_directory, "cache");
+            new DomResourceCache(0, cacheDirectory).Load(path, GetNodeType, Read);
+
+            // data written with the old node type is discarded, rather than misread
+            var type = new DomNodeType("node");
+            var nameInfo = new AttributeInfo("name", AttributeType.StringType);
+            type.Define(nameInfo);
+            var valuesInfo = new AttributeInfo("values", m_valuesInfo.Type);
+            type.Define(valuesInfo);
+            var cache = new DomResourceCache(0, cacheDirectory);
+            DomNode node = cache.Load(path, name => type, stream =>
+            {
+                m_readCount++;
+                var result = new DomNode(type);
+                result.SetAttribute(nameInfo, "a");
+                return result;
+            });
+            Assert.AreEqual(m_readCount, 2);
+            Assert.AreEqual(cache.DiskHits, 0);
+            Assert.AreEqual(node.GetAttribute(nameInfo), "a");
+
+            // and replaced
+            Assert.AreEqual(new DomResourceCache(0, cacheDirectory).Load(path, name => type, stream => null).GetAttribute(nameInfo), "a");
+        }
+
+        [Test]
+        public void TestCorruptEntry()
+        {
+            string path = WriteFile("a.txt", "1 2 3");
+            string cacheDirectory = Path.Combine(m_directory, "cache");
+            new DomResourceCache(0, cacheDirectory).Load(path, GetNodeType, Read);
+            string entryPath = Directory.GetFiles(cacheDirectory).Single();
+            byte[] entry = File.ReadAllBytes(entryPath);
+
+            // truncated entries, and entries with garbage counts or data, are read as misses
+            var corruptEntries = new List<byte[]>();
+            corruptEntries.Add(entry.Take(entry.Length / 2).ToArray());
+            for (int start = entry.Length - 4; start > entry.Length / 2; start -= 4)
+                corruptEntries.Add(entry.Take(start).Concat(Enumerable.Repeat((byte)0xFF, entry.Length - start)).ToArray());
+
+            foreach (byte[] corruptEntry in corruptEntries)
+            {
+                File.WriteAllBytes(entryPath, corruptEntry);
+                m_readCount = 0;
+                var cache = new DomResourceCache(0, cacheDirectory);
+                Assert.AreEqual(cache.Load(path, GetNodeType, Read).GetAttribute(m_valuesInfo), new[] { 1.0f, 2.0f, 3.0f });
+                Assert.AreEqual(m_readCount, 1);
+
+                // the entry is rewritten
+                CollectionAssert.AreEqual(File.ReadAllBytes(entryPath), entry);
+            }
+        }
+
+        [Test]
+        public void TestDependencies()
+        {
+            string path = WriteFile("a.txt", "b.txt");
+            string dependencyPath = WriteFile("b.txt", "1 2 3");
+            var watcher = new FileWatcher();
+            var cache = new DomResourceCache(long.MaxValue, Path.Combine(m_directory, "cache"));
+            cache.FileWatcherService = watcher;
+
+            Assert.AreEqual(cache.Load(path, GetNodeType, ReadWithDependency).GetAttribute(m_valuesInfo), new[] { 1.0f, 2.0f, 3.0f });
+            CollectionAssert.AreEquivalent(watcher.Files, new[] { path, dependencyPath });
+
+            // a changed dependency invalidates the entry, in memory and on disk
+            WriteFile("b.txt", "4 5");
+            Assert.AreEqual(cache.Load(path, GetNodeType, ReadWithDependency).GetAttribute(m_valuesInfo), new[] { 4.0f, 5.0f });
+            Assert.AreEqual(m_readCount, 2);
+            Assert.AreEqual(new DomResourceCache(0, Path.Combine(m_directory, "cache")).Load(path, GetNodeType, ReadWithDependency).GetAttribute(m_valuesInfo), new[] { 4.0f, 5.0f });
+            Assert.AreEqual(m_readCount, 2);
+
+            // as does a change reported by the file watcher service
+            watcher.RaiseFileChanged(dependencyPath);
+            CollectionAssert.IsEmpty(watcher.Files);
+            cache.Load(path, GetNodeType, ReadWithDependency);
+            Assert.AreEqual(m_readCount, 3);
+
+            // a missing dependency is also checked
+            File.Delete(dependencyPath);
+            CollectionAssert.IsEmpty((float[])cache.Load(path, GetNodeType, ReadWithDependency).GetAttribute(m_valuesInfo));
+            Assert.AreEqual(m_readCount, 4);
+        }
+
+        private string WriteFile(string name, string contents)
+        {
+            string path = Path.Combine(m_directory, name);
+            File.WriteAllText(path, contents);
+            return path;
+        }
+
+        private DomNode Read(Stream stream)
+        {
+            m_readCount++;
+            DomNode node = new DomNode(m_type);
+            using (var reader = new StreamReader(stream))
+                node.SetAttribute(m_valuesInfo, m_valuesInfo.Type.Convert(reader.ReadToEnd()));
+            return node;
+        }
+
+        private DomNode ReadWithDependency(Stream stream, ICollection<string> dependencies)
+        {
+            string dependencyPath;
+            using (var reader = new StreamReader(stream))
+                dependencyPath = Path.Combine(m_directory, reader.ReadToEnd());
+            dependencies.Add(dependencyPath);
+
+            m_readCount++;
+            DomNode node = new DomNode(m_type);
+            if (File.Exists(dependencyPath))
+                node.SetAttribute(m_valuesInfo, m_valuesInfo.Type.Convert(File.ReadAllText(dependencyPath)));
+            return node;
+        }
+
+        private DomNodeType GetNodeType(string name)
+        {
+            return name == m_type.Name ? m_type : null;
+        }
+
+        private class FileWatcher : IFileWatcherService
+        {
+            public readonly List<string> Files = new List<string>();
+
+            public void Register(string filePath)
+            {
+                Files.Add(filePath);
+            }
+
+            public void Unregister(string filePath)
+            {
+                Files.Remove(filePath);
+            }
+
+            public event FileSystemEventHandler FileChanged;
+
+            public void RaiseFileChanged(string filePath)
+            {
+                FileChanged(this, new FileSystemEventArgs(
+                    WatcherChangeTypes.Changed, Path.GetDirectoryName(filePath), Path.GetFileName(filePath)));
+            }
+        }
+
+        private readonly DomNodeType m_type;
+        private readonly AttributeInfo m_valuesInfo;
+        private string m_directory;
+        private int m_readCount;
+    }
+}
@@ -0,0 +1,217 @@
+//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.ComponentModel;
+using System.IO;
+using System.Xml;
+using System.Xml.Schema;
+
+using NUnit.Framework;
+
+using Sce.Atf.Dom;
+
+namespace UnitTests.Atf.Dom
+{
+    [TestFixture]
+    public class TestDomXmlReader
+    {
+        [Test]
+        public void TestParallelAttributeParsing()
+        {
+            XmlSchemaTypeLoader loader = CreateLoader();
+            byte[] data = WriteTree(loader, 5000);
+
+            DomXmlReader reader = new DomXmlReader(loader);
+            DomNode expected = reader.Read(new MemoryStream(data), null);
+
+            DomXmlReader parallelReader = new DomXmlReader(loader);
+            parallelReader.ParallelAttributeParsing = true;
+            DomNode actual = parallelReader.Read(new MemoryStream(data), null);
+
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, actual));
+            CollectionAssert.IsEmpty(parallelReader.UnresolvedReferences);
+        }
+
+        [Test]
+        public void TestParallelParsingErrors()
+        {
+            XmlSchemaTypeLoader loader = CreateLoader();
+            string xml =
+                "<root xmlns='" + Namespace + "'>" +
+                "<item id='a' weight='1'/>" +
+                "<item id='b' weight='not a number'/>" +
+                "</root>";
+
+            DomXmlReader reader = new DomXmlReader(loader);
+            reader.ParallelAttributeParsing = true;
+            DomNode root = reader.Read(new MemoryStream(System.Text.Encoding.UTF8.GetBytes(xml)), null);
+
+            // invalid values are handled the same as when parsing sequentially
+            DomNodeType itemType = loader.GetNodeType(Namespace + ":itemType");
+            AttributeInfo weightInfo = itemType.GetAttributeInfo("weight");
+            IList<DomNode> items = root.GetChildList(root.Type.GetChildInfo("item"));
+            Assert.AreEqual(items[0].GetAttribute(weightInfo), 1.0f);
+            Assert.AreEqual(items[1].GetAttribute(weightInfo), weightInfo.DefaultValue);
+        }
+
+        [Test]
+        public void TestProgress()
+        {
+            XmlSchemaTypeLoader loader = CreateLoader();
+            byte[] data = WriteTree(loader, 5000);
+
+            List<int> percentages = new List<int>();
+            DomXmlReader reader = new DomXmlReader(loader);
+            reader.ProgressChanged += delegate(object sender, ProgressChangedEventArgs e)
+            {
+                percentages.Add(e.ProgressPercentage);
+            };
+            reader.Read(new MemoryStream(data), null);
+
+            Assert.Greater(percentages.Count, 2);
+            Assert.AreEqual(percentages[percentages.Count - 1], 100);
+            for (int i = 1; i < percentages.Count; i++)
+                Assert.Greater(percentages[i], percentages[i - 1]);
+        }
+
+        [Test]
+        public void TestLazyLoading()
+        {
+            XmlSchemaTypeLoader loader = CreateLoader();
+            string xml =
+                "<root xmlns='" + Namespace + "'>" +
+                "<item id='a'><item id='a1'><item id='a11' weight='2'/></item><item id='a2'/></item>" +
+                "<item id='b'><item id='b1' ref='a11'/></item>" +
+                "<item id='c' ref='b'/>" +
+                "</root>";
+            byte[] data = System.Text.Encoding.UTF8.GetBytes(xml);
+            DomNode expected = new DomXmlReader(loader).Read(new MemoryStream(data), null);
+
+            DomXmlReader reader = new DomXmlReader(loader);
+            reader.LazyLoadDepth = 1;
+            DomNode root = reader.Read(new MemoryStream(data), null);
+
+            ChildInfo itemsInfo = root.Type.GetChildInfo("item");
+            DomNodeType itemType = loader.GetNodeType(Namespace + ":itemType");
+            AttributeInfo refInfo = itemType.GetAttributeInfo("ref");
+            ChildInfo subItemsInfo = itemType.GetChildInfo("item");
+            IList<DomNode> items = root.GetChildList(itemsInfo);
+            Assert.IsFalse(root.HasUnloadedChildren);
+            Assert.IsTrue(items[0].HasUnloadedChildren);
+            Assert.IsTrue(items[1].HasUnloadedChildren);
+            Assert.IsFalse(items[2].HasUnloadedChildren);
+            Assert.AreSame(items[2].GetAttribute(refInfo), items[1]);
+            Assert.AreEqual(GetIds(root.LoadedSubtree), new[] { "", "a", "b", "c" });
+
+            int loaded = 0, inserted = 0;
+            root.ChildLoaded += delegate { loaded++; };
+            root.ChildInserted += delegate { inserted++; };
+
+            // resolving b1's reference loads the nodes on the way to a11
+            DomNode b1 = items[1].GetChildList(subItemsInfo)[0];
+            Assert.IsFalse(items[0].HasUnloadedChildren);
+            DomNode a1 = items[0].GetChildList(subItemsInfo)[0];
+            Assert.IsFalse(a1.HasUnloadedChildren);
+            Assert.AreSame(b1.GetAttribute(refInfo), a1.GetChildList(subItemsInfo)[0]);
+            Assert.AreEqual(loaded, 4);
+            Assert.AreEqual(inserted, 0);
+
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, root));
+        }
+
+        [Test]
+        public void TestLazyLoadingValidation()
+        {
+            XmlSchemaTypeLoader loader = CreateLoader();
+            DomNodeType rootType = loader.GetNodeType(Namespace + ":rootType");
+            rootType.Define(new ExtensionInfo<UniqueIdValidator>());
+            string xml =
+                "<root xmlns='" + Namespace + "'>" +
+                "<item id='a'><item id='b'/></item>" +
+                "<item id='b'/>" +
+                "</root>";
+
+            DomXmlReader reader = new DomXmlReader(loader);
+            reader.LazyLoadDepth = 1;
+            DomNode root = reader.Read(new MemoryStream(System.Text.Encoding.UTF8.GetBytes(xml)), null);
+            root.InitializeExtensions();
+
+            // the duplicate id is found when it's loaded
+            DomNode a = root.GetChildList(root.Type.GetChildInfo("item"))[0];
+            Assert.IsTrue(a.HasUnloadedChildren);
+            Assert.Throws<InvalidOperationException>(delegate { a.Children.GetEnumerator().MoveNext(); });
+        }
+
+        private static List<string> GetIds(IEnumerable<DomNode> nodes)
+        {
+            List<string> ids = new List<string>();
+            foreach (DomNode node in nodes)
+                ids.Add(node.GetId() ?? string.Empty);
+            return ids;
+        }
+
+        private static byte[] WriteTree(XmlSchemaTypeLoader loader, int itemCount)
+        {
+            DomNodeType rootType = loader.GetNodeType(Namespace + ":rootType");
+            DomNodeType itemType = loader.GetNodeType(Namespace + ":itemType");
+            AttributeInfo idInfo = itemType.GetAttributeInfo("id");
+            AttributeInfo weightInfo = itemType.GetAttributeInfo("weight");
+            AttributeInfo valuesInfo = itemType.GetAttributeInfo("values");
+            AttributeInfo refInfo = itemType.GetAttributeInfo("ref");
+            ChildInfo itemsInfo = rootType.GetChildInfo("item");
+
+            DomNode root = new DomNode(rootType, loader.GetRootElement(Namespace + ":root"));
+            IList<DomNode> items = root.GetChildList(itemsInfo);
+            for (int i = 0; i < itemCount; i++)
+            {
+                DomNode item = new DomNode(itemType);
+                item.SetAttribute(idInfo, "item" + i);
+                item.SetAttribute(weightInfo, i * 0.5f);
+                item.SetAttribute(valuesInfo, new[] { i, i + 1.5f, i + 2.25f });
+                if (i > 0)
+                    item.SetAttribute(refInfo, items[i - 1]);
+                items.Add(item);
+            }
+
+            MemoryStream stream = new MemoryStream();
+            new DomXmlWriter(loader.GetTypeCollection(Namespace)).Write(root, stream, null);
+            return stream.ToArray();
+        }
+
+        private static XmlSchemaTypeLoader CreateLoader()
+        {
+            string schemaText =
+                "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema' xmlns:test='" + Namespace + "'" +
+                "    targetNamespace='" + Namespace + "' elementFormDefault='qualified'>" +
+                "  <xs:complexType name='itemType'>" +
+                "    <xs:sequence>" +
+                "      <xs:element name='item' type='test:itemType' minOccurs='0' maxOccurs='unbounded'/>" +
+                "    </xs:sequence>" +
+                "    <xs:attribute name='id' type='xs:ID'/>" +
+                "    <xs:attribute name='weight' type='xs:float'/>" +
+                "    <xs:attribute name='values' type='test:floatList'/>" +
+                "    <xs:attribute name='ref' type='xs:IDREF'/>" +
+                "  </xs:complexType>" +
+                "  <xs:simpleType name='floatList'><xs:list itemType='xs:float'/></xs:simpleType>" +
+                "  <xs:complexType name='rootType'>" +
+                "    <xs:sequence>" +
+                "      <xs:element name='item' type='test:itemType' minOccurs='0' maxOccurs='unbounded'/>" +
+                "    </xs:sequence>" +
+                "  </xs:complexType>" +
+                "  <xs:element name='root' type='test:rootType'/>" +
+                "</xs:schema>";
+
+            XmlSchemaSet schemaSet = new XmlSchemaSet();
+            using (XmlReader xmlReader = XmlReader.Create(new StringReader(schemaText)))
+                schemaSet.Add(XmlSchema.Read(xmlReader, null));
+            schemaSet.Compile();
+
+            XmlSchemaTypeLoader loader = new XmlSchemaTypeLoader();
+            loader.Load(schemaSet);
+            return loader;
+        }
+
+        private const string Namespace = "test";
+    }
+}
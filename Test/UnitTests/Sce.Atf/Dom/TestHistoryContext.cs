@@ -0,0 +1,77 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+
+using NUnit.Framework;
+
+using Sce.Atf;
+using Sce.Atf.Adaptation;
+using Sce.Atf.Applications;
+using Sce.Atf.Dom;
+
+namespace UnitTests.Atf.Dom
+{
+    [TestFixture]
+    public class TestHistoryContext
+    {
+        public TestHistoryContext()
+        {
+            m_type = new DomNodeType("type");
+            m_nameInfo = new AttributeInfo("name", AttributeType.StringType);
+            m_valuesInfo = new AttributeInfo("values", new AttributeType("floatArray", typeof(float[])));
+            m_type.Define(m_nameInfo);
+            m_type.Define(m_valuesInfo);
+            m_type.Define(new ExtensionInfo<HistoryContext>());
+        }
+
+        [Test]
+        public void TestMergeIntoPendingChange()
+        {
+            DomNode node = new DomNode(m_type);
+            HistoryContext context = node.As<HistoryContext>();
+            context.PendingSetOperationLifetime = TimeSpan.FromHours(1);
+            CommandHistory history = context.History;
+            object originalValues = node.GetAttribute(m_valuesInfo);
+
+            context.DoTransaction(() => node.SetAttribute(m_valuesInfo, new[] { 1.0f }), "edit");
+            long size = history.GetMemorySize(0);
+
+            // a rapid change to the same attribute is merged into the first command
+            context.DoTransaction(() => node.SetAttribute(m_valuesInfo, new float[1000]), "edit");
+            Assert.AreEqual(history.Count, 1);
+            Assert.AreEqual(history.GetMemorySize(0), history[0].MemorySize);
+            Assert.Greater(history.GetMemorySize(0), size);
+            Assert.AreEqual(history.MemorySize, history.GetMemorySize(0));
+
+            context.Undo();
+            Assert.AreEqual(node.GetAttribute(m_valuesInfo), originalValues);
+        }
+
+        [Test]
+        public void TestMergeAfterEviction()
+        {
+            DomNode node = new DomNode(m_type);
+            HistoryContext context = node.As<HistoryContext>();
+            context.PendingSetOperationLifetime = TimeSpan.FromHours(1);
+            CommandHistory history = context.History;
+            history.MemoryBudget = 1000;
+
+            context.DoTransaction(() => node.SetAttribute(m_nameInfo, "a"), "edit name");
+
+            // this evicts the first command
+            context.DoTransaction(() => node.SetAttribute(m_valuesInfo, new float[1000]), "edit");
+            Assert.AreEqual(history.Count, 1);
+
+            // so the next change to the name can't be merged into it, and must be undoable
+            context.DoTransaction(() => node.SetAttribute(m_nameInfo, "b"), "edit name");
+            Assert.AreEqual(history.LastDone.Description, "edit name");
+            context.Undo();
+            Assert.AreEqual(node.GetAttribute(m_nameInfo), "a");
+            Assert.AreEqual(((float[])node.GetAttribute(m_valuesInfo)).Length, 1000);
+        }
+
+        private readonly DomNodeType m_type;
+        private readonly AttributeInfo m_nameInfo;
+        private readonly AttributeInfo m_valuesInfo;
+    }
+}
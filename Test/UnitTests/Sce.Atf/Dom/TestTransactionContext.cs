@@ -0,0 +1,207 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.IO;
+
+using NUnit.Framework;
+
+using Sce.Atf;
+using Sce.Atf.Adaptation;
+using Sce.Atf.Dom;
+
+namespace UnitTests.Atf.Dom
+{
+    [TestFixture]
+    public class TestTransactionContext
+    {
+        public TestTransactionContext()
+        {
+            m_type = new DomNodeType("type");
+            m_nameInfo = new AttributeInfo("name", AttributeType.StringType);
+            m_valuesInfo = new AttributeInfo("values", new AttributeType("floatArray", typeof(float[])));
+            m_childInfo = new ChildInfo("child", m_type, true);
+            m_type.Define(m_nameInfo);
+            m_type.Define(m_valuesInfo);
+            m_type.Define(m_childInfo);
+            m_type.Define(new ExtensionInfo<TransactionContext>());
+        }
+
+        [Test]
+        public void TestCompactOperations()
+        {
+            DomNode root = new DomNode(m_type);
+            DomNode child = new DomNode(m_type);
+            TransactionContext context = root.As<TransactionContext>();
+            context.CompactOperations = true;
+
+            IList<TransactionContext.Operation> operations = null;
+            context.Ended += (sender, e) => operations = context.TransactionOperations;
+            context.DoTransaction(() =>
+            {
+                for (int i = 0; i < 100; i++)
+                    root.SetAttribute(m_nameInfo, "name" + i);
+                root.GetChildList(m_childInfo).Add(child);
+                child.SetAttribute(m_nameInfo, "a");
+                child.SetAttribute(m_nameInfo, "b");
+                root.SetAttribute(m_nameInfo, "last");
+
+                // changes back to the original value are removed
+                child.SetAttribute(m_valuesInfo, new[] { 1.0f });
+                child.SetAttribute(m_valuesInfo, new[] { 0.0f });
+            }, "compact");
+
+            Assert.AreEqual(operations.Count, 3);
+            var rootOperation = (TransactionContext.AttributeChangedOperation)operations[0];
+            Assert.AreSame(rootOperation.DomNode, root);
+            Assert.AreEqual(rootOperation.OldValue, "");
+            Assert.AreEqual(rootOperation.NewValue, "last");
+            Assert.IsInstanceOf<TransactionContext.ChildInsertedOperation>(operations[1]);
+            var childOperation = (TransactionContext.AttributeChangedOperation)operations[2];
+            Assert.AreEqual(childOperation.OldValue, "");
+            Assert.AreEqual(childOperation.NewValue, "b");
+
+            // the compacted operations have the same effect
+            for (int i = operations.Count - 1; i >= 0; i--)
+                operations[i].Undo();
+            Assert.AreEqual(root.GetAttribute(m_nameInfo), "");
+            CollectionAssert.IsEmpty(root.GetChildList(m_childInfo));
+            Assert.AreEqual(child.GetAttribute(m_nameInfo), "");
+            foreach (TransactionContext.Operation operation in operations)
+                operation.Do();
+            Assert.AreEqual(root.GetAttribute(m_nameInfo), "last");
+            Assert.AreSame(root.GetChildList(m_childInfo)[0], child);
+            Assert.AreEqual(child.GetAttribute(m_nameInfo), "b");
+
+            // cancelling rolls back the compacted operations
+            context.Begin("cancel");
+            root.SetAttribute(m_nameInfo, "x");
+            root.SetAttribute(m_nameInfo, "y");
+            Assert.AreEqual(context.TransactionOperations.Count, 1);
+            context.Cancel();
+            Assert.AreEqual(root.GetAttribute(m_nameInfo), "last");
+        }
+
+        [Test]
+        public void TestSpillOperation()
+        {
+            DomNode node = new DomNode(m_type);
+            node.SetAttribute(m_valuesInfo, new[] { 1.0f, 2.0f });
+            node.SetAttribute(m_nameInfo, "a");
+            var valuesOperation = new TransactionContext.AttributeChangedOperation(
+                new AttributeEventArgs(node, m_valuesInfo, new[] { 1.0f, 2.0f }, new[] { 3.0f, 4.0f, 5.0f }));
+            var nameOperation = new TransactionContext.AttributeChangedOperation(
+                new AttributeEventArgs(node, m_nameInfo, "a", "b"));
+            long size = valuesOperation.MemorySize;
+
+            var stream = new MemoryStream();
+            var writer = new BinaryWriter(stream);
+            Assert.IsTrue(valuesOperation.Spill(writer));
+            Assert.IsTrue(nameOperation.Spill(writer));
+            writer.Flush();
+            Assert.Less(valuesOperation.MemorySize, size);
+            Assert.Throws<System.InvalidOperationException>(valuesOperation.Do);
+
+            // a new value that is set after spilling isn't overwritten by the restored one
+            nameOperation.NewValue = "c";
+
+            stream.Position = 0;
+            var reader = new BinaryReader(stream);
+            valuesOperation.Restore(reader);
+            nameOperation.Restore(reader);
+            Assert.AreEqual(valuesOperation.MemorySize, size);
+            Assert.AreEqual(nameOperation.OldValue, "a");
+            Assert.AreEqual(nameOperation.NewValue, "c");
+
+            valuesOperation.Do();
+            Assert.AreEqual(node.GetAttribute(m_valuesInfo), new[] { 3.0f, 4.0f, 5.0f });
+            valuesOperation.Undo();
+            Assert.AreEqual(node.GetAttribute(m_valuesInfo), new[] { 1.0f, 2.0f });
+        }
+
+        [Test, Explicit, Category("Performance")]
+        public void TestValidationPerformance()
+        {
+            // a document of 500 folders of 1000 items, where each item references the previous one
+            const int folderCount = 500;
+            const int itemCount = 1000;
+            DomNodeType itemType = new DomNodeType("item");
+            AttributeInfo itemIdInfo = new AttributeInfo("id", AttributeType.StringType);
+            AttributeInfo refInfo = new AttributeInfo("ref", new AttributeType("ref", typeof(DomNode)));
+            itemType.Define(itemIdInfo);
+            itemType.Define(refInfo);
+            itemType.SetIdAttribute(itemIdInfo.Name);
+
+            DomNodeType folderType = new DomNodeType("folder");
+            AttributeInfo folderIdInfo = new AttributeInfo("id", AttributeType.StringType);
+            ChildInfo itemsInfo = new ChildInfo("item", itemType, true);
+            folderType.Define(folderIdInfo);
+            folderType.Define(itemsInfo);
+            folderType.SetIdAttribute(folderIdInfo.Name);
+
+            DomNodeType rootType = new DomNodeType("root");
+            ChildInfo foldersInfo = new ChildInfo("folder", folderType, true);
+            rootType.Define(foldersInfo);
+            rootType.Define(new ExtensionInfo<TransactionContext>());
+            rootType.Define(new ExtensionInfo<UniquePathIdValidator>());
+            rootType.Define(new ExtensionInfo<ReferenceValidator>());
+            rootType.Define(new ExtensionInfo<DataValidator>());
+
+            DomNode root = new DomNode(rootType);
+            for (int i = 0; i < folderCount; i++)
+            {
+                DomNode folder = new DomNode(folderType);
+                folder.SetAttribute(folderIdInfo, "folder" + i);
+                DomNode previous = null;
+                for (int j = 0; j < itemCount; j++)
+                {
+                    DomNode item = new DomNode(itemType);
+                    item.SetAttribute(itemIdInfo, "item" + j);
+                    item.SetAttribute(refInfo, previous);
+                    folder.GetChildList(itemsInfo).Add(item);
+                    previous = item;
+                }
+                root.GetChildList(foldersInfo).Add(folder);
+            }
+
+            Stopwatch stopwatch = Stopwatch.StartNew();
+            root.InitializeExtensions();
+            long initializeMilliseconds = stopwatch.ElapsedMilliseconds;
+
+            // each transaction touches 10 items in a folder: 4 are renamed to their siblings'
+            //  ids, the last 3 are removed and 3 more are added with existing ids
+            const int transactionCount = 100;
+            TransactionContext context = root.As<TransactionContext>();
+            IList<DomNode> folders = root.GetChildList(foldersInfo);
+            stopwatch.Restart();
+            for (int i = 0; i < transactionCount; i++)
+            {
+                IList<DomNode> items = folders[i % folderCount].GetChildList(itemsInfo);
+                context.DoTransaction(() =>
+                {
+                    for (int j = 0; j < 4; j++)
+                        items[j].SetAttribute(itemIdInfo, items[j + 4].GetId());
+                    for (int j = 0; j < 3; j++)
+                        items.RemoveAt(items.Count - 1);
+                    for (int j = 0; j < 3; j++)
+                    {
+                        DomNode item = new DomNode(itemType);
+                        item.SetAttribute(itemIdInfo, "item" + j);
+                        items.Add(item);
+                    }
+                }, "edit");
+                Assert.AreEqual(items[0].GetId(), "item4_1");
+            }
+
+            Console.WriteLine("{0} nodes: validators initialized in {1} ms; {2:F3} ms per transaction",
+                1 + folderCount + folderCount * itemCount, initializeMilliseconds,
+                stopwatch.Elapsed.TotalMilliseconds / transactionCount);
+        }
+
+        private readonly DomNodeType m_type;
+        private readonly AttributeInfo m_nameInfo;
+        private readonly AttributeInfo m_valuesInfo;
+        private readonly ChildInfo m_childInfo;
+    }
+}
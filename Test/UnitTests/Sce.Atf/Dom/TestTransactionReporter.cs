@@ -265,6 +265,74 @@ public void TestReparentInTransaction()
             CheckChildInsertedEvent(m_events[1], m_root, b);
         }
 
+        [Test]
+        public void TestBatchedNotifications()
+        {
+            DomNode child = m_root.GetChild(ChildInfo);
+            DomNode grandchild = child.GetChild(ChildInfo);
+            var greatGrandchild = new DomNode(ChildType, ChildInfo);
+            var changeSets = new List<DomChangeSet>();
+            m_reporter.TransactionFinished += (sender, e) => changeSets.Add(e.ChangeSet);
+            m_transactionContext.BatchNotifications = true;
+
+            DomChangeSet contextChangeSet = null;
+            m_transactionContext.Ended += (sender, e) => contextChangeSet = m_transactionContext.ChangeSet;
+            m_transactionContext.DoTransaction(() =>
+            {
+                Assert.NotNull(m_transactionContext.ChangeSet);
+                child.SetAttribute(StringAttrInfo, "foo1");
+                child.SetAttribute(StringAttrInfo, "foo2");
+                grandchild.SetChild(ChildInfo, greatGrandchild);
+                greatGrandchild.SetAttribute(StringAttrInfo, "foo1");
+                grandchild.SetAttribute(StringAttrInfo, "foo1");
+                grandchild.SetAttribute(StringAttrInfo, "");
+            }, "test transaction");
+            Assert.IsNull(m_transactionContext.ChangeSet);
+
+            // The individual events are the same as without batching.
+            Assert.IsTrue(m_events.Count == 2);
+            CheckAttributeEvent(m_events[0], child, "", "foo2");
+            CheckChildInsertedEvent(m_events[1], grandchild, greatGrandchild);
+
+            // The reporter uses the context's change set, which is raised once.
+            Assert.AreEqual(changeSets.Count, 1);
+            Assert.AreSame(changeSets[0], contextChangeSet);
+            List<AttributeEventArgs> attributeChanges = new List<AttributeEventArgs>(changeSets[0].AttributeChanges);
+            Assert.AreEqual(attributeChanges.Count, 1);
+            CheckAttributeEvent(attributeChanges[0], child, "", "foo2");
+            List<ChildEventArgs> inserted = new List<ChildEventArgs>(changeSets[0].InsertedChildren);
+            Assert.AreEqual(inserted.Count, 1);
+            Assert.AreSame(inserted[0].Child, greatGrandchild);
+            CollectionAssert.IsEmpty(changeSets[0].RemovedChildren);
+
+            // Changes that cancel each other out aren't reported.
+            m_events.Clear();
+            changeSets.Clear();
+            m_transactionContext.DoTransaction(() =>
+            {
+                child.SetAttribute(StringAttrInfo, "foo3");
+                greatGrandchild.RemoveFromParent();
+                child.SetAttribute(StringAttrInfo, "foo2");
+                grandchild.SetChild(ChildInfo, greatGrandchild);
+            }, "test transaction 2");
+            Assert.IsTrue(m_events.Count == 2);
+            CheckChildRemovedEvent(m_events[0], grandchild, greatGrandchild);
+            CheckChildInsertedEvent(m_events[1], grandchild, greatGrandchild);
+            Assert.AreEqual(changeSets.Count, 1);
+            CollectionAssert.IsEmpty(changeSets[0].AttributeChanges);
+
+            // The changes of cancelled transactions aren't reported, but the rollback is, as changes
+            //  outside of a transaction.
+            m_events.Clear();
+            changeSets.Clear();
+            m_transactionContext.Begin("test transaction 3");
+            child.SetAttribute(StringAttrInfo, "foo4");
+            m_transactionContext.Cancel();
+            Assert.IsTrue(m_events.Count == 1);
+            CheckAttributeEvent(m_events[0], child, "foo4", "foo2");
+            Assert.AreEqual(changeSets.Count, 1);
+        }
+
         private void CheckAttributeEvent(EventArgs eventArgs, DomNode domNode, string oldValue, string newValue)
         {
             var attrArgs = eventArgs as AttributeEventArgs;
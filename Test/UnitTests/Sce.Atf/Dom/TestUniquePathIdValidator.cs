@@ -1,5 +1,7 @@
 ﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
 
+using System.Collections.Generic;
+
 using NUnit.Framework;
 using Sce.Atf;
 using Sce.Atf.Adaptation;
@@ -166,5 +168,63 @@ public void TestMoveDomNode()
             Assert.DoesNotThrow(() => ValidateSubtree(root));
             Assert.True((string)root.GetAttribute(RootType.NameAttribute) == "new_root");
         }
+
+        [Test]
+        public void TestIncrementalIds()
+        {
+            var root = new DomNode(RootType.Type, RootElement);
+            var folder = new DomNode(FolderType.Type);
+            folder.SetAttribute(FolderType.NameAttribute, "folder");
+            root.GetChildList(RootType.FolderChild).Add(folder);
+            IList<DomNode> items = folder.GetChildList(FolderType.ItemChild);
+            DomNode itemA = CreateItem("a");
+            DomNode itemB = CreateItem("b");
+            items.Add(itemA);
+            items.Add(itemB);
+
+            root.InitializeExtensions();
+            var validationContext = root.As<ValidationContext>();
+
+            // a child that is renamed and then removed frees its original id
+            validationContext.RaiseBeginning();
+            itemA.SetAttribute(ItemType.NameAttribute, "c");
+            itemA.RemoveFromParent();
+            DomNode newItemA = CreateItem("a");
+            items.Add(newItemA);
+            validationContext.RaiseEnding();
+            validationContext.RaiseEnded();
+            Assert.AreEqual(newItemA.GetAttribute(ItemType.NameAttribute), "a");
+
+            // a child that is added and removed again doesn't free its sibling's id
+            validationContext.RaiseBeginning();
+            items.Add(CreateItem("b"));
+            items.RemoveAt(items.Count - 1);
+            DomNode newItemB = CreateItem("b");
+            items.Add(newItemB);
+            validationContext.RaiseEnding();
+            validationContext.RaiseEnded();
+            Assert.AreEqual(itemB.GetAttribute(ItemType.NameAttribute), "b");
+            Assert.AreEqual(newItemB.GetAttribute(ItemType.NameAttribute), "b_1");
+
+            // changes made outside of validations are taken into account
+            itemB.SetAttribute(ItemType.NameAttribute, "d");
+            validationContext.RaiseBeginning();
+            DomNode itemD = CreateItem("d");
+            DomNode otherItemB = CreateItem("b");
+            items.Add(itemD);
+            items.Add(otherItemB);
+            validationContext.RaiseEnding();
+            validationContext.RaiseEnded();
+            Assert.AreEqual(itemD.GetAttribute(ItemType.NameAttribute), "d_1");
+            Assert.AreEqual(otherItemB.GetAttribute(ItemType.NameAttribute), "b");
+            Assert.DoesNotThrow(() => ValidateSubtree(root));
+        }
+
+        private static DomNode CreateItem(string name)
+        {
+            var item = new DomNode(ItemType.Type);
+            item.SetAttribute(ItemType.NameAttribute, name);
+            return item;
+        }
     }
 }
\ No newline at end of file
@@ -0,0 +1,186 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System;
+using System.Diagnostics;
+using System.Globalization;
+using System.IO;
+using System.Linq;
+using System.Text;
+using System.Threading;
+
+using NUnit.Framework;
+
+using Sce.Atf.Dom;
+using Sce.Atf.Obj;
+
+namespace UnitTests.Atf.Obj
+{
+    [TestFixture]
+    public class TestObjFile
+    {
+        public TestObjFile()
+        {
+            // load the obj schema
+            new ObjResolver().Initialize();
+        }
+
+        [Test]
+        public void TestPopulateDomNode()
+        {
+            string directory = Path.Combine(Path.GetTempPath(), Path.GetRandomFileName());
+            Directory.CreateDirectory(directory);
+            CultureInfo culture = Thread.CurrentThread.CurrentCulture;
+            try
+            {
+                File.WriteAllText(Path.Combine(directory, "test.mtl"), "newmtl red\nKd 1 0 0\nNs 0.5\n");
+                string obj =
+                    "# comment\r\n" +
+                    "mtllib test.mtl\r\n" +
+                    "v 0 0 0\r\n" +
+                    "v\t1.5 0 0\r\n" +
+                    "v 0 -2.5e-1 1E+2\n" +
+                    "vt 0 1\n" +
+                    "vn 0 0 1\n" +
+                    "\n" +
+                    "g first\n" +
+                    "f 1 2 3\n" +
+                    "usemtl red\n" +
+                    "f 1/1/1 2//1 3/1\n" +
+                    "  g second  \n" +
+                    "f 3 2 1 1";
+
+                // numbers are parsed with the invariant culture, whatever the current culture is
+                Thread.CurrentThread.CurrentCulture = new CultureInfo("de-DE");
+                DomNode node = Populate(Encoding.UTF8.GetBytes(obj), new Uri(Path.Combine(directory, "test.obj")), false);
+
+                DomNode vertexArray = node.GetChild(Schema.nodeType.meshChild).GetChild(Schema.meshType.vertexArrayChild);
+                DomNode[] arrays = vertexArray.GetChildList(Schema.meshType_vertexArray.arrayChild).ToArray();
+                Assert.AreEqual(arrays.Length, 3);
+                Assert.AreEqual(arrays[0].GetAttribute(Schema.vertexArray_array.nameAttribute), "normal");
+                Assert.AreEqual(arrays[0].GetAttribute(Schema.vertexArray_array.Attribute), new[] { 0.0f, 0.0f, 1.0f });
+                Assert.AreEqual(arrays[1].GetAttribute(Schema.vertexArray_array.nameAttribute), "map1");
+                Assert.AreEqual(arrays[1].GetAttribute(Schema.vertexArray_array.Attribute), new[] { 0.0f, 1.0f });
+                Assert.AreEqual(arrays[2].GetAttribute(Schema.vertexArray_array.nameAttribute), "position");
+                Assert.AreEqual(arrays[2].GetAttribute(Schema.vertexArray_array.Attribute),
+                    new[] { 0.0f, 0.0f, 0.0f, 1.5f, 0.0f, 0.0f, 0.0f, -0.25f, 100.0f });
+                Assert.AreEqual(arrays[2].GetAttribute(Schema.vertexArray_array.countAttribute), 3);
+
+                DomNode[] primitives = vertexArray.GetChildList(Schema.meshType_vertexArray.primitivesChild).ToArray();
+                Assert.AreEqual(primitives.Length, 3);
+
+                // the faces of the first group, before and after the usemtl statement
+                Assert.AreEqual(primitives[0].GetAttribute(Schema.vertexArray_primitives.indicesAttribute), new[] { 0, 1, 2 });
+                Assert.AreEqual(primitives[0].GetAttribute(Schema.vertexArray_primitives.sizesAttribute), new[] { 3 });
+                Assert.IsNull(primitives[0].GetChild(Schema.vertexArray_primitives.shaderChild));
+                Assert.AreEqual(primitives[0].GetChildList(Schema.vertexArray_primitives.bindingChild).Count, 1);
+
+                Assert.AreEqual(primitives[1].GetAttribute(Schema.vertexArray_primitives.indicesAttribute), new[] { 0, 0, 0, 0, 1, 0, 2 });
+                Assert.AreEqual(primitives[1].GetAttribute(Schema.vertexArray_primitives.sizesAttribute), new[] { 3 });
+                DomNode shader = primitives[1].GetChild(Schema.vertexArray_primitives.shaderChild);
+                Assert.AreEqual(shader.GetAttribute(Schema.shaderType.nameAttribute), "red");
+                Assert.AreEqual(shader.GetAttribute(Schema.shaderType.shininessAttribute), 0.5f);
+                Assert.AreEqual(primitives[1].GetChildList(Schema.vertexArray_primitives.bindingChild).Count, 3);
+
+                // the second group keeps the current material
+                Assert.AreEqual(primitives[2].GetAttribute(Schema.vertexArray_primitives.indicesAttribute), new[] { 2, 1, 0, 0 });
+                Assert.AreEqual(primitives[2].GetAttribute(Schema.vertexArray_primitives.sizesAttribute), new[] { 4 });
+                Assert.IsNotNull(primitives[2].GetChild(Schema.vertexArray_primitives.shaderChild));
+            }
+            finally
+            {
+                Thread.CurrentThread.CurrentCulture = culture;
+                Directory.Delete(directory, true);
+            }
+        }
+
+        [Test]
+        public void TestInvalidLines()
+        {
+            Uri uri = new Uri(Path.Combine(Path.GetTempPath(), "test.obj"));
+            Assert.Throws<ApplicationException>(() => Populate(Encoding.UTF8.GetBytes("v 1 2\n"), uri, false));
+            Assert.Throws<ApplicationException>(() => Populate(Encoding.UTF8.GetBytes("vt 1 2 3\n"), uri, false));
+            Assert.Throws<ApplicationException>(() => Populate(Encoding.UTF8.GetBytes("v 1 2 3\nf 1 1\n"), uri, false));
+            Assert.Throws<ApplicationException>(() => Populate(Encoding.UTF8.GetBytes("usemtl\n"), uri, false));
+            Assert.Throws<FormatException>(() => Populate(Encoding.UTF8.GetBytes("v 1 2 x\n"), uri, false));
+            Assert.Throws<FormatException>(() => Populate(Encoding.UTF8.GetBytes("v 1 2 3\nf 1 1 a\n"), uri, false));
+        }
+
+        [Test]
+        public void TestParallelParsing()
+        {
+            Uri uri = new Uri(Path.Combine(Path.GetTempPath(), "test.obj"));
+            byte[] data = GenerateObj(300);
+
+            DomNode expected = Populate(data, uri, false);
+            DomNode actual = Populate(data, uri, true);
+            CollectionAssert.IsEmpty(DomCompare.Diff(expected, actual));
+        }
+
+        [Test, Explicit, Category("Performance")]
+        public void TestReadPerformance()
+        {
+            // a grid of a million quads, with texture coordinates and normals
+            Uri uri = new Uri(Path.Combine(Path.GetTempPath(), "test.obj"));
+            byte[] data = GenerateObj(1000);
+
+            // report the fastest of several runs
+            long sequentialMilliseconds = long.MaxValue;
+            long parallelMilliseconds = long.MaxValue;
+            for (int i = 0; i < 5; i++)
+            {
+                Stopwatch stopwatch = Stopwatch.StartNew();
+                Populate(data, uri, false);
+                sequentialMilliseconds = Math.Min(sequentialMilliseconds, stopwatch.ElapsedMilliseconds);
+                stopwatch.Restart();
+                Populate(data, uri, true);
+                parallelMilliseconds = Math.Min(parallelMilliseconds, stopwatch.ElapsedMilliseconds);
+            }
+
+            Console.WriteLine("{0} bytes: read in {1} ms, in {2} ms in parallel on {3} processors",
+                data.Length, sequentialMilliseconds, parallelMilliseconds, Environment.ProcessorCount);
+        }
+
+        private static DomNode Populate(byte[] data, Uri uri, bool parallelParsing)
+        {
+            DomNode node = null;
+            using (var stream = new MemoryStream(data))
+                ObjFile.PopulateDomNode(stream, ref node, uri, parallelParsing);
+            return node;
+        }
+
+        // Generates a square grid of quads, with a group for every ten rows.
+        private static byte[] GenerateObj(int size)
+        {
+            var builder = new StringBuilder();
+            var random = new Random(1);
+            for (int y = 0; y <= size; y++)
+            {
+                for (int x = 0; x <= size; x++)
+                {
+                    builder.AppendFormat(CultureInfo.InvariantCulture, "v {0} {1} {2}\n",
+                        x * 0.1f, y * 0.1f, (float)Math.Round(random.NextDouble(), 4));
+                    builder.AppendFormat(CultureInfo.InvariantCulture, "vt {0} {1}\n",
+                        (float)x / size, (float)y / size);
+                }
+            }
+            builder.Append("vn 0 0 1\n");
+
+            for (int y = 0; y < size; y++)
+            {
+                if (y % 10 == 0)
+                    builder.AppendFormat("g rows{0}\n", y);
+
+                for (int x = 0; x < size; x++)
+                {
+                    int a = y * (size + 1) + x + 1;
+                    int b = a + 1;
+                    int c = b + size + 1;
+                    int d = a + size + 1;
+                    builder.AppendFormat("f {0}/{0}/1 {1}/{1}/1 {2}/{2}/1 {3}/{3}/1\n", a, b, c, d);
+                }
+            }
+
+            return Encoding.ASCII.GetBytes(builder.ToString());
+        }
+    }
+}
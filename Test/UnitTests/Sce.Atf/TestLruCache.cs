@@ -0,0 +1,106 @@
+﻿//Copyright © 2014 Sony Computer Entertainment America LLC. See License.txt.
+
+using System.Collections.Generic;
+
+using NUnit.Framework;
+
+using Sce.Atf;
+
+namespace UnitTests.Atf
+{
+    [TestFixture]
+    public class TestLruCache
+    {
+        [Test]
+        public void TestEvictsLeastRecentlyUsed()
+        {
+            var cache = new LruCache<string, int>(2);
+            cache.Set("a", 1);
+            cache.Set("b", 2);
+
+            int value;
+            Assert.True(cache.TryGetValue("a", out value));
+            Assert.AreEqual(value, 1);
+
+            // "b" is now the least recently used
+            cache.Set("c", 3);
+            Assert.AreEqual(cache.Count, 2);
+            Assert.True(cache.ContainsKey("a"));
+            Assert.False(cache.ContainsKey("b"));
+            Assert.True(cache.ContainsKey("c"));
+            Assert.AreEqual(cache.Evictions, 1);
+            Utilities.TestSequenceEqual(cache.Keys, "c", "a");
+        }
+
+        [Test]
+        public void TestHitsAndMisses()
+        {
+            var cache = new LruCache<int, string>(10);
+            cache.Set(1, "one");
+
+            string value;
+            Assert.True(cache.TryGetValue(1, out value));
+            Assert.False(cache.TryGetValue(2, out value));
+            Assert.IsNull(value);
+            Assert.True(cache.TryGetValue(1, out value));
+            Assert.AreEqual(cache.Hits, 2);
+            Assert.AreEqual(cache.Misses, 1);
+
+            cache.ResetStatistics();
+            Assert.AreEqual(cache.Hits, 0);
+            Assert.AreEqual(cache.Misses, 0);
+        }
+
+        [Test]
+        public void TestSizedValues()
+        {
+            var evicted = new List<string>();
+            var cache = new LruCache<string, byte[]>(100, bytes => bytes.Length, null);
+            cache.Evicted += (sender, e) => evicted.Add(e.Item.Key);
+
+            cache.Set("a", new byte[40]);
+            cache.Set("b", new byte[40]);
+            Assert.AreEqual(cache.Size, 80);
+
+            cache.Set("c", new byte[40]);
+            Assert.AreEqual(cache.Size, 80);
+            Utilities.TestSequenceEqual(evicted, "a");
+
+            // a value larger than the capacity is not kept, and doesn't evict the others
+            cache.Set("d", new byte[101]);
+            Assert.False(cache.ContainsKey("d"));
+            Assert.True(cache.ContainsKey("b"));
+            Assert.True(cache.ContainsKey("c"));
+            Assert.AreEqual(cache.Size, 80);
+            Utilities.TestSequenceEqual(evicted, "a");
+
+            // it replaces the key's previous value, though
+            cache.Set("b", new byte[101]);
+            Assert.False(cache.ContainsKey("b"));
+            Assert.True(cache.ContainsKey("c"));
+            Assert.AreEqual(cache.Size, 40);
+
+            cache.Set("e", new byte[10]);
+            cache.Set("e", new byte[20]);
+            Assert.AreEqual(cache.Count, 2);
+            Assert.AreEqual(cache.Size, 60);
+        }
+
+        [Test]
+        public void TestReduceCapacity()
+        {
+            var cache = new LruCache<int, int>(3);
+            cache.Set(1, 1);
+            cache.Set(2, 2);
+            cache.Set(3, 3);
+
+            cache.Capacity = 1;
+            Assert.AreEqual(cache.Count, 1);
+            Assert.True(cache.ContainsKey(3));
+
+            Assert.True(cache.Remove(3));
+            Assert.False(cache.Remove(3));
+            Assert.AreEqual(cache.Size, 0);
+        }
+    }
+}